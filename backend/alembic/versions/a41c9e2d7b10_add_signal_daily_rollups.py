@@ -0,0 +1,51 @@
+"""Add signal_daily_rollups
+
+Revision ID: a41c9e2d7b10
+Revises: d32f6e15bf54
+Create Date: 2026-10-19 10:12:04.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41c9e2d7b10"
+down_revision: Union[str, Sequence[str], None] = "d32f6e15bf54"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "signal_daily_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("token", sa.String(), nullable=True),
+        sa.Column("is_saved", sa.Integer(), nullable=True),
+        sa.Column("signals", sa.Integer(), nullable=True),
+        sa.Column("wins", sa.Integer(), nullable=True),
+        sa.Column("losses", sa.Integer(), nullable=True),
+        sa.Column("breakeven", sa.Integer(), nullable=True),
+        sa.Column("pnl_r_sum", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "day", "user_id", "source", "token", "is_saved", name="uq_rollup_bucket"
+        ),
+    )
+    op.create_index(
+        op.f("ix_signal_daily_rollups_day"), "signal_daily_rollups", ["day"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_signal_daily_rollups_day"), table_name="signal_daily_rollups")
+    op.drop_table("signal_daily_rollups")
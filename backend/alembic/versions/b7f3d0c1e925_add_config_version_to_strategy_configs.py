@@ -0,0 +1,32 @@
+"""Add config_version to strategy_configs
+
+Revision ID: b7f3d0c1e925
+Revises: a41c9e2d7b10
+Create Date: 2026-10-19 11:40:27.530981
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7f3d0c1e925"
+down_revision: Union[str, Sequence[str], None] = "a41c9e2d7b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "strategy_configs",
+        sa.Column("config_version", sa.Integer(), nullable=True, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("strategy_configs", "config_version")
@@ -0,0 +1,256 @@
+# backend/core/backtest_cache.py
+"""
+Caché de resultados de backtest direccionada por contenido.
+
+La clave es un hash de todo lo que determina el resultado: estrategia,
+versión, config efectiva, símbolo/timeframe, capital, versión del motor y
+una huella de las velas usadas (rango + valores). Misma entrada -> mismo
+resultado, sin TTL que adivinar: si cambian los datos cambia la clave.
+
+Además del resultado completo se guarda un checkpoint de la simulación
+(estado justo antes de la última vela). Si llega una petición con el
+mismo inicio de rango y las mismas velas previas, pero el final se ha
+movido hacia delante, la simulación se reanuda desde el checkpoint y
+solo procesa las velas nuevas ("partial").
+
+Almacenamiento:
+- Redis (si REDIS_URL) con TTL; la memoria la acota la política de Redis.
+- Disco (BACKTEST_CACHE_DIR) con límite de tamaño total y desalojo LRU.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import ENGINE_VERSION, BacktestEngine
+from core.cache import cache
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(
+    os.getenv("BACKTEST_CACHE_DIR", str(BACKEND_DIR / "data" / "cache" / "backtests"))
+)
+MAX_DISK_BYTES = int(os.getenv("BACKTEST_CACHE_MAX_MB", "256")) * 1024 * 1024
+REDIS_TTL = int(os.getenv("BACKTEST_CACHE_TTL", str(7 * 24 * 3600)))
+REDIS_PREFIX = "bt:"
+
+HIT, PARTIAL, MISS = "hit", "partial", "miss"
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp,)):
+        return obj.isoformat()
+    raise TypeError(f"Not serializable: {type(obj)}")
+
+
+# === Keys ===
+
+
+def data_digest(df: pd.DataFrame, end: Optional[int] = None) -> str:
+    """Huella de las velas [0:end) (timestamp + OHLCV)."""
+    cols = [c for c in ("timestamp", "open", "high", "low", "close", "volume") if c in df]
+    values = df[cols].iloc[:end].to_numpy(dtype=np.float64)
+    return hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+
+def _hash(parts: Dict[str, Any]) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _identity(
+    engine: BacktestEngine,
+    strategy_id: str,
+    symbol: str,
+    timeframe: str,
+    config: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Lo que identifica una simulación, sin incluir los datos."""
+    strategy = engine.strategies[strategy_id]
+    try:
+        meta = strategy.metadata()
+        version, effective = meta.version, meta.config
+    except Exception:
+        version, effective = None, None
+    return {
+        "engine": ENGINE_VERSION,
+        "strategy": strategy_id,
+        "version": version,
+        "config": effective or config or {},
+        "symbol": symbol.upper(),
+        "timeframe": timeframe,
+        "capital": engine.initial_capital,
+    }
+
+
+# === Storage ===
+
+
+class BacktestResultStore:
+    """Redis si está disponible; si no, ficheros gzip en disco con LRU."""
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = MAX_DISK_BYTES):
+        self.redis = cache.redis_client
+        self.directory = Path(directory or CACHE_DIR)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis:
+            try:
+                raw = self.redis.get(REDIS_PREFIX + key)
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                print(f"[BT CACHE] Redis GET Error: {e}")
+                return None
+
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # LRU: marca como usado recientemente
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[BT CACHE] Corrupt entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value, default=_json_default)
+        if self.redis:
+            try:
+                self.redis.setex(REDIS_PREFIX + key, REDIS_TTL, payload)
+            except Exception as e:
+                print(f"[BT CACHE] Redis SET Error: {e}")
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        self._evict(keep=path)
+
+    def _evict(self, keep: Optional[Path] = None) -> None:
+        """Borra las entradas menos usadas hasta quedar bajo `max_bytes`."""
+        entries = []
+        total = 0
+        for p in self.directory.glob("*.json.gz"):
+            st = p.stat()
+            total += st.st_size
+            if p != keep:
+                entries.append((st.st_mtime_ns, st.st_size, p))
+        if total <= self.max_bytes:
+            return
+        for _, size, p in sorted(entries):
+            p.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_default_store: Optional[BacktestResultStore] = None
+
+
+def get_store() -> BacktestResultStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = BacktestResultStore()
+    return _default_store
+
+
+def load_result(
+    result_id: str, store: Optional[BacktestResultStore] = None
+) -> Optional[Dict[str, Any]]:
+    """Resultado completo por su `result_id` (None si expiró o no existe)."""
+    if not result_id.startswith("result-") or not result_id[7:].isalnum():
+        return None
+    return (store or get_store()).get(result_id)
+
+
+# === Cached Run ===
+
+
+def run_cached(
+    engine: BacktestEngine,
+    strategy_id: str,
+    symbol: str,
+    timeframe: str = "1h",
+    days: int = 30,
+    config: Optional[Dict[str, Any]] = None,
+    monte_carlo_paths: int = 0,
+    start_ts: Optional[int] = None,
+    df: Optional[pd.DataFrame] = None,
+    store: Optional[BacktestResultStore] = None,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None,
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Igual que `engine.run`, pero consultando la caché. Devuelve
+    (resultado, estado) con estado en {"hit", "partial", "miss"}.
+    """
+    store = store or get_store()
+    if df is None:
+        df = engine.fetch_history(symbol, timeframe, days, start_ts=start_ts)
+
+    engine.load_strategy(strategy_id, config=config)
+    identity = _identity(engine, strategy_id, symbol, timeframe, config)
+
+    result_key = "result-" + _hash(
+        {**identity, "mc": monte_carlo_paths, "data": data_digest(df)}
+    )
+    cached = store.get(result_key)
+    if cached:
+        print(f"[BT CACHE] Hit {strategy_id} {symbol} {timeframe}")
+        cached.setdefault("result_id", result_key)
+        return cached, HIT
+
+    # Checkpoint: mismo inicio de rango, final anterior
+    first_ts = int(df["timestamp"].iloc[0])
+    ckpt_key = "ckpt-" + _hash({**identity, "first_ts": first_ts})
+    resume = store.get(ckpt_key)
+    status = MISS
+    if resume:
+        n = resume["next_index"]
+        if n < len(df) and resume["prefix_digest"] == data_digest(df, end=n):
+            status = PARTIAL
+            print(
+                f"[BT CACHE] Partial {strategy_id} {symbol} {timeframe}: "
+                f"resuming at candle {n}/{len(df)}"
+            )
+        else:
+            resume = None
+
+    result = engine.run_on_data(
+        strategy_id,
+        symbol,
+        timeframe,
+        df,
+        config=config,
+        monte_carlo_paths=monte_carlo_paths,
+        resume=resume,
+        progress_callback=progress_callback,
+    )
+
+    # Permite pedir después la curva completa (GET /backtest/results/{id}/curve)
+    result["result_id"] = result_key
+    store.set(result_key, result)
+    checkpoint = engine.last_checkpoint
+    if checkpoint:
+        checkpoint["prefix_digest"] = data_digest(df, end=checkpoint["next_index"])
+        store.set(ckpt_key, checkpoint)
+
+    return result, status
@@ -1,14 +1,22 @@
 import pandas as pd
 import importlib
+import math
+import time
 import inspect
 import sys
 import os
 import traceback
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 
 # Add root to path to find 'strategies'
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.market_data_api import get_ohlcv_data
+from core.monte_carlo import monte_carlo_summary
+
+# Subir cuando cambie la lógica de simulación (invalida resultados cacheados)
+ENGINE_VERSION = "2"
+CANDLES_PER_DAY = {"1m": 1440, "5m": 288, "15m": 96, "30m": 48, "1h": 24, "4h": 6}
+WARMUP_CANDLES = 50
 
 
 class BacktestEngine:
@@ -19,20 +27,24 @@ class BacktestEngine:
     def __init__(self, initial_capital: float = 1000.0):
         self.initial_capital = initial_capital
         self.strategies = {}
+        self.last_checkpoint = None
 
-    def load_strategy(self, strategy_id: str):
+    def load_strategy(self, strategy_id: str, config: Optional[Dict[str, Any]] = None):
         """
         Carga una estrategia por su ID.
         Prioridad:
         1. Registry (Memoria/Oficial)
         2. Import dinámico por nombre de archivo (Legacy)
+
+        `config` sobreescribe los parámetros por defecto de la estrategia
+        (lo usa el optimizador para barrer combinaciones).
         """
         try:
             # 1. Try Registry First
             from strategies.registry import get_registry
 
             registry = get_registry()
-            strategy_instance = registry.get(strategy_id)
+            strategy_instance = registry.get(strategy_id, config=config)
 
             if strategy_instance:
                 self.strategies[strategy_id] = strategy_instance
@@ -57,7 +69,9 @@ class BacktestEngine:
                         break
 
             if found_class:
-                self.strategies[strategy_id] = found_class()
+                self.strategies[strategy_id] = (
+                    found_class(config=config) if config else found_class()
+                )
                 print(f"[Backtest] Estrategia cargada desde archivo: {strategy_id}")
             else:
                 raise Exception(f"No se encontró clase compatible en {strategy_id}")
@@ -72,8 +86,6 @@ class BacktestEngine:
             raise e
 
     def _safe_float(self, val):
-        import math
-
         try:
             f = float(val)
             if math.isnan(f) or math.isinf(f):
@@ -82,64 +94,155 @@ class BacktestEngine:
         except Exception:
             return 0.0
 
+    def fetch_history(
+        self,
+        symbol: str,
+        timeframe: str = "1h",
+        days: int = 30,
+        start_ts: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Descarga el histórico necesario para `days` días (+ warmup) y lo
+        devuelve como DataFrame listo para `run_on_data`.
+        Con `start_ts` (ms) el rango queda anclado: empieza en esa vela
+        (tras el warmup) y llega hasta la última disponible.
+        """
+        if start_ts is not None:
+            days = max(1, math.ceil((time.time() * 1000 - start_ts) / 86_400_000))
+
+        # Determine limit based on candles per day (default 1h)
+        limit = days * CANDLES_PER_DAY.get(timeframe, 24)
+
+        limit += WARMUP_CANDLES
+        # Removed arbitrary 1000 cap to support long backtests with pagination
+        # limit = min(limit, 1000)
+
+        print(f"[Backtest] Descargando {limit} velas para {symbol}...")
+        try:
+            ohlcv = get_ohlcv_data(symbol, timeframe, limit=limit)
+        except Exception as e:
+            raise Exception(f"Error descargando datos: {str(e)}")
+
+        if not ohlcv or len(ohlcv) < 60:
+            raise Exception("Datos históricos insuficientes para backtest")
+
+        df = pd.DataFrame(ohlcv)
+        if start_ts is not None:
+            first = int((df["timestamp"] < start_ts).sum())
+            df = df.iloc[max(0, first - WARMUP_CANDLES) :].reset_index(drop=True)
+            if len(df) < 60:
+                raise Exception("Datos históricos insuficientes para backtest")
+        if "timestamp" in df.columns:
+            df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
     def run(
-        self, strategy_id: str, symbol: str, timeframe: str = "1h", days: int = 30
+        self,
+        strategy_id: str,
+        symbol: str,
+        timeframe: str = "1h",
+        days: int = 30,
+        config: Optional[Dict[str, Any]] = None,
+        monte_carlo_paths: int = 0,
     ) -> Dict[str, Any]:
         """
         Ejecuta el backtest Walk-Forward.
         Recorre vela a vela simulando que "hoy es t".
         """
         try:
-            self.load_strategy(strategy_id)
+            df = self.fetch_history(symbol, timeframe, days)
+            return self.run_on_data(
+                strategy_id,
+                symbol,
+                timeframe,
+                df,
+                config=config,
+                monte_carlo_paths=monte_carlo_paths,
+            )
+        except Exception as e:
+            print("[Backtest Critical Error]:")
+            traceback.print_exc()
+            raise e
+
+    def run_on_data(
+        self,
+        strategy_id: str,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        config: Optional[Dict[str, Any]] = None,
+        monte_carlo_paths: int = 0,
+        resume: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Simula la estrategia sobre un histórico ya descargado.
+        No modifica `df`, así que el mismo DataFrame se puede reutilizar
+        para muchas ejecuciones (barridos de parámetros).
+        Con `monte_carlo_paths > 0` añade el remuestreo Monte Carlo de los
+        retornos por trade (core.monte_carlo).
+
+        Al terminar deja en `self.last_checkpoint` el estado justo antes de
+        la última vela (que puede estar aún formándose). Pasándolo como
+        `resume` con un `df` que comparte las velas anteriores, la
+        simulación continúa desde ahí en vez de empezar de cero
+        (ver core.backtest_cache).
+
+        `progress_callback(procesadas, total, trades)` se llama cada ~1% de
+        las velas; si lanza una excepción la simulación se aborta (así se
+        cancelan los jobs asíncronos).
+        """
+        try:
+            self.load_strategy(strategy_id, config=config)
             strategy = self.strategies.get(strategy_id)
             if not strategy:
                 raise Exception("Estrategia no cargada")
 
-            # Determine limit based on candles per day
-            candles_per_day = 24  # default 1h
-            if timeframe == "30m":
-                candles_per_day = 48
-            if timeframe == "4h":
-                candles_per_day = 6
-            if timeframe == "15m":
-                candles_per_day = 96
-            if timeframe == "5m":
-                candles_per_day = 288
-            if timeframe == "1m":
-                candles_per_day = 1440
-
-            limit = days * candles_per_day
-
-            limit += 50
-            # Removed arbitrary 1000 cap to support long backtests with pagination
-            # limit = min(limit, 1000)
-
-            print(f"[Backtest] Descargando {limit} velas para {symbol}...")
-            try:
-                ohlcv = get_ohlcv_data(symbol, timeframe, limit=limit)
-            except Exception as e:
-                raise Exception(f"Error descargando datos: {str(e)}")
-
-            if not ohlcv or len(ohlcv) < 60:
+            if len(df) < 60:
                 raise Exception("Datos históricos insuficientes para backtest")
 
-            df = pd.DataFrame(ohlcv)
-            if "timestamp" in df.columns:
-                df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
-
             trades = []
+            trade_returns = []  # % sobre el capital antes de cada trade
             equity_curve = []  # List of {time, strategy_equity, buy_hold_equity, price}
 
             current_capital = self.initial_capital
-            initial_price = df.iloc[50]["open"]  # Start price after warmup
+            initial_price = df.iloc[WARMUP_CANDLES]["open"]  # Start price after warmup
             buy_hold_amount = self.initial_capital / initial_price
 
             active_position = None
-            warmup = 50
-
-            print(f"[Backtest] Running loop from {warmup} to {len(df)}")
+            warmup = WARMUP_CANDLES
+            start_index = warmup
+
+            if resume:
+                start_index = resume["next_index"]
+                current_capital = resume["current_capital"]
+                active_position = (
+                    dict(resume["active_position"]) if resume["active_position"] else None
+                )
+                trades = list(resume["trades"])
+                trade_returns = list(resume["trade_returns"])
+                equity_curve = list(resume["curve"])
+
+            self.last_checkpoint = None
+            print(f"[Backtest] Running loop from {start_index} to {len(df)}")
+            progress_every = max(1, (len(df) - warmup) // 100)
+
+            for i in range(start_index, len(df)):
+                if progress_callback and (i - warmup) % progress_every == 0:
+                    progress_callback(i - warmup, len(df) - warmup, len(trades))
+
+                if i == len(df) - 1:
+                    self.last_checkpoint = {
+                        "next_index": i,
+                        "current_capital": current_capital,
+                        "active_position": (
+                            dict(active_position) if active_position else None
+                        ),
+                        "trades": list(trades),
+                        "trade_returns": list(trade_returns),
+                        "curve": list(equity_curve),
+                    }
 
-            for i in range(warmup, len(df)):
                 current_candle = df.iloc[i]
                 current_time = current_candle["time"]
                 current_ts_val = current_candle["timestamp"]
@@ -185,6 +288,7 @@ class BacktestEngine:
                         fees = 0.0
                         net_pnl = pnl_raw - fees
 
+                        trade_returns.append(net_pnl / current_capital * 100)
                         current_capital += net_pnl
 
                         trades.append(
@@ -278,6 +382,9 @@ class BacktestEngine:
                 except Exception as e:
                     print(f"[Backtest Warning] Error adding curve point at {i}: {e}")
 
+            if progress_callback:
+                progress_callback(len(df) - warmup, len(df) - warmup, len(trades))
+
             wins = [t for t in trades if t["pnl"] > 0]
             win_rate = (len(wins) / len(trades) * 100) if trades else 0
 
@@ -304,7 +411,7 @@ class BacktestEngine:
                 (current_capital - self.initial_capital) / self.initial_capital
             ) * 100
 
-            return {
+            result = {
                 "metrics": {
                     "initial_capital": round(self._safe_float(self.initial_capital), 2),
                     "final_capital": round(self._safe_float(current_capital), 2),
@@ -334,6 +441,11 @@ class BacktestEngine:
                 "trades": trades[-50:],
                 "curve": equity_curve,
             }
+            if monte_carlo_paths > 0:
+                result["monte_carlo"] = monte_carlo_summary(
+                    trade_returns, n_paths=monte_carlo_paths
+                )
+            return result
         except Exception as e:
             print("[Backtest Critical Error]:")
             traceback.print_exc()
@@ -0,0 +1,320 @@
+# backend/core/backtest_jobs.py
+"""
+Cola asíncrona de backtests.
+
+`/backtest/run` es síncrono: en rangos largos bloquea un hilo del servidor
+durante minutos mientras el cliente espera. Aquí los backtests se envían
+como jobs:
+
+- submit  -> devuelve un job_id al instante; un pool acotado los ejecuta
+- status  -> estado + progreso (velas procesadas, trades hasta ahora)
+- result  -> resultado cuando termina
+- cancel  -> cancela en cola o aborta en la siguiente actualización de progreso
+
+Envíos idénticos del mismo usuario mientras el job sigue vivo (o ya tiene
+resultado) devuelven el mismo job. El número de jobs activos por usuario
+se limita según su plan (core.entitlements.BACKTEST_JOB_LIMITS).
+
+`params["kind"]` elige el trabajo: "backtest" (por defecto), "optimize"
+(barrido de parámetros, core.optimizer), "walk_forward" (core.walk_forward)
+o "portfolio" (varios tokens con capital compartido, core.portfolio_backtest).
+
+El estado vive en memoria del proceso: los jobs no sobreviven a reinicios.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.entitlements import BACKTEST_JOB_LIMITS
+
+MAX_WORKERS = int(os.getenv("BACKTEST_JOB_WORKERS", "2"))
+MAX_PENDING = int(os.getenv("BACKTEST_JOB_MAX_PENDING", "50"))
+# Tiempo que se conservan jobs terminados (para status/result)
+FINISHED_TTL_SECONDS = 3600
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = (
+    "queued",
+    "running",
+    "done",
+    "failed",
+    "cancelled",
+)
+ACTIVE = (QUEUED, RUNNING)
+TERMINAL = (DONE, FAILED, CANCELLED)
+
+# runner(params, progress_callback) -> resultado
+Runner = Callable[[Dict[str, Any], Callable[[int, int, int], None]], Dict[str, Any]]
+
+
+class JobCancelled(BaseException):
+    """
+    Hereda de BaseException (como asyncio.CancelledError) para atravesar los
+    `except Exception` del motor sin registrarse como error.
+    """
+
+
+class JobLimitExceeded(Exception):
+    def __init__(self, limit: int, scope: str = "user"):
+        self.limit = limit
+        self.scope = scope
+        super().__init__(f"Backtest job limit reached ({scope}: {limit})")
+
+
+def optimize_runner(
+    params: Dict[str, Any], progress: Callable[[int, int, int], None]
+) -> Dict[str, Any]:
+    from core.optimizer import run_sweep
+
+    sweep = run_sweep(
+        strategy_id=params["strategy_id"],
+        symbol=params["token"].lower(),
+        timeframe=params.get("timeframe", "1h"),
+        days=params.get("days", 30),
+        grid=params.get("grid"),
+        space=params.get("space"),
+        n_iter=params.get("n_iter", 20),
+        seed=params.get("seed"),
+        metric=params.get("metric", "roi_pct"),
+        initial_capital=params.get("initial_capital", 1000.0),
+        progress_callback=progress,
+    )
+    sweep["results"] = sweep["results"][: max(1, params.get("top", 20))]
+    return sweep
+
+
+def walk_forward_runner(
+    params: Dict[str, Any], progress: Callable[[int, int, int], None]
+) -> Dict[str, Any]:
+    from core.walk_forward import run_walk_forward
+
+    return run_walk_forward(
+        strategy_id=params["strategy_id"],
+        symbol=params["token"].lower(),
+        timeframe=params.get("timeframe", "1h"),
+        days=params.get("days", 90),
+        train_candles=params.get("train_candles", 500),
+        test_candles=params.get("test_candles", 100),
+        grid=params.get("grid"),
+        space=params.get("space"),
+        n_iter=params.get("n_iter", 20),
+        seed=params.get("seed"),
+        metric=params.get("metric", "roi_pct"),
+        initial_capital=params.get("initial_capital", 1000.0),
+        max_runs=params.get("max_runs"),
+        progress_callback=progress,
+    )
+
+
+def portfolio_runner(
+    params: Dict[str, Any], progress: Callable[[int, int, int], None]
+) -> Dict[str, Any]:
+    from core.portfolio_backtest import PortfolioBacktestEngine
+
+    engine = PortfolioBacktestEngine(
+        initial_capital=params.get("initial_capital", 1000.0),
+        max_positions=params.get("max_positions", 5),
+        position_size_pct=params.get("position_size_pct", 20.0),
+    )
+    return engine.run(
+        strategy_id=params["strategy_id"],
+        tokens=params["tokens"],
+        timeframe=params.get("timeframe", "1h"),
+        days=params.get("days", 30),
+        progress_callback=progress,
+    )
+
+
+def default_runner(
+    params: Dict[str, Any], progress: Callable[[int, int, int], None]
+) -> Dict[str, Any]:
+    if params.get("kind") == "optimize":
+        return optimize_runner(params, progress)
+    if params.get("kind") == "walk_forward":
+        return walk_forward_runner(params, progress)
+    if params.get("kind") == "portfolio":
+        return portfolio_runner(params, progress)
+
+    from core.backtest_engine import BacktestEngine
+    from core.backtest_cache import run_cached
+
+    engine = BacktestEngine(initial_capital=params.get("initial_capital", 1000.0))
+    result, _ = run_cached(
+        engine,
+        strategy_id=params["strategy_id"],
+        symbol=params["token"].lower(),
+        timeframe=params.get("timeframe", "1h"),
+        days=params.get("days", 30),
+        monte_carlo_paths=params.get("monte_carlo_paths", 0),
+        start_ts=params.get("start_ts"),
+        progress_callback=progress,
+    )
+    return result
+
+
+class BacktestJob:
+    def __init__(self, key: str, user_id: int, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.user_id = user_id
+        self.params = params
+        self.status = QUEUED
+        self.processed = 0
+        self.total = 0
+        self.trades = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Se incrementa con cada cambio; el stream SSE emite cuando cambia
+        self.version = 0
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {
+                "processed": self.processed,
+                "total": self.total,
+                "pct": round(self.processed / self.total * 100, 1) if self.total else 0.0,
+                "trades": self.trades,
+            },
+            "error": self.error,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class BacktestJobManager:
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        runner: Runner = default_runner,
+        max_pending: int = MAX_PENDING,
+    ):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="backtest-job"
+        )
+        self._runner = runner
+        self._max_pending = max_pending
+        self._jobs: Dict[str, BacktestJob] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(user_id: int, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"user": user_id, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def submit(
+        self, user_id: int, plan: str, params: Dict[str, Any]
+    ) -> Tuple[BacktestJob, bool]:
+        """Devuelve (job, creado). `creado=False` si era un duplicado."""
+        key = self.job_key(user_id, params)
+        with self._lock:
+            self._prune()
+
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing and existing.status in (QUEUED, RUNNING, DONE):
+                return existing, False
+
+            limit = BACKTEST_JOB_LIMITS.get((plan or "FREE").upper(), 1)
+            active = [j for j in self._jobs.values() if j.status in ACTIVE]
+            if sum(1 for j in active if j.user_id == user_id) >= limit:
+                raise JobLimitExceeded(limit)
+            if len(active) >= self._max_pending:
+                raise JobLimitExceeded(self._max_pending, scope="server")
+
+            job = BacktestJob(key, user_id, params)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            job.future = self._pool.submit(self._execute, job)
+
+        print(f"[JOBS] Submitted {job.id} ({params.get('strategy_id')}) user={user_id}")
+        return job, True
+
+    def get(self, job_id: str, user_id: Optional[int] = None) -> Optional[BacktestJob]:
+        job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def cancel(self, job_id: str, user_id: Optional[int] = None) -> Optional[BacktestJob]:
+        job = self.get(job_id, user_id)
+        if job is None or job.status in TERMINAL:
+            return job
+        job.cancel_event.set()
+        # Si aún no había empezado, se cancela sin llegar a ejecutarse
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts = {s: 0 for s in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        for job in list(self._jobs.values()):
+            counts[job.status] += 1
+        return counts
+
+    def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            if job.status in ACTIVE:
+                self.cancel(job.id)
+        self._pool.shutdown(wait=False)
+
+    # === Internals ===
+
+    def _execute(self, job: BacktestJob) -> None:
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.version += 1
+
+        def progress(processed: int, total: int, trades: int) -> None:
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            job.processed, job.total, job.trades = processed, total, trades
+            job.version += 1
+
+        try:
+            job.result = self._runner(job.params, progress)
+            self._finish(job, DONE)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            if job.cancel_event.is_set():
+                self._finish(job, CANCELLED)
+            else:
+                job.error = str(e)
+                self._finish(job, FAILED)
+                print(f"[JOBS] Job {job.id} failed: {e}")
+
+    def _finish(self, job: BacktestJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.version += 1
+
+    def _prune(self) -> None:
+        """Olvida jobs terminados hace más de FINISHED_TTL_SECONDS (con lock)."""
+        cutoff = time.time() - FINISHED_TTL_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            if job.status in TERMINAL and (job.finished_at or 0) < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+
+
+job_manager = BacktestJobManager()
@@ -0,0 +1,298 @@
+# backend/core/candle_store.py
+"""
+Store local de velas OHLCV (Parquet por símbolo/timeframe).
+
+    <CANDLE_STORE_DIR>/<SYMBOL>_<tf>.parquet        serie consolidada
+    <CANDLE_STORE_DIR>/.staging/<SYMBOL>_<tf>/*.parquet   páginas pendientes
+
+Lo llena trading_lab/download_data.py (solo velas cerradas) y lo leen:
+- core.market_data_api.get_ohlcv_data: si la serie existe, solo pide al
+  exchange las velas posteriores a la última guardada.
+- trading_lab/dataset_store.py: si no hay CSV en datasets/, lee la serie
+  de aquí (mismo esquema: índice `timestamp` UTC + OHLCV float64).
+- core.resample: deriva timeframes superiores de una serie base guardada.
+
+Cada página descargada se escribe como fichero propio en .staging (es el
+checkpoint: una caída pierde como mucho la página en curso) y
+`merge_staged` las consolida en la serie, quitando duplicados.
+
+Escrituras concurrentes (hilos del scheduler vía market_data_api): cada
+lectura-merge-escritura de una serie va bajo un lock propio de la serie y
+cada escritura usa un temporal único antes del os.replace atómico.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CANDLE_STORE_DIR = Path(
+    os.getenv("CANDLE_STORE_DIR", str(BACKEND_DIR / "data" / "candles"))
+)
+ROW_GROUP_SIZE = 20_000
+PARQUET_COMPRESSION = "zstd"
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """'15m' -> 900000, '4h' -> 14400000, '1d' -> 86400000."""
+    try:
+        return int(timeframe[:-1]) * _UNIT_MS[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Timeframe no soportado: {timeframe}")
+
+
+def series_key(symbol: str, timeframe: str) -> str:
+    """'eth', 'ETH/USDT', 'ETHUSDT' -> 'ETHUSDT_<tf>' (mismo criterio que market_data_api)."""
+    base = symbol.upper().replace("/", "").replace("-", "").replace("USDT", "")
+    return f"{base}USDT_{timeframe}"
+
+
+def rows_to_frame(rows: Iterable[Sequence[Any]]) -> pd.DataFrame:
+    """Filas ccxt [ts_ms, o, h, l, c, v] -> DataFrame del store."""
+    arr = np.asarray(list(rows), dtype=np.float64).reshape(-1, 6)
+    index = pd.DatetimeIndex(
+        pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms", utc=True), name="timestamp"
+    )
+    return pd.DataFrame(arr[:, 1:], index=index, columns=OHLCV_COLUMNS)
+
+
+def to_ms(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("ms").asi8
+
+
+# === Validación ===
+
+
+def find_gaps(ts_ms: np.ndarray, interval_ms: int) -> List[Tuple[int, int, int]]:
+    """Huecos internos como (primera_vela_que_falta, última_vela_que_falta, nº_velas)."""
+    if len(ts_ms) < 2:
+        return []
+    diffs = np.diff(ts_ms)
+    idx = np.flatnonzero(diffs > interval_ms)
+    return [
+        (int(ts_ms[i] + interval_ms), int(ts_ms[i + 1] - interval_ms), int(diffs[i] // interval_ms - 1))
+        for i in idx
+    ]
+
+
+def missing_ranges(
+    ts_ms: np.ndarray,
+    start_ms: int,
+    end_ms: int,
+    interval_ms: int,
+    include_gaps: bool = False,
+) -> List[Tuple[int, int]]:
+    """
+    Rangos [desde, hasta] (aperturas de vela, inclusivos) que faltan para
+    cubrir [start_ms, end_ms] dado lo ya guardado: cabeza, cola y, con
+    `include_gaps`, los huecos internos.
+    """
+    start_ms = -(-start_ms // interval_ms) * interval_ms
+    if start_ms > end_ms:
+        return []
+    if len(ts_ms) == 0:
+        return [(start_ms, end_ms)]
+    ranges = []
+    first, last = int(ts_ms[0]), int(ts_ms[-1])
+    if start_ms < first:
+        ranges.append((start_ms, min(first - interval_ms, end_ms)))
+    if include_gaps:
+        ranges.extend(
+            (a, min(b, end_ms)) for a, b, _ in find_gaps(ts_ms, interval_ms)
+            if start_ms <= b and a <= end_ms
+        )
+    if last + interval_ms <= end_ms:
+        ranges.append((max(last + interval_ms, start_ms), end_ms))
+    return ranges
+
+
+def validate_frame(df: pd.DataFrame, interval_ms: int) -> Dict[str, Any]:
+    ts = to_ms(df.index)
+    diffs = np.diff(ts)
+    gaps = find_gaps(ts, interval_ms)
+    return {
+        "rows": int(len(df)),
+        "first_ts": int(ts[0]) if len(ts) else None,
+        "last_ts": int(ts[-1]) if len(ts) else None,
+        "duplicates": int((diffs == 0).sum()),
+        "unsorted": int((diffs < 0).sum()),
+        "misaligned": int((ts % interval_ms != 0).sum()),
+        "gaps": len(gaps),
+        "missing_candles": int(sum(g[2] for g in gaps)),
+        "gap_ranges": gaps[:20],
+        "bad_ohlc": int(
+            ((df["high"] < df["low"]) | (df["high"] < df[["open", "close"]].max(axis=1))
+             | (df["low"] > df[["open", "close"]].min(axis=1))).sum()
+        ),
+    }
+
+
+# === Store ===
+
+_SERIES_LOCKS: Dict[str, threading.RLock] = {}
+_SERIES_LOCKS_GUARD = threading.Lock()
+
+
+def _series_lock(path: Path) -> threading.RLock:
+    with _SERIES_LOCKS_GUARD:
+        return _SERIES_LOCKS.setdefault(str(path.resolve()), threading.RLock())
+
+
+class CandleStore:
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or CANDLE_STORE_DIR)
+
+    def path(self, symbol: str, timeframe: str) -> Path:
+        return self.directory / f"{series_key(symbol, timeframe)}.parquet"
+
+    def staging_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.directory / ".staging" / series_key(symbol, timeframe)
+
+    def exists(self, symbol: str, timeframe: str) -> bool:
+        return self.path(symbol, timeframe).exists()
+
+    def timeframes(self, symbol: str) -> List[str]:
+        """Timeframes con serie consolidada para el símbolo."""
+        prefix = series_key(symbol, "")
+        if not self.directory.exists():
+            return []
+        out = []
+        for p in self.directory.glob(f"{prefix}*.parquet"):
+            tf = p.stem[len(prefix):]
+            try:
+                timeframe_to_ms(tf)
+            except ValueError:
+                continue
+            out.append(tf)
+        return sorted(out, key=timeframe_to_ms)
+
+    # --- Lectura ---
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Serie consolidada (vacía si no existe), opcionalmente acotada."""
+        import pyarrow.parquet as pq
+
+        path = self.path(symbol, timeframe)
+        if not path.exists():
+            return rows_to_frame([])
+
+        filters = []
+        if start_ms is not None:
+            filters.append(("timestamp", ">=", pd.Timestamp(start_ms, unit="ms", tz="UTC")))
+        if end_ms is not None:
+            filters.append(("timestamp", "<=", pd.Timestamp(end_ms, unit="ms", tz="UTC")))
+        if filters:
+            table = pq.read_table(path, filters=filters)
+        elif limit:
+            # Solo los últimos row groups necesarios
+            pf = pq.ParquetFile(path)
+            groups, rows = [], 0
+            for i in range(pf.num_row_groups - 1, -1, -1):
+                groups.append(i)
+                rows += pf.metadata.row_group(i).num_rows
+                if rows >= limit:
+                    break
+            table = pf.read_row_groups(sorted(groups))
+        else:
+            table = pq.read_table(path)
+        if limit:
+            table = table.slice(max(table.num_rows - limit, 0))
+        return table.to_pandas()
+
+    def timestamps(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Aperturas (ms) guardadas, incluyendo páginas aún en staging."""
+        import pyarrow.parquet as pq
+
+        parts = []
+        path = self.path(symbol, timeframe)
+        if path.exists():
+            parts.append(pq.read_table(path, columns=["timestamp"]).column(0))
+        for p in self._staged(symbol, timeframe):
+            parts.append(pq.read_table(p, columns=["timestamp"]).column(0))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        ts = np.concatenate([to_ms(pd.DatetimeIndex(c.to_pandas())) for c in parts])
+        return np.unique(ts)
+
+    # --- Escritura ---
+
+    def stage_page(self, symbol: str, timeframe: str, rows: Sequence[Sequence[Any]]) -> Optional[Path]:
+        """Guarda una página descargada como checkpoint (escritura atómica)."""
+        if not rows:
+            return None
+        folder = self.staging_dir(symbol, timeframe)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{int(rows[0][0])}-{int(rows[-1][0])}.parquet"
+        self._write(rows_to_frame(rows), path)
+        return path
+
+    def merge_staged(self, symbol: str, timeframe: str) -> Dict[str, int]:
+        """Consolida las páginas en staging en la serie. Devuelve contadores."""
+        with _series_lock(self.path(symbol, timeframe)):
+            staged = self._staged(symbol, timeframe)
+            if not staged:
+                return {"merged_pages": 0, "added": 0, "duplicates": 0}
+            frames = [pd.read_parquet(p) for p in staged]
+            stats = self._merge(symbol, timeframe, frames)
+            # Solo las páginas consolidadas: las que lleguen mientras tanto se quedan
+            for p in staged:
+                p.unlink(missing_ok=True)
+            return {"merged_pages": len(staged), **stats}
+
+    def append(self, symbol: str, timeframe: str, rows: Sequence[Sequence[Any]]) -> Dict[str, int]:
+        """Añade filas [ts_ms, o, h, l, c, v] directamente a la serie."""
+        if not rows:
+            return {"added": 0, "duplicates": 0}
+        return self._merge(symbol, timeframe, [rows_to_frame(rows)])
+
+    def validate(self, symbol: str, timeframe: str) -> Dict[str, Any]:
+        return validate_frame(self.read(symbol, timeframe), timeframe_to_ms(timeframe))
+
+    # --- Internals ---
+
+    def _staged(self, symbol: str, timeframe: str) -> List[Path]:
+        folder = self.staging_dir(symbol, timeframe)
+        return sorted(folder.glob("*.parquet")) if folder.exists() else []
+
+    def _merge(self, symbol: str, timeframe: str, frames: List[pd.DataFrame]) -> Dict[str, int]:
+        path = self.path(symbol, timeframe)
+        with _series_lock(path):
+            current = self.read(symbol, timeframe)
+            incoming = pd.concat(frames)
+            combined = pd.concat([current, incoming]).sort_index(kind="stable")
+            # Ante duplicados gana la versión más reciente (la entrante)
+            dup = combined.index.duplicated(keep="last")
+            combined = combined[~dup]
+            self._write(combined, path)
+        return {"added": int(len(combined) - len(current)), "duplicates": int(dup.sum())}
+
+    @staticmethod
+    def _write(df: pd.DataFrame, path: Path) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, compression=PARQUET_COMPRESSION)
+        os.replace(tmp, path)
+
+
+candle_store = CandleStore()
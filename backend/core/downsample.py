@@ -0,0 +1,82 @@
+# backend/core/downsample.py
+"""
+Reducción de curvas de equity para la UI.
+
+Un backtest de 180 días en 5m devuelve ~52k puntos; el gráfico no tiene
+más de unos pocos miles de píxeles de ancho. LTTB (Largest-Triangle-
+Three-Buckets) elige en cada bucket el punto que forma el triángulo de
+mayor área con sus vecinos, así que conserva los picos y valles que
+definen visualmente la curva (y el drawdown) con muchos menos puntos.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_POINTS = 2000
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Índices (ordenados) de los `n_out` puntos elegidos por LTTB.
+    Siempre incluye el primero y el último.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+def downsample_curve(
+    curve: List[Dict[str, Any]],
+    max_points: int = DEFAULT_MAX_POINTS,
+    key: str = "strategy_equity",
+) -> List[Dict[str, Any]]:
+    """Aplica LTTB sobre `key` y devuelve los puntos originales elegidos."""
+    if not curve or len(curve) <= max_points:
+        return curve
+    y = np.fromiter((p.get(key) or 0.0 for p in curve), dtype=np.float64, count=len(curve))
+    return [curve[i] for i in lttb_indices(y, max_points)]
+
+
+def apply_max_points(
+    result: Dict[str, Any], max_points: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Devuelve una copia superficial de `result` con la curva reducida a
+    `max_points` (None/0 = sin reducir) y metadatos para pedir la completa.
+    """
+    curve = result.get("curve") or []
+    if not max_points or len(curve) <= max_points:
+        return result
+    return {
+        **result,
+        "curve": downsample_curve(curve, max_points),
+        "curve_points_total": len(curve),
+        "curve_downsampled": True,
+    }
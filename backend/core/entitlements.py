@@ -37,6 +37,19 @@ QUOTAS = {
     "OWNER": {"ai_analysis": 9999, "advisor_chat": 9999},
 }
 
+# Backtest jobs asíncronos simultáneos (en cola o corriendo) por usuario
+BACKTEST_JOB_LIMITS = {"FREE": 1, "TRADER": 2, "PRO": 4, "OWNER": 8}
+
+# Tamaño máximo de un barrido de parámetros (/backtest/optimize) por plan:
+# nº de combinaciones (grid completo o n_iter). Cada una es un backtest.
+OPTIMIZE_LIMITS = {"FREE": 10, "TRADER": 50, "PRO": 200, "OWNER": 200}
+
+# Walk-forward (/backtest/walk-forward): ventanas × combinaciones por plan
+WALK_FORWARD_LIMITS = {"FREE": 50, "TRADER": 500, "PRO": 2500, "OWNER": 10000}
+
+# Backtest de cartera (/backtest/portfolio): tokens × días de histórico por plan
+PORTFOLIO_LIMITS = {"FREE": 150, "TRADER": 1500, "PRO": 9000, "OWNER": 18250}
+
 # === 2. TOKEN CATALOG SERVICE ===
 
 
@@ -165,10 +178,101 @@ def can_use_advisor(user: User):
         )
 
 
+# Redis quota counters (used when REDIS_URL is set, see core/cache.py)
+QUOTA_KEY_PREFIX = "quota"
+QUOTA_DIRTY_KEY = "quota:dirty"
+# Counters live for the current day plus a buffer for the write-behind flush
+QUOTA_KEY_TTL_SECONDS = 2 * 24 * 3600
+
+
+def get_quota_redis_client():
+    """Redis client shared with CacheService, or None (DB fallback)."""
+    try:
+        from core.cache import cache
+
+        return cache.redis_client
+    except Exception:
+        return None
+
+
+def _quota_key(user_id: int, feature: str, date_str: str) -> str:
+    return f"{QUOTA_KEY_PREFIX}:{date_str}:{user_id}:{feature}"
+
+
+def _quota_exceeded(plan: str, feature: str, limit: int, used: int) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={
+            "code": "DAILY_QUOTA_EXCEEDED",
+            "message": (
+                f"You have reached your daily limit of {limit} for {feature}."
+            ),
+            "tier": plan,
+            "limit": limit,
+            "used": used,
+            "reset_at": "00:00 UTC",
+            "upgrade_required": plan != "PRO",
+        },
+    )
+
+
+def _get_db_usage_count(db: Session, user_id: int, feature: str, date_str: str) -> int:
+    usage = (
+        db.query(DailyUsage)
+        .filter(
+            DailyUsage.user_id == user_id,
+            DailyUsage.feature == feature,
+            DailyUsage.date == date_str,
+        )
+        .first()
+    )
+    return usage.count if usage else 0
+
+
+def _redis_check_and_increment(
+    client, db: Session, user: User, feature: str, limit: int, plan: str, today_str: str
+):
+    """
+    Atomic INCR on Redis. The DB is only read once per user/feature/day (to
+    seed the counter with usage recorded before Redis was in play) and is
+    written later by flush_quota_counters().
+
+    The seed is written with SET NX before the first INCR, so concurrent
+    requests never see a counter without it. Once the INCR has been applied
+    nothing else may raise: a DB fallback at that point would count twice.
+    """
+    key = _quota_key(user.id, feature, today_str)
+
+    if not client.exists(key):
+        # First hit of the day for this key: seed + expiry (only one SET wins)
+        seed = _get_db_usage_count(db, user.id, feature, today_str)
+        client.set(key, seed, nx=True, ex=QUOTA_KEY_TTL_SECONDS)
+
+    pipe = client.pipeline()
+    pipe.incr(key)
+    pipe.sadd(QUOTA_DIRTY_KEY, key)
+    used = pipe.execute()[0]
+
+    if used > limit:
+        # Give the slot back so the counter reflects consumed quota only
+        try:
+            client.decr(key)
+        except Exception as e:
+            print(f"[QUOTA] Could not release slot for {key} ({e}).")
+        raise _quota_exceeded(plan, feature, limit, used - 1)
+
+    return {
+        "used": used,
+        "limit": limit,
+        "remaining": limit - used,
+    }
+
+
 def check_and_increment_quota(db: Session, user: User, feature: str):
     """
     Verifica y consume cuota diaria con atomicidad robusta.
-    Maneja condiciones de carrera (Race Conditions) mediante retries y locking.
+    Con REDIS_URL usa contadores atómicos (INCR + expiry) y write-behind a
+    DailyUsage; sin Redis (o si Redis falla) usa el camino DB original.
     Lanza 429 con JSON estructurado si falla.
     """
     plan = (user.plan or "FREE").upper()
@@ -191,6 +295,27 @@ def check_and_increment_quota(db: Session, user: User, feature: str):
 
     today_str = datetime.utcnow().strftime("%Y-%m-%d")
 
+    client = get_quota_redis_client()
+    if client is not None:
+        try:
+            return _redis_check_and_increment(
+                client, db, user, feature, limit, plan, today_str
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"[QUOTA] Redis counter failed ({e}). Falling back to DB.")
+
+    return _db_check_and_increment(db, user, feature, limit, plan, today_str)
+
+
+def _db_check_and_increment(
+    db: Session, user: User, feature: str, limit: int, plan: str, today_str: str
+):
+    """
+    Camino DB (fallback): read-modify-write sobre DailyUsage.
+    Maneja condiciones de carrera (Race Conditions) mediante retries y locking.
+    """
     # Retry loop to handle Insert Race Conditions (Upsert)
     for attempt in range(3):
         try:
@@ -239,20 +364,7 @@ def check_and_increment_quota(db: Session, user: User, feature: str):
             # 3. Check Limit
             if usage.count >= limit:
                 # Quota Exceeded
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        "code": "DAILY_QUOTA_EXCEEDED",
-                        "message": (
-                            f"You have reached your daily limit of {limit} for {feature}."
-                        ),
-                        "tier": plan,
-                        "limit": limit,
-                        "used": usage.count,
-                        "reset_at": "00:00 UTC",
-                        "upgrade_required": plan != "PRO",
-                    },
-                )
+                raise _quota_exceeded(plan, feature, limit, usage.count)
 
             # 4. Increment & Commit
             usage.count += 1
@@ -302,6 +414,18 @@ def get_user_entitlements(db: Session, user: User):
     )
 
     usage_map = {u.feature: u.count for u in usages}
+
+    # Redis counters are ahead of DailyUsage until the next write-behind flush
+    client = get_quota_redis_client()
+    if client is not None:
+        try:
+            features = ["ai_analysis", "advisor_chat"]
+            values = client.mget([_quota_key(user.id, f, today_str) for f in features])
+            for f, v in zip(features, values):
+                if v is not None:
+                    usage_map[f] = max(usage_map.get(f, 0), int(v))
+        except Exception as e:
+            print(f"[QUOTA] Redis read failed ({e}). Using DB usage.")
     limits = QUOTAS.get(plan, QUOTAS["FREE"])
 
     return {
@@ -325,3 +449,54 @@ def get_user_entitlements(db: Session, user: User):
         "allowed_tokens": TokenCatalog.get_allowed_tokens(plan),
         "server_time": datetime.utcnow().isoformat() + "Z",
     }
+
+
+def flush_quota_counters(db: Session) -> int:
+    """
+    Write-behind: copia los contadores Redis modificados a DailyUsage
+    (reporting / admin). Idempotente: guarda max(DB, Redis).
+    Devuelve el número de contadores sincronizados.
+    """
+    client = get_quota_redis_client()
+    if client is None:
+        return 0
+
+    keys = client.spop(QUOTA_DIRTY_KEY, 1000) or []
+    if not keys:
+        return 0
+
+    values = client.mget(keys)
+    synced = 0
+    try:
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            _, date_str, user_id, feature = key.split(":", 3)
+            count = int(value)
+
+            usage = (
+                db.query(DailyUsage)
+                .filter(
+                    DailyUsage.user_id == int(user_id),
+                    DailyUsage.feature == feature,
+                    DailyUsage.date == date_str,
+                )
+                .first()
+            )
+            if usage is None:
+                db.add(
+                    DailyUsage(
+                        user_id=int(user_id), feature=feature, date=date_str, count=count
+                    )
+                )
+            elif count > (usage.count or 0):
+                usage.count = count
+            synced += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Re-mark so the next flush retries these counters
+        client.sadd(QUOTA_DIRTY_KEY, *keys)
+        raise
+
+    return synced
@@ -5,13 +5,34 @@ Refactorizado para usar CCXT (Binance) para consistencia con Trading Lab.
 """
 
 import ccxt
+import os
 import time
-from typing import List, Dict, Any, Optional, Tuple, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 from datetime import datetime
 from core.cache import cache  # Importar Cache
+from core.candle_store import candle_store, rows_to_frame, timeframe_to_ms
+from core import resample
 
 print("[DEBUG] LOADING MARKET_DATA_API (Scale-Ready Fix)")
 
+# Derivar timeframes superiores de una serie base del candle store
+# (core/resample.py) en vez de pedirlos al exchange por separado
+RESAMPLE_FROM_BASE = os.getenv("MARKET_RESAMPLE_FROM_BASE", "1") == "1"
+# Tope de velas base a leer y agregar por petición (p. ej. 1d x 1000 desde 5m
+# serían 288k): por encima sale más barato pedir el timeframe directamente
+RESAMPLE_MAX_BASE_ROWS = int(os.getenv("MARKET_RESAMPLE_MAX_BASE_ROWS", "50000"))
+# Velas por petición de fetch_ohlcv (Binance): la cola de la base cabe en una
+EXCHANGE_PAGE_LIMIT = 1000
+
+# Consolidación del staging del candle store fuera del camino de la petición
+_STORE_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candle-store")
+_PENDING_MERGES: Set[str] = set()
+_PENDING_MERGES_LOCK = threading.Lock()
+
 
 def get_ohlcv_data(
     symbol: str, timeframe: str = "30m", limit: int = 100, return_source: bool = False
@@ -29,8 +50,47 @@ def get_ohlcv_data(
             return cached_data, "cache"
         return cached_data
 
-    # ... execution continues ...
+    # 1a. Timeframe derivado de una serie base guardada (p. ej. 1h desde 5m):
+    # al exchange solo se le pide la cola de la base
+    if RESAMPLE_FROM_BASE:
+        derived = _resampled_ohlcv(symbol, timeframe, limit)
+        if derived is not None:
+            ohlcv, source = derived
+            cache.set(cache_key, ohlcv, ttl=20)
+            if return_source:
+                return ohlcv, source
+            return ohlcv
+
+    # 1b. Store local de velas (trading_lab/download_data.py): si la serie
+    # existe, al exchange solo se le piden las velas desde la última guardada
+    stored, fetch_limit = _stored_prefix(symbol, timeframe, limit)
+
+    data, ex_id = _fetch_exchange_ohlcv(symbol, timeframe, fetch_limit)
+    if data:
+        # Format
+        ohlcv = [_format_candle(candle) for candle in data]
+        if stored:
+            ohlcv = _merge_with_store(symbol, timeframe, stored, data, ohlcv, limit)
+
+        # Cache Valid Data: 20s TTL (Balance between load and freshness)
+        cache.set(cache_key, ohlcv, ttl=20)
+        if return_source:
+            return ohlcv, ex_id
+        return ohlcv
+
+    # 2. Last Resort: Fail gracefully (No Mocks allowed per User Request)
+    print("[MARKET DATA] 🚨 All exchanges failed. Returning EMPTY to avoid fake data.")
+    if return_source:
+        return [], "none"
+    return []
+
 
+def _fetch_exchange_ohlcv(symbol: str, timeframe: str, fetch_limit: int) -> Tuple[List[List[float]], str]:
+    """
+    Velas ccxt crudas [ts, o, h, l, c, v] de la primera exchange que responda
+    (binance → kraken → kucoin → gateio → bybit). Sin cache ni store:
+    ([], "none") si todas fallan.
+    """
     base_symbol = symbol.upper().replace("USDT", "").replace("-", "")
     ccxt_symbol = f"{base_symbol}/USDT"
 
@@ -67,7 +127,7 @@ def get_ohlcv_data(
             for attempt in range(max_retries):
                 try:
                     # Try Primary Symbol
-                    data = exchange.fetch_ohlcv(ccxt_symbol, timeframe, limit=limit)
+                    data = exchange.fetch_ohlcv(ccxt_symbol, timeframe, limit=fetch_limit)
                     break # Success
                 except Exception as e:
                     # Check for Alias (Migration fallback)
@@ -76,7 +136,7 @@ def get_ohlcv_data(
                         try:
                             alias_symbol = f"{alias}/USDT"
                             # print(f"[MARKET] ⚠️ Primary {ccxt_symbol} failed. Trying {alias_symbol}...")
-                            data = exchange.fetch_ohlcv(alias_symbol, timeframe, limit=limit)
+                            data = exchange.fetch_ohlcv(alias_symbol, timeframe, limit=fetch_limit)
                             # If successful, print and break
                             print(f"[MARKET] ✅ Recovered using alias {alias_symbol} on {ex_id}")
                             break
@@ -101,63 +161,239 @@ def get_ohlcv_data(
 
             if data and len(data) > 0:
                 print(f"[MARKET DATA] Success: {len(data)} candles from {ex_id}.")
-
-                # Format
-                ohlcv = []
-                for candle in data:
-                    ts = candle[0]
-                    dt = datetime.fromtimestamp(ts / 1000)
-                    ohlcv.append(
-                        {
-                            "timestamp": ts,
-                            "time": dt.strftime("%Y-%m-%d %H:%M"),
-                            "open": float(candle[1]),
-                            "high": float(candle[2]),
-                            "low": float(candle[3]),
-                            "close": float(candle[4]),
-                            "volume": float(candle[5]),
-                        }
-                    )
-
-                # Cache Valid Data: 20s TTL (Balance between load and freshness)
-                cache.set(cache_key, ohlcv, ttl=20)
-                if return_source:
-                    return ohlcv, ex_id
-                return ohlcv
+                return data, ex_id
         except BaseException as e:
             print(f"[MARKET DATA] ⚠️ Failed fetch from {ex_id}: {e}")
             continue  # Try next exchange
 
-    # 2. Last Resort: Fail gracefully (No Mocks allowed per User Request)
-    print("[MARKET DATA] 🚨 All exchanges failed. Returning EMPTY to avoid fake data.")
-    if return_source:
-        return [], "none"
-    return []
+    return [], "none"
 
 
-def generate_mock_ohlcv(symbol: str, limit: int = 100) -> List[Dict[str, Any]]:
-    """Generates synthetic OHLCV data for testing/fallback."""
+def _format_candle(candle) -> Dict[str, Any]:
+    ts = int(candle[0])
+    dt = datetime.fromtimestamp(ts / 1000)
+    return {
+        "timestamp": ts,
+        "time": dt.strftime("%Y-%m-%d %H:%M"),
+        "open": float(candle[1]),
+        "high": float(candle[2]),
+        "low": float(candle[3]),
+        "close": float(candle[4]),
+        "volume": float(candle[5]),
+    }
+
+
+def _stored_prefix(
+    symbol: str, timeframe: str, limit: int
+) -> Tuple[List[List[float]], int]:
+    """
+    (velas guardadas, cuántas pedir al exchange). Si el store no tiene la
+    serie o está demasiado atrasado para ahorrar algo, ([], limit).
+    """
+    try:
+        if not candle_store.exists(symbol, timeframe):
+            return [], limit
+        df = candle_store.read(symbol, timeframe, limit=limit)
+        if df.empty:
+            return [], limit
+        interval = timeframe_to_ms(timeframe)
+        last_ts = int(df.index[-1].value // 1_000_000)
+        # Velas desde la última guardada (incluida, para solapar) hasta la actual
+        fetch_limit = (int(time.time() * 1000) - last_ts) // interval + 1
+        if fetch_limit >= limit:
+            return [], limit
+        ts = df.index.as_unit("ms").asi8
+        rows = np.column_stack([ts, df[["open", "high", "low", "close", "volume"]].to_numpy()])
+        return rows.tolist(), max(int(fetch_limit), 2)
+    except Exception as e:
+        print(f"[MARKET DATA] ⚠️ Candle store read failed: {e}")
+        return [], limit
+
+
+def _merge_with_store(
+    symbol: str,
+    timeframe: str,
+    stored: List[List[float]],
+    data: List[List[float]],
+    fresh: List[Dict[str, Any]],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Histórico guardado + velas recientes del exchange (estas ganan)."""
+    first_new = fresh[0]["timestamp"]
+    merged = [_format_candle(c) for c in stored if c[0] < first_new] + fresh
+    # Devuelve al store las velas nuevas ya cerradas (la última sigue abierta)
+    closed = [c for c in data[:-1] if c[0] > stored[-1][0]]
+    if closed:
+        _store_closed(symbol, timeframe, closed)
+    return merged[-limit:]
+
+
+def _store_closed(symbol: str, timeframe: str, rows: List[List[float]]) -> None:
+    """
+    Velas cerradas nuevas al store sin reescribir la serie en la petición:
+    se guardan como página de staging (fichero pequeño) y la consolidación
+    (merge_staged, que reescribe el Parquet) va al hilo _STORE_WRITER. Una
+    consolidación pendiente por serie recoge todas las páginas que lleguen.
+    """
+    store = candle_store
+    try:
+        store.stage_page(symbol, timeframe, rows)
+    except Exception as e:
+        print(f"[MARKET DATA] ⚠️ Candle store staging failed: {e}")
+        return
+    key = str(store.path(symbol, timeframe))
+    with _PENDING_MERGES_LOCK:
+        if key in _PENDING_MERGES:
+            return
+        _PENDING_MERGES.add(key)
+    _STORE_WRITER.submit(_consolidate, store, symbol, timeframe, key)
+
+
+def _consolidate(store, symbol: str, timeframe: str, key: str) -> None:
+    # Fuera del set antes de consolidar: una página nueva durante el merge programa otro
+    with _PENDING_MERGES_LOCK:
+        _PENDING_MERGES.discard(key)
+    try:
+        store.merge_staged(symbol, timeframe)
+    except Exception as e:
+        print(f"[MARKET DATA] ⚠️ Candle store merge failed: {e}")
+
+
+def flush_store_writes(timeout: Optional[float] = None) -> None:
+    """Espera a que terminen las consolidaciones ya programadas (apagado, tests)."""
+    _STORE_WRITER.submit(lambda: None).result(timeout=timeout)
+
+
+def _resampled_ohlcv(
+    symbol: str, timeframe: str, limit: int
+) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+    """
+    (velas, fuente) de `timeframe` agregando la serie base guardada más
+    gruesa que lo divida. La base se lee del store como DataFrame y al
+    exchange solo se le pide su cola (una página como mucho); las velas
+    cerradas nuevas vuelven al store. None (y petición directa del
+    timeframe) si ya hay serie propia de `timeframe`, si no hay base, si
+    habría que agregar más de RESAMPLE_MAX_BASE_ROWS velas, si la base va
+    demasiado atrasada o si no cubre `limit` velas.
+    La última vela es la que está en curso, como la del exchange.
+    """
+    try:
+        # Serie guardada del mismo timeframe: _stored_prefix, sin agregar
+        if candle_store.exists(symbol, timeframe):
+            return None
+        base = resample.base_timeframe_for(timeframe, candle_store.timeframes(symbol))
+        if base is None:
+            return None
+        base_ms = timeframe_to_ms(base)
+        base_limit = (limit + 1) * (timeframe_to_ms(timeframe) // base_ms)
+        if base_limit > RESAMPLE_MAX_BASE_ROWS:
+            return None
+        df = candle_store.read(symbol, base, limit=base_limit)
+        if df.empty:
+            return None
+        last_ts = int(df.index[-1].value // 1_000_000)
+        behind = (int(time.time() * 1000) - last_ts) // base_ms + 1
+        if behind >= base_limit or behind > EXCHANGE_PAGE_LIMIT:
+            return None
+    except Exception as e:
+        print(f"[MARKET DATA] ⚠️ Resample check failed: {e}")
+        return None
+
+    # Solo la cola de la base (desde la última guardada, incluida)
+    data, source = _fetch_exchange_ohlcv(symbol, base, max(int(behind), 2))
+    if not data:
+        return None
+    closed = [c for c in data[:-1] if c[0] > last_ts]
+    if closed:
+        _store_closed(symbol, base, closed)
+    fresh = rows_to_frame(data)
+    df = pd.concat([df[df.index < fresh.index[0]], fresh])
+
+    out = resample.resample_frame(df, base, timeframe, include_partial=True)
+    if len(out) < limit:
+        return None
+    ts = out.index.as_unit("ms").asi8
+    values = out.to_numpy()
+    ohlcv = [_format_candle([t, *v]) for t, v in zip(ts[-limit:], values[-limit:])]
+    return ohlcv, f"resampled:{base}:{source}"
+
+
+# Regímenes de generate_mock_ohlcv ("mixed" los alterna cada MOCK_REGIME_SEGMENT velas)
+MOCK_REGIMES = ("random", "trend_up", "trend_down", "range", "volatile", "mixed")
+MOCK_REGIME_SEGMENT = 250
+
+
+def _mock_change(regime: str, rng, volatility: float, log_dev: float) -> float:
+    """Retorno de una vela según el régimen (log_dev = desvío log vs precio inicial)."""
+    if regime == "trend_up":
+        return rng.gauss(0.1 * volatility, 0.5 * volatility)
+    if regime == "trend_down":
+        return rng.gauss(-0.1 * volatility, 0.5 * volatility)
+    if regime == "range":
+        # Reversión a la media alrededor del precio inicial
+        return rng.gauss(-0.05 * log_dev, 0.5 * volatility)
+    if regime == "volatile":
+        jump = rng.gauss(0, 4 * volatility) if rng.random() < 0.02 else 0.0
+        return rng.gauss(0, 1.5 * volatility) + jump
+    return rng.uniform(-volatility, volatility)
+
+
+def generate_mock_ohlcv(
+    symbol: str,
+    limit: int = 100,
+    timeframe: str = "1h",
+    seed: Optional[int] = None,
+    regime: str = "random",
+    volatility: float = 0.02,
+    end_ts: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Generates synthetic OHLCV data for testing/fallback.
+
+    Sin argumentos extra se comporta como siempre (random global, velas de
+    1h que terminan ahora). Con `seed` y `end_ts` la serie es determinista,
+    que es lo que necesitan los benchmarks offline (tools/benchmark_suite.py).
+    `regime` fija la forma de la serie (ver MOCK_REGIMES) y `volatility` la
+    amplitud de cada vela.
+    """
+    import math
     import random
 
+    if regime not in MOCK_REGIMES:
+        raise ValueError(f"Régimen desconocido: {regime}")
+    rng = random.Random(seed) if seed is not None else random
+
     base_price = 50000.0 if "BTC" in symbol else 3000.0
     if "SOL" in symbol:
         base_price = 150.0
+    start_price = base_price
 
     data = []
-    current_time = int(time.time() * 1000)
-    # 1 hour intervals in ms
-    interval_ms = 3600 * 1000
+    current_time = int(time.time() * 1000) if end_ts is None else int(end_ts)
+    interval_ms = timeframe_to_ms(timeframe)
 
     for i in range(limit):
         ts = current_time - ((limit - i) * interval_ms)
         dt = datetime.fromtimestamp(ts / 1000)
 
-        # Random walk
-        change = random.uniform(-0.02, 0.02)
-        close = base_price * (1 + change)
-        open_p = base_price
-        high = max(open_p, close) * 1.01
-        low = min(open_p, close) * 0.99
+        active = regime
+        if regime == "mixed":
+            cycle = ("trend_up", "range", "trend_down", "volatile")
+            active = cycle[(i // MOCK_REGIME_SEGMENT) % len(cycle)]
+
+        if active == "random":
+            # Random walk (serie original)
+            change = rng.uniform(-volatility, volatility)
+            close = base_price * (1 + change)
+            open_p = base_price
+            high = max(open_p, close) * 1.01
+            low = min(open_p, close) * 0.99
+        else:
+            change = _mock_change(active, rng, volatility, math.log(base_price / start_price))
+            close = base_price * math.exp(change)
+            open_p = base_price
+            high = max(open_p, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+            low = min(open_p, close) * (1 - abs(rng.gauss(0, volatility / 2)))
 
         data.append(
             {
@@ -167,7 +403,7 @@ def generate_mock_ohlcv(symbol: str, limit: int = 100) -> List[Dict[str, Any]]:
                 "high": round(high, 2),
                 "low": round(low, 2),
                 "close": round(close, 2),
-                "volume": round(random.uniform(100, 1000), 2),
+                "volume": round(rng.uniform(100, 1000), 2),
             }
         )
         base_price = close
@@ -0,0 +1,100 @@
+# backend/core/monte_carlo.py
+"""
+Monte Carlo sobre la secuencia de retornos por trade.
+
+Un backtest da UNA secuencia de trades, y por tanto un único max drawdown.
+Remuestreando esa secuencia miles de veces se obtiene la distribución de
+drawdowns/retornos que la misma estrategia podría haber producido:
+
+- bootstrap: muestreo con reemplazo (varía retorno final y drawdown)
+- shuffle:   permutación del orden (mismo retorno final, varía el drawdown)
+
+Todo se calcula como una sola operación matricial (paths x trades) en
+NumPy, sin bucles en Python: 10.000 paths x 500 trades < 1s.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_PATHS = 10_000
+DEFAULT_RUIN_PCT = 50.0
+PERCENTILES = (5, 25, 50, 75, 95)
+METHODS = ("bootstrap", "shuffle")
+
+
+def simulate_equity_paths(
+    returns_pct: Sequence[float],
+    n_paths: int = DEFAULT_PATHS,
+    method: str = "bootstrap",
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Devuelve la matriz (n_paths, n_trades) de equity relativa (1.0 = capital
+    inicial) tras cada trade, componiendo los retornos remuestreados.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Use one of {METHODS}")
+
+    r = np.asarray(returns_pct, dtype=np.float64) / 100.0
+    rng = np.random.default_rng(seed)
+
+    if method == "bootstrap":
+        idx = rng.integers(0, len(r), size=(n_paths, len(r)))
+        sampled = r[idx]
+    else:
+        sampled = rng.permuted(np.broadcast_to(r, (n_paths, len(r))), axis=1)
+
+    # Un trade no puede perder más del 100% del capital
+    return np.cumprod(np.maximum(1.0 + sampled, 0.0), axis=1)
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    qs = np.percentile(values, PERCENTILES)
+    return {f"p{p}": round(float(q), 2) for p, q in zip(PERCENTILES, qs)}
+
+
+def monte_carlo_summary(
+    returns_pct: Sequence[float],
+    n_paths: int = DEFAULT_PATHS,
+    method: str = "bootstrap",
+    ruin_pct: float = DEFAULT_RUIN_PCT,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Distribuciones de retorno final y max drawdown (en %, percentiles) y
+    riesgo de ruina: % de paths cuya equity cae en algún momento un
+    `ruin_pct`% o más por debajo del capital inicial.
+    """
+    returns = np.asarray(returns_pct, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    if len(returns) < 2 or n_paths <= 0:
+        return {
+            "method": method,
+            "paths": 0,
+            "trades": int(len(returns)),
+            "final_return_pct": None,
+            "max_drawdown_pct": None,
+            "risk_of_ruin_pct": None,
+            "prob_loss_pct": None,
+        }
+
+    equity = simulate_equity_paths(returns, n_paths, method, seed)
+
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    max_dd = ((equity / peaks) - 1.0).min(axis=1) * 100.0
+    final_ret = (equity[:, -1] - 1.0) * 100.0
+    ruined = equity.min(axis=1) <= 1.0 - ruin_pct / 100.0
+
+    return {
+        "method": method,
+        "paths": int(n_paths),
+        "trades": int(len(returns)),
+        "final_return_pct": _percentiles(final_ret),
+        "max_drawdown_pct": _percentiles(max_dd),
+        "risk_of_ruin_pct": round(float(ruined.mean() * 100.0), 2),
+        "ruin_threshold_pct": ruin_pct,
+        "prob_loss_pct": round(float((final_ret < 0).mean() * 100.0), 2),
+    }
@@ -0,0 +1,240 @@
+# backend/core/optimizer.py
+"""
+Parameter sweep / optimizer sobre BacktestEngine.
+
+Toma un `strategy_id` y un espacio de búsqueda (grid o random), descarga
+el histórico UNA vez y evalúa cada combinación de parámetros sobre el
+mismo DataFrame en un pool de procesos. El DataFrame se envía a cada
+worker una sola vez (initializer), no por combinación.
+
+Espacios de búsqueda:
+- grid:   {"fast_period": [5, 10, 20], "slow_period": [50, 100]}
+- random: {"fast_period": {"min": 5, "max": 30, "type": "int"},
+           "tp_atr_mult": {"min": 1.0, "max": 3.0},
+           "mode": ["fast", "slow"]}
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from core.backtest_engine import BacktestEngine
+
+MAX_COMBINATIONS = int(os.getenv("BACKTEST_SWEEP_MAX_COMBINATIONS", "200"))
+DEFAULT_WORKERS = int(os.getenv("BACKTEST_SWEEP_WORKERS", "0")) or min(
+    4, os.cpu_count() or 1
+)
+
+# Métricas donde "más alto" es mejor (max_drawdown es negativo: -5 > -20)
+RANK_METRICS = ("roi_pct", "total_pnl", "win_rate", "max_drawdown", "total_trades")
+
+# Estado por worker: histórico compartido (solo lectura)
+_SHARED: Dict[str, Any] = {}
+
+
+class SweepError(ValueError):
+    """Espacio de búsqueda inválido o demasiado grande."""
+
+
+# === Search Spaces ===
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Producto cartesiano de un grid {param: [valores]}."""
+    if not grid:
+        return [{}]
+    for name, values in grid.items():
+        if not isinstance(values, (list, tuple)) or not values:
+            raise SweepError(f"Grid param '{name}' must be a non-empty list")
+    names = list(grid.keys())
+    return [dict(zip(names, combo)) for combo in itertools.product(*grid.values())]
+
+
+def sample_space(
+    space: Dict[str, Any], n_iter: int, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Muestreo aleatorio de `n_iter` combinaciones únicas. Cada parámetro es
+    una lista (elección) o un rango {"min", "max", "type": "int"|"float"}.
+    """
+    rng = random.Random(seed)
+    samplers = {}
+    for name, spec in space.items():
+        if isinstance(spec, (list, tuple)):
+            if not spec:
+                raise SweepError(f"Space param '{name}' has no choices")
+            samplers[name] = lambda s=spec: rng.choice(s)
+        elif isinstance(spec, dict) and "min" in spec and "max" in spec:
+            lo, hi = spec["min"], spec["max"]
+            if lo > hi:
+                raise SweepError(f"Space param '{name}': min > max")
+            if spec.get("type") == "int" or (
+                isinstance(lo, int) and isinstance(hi, int) and "type" not in spec
+            ):
+                samplers[name] = lambda lo=int(lo), hi=int(hi): rng.randint(lo, hi)
+            else:
+                samplers[name] = lambda lo=lo, hi=hi: round(rng.uniform(lo, hi), 4)
+        else:
+            raise SweepError(f"Space param '{name}' must be a list or {{min, max}}")
+
+    combos: List[Dict[str, Any]] = []
+    seen = set()
+    # Límite de intentos para espacios discretos más pequeños que n_iter
+    for _ in range(n_iter * 20):
+        if len(combos) >= n_iter:
+            break
+        combo = {name: sample() for name, sample in samplers.items()}
+        key = tuple(sorted(combo.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        combos.append(combo)
+    return combos
+
+
+def build_combinations(
+    grid: Optional[Dict[str, List[Any]]] = None,
+    space: Optional[Dict[str, Any]] = None,
+    n_iter: int = 20,
+    seed: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    if grid and space:
+        raise SweepError("Use either 'grid' or 'space', not both")
+    if space:
+        combos = sample_space(space, n_iter, seed)
+    else:
+        combos = expand_grid(grid or {})
+    if len(combos) > MAX_COMBINATIONS:
+        raise SweepError(
+            f"{len(combos)} combinations exceed the limit of {MAX_COMBINATIONS}"
+        )
+    return combos
+
+
+# === Workers ===
+
+
+def _init_worker(df: pd.DataFrame, initial_capital: float):
+    _SHARED["df"] = df
+    _SHARED["initial_capital"] = initial_capital
+
+
+def _evaluate(
+    strategy_id: str, symbol: str, timeframe: str, params: Dict[str, Any]
+) -> Dict[str, Any]:
+    engine = BacktestEngine(initial_capital=_SHARED["initial_capital"])
+    try:
+        result = engine.run_on_data(
+            strategy_id, symbol, timeframe, _SHARED["df"], config=params or None
+        )
+        return {"params": params, "metrics": result["metrics"], "error": None}
+    except Exception as e:
+        return {"params": params, "metrics": None, "error": str(e)}
+
+
+def rank_results(
+    results: List[Dict[str, Any]], metric: str = "roi_pct"
+) -> List[Dict[str, Any]]:
+    """Ordena por `metric` (desc), desempata por drawdown; errores al final."""
+    ok = [r for r in results if r["metrics"]]
+    failed = [r for r in results if not r["metrics"]]
+    ok.sort(
+        key=lambda r: (r["metrics"].get(metric, 0), r["metrics"].get("max_drawdown", 0)),
+        reverse=True,
+    )
+    ranked = ok + failed
+    for i, r in enumerate(ranked, start=1):
+        r["rank"] = i
+    return ranked
+
+
+# === Public API ===
+
+
+def run_sweep(
+    strategy_id: str,
+    symbol: str,
+    timeframe: str = "1h",
+    days: int = 30,
+    grid: Optional[Dict[str, List[Any]]] = None,
+    space: Optional[Dict[str, Any]] = None,
+    n_iter: int = 20,
+    seed: Optional[int] = None,
+    metric: str = "roi_pct",
+    initial_capital: float = 1000.0,
+    workers: Optional[int] = None,
+    df: Optional[pd.DataFrame] = None,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta el barrido y devuelve la tabla ordenada.
+    `df` permite inyectar un histórico ya descargado (tests, walk-forward).
+    `workers=1` ejecuta en el proceso actual, sin pool.
+    `progress_callback(hechas, total, 0)` se llama tras cada combinación
+    (mismo contrato que BacktestEngine; si lanza, el barrido se aborta).
+    """
+    if metric not in RANK_METRICS:
+        raise SweepError(f"Unknown metric '{metric}'. Use one of {RANK_METRICS}")
+
+    combos = build_combinations(grid, space, n_iter, seed)
+    if df is None:
+        df = BacktestEngine(initial_capital).fetch_history(symbol, timeframe, days)
+
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(combos)))
+    started = time.perf_counter()
+    print(
+        f"[SWEEP] {strategy_id} {symbol} {timeframe}: {len(combos)} combinations, "
+        f"{len(df)} candles, {workers} workers"
+    )
+
+    def report(done: int) -> None:
+        if progress_callback:
+            progress_callback(done, len(combos), 0)
+
+    if workers == 1:
+        _init_worker(df, initial_capital)
+        results = []
+        for p in combos:
+            results.append(_evaluate(strategy_id, symbol, timeframe, p))
+            report(len(results))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(df, initial_capital),
+        ) as pool:
+            futures = {
+                pool.submit(_evaluate, strategy_id, symbol, timeframe, p): i
+                for i, p in enumerate(combos)
+            }
+            results = [None] * len(combos)
+            try:
+                for done, f in enumerate(as_completed(futures), start=1):
+                    results[futures[f]] = f.result()
+                    report(done)
+            except BaseException:
+                # Cancelación (JobCancelled) o error: no arrancar lo pendiente
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    elapsed = time.perf_counter() - started
+    print(f"[SWEEP] Done in {elapsed:.1f}s")
+
+    return {
+        "strategy_id": strategy_id,
+        "token": symbol.upper(),
+        "timeframe": timeframe,
+        "days": days,
+        "metric": metric,
+        "combinations": len(combos),
+        "candles": len(df),
+        "elapsed_seconds": round(elapsed, 2),
+        "results": rank_results(results, metric),
+    }
@@ -0,0 +1,405 @@
+# backend/core/portfolio_backtest.py
+"""
+Backtest multi-activo con capital compartido.
+
+`BacktestEngine` simula un token y una posición a la vez. Las personas del
+marketplace operan muchos tokens con la misma cuenta, así que aquí:
+
+1. Se generan las señales de cada token de forma causal: las estrategias
+   con `emits_history` (MA Cross, Bollinger Reversion, Donchian V2) en una
+   sola llamada vectorizada a analyze() sobre el histórico completo; el
+   resto (solo miran la última vela) vela a vela con ventanas crecientes,
+   igual que BacktestEngine. Solo las primeras escalan a 50 tokens x miles
+   de velas en segundos; las demás cuestan lo mismo que N backtests.
+2. Todo se alinea en una rejilla común de timestamps y se convierte en
+   matrices (tiempo x tokens): OHLC, dirección, TP, SL y confianza.
+3. La simulación avanza por el tiempo operando vectorialmente sobre todos
+   los tokens: salidas TP/SL (SL primero, igual que BacktestEngine),
+   entradas limitadas por `max_positions` y por el cash disponible, y
+   tamaño de posición como % del equity.
+
+La vía en bloque asume que los indicadores de la estrategia son causales
+(EMAs, medias móviles, ATR...); la vía vela a vela no ve velas futuras.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import BacktestEngine, WARMUP_CANDLES
+
+MAX_TOKENS = 50
+MAX_DAYS = 365
+
+
+def align_frames(data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Alinea los históricos en una rejilla común de timestamps (unión).
+    Las velas que faltan quedan como NaN y no generan entradas ni salidas.
+    """
+    tokens = list(data.keys())
+    grid = np.unique(
+        np.concatenate([df["timestamp"].to_numpy(dtype=np.int64) for df in data.values()])
+    )
+    shape = (len(grid), len(tokens))
+    mats = {k: np.full(shape, np.nan) for k in ("open", "high", "low", "close")}
+    for j, tok in enumerate(tokens):
+        df = data[tok]
+        rows = np.searchsorted(grid, df["timestamp"].to_numpy(dtype=np.int64))
+        for k in mats:
+            mats[k][rows, j] = df[k].to_numpy(dtype=np.float64)
+    return {"tokens": tokens, "timestamps": grid, **mats}
+
+
+def history_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Copia de `df` indexada por fecha (columna `timestamp` en ms), como la usa analyze()."""
+    d = df.copy()
+    if "timestamp" in d.columns and not isinstance(d.index, pd.DatetimeIndex):
+        d.index = pd.DatetimeIndex(pd.to_datetime(d["timestamp"].to_numpy(), unit="ms"))
+    return d
+
+
+def token_signals(strategy, token: str, df: pd.DataFrame, timeframe: str, warmup: int = WARMUP_CANDLES):
+    """
+    Señales de un token sobre su histórico sin mirar al futuro.
+    `emits_history`: una sola llamada vectorizada a analyze() con todo el
+    histórico. Si no, una llamada a generate_signals por vela con
+    df[: i + 1] (O(T²) como BacktestEngine, pero correcto para estrategias
+    que solo evalúan la última vela).
+    """
+    if getattr(strategy, "emits_history", False):
+        return strategy.analyze(history_frame(df), token, timeframe)
+
+    signals = []
+    for i in range(warmup, len(df)):
+        try:
+            signals.extend(
+                strategy.generate_signals(
+                    tokens=[token],
+                    timeframe=timeframe,
+                    # Copia: algunas estrategias reindexan el DataFrame del context in-place
+                    context={"data": {token: df.iloc[: i + 1].copy()}},
+                )
+            )
+        except Exception:
+            continue  # como BacktestEngine: una vela con error no genera entrada
+    return signals
+
+
+def build_signal_matrices(
+    strategy,
+    data: Dict[str, pd.DataFrame],
+    timeframe: str,
+    timestamps: np.ndarray,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Genera las señales de cada token (token_signals) y coloca cada una en la
+    vela de su timestamp. Si hay varias señales en la misma vela gana la última.
+    `progress_callback(tokens hechos, total, 0)` se llama antes de cada token y al final.
+    """
+    shape = (len(timestamps), len(data))
+    direction = np.zeros(shape, dtype=np.int8)
+    entry = np.full(shape, np.nan)
+    tp = np.full(shape, np.nan)
+    sl = np.full(shape, np.nan)
+    confidence = np.zeros(shape)
+
+    for j, (tok, df) in enumerate(data.items()):
+        if progress_callback:
+            progress_callback(j, len(data), 0)
+        try:
+            signals = token_signals(strategy, tok, df, timeframe)
+        except Exception as e:
+            print(f"[PORTFOLIO] Error generating signals for {tok}: {e}")
+            continue
+
+        for sig in signals:
+            if sig.direction not in ("long", "short") or sig.tp is None or sig.sl is None:
+                continue
+            ts_ms = int(pd.Timestamp(sig.timestamp).value // 1_000_000)
+            i = np.searchsorted(timestamps, ts_ms)
+            if i >= len(timestamps) or timestamps[i] != ts_ms:
+                continue
+            direction[i, j] = 1 if sig.direction == "long" else -1
+            entry[i, j] = sig.entry
+            tp[i, j] = sig.tp
+            sl[i, j] = sig.sl
+            confidence[i, j] = sig.confidence or 0.0
+
+    if progress_callback:
+        progress_callback(len(data), len(data), 0)
+
+    return {
+        "direction": direction,
+        "entry": entry,
+        "tp": tp,
+        "sl": sl,
+        "confidence": confidence,
+    }
+
+
+def simulate_portfolio(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    signals: Dict[str, np.ndarray],
+    initial_capital: float = 1000.0,
+    max_positions: int = 5,
+    position_size_pct: float = 20.0,
+    warmup: int = WARMUP_CANDLES,
+) -> Dict[str, Any]:
+    """
+    Núcleo de la simulación sobre matrices (T x N). Devuelve arrays crudos:
+    equity y posiciones abiertas por vela, y la lista de trades cerrados.
+    """
+    T, N = close.shape
+    direction = signals["direction"]
+
+    cash = float(initial_capital)
+    is_open = np.zeros(N, dtype=bool)
+    pos_dir = np.zeros(N)
+    pos_entry = np.zeros(N)
+    pos_tp = np.zeros(N)
+    pos_sl = np.zeros(N)
+    pos_qty = np.zeros(N)
+    pos_alloc = np.zeros(N)
+    pos_start = np.zeros(N, dtype=np.int64)
+    last_close = np.where(np.isnan(close[0]), 0.0, close[0])
+
+    equity = np.full(T, float(initial_capital))
+    open_count = np.zeros(T, dtype=np.int32)
+    trades: List[Dict[str, Any]] = []
+    skipped = 0
+
+    for t in range(warmup, T):
+        h, lo, c = high[t], low[t], close[t]
+        valid = ~np.isnan(c)
+        last_close = np.where(valid, c, last_close)
+
+        # --- A. Salidas (SL antes que TP, como BacktestEngine) ---
+        if is_open.any():
+            live = is_open & valid
+            is_long = pos_dir > 0
+            sl_hit = live & np.where(is_long, lo <= pos_sl, h >= pos_sl)
+            tp_hit = live & ~sl_hit & np.where(is_long, h >= pos_tp, lo <= pos_tp)
+            closing = sl_hit | tp_hit
+            if closing.any():
+                exit_px = np.where(sl_hit, pos_sl, pos_tp)
+                pnl = (exit_px - pos_entry) * pos_qty * pos_dir
+                for j in np.flatnonzero(closing):
+                    cash += pos_alloc[j] + pnl[j]
+                    trades.append(
+                        {
+                            "token_idx": int(j),
+                            "entry_idx": int(pos_start[j]),
+                            "exit_idx": t,
+                            "type": "LONG" if pos_dir[j] > 0 else "SHORT",
+                            "entry": float(pos_entry[j]),
+                            "exit": float(exit_px[j]),
+                            "pnl": float(pnl[j]),
+                            "return_pct": float(pnl[j] / pos_alloc[j] * 100),
+                            "reason": "STOP_LOSS" if sl_hit[j] else "TAKE_PROFIT",
+                        }
+                    )
+                is_open &= ~closing
+
+        # Equity antes de entrar (para dimensionar)
+        unreal = np.where(is_open, (last_close - pos_entry) * pos_qty * pos_dir, 0.0)
+        eq_now = cash + float(np.sum(np.where(is_open, pos_alloc, 0.0) + unreal))
+
+        # --- B. Entradas (prioridad por confianza, límite de slots y cash) ---
+        candidates = np.flatnonzero((direction[t] != 0) & ~is_open & valid)
+        if len(candidates):
+            slots = max_positions - int(is_open.sum())
+            order = candidates[np.argsort(-signals["confidence"][t, candidates], kind="stable")]
+            for j in order:
+                alloc = min(eq_now * position_size_pct / 100.0, cash)
+                price = signals["entry"][t, j]
+                if slots <= 0 or alloc <= 0 or not price > 0:
+                    skipped += 1
+                    continue
+                is_open[j] = True
+                pos_dir[j] = direction[t, j]
+                pos_entry[j] = price
+                pos_tp[j] = signals["tp"][t, j]
+                pos_sl[j] = signals["sl"][t, j]
+                pos_alloc[j] = alloc
+                pos_qty[j] = alloc / price
+                pos_start[j] = t
+                cash -= alloc
+                slots -= 1
+
+        # --- C. Equity mark-to-market ---
+        unreal = np.where(is_open, (last_close - pos_entry) * pos_qty * pos_dir, 0.0)
+        equity[t] = cash + float(np.sum(np.where(is_open, pos_alloc, 0.0) + unreal))
+        open_count[t] = int(is_open.sum())
+
+    return {
+        "equity": equity,
+        "open_positions": open_count,
+        "trades": trades,
+        "skipped_signals": skipped,
+        "final_cash": cash,
+        "still_open": int(is_open.sum()),
+    }
+
+
+class PortfolioBacktestEngine(BacktestEngine):
+    """
+    Backtest de una estrategia sobre N tokens con capital compartido.
+    """
+
+    def __init__(
+        self,
+        initial_capital: float = 1000.0,
+        max_positions: int = 5,
+        position_size_pct: float = 20.0,
+    ):
+        super().__init__(initial_capital=initial_capital)
+        self.max_positions = max_positions
+        self.position_size_pct = position_size_pct
+
+    def run(
+        self,
+        strategy_id: str,
+        tokens: List[str],
+        timeframe: str = "1h",
+        days: int = 30,
+        config: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        tokens = [t.upper() for t in dict.fromkeys(tokens)][:MAX_TOKENS]
+
+        def _fetch(tok):
+            try:
+                return tok, self.fetch_history(tok.lower(), timeframe, days)
+            except Exception as e:
+                print(f"[PORTFOLIO] Skipping {tok}: {e}")
+                return tok, None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            data = {tok: df for tok, df in pool.map(_fetch, tokens) if df is not None}
+
+        if not data:
+            raise Exception("Datos históricos insuficientes para backtest")
+        return self.run_on_data(
+            strategy_id, data, timeframe, config=config, progress_callback=progress_callback
+        )
+
+    def run_on_data(
+        self,
+        strategy_id: str,
+        data: Dict[str, pd.DataFrame],
+        timeframe: str,
+        config: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        `progress_callback(tokens hechos, total, 0)` se llama según se generan
+        las señales de cada token; si lanza una excepción el backtest se aborta
+        (cancelación de jobs, como en BacktestEngine).
+        """
+        self.load_strategy(strategy_id, config=config)
+        strategy = self.strategies.get(strategy_id)
+        if not strategy:
+            raise Exception("Estrategia no cargada")
+
+        aligned = align_frames(data)
+        tokens, ts = aligned["tokens"], aligned["timestamps"]
+        if len(ts) <= WARMUP_CANDLES:
+            raise Exception("Datos históricos insuficientes para backtest")
+
+        print(f"[PORTFOLIO] {strategy_id}: {len(tokens)} tokens x {len(ts)} candles")
+        signals = build_signal_matrices(strategy, data, timeframe, ts, progress_callback)
+        sim = simulate_portfolio(
+            aligned["high"],
+            aligned["low"],
+            aligned["close"],
+            signals,
+            initial_capital=self.initial_capital,
+            max_positions=self.max_positions,
+            position_size_pct=self.position_size_pct,
+        )
+        return self._format(sim, tokens, ts)
+
+    def _format(
+        self, sim: Dict[str, Any], tokens: List[str], ts: np.ndarray
+    ) -> Dict[str, Any]:
+        times = pd.to_datetime(ts, unit="ms").strftime("%Y-%m-%d %H:%M")
+        equity = sim["equity"]
+        trades = sim["trades"]
+
+        per_token: Dict[str, Dict[str, Any]] = {}
+        formatted = []
+        for n, tr in enumerate(trades, start=1):
+            tok = tokens[tr["token_idx"]]
+            stats = per_token.setdefault(tok, {"trades": 0, "wins": 0, "pnl": 0.0})
+            stats["trades"] += 1
+            stats["wins"] += tr["pnl"] > 0
+            stats["pnl"] += tr["pnl"]
+            formatted.append(
+                {
+                    "id": n,
+                    "symbol": tok,
+                    "type": tr["type"],
+                    "entry_time": times[tr["entry_idx"]],
+                    "exit_time": times[tr["exit_idx"]],
+                    "exit_ts": self._safe_float(ts[tr["exit_idx"]]),
+                    "entry": tr["entry"],
+                    "exit": tr["exit"],
+                    "pnl": round(self._safe_float(tr["pnl"]), 2),
+                    "result": "WIN" if tr["pnl"] > 0 else "LOSS",
+                    "reason": tr["reason"],
+                }
+            )
+        for stats in per_token.values():
+            stats["pnl"] = round(stats["pnl"], 2)
+
+        sl = slice(WARMUP_CANDLES, len(ts))
+        eq = equity[sl]
+        peaks = np.maximum.accumulate(np.maximum(eq, self.initial_capital))
+        max_dd = float(((eq - peaks) / peaks).min()) if len(eq) else 0.0
+        final_equity = float(eq[-1]) if len(eq) else self.initial_capital
+        pnls = [t["pnl"] for t in trades]
+        wins = sum(1 for p in pnls if p > 0)
+
+        curve = [
+            {
+                "time": times[i],
+                "timestamp": self._safe_float(ts[i]),
+                "strategy_equity": round(self._safe_float(equity[i]), 2),
+                "open_positions": int(sim["open_positions"][i]),
+            }
+            for i in range(sl.start, sl.stop)
+        ]
+
+        return {
+            "metrics": {
+                "initial_capital": round(self.initial_capital, 2),
+                "final_capital": round(self._safe_float(final_equity), 2),
+                "total_pnl": round(self._safe_float(final_equity - self.initial_capital), 2),
+                "roi_pct": round(
+                    self._safe_float(
+                        (final_equity - self.initial_capital) / self.initial_capital * 100
+                    ),
+                    2,
+                ),
+                "max_drawdown": round(self._safe_float(max_dd * 100), 2),
+                "total_trades": len(trades),
+                "win_rate": round(wins / len(trades) * 100, 1) if trades else 0,
+                "best_trade": round(max(pnls), 2) if pnls else 0,
+                "worst_trade": round(min(pnls), 2) if pnls else 0,
+                "max_positions": self.max_positions,
+                "position_size_pct": self.position_size_pct,
+                "skipped_signals": sim["skipped_signals"],
+                "open_at_end": sim["still_open"],
+            },
+            "tokens": per_token,
+            "trades": formatted[-50:],
+            "curve": curve,
+        }
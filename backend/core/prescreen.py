@@ -0,0 +1,237 @@
+# backend/core/prescreen.py
+"""
+Pre-screen barato para personas scanner (ALL / SCANNER / *).
+
+Una persona scanner ejecuta su estrategia sobre todo VALID_TOKENS_FULL en
+cada ciclo, aunque casi ningún token esté cerca de un setup. Cada estrategia
+puede declarar (Strategy.prescreen) unas reglas baratas, p. ej.:
+
+    near_donchian(20, atr_mult=0.25)   cierre a menos de X ATR de una banda
+    rsi_below(35)                      RSI < 35
+    atr_expanding(14, 20)              ATR > media del ATR
+
+Las reglas se evalúan de una vez sobre un panel de velas recientes
+(filas = velas alineadas por el final, columnas = tokens) con operaciones
+de pandas/numpy por columnas, y solo los tokens que pasan llegan a
+generate_signals.
+
+El filtro debe ser un superconjunto del setup real (umbrales con holgura):
+una regla que descarta un token con setup es un bug, uno que deja pasar de
+más solo cuesta tiempo. Por eso:
+- basta con que se cumpla en alguna de las últimas `rows` velas (las
+  estrategias miran la vela en curso o la última cerrada);
+- los tokens sin histórico suficiente para evaluar pasan siempre.
+
+El panel se descarga con las velas que pedirá generate_signals
+(PreScreen.fetch_limit) y guarda los DataFrames descargados
+(CandlePanel.frames): el scheduler se los pasa a la estrategia en
+context["data"], así un superviviente no cuesta una segunda descarga.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+PANEL_WORKERS = 8
+
+
+# === Panel ===
+
+
+@dataclass
+class CandlePanel:
+    """Velas recientes de muchos tokens: un DataFrame (velas × tokens) por campo."""
+
+    open: pd.DataFrame
+    high: pd.DataFrame
+    low: pd.DataFrame
+    close: pd.DataFrame
+    volume: pd.DataFrame
+    # DataFrames descargados por token (todas las filas, con timestamp) para generate_signals
+    frames: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+    @property
+    def tokens(self) -> List[str]:
+        return list(self.close.columns)
+
+    def bars(self) -> pd.Series:
+        """Velas válidas por token."""
+        return self.close.notna().sum(axis=0)
+
+
+def panel_from_frames(frames: Dict[str, pd.DataFrame], lookback: int) -> CandlePanel:
+    """
+    Panel con las últimas `lookback` velas de cada token, alineadas por el
+    final (la última fila es la vela más reciente de cada uno). Los tokens
+    con menos velas quedan con NaN al principio.
+    """
+    tokens = list(frames)
+    arrays = {f: np.full((lookback, len(tokens)), np.nan) for f in PANEL_FIELDS}
+    for j, token in enumerate(tokens):
+        df = frames[token]
+        if df is None or df.empty:
+            continue
+        tail = df.iloc[-lookback:]
+        for f in PANEL_FIELDS:
+            arrays[f][lookback - len(tail):, j] = tail[f].to_numpy(dtype=np.float64)
+    kept = {t: df for t, df in frames.items() if df is not None and not df.empty}
+    return CandlePanel(**{f: pd.DataFrame(a, columns=tokens) for f, a in arrays.items()}, frames=kept)
+
+
+def build_panel(
+    tokens: Sequence[str],
+    timeframe: str,
+    lookback: int,
+    fetch: Optional[Callable] = None,
+    workers: int = PANEL_WORKERS,
+) -> CandlePanel:
+    """Descarga (caché/candle store/exchange) las últimas `lookback` velas de cada token."""
+    if fetch is None:
+        from core.market_data_api import get_ohlcv_data as fetch
+
+    def _load(token):
+        try:
+            rows = fetch(token, timeframe, limit=lookback)
+        except Exception as e:
+            print(f"[PRESCREEN] ⚠️ {token} {timeframe}: {e}")
+            rows = []
+        return token, pd.DataFrame(rows) if rows else None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        frames = dict(pool.map(_load, tokens))
+    return panel_from_frames(frames, lookback)
+
+
+# === Indicadores por columnas ===
+
+
+def _rma(frame: pd.DataFrame, period: int) -> pd.DataFrame:
+    return frame.ewm(alpha=1.0 / period, adjust=False).mean()
+
+
+def panel_rsi(close: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    delta = close.diff()
+    up = _rma(delta.clip(lower=0), period)
+    down = _rma((-delta).clip(lower=0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + up / down)
+    return rsi.where(down != 0, 100.0).where(delta.notna())
+
+
+def panel_atr(panel: CandlePanel, period: int = 14) -> pd.DataFrame:
+    prev = panel.close.shift(1)
+    tr = np.fmax(panel.high - panel.low,
+                 np.fmax((panel.high - prev).abs(), (panel.low - prev).abs()))
+    return _rma(tr.where(prev.notna()), period)
+
+
+# === Reglas ===
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Regla vectorizada: panel -> DataFrame booleano (velas × tokens)."""
+
+    name: str
+    fn: Callable[[CandlePanel], pd.DataFrame]
+    lookback: int
+
+    def __call__(self, panel: CandlePanel) -> pd.DataFrame:
+        return self.fn(panel).fillna(False).astype(bool)
+
+
+def rsi_below(threshold: float, period: int = 14) -> Rule:
+    return Rule(f"rsi{period}<{threshold}",
+                lambda p: panel_rsi(p.close, period) < threshold, 4 * period)
+
+
+def rsi_above(threshold: float, period: int = 14) -> Rule:
+    return Rule(f"rsi{period}>{threshold}",
+                lambda p: panel_rsi(p.close, period) > threshold, 4 * period)
+
+
+def rsi_outside(low: float, high: float, period: int = 14) -> Rule:
+    """RSI < low o RSI > high (setups de reversión en los dos sentidos)."""
+    def fn(p):
+        rsi = panel_rsi(p.close, period)
+        return (rsi < low) | (rsi > high)
+    return Rule(f"rsi{period}∉[{low},{high}]", fn, 4 * period)
+
+
+def near_donchian(period: int = 20, atr_mult: float = 0.5, atr_period: int = 14) -> Rule:
+    """Cierre a menos de `atr_mult` ATR de una banda Donchian previa (o ya fuera)."""
+    def fn(p):
+        upper = p.high.rolling(period).max().shift(1)
+        lower = p.low.rolling(period).min().shift(1)
+        dist = np.fmin(upper - p.close, p.close - lower)
+        return dist <= atr_mult * panel_atr(p, atr_period)
+    return Rule(f"donchian{period}±{atr_mult}atr", fn, max(period + 1, 4 * atr_period))
+
+
+def atr_expanding(atr_period: int = 14, ma_period: int = 20, slack: float = 1.0) -> Rule:
+    """ATR > slack · SMA(ATR, ma_period)."""
+    def fn(p):
+        atr = panel_atr(p, atr_period)
+        return atr > slack * atr.rolling(ma_period).mean()
+    return Rule(f"atr{atr_period}>{slack}·ma{ma_period}", fn, 4 * atr_period + ma_period)
+
+
+def all_of(*rules: Rule) -> Rule:
+    def fn(p):
+        out = rules[0](p)
+        for r in rules[1:]:
+            out = out & r(p)
+        return out
+    return Rule(" & ".join(r.name for r in rules), fn, max(r.lookback for r in rules))
+
+
+def any_of(*rules: Rule) -> Rule:
+    def fn(p):
+        out = rules[0](p)
+        for r in rules[1:]:
+            out = out | r(p)
+        return out
+    return Rule("(" + " | ".join(r.name for r in rules) + ")", fn, max(r.lookback for r in rules))
+
+
+@dataclass(frozen=True)
+class PreScreen:
+    """
+    Reglas (AND) que declara una estrategia. Un token pasa si se cumplen en
+    alguna de las últimas `rows` velas, o si no tiene `lookback` velas.
+    """
+
+    rules: Tuple[Rule, ...]
+    rows: int = 2
+    # Velas que descarga generate_signals: el panel pide las mismas (misma
+    # clave de caché) y se las pasa en context["data"]. 0 = solo `lookback`
+    fetch_limit: int = 0
+
+    @property
+    def lookback(self) -> int:
+        return max(r.lookback for r in self.rules) + self.rows
+
+    @property
+    def panel_rows(self) -> int:
+        """Velas a descargar por token para el panel."""
+        return max(self.lookback, self.fetch_limit)
+
+    @property
+    def name(self) -> str:
+        return " & ".join(r.name for r in self.rules)
+
+    def mask(self, panel: CandlePanel) -> pd.Series:
+        hit = all_of(*self.rules)(panel).iloc[-self.rows:].any(axis=0)
+        unknown = panel.bars() < self.lookback
+        return hit | unknown
+
+    def survivors(self, panel: CandlePanel, tokens: Optional[Iterable[str]] = None) -> List[str]:
+        """Tokens que pasan, en el orden de `tokens` (por defecto los del panel)."""
+        mask = self.mask(panel)
+        tokens = panel.tokens if tokens is None else tokens
+        # Tokens fuera del panel no se han podido evaluar: pasan
+        return [t for t in tokens if bool(mask.get(t, True))]
@@ -0,0 +1,165 @@
+# backend/core/resample.py
+"""
+Timeframes superiores derivados de una serie base del candle store.
+
+En vez de descargar 5m, 15m, 1h, 4h y 1d por separado, basta con guardar
+una serie base (p. ej. 1m o 5m) y agregar:
+
+    open = primera, high = máximo, low = mínimo, close = última, volume = suma
+
+Las velas se agrupan por la apertura del timeframe destino alineada a epoch
+UTC, igual que los exchanges (1d a las 00:00 UTC; 1w empieza en lunes).
+
+Velas parciales: una vela derivada solo se considera completa si tiene las
+`ratio` velas base, contiguas y empezando en su apertura. Las incompletas se
+descartan (la primera del rango suele estarlo, y un hueco en la base
+falsearía open/close), salvo la última con `include_partial=True`, que se
+devuelve como vela en curso, igual que hace el exchange con la vela abierta.
+
+compare_candles contrasta el resultado con las velas del exchange
+(tools/verify_resample.py).
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.candle_store import OHLCV_COLUMNS, CandleStore, rows_to_frame, timeframe_to_ms, to_ms
+
+# Las velas semanales de Binance abren el lunes; epoch (1970-01-01) fue jueves
+_WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def bucket_offset(timeframe: str) -> int:
+    return _WEEK_OFFSET_MS if timeframe.endswith("w") else 0
+
+
+def bucket_start(ts_ms: np.ndarray, timeframe: str) -> np.ndarray:
+    """Apertura de la vela `timeframe` que contiene cada timestamp (ms)."""
+    interval = timeframe_to_ms(timeframe)
+    off = bucket_offset(timeframe)
+    return (np.asarray(ts_ms, dtype=np.int64) - off) // interval * interval + off
+
+
+def can_derive(base_timeframe: str, timeframe: str) -> bool:
+    base, target = timeframe_to_ms(base_timeframe), timeframe_to_ms(timeframe)
+    if base >= target or target % base:
+        return False
+    # Con offset semanal la base tiene que caer en las aperturas de semana
+    return bucket_offset(timeframe) % base == 0
+
+
+def base_timeframe_for(timeframe: str, available: Iterable[str]) -> Optional[str]:
+    """La base disponible más gruesa de la que se puede derivar `timeframe` (menos filas que agregar)."""
+    candidates = [tf for tf in available if can_derive(tf, timeframe)]
+    return max(candidates, key=timeframe_to_ms, default=None)
+
+
+def resample_frame(
+    df: pd.DataFrame,
+    base_timeframe: str,
+    timeframe: str,
+    include_partial: bool = False,
+) -> pd.DataFrame:
+    """
+    Agrega un DataFrame del store (índice `timestamp` UTC ordenado y sin
+    duplicados, columnas OHLCV) al timeframe `timeframe`.
+    """
+    if not can_derive(base_timeframe, timeframe):
+        raise ValueError(f"No se puede derivar {timeframe} desde {base_timeframe}")
+    if df.empty:
+        return rows_to_frame([])
+
+    base_ms = timeframe_to_ms(base_timeframe)
+    ratio = timeframe_to_ms(timeframe) // base_ms
+    ts = to_ms(df.index)
+    buckets = bucket_start(ts, timeframe)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    counts = ends - starts + 1
+
+    first_ts, last_ts = ts[starts], ts[ends]
+    contiguous = (last_ts - first_ts) // base_ms + 1 == counts
+    aligned = first_ts == buckets[starts]
+    keep = contiguous & aligned & (counts == ratio)
+    if include_partial:
+        keep[-1] = contiguous[-1] and aligned[-1]
+
+    o, h, lo, c, v = (df[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS)
+    out = np.column_stack([
+        buckets[starts],
+        o[starts],
+        np.maximum.reduceat(h, starts),
+        np.minimum.reduceat(lo, starts),
+        c[ends],
+        np.add.reduceat(v, starts),
+    ])[keep]
+    return rows_to_frame(out)
+
+
+def derive_from_store(
+    store: CandleStore,
+    symbol: str,
+    timeframe: str,
+    limit: Optional[int] = None,
+    base_timeframe: Optional[str] = None,
+    include_partial: bool = False,
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    (velas `timeframe` derivadas, base usada). Lee solo las velas base
+    necesarias para `limit` velas destino. Sin base disponible: (vacío, None).
+    """
+    base = base_timeframe or base_timeframe_for(timeframe, store.timeframes(symbol))
+    if base is None:
+        return rows_to_frame([]), None
+    base_limit = None
+    if limit:
+        # +1 vela destino: la primera del rango suele quedar incompleta
+        base_limit = (limit + 1) * (timeframe_to_ms(timeframe) // timeframe_to_ms(base))
+    out = resample_frame(store.read(symbol, base, limit=base_limit), base, timeframe,
+                         include_partial=include_partial)
+    return (out.iloc[-limit:] if limit else out), base
+
+
+def compare_candles(
+    derived: pd.DataFrame,
+    reference: pd.DataFrame,
+    rtol: float = 1e-6,
+    atol: float = 1e-9,
+) -> Dict[str, Any]:
+    """
+    Compara velas derivadas con las del exchange en las aperturas comunes.
+    `ok` exige mismas aperturas en el solape y OHLCV dentro de tolerancia.
+    """
+    common = derived.index.intersection(reference.index)
+    der_idx, ref_idx = derived.index[:0], reference.index[:0]
+    if len(derived) and len(reference):
+        lo = max(derived.index[0], reference.index[0])
+        hi = min(derived.index[-1], reference.index[-1])
+        der_idx = derived.index[(derived.index >= lo) & (derived.index <= hi)]
+        ref_idx = reference.index[(reference.index >= lo) & (reference.index <= hi)]
+    missing = ref_idx.difference(derived.index)
+    extra = der_idx.difference(reference.index)
+
+    mismatched, max_rel = {}, {}
+    bad = np.zeros(len(common), dtype=bool)
+    for col in OHLCV_COLUMNS:
+        a = derived.loc[common, col].to_numpy(dtype=np.float64)
+        b = reference.loc[common, col].to_numpy(dtype=np.float64)
+        diff = ~np.isclose(a, b, rtol=rtol, atol=atol)
+        bad |= diff
+        mismatched[col] = int(diff.sum())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.abs(a - b) / np.maximum(np.abs(b), atol)
+        max_rel[col] = float(rel.max()) if len(rel) else 0.0
+
+    return {
+        "compared": int(len(common)),
+        "missing": int(len(missing)),
+        "extra": int(len(extra)),
+        "mismatched": mismatched,
+        "max_rel_err": max_rel,
+        "first_mismatches": [str(t) for t in common[bad][:10]],
+        "ok": bool(len(common)) and not bad.any() and not len(missing) and not len(extra),
+    }
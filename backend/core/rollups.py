@@ -0,0 +1,311 @@
+# backend/core/rollups.py
+"""
+Daily Performance Rollups.
+
+Mantiene la tabla `signal_daily_rollups` (día x usuario x persona x token)
+a medida que el evaluador cierra señales, de modo que las gráficas de
+Dashboard, Marketplace y Admin lean agregados en lugar de escanear las
+tablas crudas. El coste de una consulta depende del número de días del
+rango, no del número de señales.
+
+Bucket temporal: fecha UTC de la evaluación (`evaluated_at`), igual que
+las gráficas originales.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models_db import Signal, SignalEvaluation, SignalDailyRollup
+
+SYSTEM_USER_ID = 0  # user_id usado en el rollup para señales de sistema (NULL)
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def classify_result(result: Optional[str]) -> str:
+    """
+    Normaliza los distintos formatos de resultado a win / loss / be.
+    Acepta WIN/LOSS/BE (core evaluator) y hit-tp/hit-sl/neutral (CSV evaluator).
+    """
+    res = str(result or "").upper()
+    if "WIN" in res or "TP" in res:
+        return "win"
+    if "LOSS" in res or "SL" in res:
+        return "loss"
+    return "be"
+
+
+def _bucket_key(sig: Signal, evaluated_at: Optional[datetime]) -> tuple:
+    day = (evaluated_at or datetime.utcnow()).strftime(DAY_FORMAT)
+    return (
+        day,
+        sig.user_id if sig.user_id is not None else SYSTEM_USER_ID,
+        sig.source or "",
+        sig.token or "",
+        1 if sig.is_saved == 1 else 0,
+    )
+
+
+def _get_bucket(db: Session, key: tuple) -> Optional[SignalDailyRollup]:
+    day, user_id, source, token, is_saved = key
+    return (
+        db.query(SignalDailyRollup)
+        .filter(
+            SignalDailyRollup.day == day,
+            SignalDailyRollup.user_id == user_id,
+            SignalDailyRollup.source == source,
+            SignalDailyRollup.token == token,
+            SignalDailyRollup.is_saved == is_saved,
+        )
+        .first()
+    )
+
+
+def _apply(row: SignalDailyRollup, outcome: str, pnl_r: Optional[float], sign: int):
+    row.signals = (row.signals or 0) + sign
+    if outcome == "win":
+        row.wins = (row.wins or 0) + sign
+    elif outcome == "loss":
+        row.losses = (row.losses or 0) + sign
+    else:
+        row.breakeven = (row.breakeven or 0) + sign
+    row.pnl_r_sum = (row.pnl_r_sum or 0.0) + sign * (pnl_r or 0.0)
+
+
+def record_evaluation(
+    db: Session,
+    sig: Signal,
+    result: Optional[str],
+    pnl_r: Optional[float],
+    evaluated_at: Optional[datetime],
+    sign: int = 1,
+) -> None:
+    """
+    Suma (sign=1) o resta (sign=-1) una evaluación a su bucket diario.
+    No hace commit: el rollup se confirma en la misma transacción que la
+    evaluación. Usa un savepoint para el insert, de modo que un bucket creado
+    en paralelo por otro evaluador se reintenta como update.
+    """
+    key = _bucket_key(sig, evaluated_at)
+    outcome = classify_result(result)
+
+    row = _get_bucket(db, key)
+    if row is None:
+        day, user_id, source, token, is_saved = key
+        try:
+            with db.begin_nested():
+                row = SignalDailyRollup(
+                    day=day,
+                    user_id=user_id,
+                    source=source,
+                    token=token,
+                    is_saved=is_saved,
+                    signals=0,
+                    wins=0,
+                    losses=0,
+                    breakeven=0,
+                    pnl_r_sum=0.0,
+                )
+                db.add(row)
+                # Flush so later lookups in this batch see the row (autoflush=False)
+                db.flush()
+        except IntegrityError:
+            row = _get_bucket(db, key)
+            if row is None:
+                raise
+
+    _apply(row, outcome, pnl_r, sign)
+
+
+def delete_source_rollups(db: Session, source: str) -> int:
+    """Elimina los buckets de una persona (p.ej. al borrar la persona)."""
+    return (
+        db.query(SignalDailyRollup)
+        .filter(SignalDailyRollup.source == source)
+        .delete(synchronize_session=False)
+    )
+
+
+def _iter_evaluations(q_evals, since: Optional[datetime]):
+    """
+    Evaluaciones de la tabla hot + las archivadas en Parquet (core/signal_archive.py).
+    Si el archivado se interrumpe entre la escritura del Parquet y el borrado
+    en DB, la señal está en ambos sitios: se cuenta una vez (la fila hot).
+    """
+    hot_ids = set()
+    for ev in q_evals.yield_per(1000):
+        hot_ids.add(ev.signal_id)
+        yield ev
+
+    from core.signal_archive import load_archived_signals
+
+    # Las particiones van por fecha de señal (<= fecha de evaluación): margen
+    # de unos días para incluir señales evaluadas tras `since` (timeout 24h).
+    start = since - timedelta(days=3) if since else datetime(1970, 1, 1)
+    archived = load_archived_signals(start=start)
+    if archived.empty:
+        return
+    archived = archived[archived["evaluated_at"].notna() & ~archived["id"].isin(hot_ids)]
+    if since is not None:
+        archived = archived[archived["evaluated_at"] >= since]
+    archived = archived.astype(object).where(archived.notna(), None)
+    for row in archived.itertuples(index=False):
+        evaluated_at = row.evaluated_at
+        if hasattr(evaluated_at, "to_pydatetime"):
+            evaluated_at = evaluated_at.to_pydatetime()
+        yield SimpleNamespace(
+            signal_id=row.id,
+            evaluated_at=evaluated_at,
+            result=row.result,
+            pnl_r=row.pnl_r,
+            user_id=row.user_id,
+            source=row.source,
+            token=row.token,
+            is_saved=row.is_saved,
+        )
+
+
+def backfill_rollups(db: Session, since: Optional[datetime] = None) -> int:
+    """
+    Reconstruye los rollups desde las tablas crudas (y el archivo Parquet).
+    Si `since` se indica, solo se reconstruyen los días >= since.
+    Devuelve el número de evaluaciones agregadas.
+    """
+    q_delete = db.query(SignalDailyRollup)
+    q_evals = (
+        db.query(
+            SignalEvaluation.signal_id,
+            SignalEvaluation.evaluated_at,
+            SignalEvaluation.result,
+            SignalEvaluation.pnl_r,
+            Signal.user_id,
+            Signal.source,
+            Signal.token,
+            Signal.is_saved,
+        )
+        .join(Signal, Signal.id == SignalEvaluation.signal_id)
+    )
+    if since is not None:
+        since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        q_delete = q_delete.filter(SignalDailyRollup.day >= since.strftime(DAY_FORMAT))
+        q_evals = q_evals.filter(SignalEvaluation.evaluated_at >= since)
+
+    buckets: Dict[tuple, SignalDailyRollup] = {}
+    count = 0
+    for ev in _iter_evaluations(q_evals, since):
+        if ev.evaluated_at is None:
+            continue
+        key = (
+            ev.evaluated_at.strftime(DAY_FORMAT),
+            int(ev.user_id) if ev.user_id is not None else SYSTEM_USER_ID,
+            ev.source or "",
+            ev.token or "",
+            1 if ev.is_saved == 1 else 0,
+        )
+        row = buckets.get(key)
+        if row is None:
+            row = SignalDailyRollup(
+                day=key[0],
+                user_id=key[1],
+                source=key[2],
+                token=key[3],
+                is_saved=key[4],
+                signals=0,
+                wins=0,
+                losses=0,
+                breakeven=0,
+                pnl_r_sum=0.0,
+            )
+            buckets[key] = row
+        _apply(row, classify_result(ev.result), ev.pnl_r, 1)
+        count += 1
+
+    q_delete.delete(synchronize_session=False)
+    db.add_all(buckets.values())
+    db.commit()
+    return count
+
+
+# === READ PATH ===
+
+
+def daily_series(
+    db: Session,
+    days: int = 7,
+    user_id: Optional[int] = None,
+    source: Optional[str] = None,
+    saved_only: bool = False,
+    exclude_sources: Iterable[str] = (),
+) -> List[Dict]:
+    """
+    Serie diaria (más antigua -> más reciente) con huecos rellenados a cero.
+    Cada punto: day, signals, wins, losses, breakeven, pnl_r.
+    """
+    today = datetime.utcnow()
+    start = (today - timedelta(days=days - 1)).strftime(DAY_FORMAT)
+
+    q = db.query(
+        SignalDailyRollup.day,
+        func.sum(SignalDailyRollup.signals),
+        func.sum(SignalDailyRollup.wins),
+        func.sum(SignalDailyRollup.losses),
+        func.sum(SignalDailyRollup.breakeven),
+        func.sum(SignalDailyRollup.pnl_r_sum),
+    ).filter(SignalDailyRollup.day >= start)
+
+    if user_id is not None:
+        q = q.filter(SignalDailyRollup.user_id == user_id)
+    if source is not None:
+        q = q.filter(SignalDailyRollup.source == source)
+    if saved_only:
+        q = q.filter(SignalDailyRollup.is_saved == 1)
+    exclude_sources = list(exclude_sources)
+    if exclude_sources:
+        q = q.filter(SignalDailyRollup.source.notin_(exclude_sources))
+
+    by_day = defaultdict(lambda: (0, 0, 0, 0, 0.0))
+    for day, signals, wins, losses, be, pnl in q.group_by(SignalDailyRollup.day).all():
+        by_day[day] = (signals or 0, wins or 0, losses or 0, be or 0, pnl or 0.0)
+
+    series = []
+    for i in range(days):
+        day = (today - timedelta(days=days - 1 - i)).strftime(DAY_FORMAT)
+        signals, wins, losses, be, pnl = by_day[day]
+        series.append(
+            {
+                "day": day,
+                "signals": signals,
+                "wins": wins,
+                "losses": losses,
+                "breakeven": be,
+                "pnl_r": round(pnl, 2),
+            }
+        )
+    return series
+
+
+def totals_by_source(db: Session, sources: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Totales históricos (signals, wins) por persona en una sola consulta.
+    """
+    sources = list(sources)
+    if not sources:
+        return {}
+    rows = (
+        db.query(
+            SignalDailyRollup.source,
+            func.sum(SignalDailyRollup.signals),
+            func.sum(SignalDailyRollup.wins),
+        )
+        .filter(SignalDailyRollup.source.in_(sources))
+        .group_by(SignalDailyRollup.source)
+        .all()
+    )
+    return {src: {"signals": total or 0, "wins": wins or 0} for src, total, wins in rows}
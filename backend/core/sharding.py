@@ -0,0 +1,288 @@
+# backend/core/sharding.py
+"""
+Scheduler horizontal: personas repartidas en shards con leases en DB.
+
+- Persona -> shard: hash consistente (HashRing sobre "shard-0".."shard-N-1"),
+  así cambiar N mueve solo ~1/N de las personas.
+- Shard -> instancia: cada instancia publica un latido (fila
+  `scheduler_member:<id>` en scheduler_lock) y todas calculan el mismo
+  HashRing sobre los miembros vivos. Cada una intenta quedarse con el lease
+  (fila `scheduler_shard:<k>`) de los shards que le tocan y suelta los que
+  ya no le tocan: al entrar una instancia nueva los shards se redistribuyen,
+  y si una muere su latido y sus leases caducan y los recogen las demás.
+- Los leases se toman con un UPDATE condicional (dueño == yo o caducado),
+  que es atómico en la DB: dos instancias nunca ven el mismo lease como suyo.
+
+SharedState guarda en la misma tabla el estado de dedupe que antes vivía en
+memoria por proceso (avisos ya enviados, coherencia por token), para que
+siga siendo único con varias instancias. La dedupe canónica de señales es
+la idempotency_key de log_signal (core/signal_logger.py).
+"""
+
+import bisect
+import hashlib
+from datetime import datetime, timedelta
+from typing import Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models_db import SchedulerLock
+
+MEMBER_PREFIX = "scheduler_member:"
+SHARD_PREFIX = "scheduler_shard:"
+STATE_PREFIX = "scheduler_state:"
+DEFAULT_VNODES = 64
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Hash consistente con nodos virtuales (estable entre procesos, no usa hash())."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = DEFAULT_VNODES):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in set(nodes) for i in range(vnodes))
+        self._keys = [h for h, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[i]
+
+
+def shard_ring(num_shards: int, vnodes: int = DEFAULT_VNODES) -> HashRing:
+    return HashRing((f"shard-{k}" for k in range(num_shards)), vnodes)
+
+
+def shard_of(persona_id: str, ring: HashRing) -> int:
+    return int(ring.node_for(str(persona_id)).split("-")[1])
+
+
+# === Primitivas sobre scheduler_lock ===
+
+
+def _cas(db: Session, name: str, owner: str, expires_at: datetime, now: datetime) -> bool:
+    """Toma/renueva la fila si es mía o está caducada (UPDATE condicional)."""
+    updated = (
+        db.query(SchedulerLock)
+        .filter(
+            SchedulerLock.lock_name == name,
+            (SchedulerLock.owner_id == owner) | (SchedulerLock.expires_at < now),
+        )
+        .update({"owner_id": owner, "expires_at": expires_at}, synchronize_session=False)
+    )
+    db.commit()
+    return updated > 0
+
+
+def _insert(db: Session, name: str, owner: str, expires_at: datetime) -> bool:
+    try:
+        db.add(SchedulerLock(lock_name=name, owner_id=owner, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _take(db: Session, name: str, owner: str, expires_at: datetime, now: datetime) -> bool:
+    return _cas(db, name, owner, expires_at, now) or _insert(db, name, owner, expires_at)
+
+
+class ShardLeaseManager:
+    """
+    Membresía + leases de una instancia.
+
+        mgr = ShardLeaseManager(instance_id, num_shards=8)
+        owned = mgr.sync(db)        # cada ciclo: latido, rebalanceo, renovación
+        mine = mgr.filter(personas) # personas de mis shards
+    """
+
+    def __init__(self, instance_id: str, num_shards: int, lease_ttl: int = 300,
+                 vnodes: int = DEFAULT_VNODES, clock: Callable[[], datetime] = datetime.utcnow):
+        if num_shards < 1:
+            raise ValueError("num_shards debe ser >= 1")
+        self.instance_id = instance_id
+        self.num_shards = num_shards
+        self.lease_ttl = lease_ttl
+        self.vnodes = vnodes
+        self.clock = clock
+        self.ring = shard_ring(num_shards, vnodes)
+        self.owned: FrozenSet[int] = frozenset()
+        self.members: Tuple[str, ...] = ()
+
+    def shard_name(self, shard: int) -> str:
+        return f"{SHARD_PREFIX}{shard}"
+
+    def live_members(self, db: Session, now: datetime) -> List[str]:
+        rows = (
+            db.query(SchedulerLock.owner_id)
+            .filter(SchedulerLock.lock_name.like(f"{MEMBER_PREFIX}%"),
+                    SchedulerLock.expires_at >= now)
+            .all()
+        )
+        return sorted({r[0] for r in rows} | {self.instance_id})
+
+    def target_shards(self, members: Iterable[str]) -> FrozenSet[int]:
+        ring = HashRing(members, self.vnodes)
+        return frozenset(k for k in range(self.num_shards)
+                         if ring.node_for(f"shard:{k}") == self.instance_id)
+
+    def sync(self, db: Session) -> FrozenSet[int]:
+        """Latido, cálculo de shards objetivo, toma/renovación y liberación de leases."""
+        now = self.clock()
+        expires = now + timedelta(seconds=self.lease_ttl)
+        _take(db, f"{MEMBER_PREFIX}{self.instance_id}", self.instance_id, expires, now)
+
+        # Latidos de instancias muertas hace tiempo
+        db.query(SchedulerLock).filter(
+            SchedulerLock.lock_name.like(f"{MEMBER_PREFIX}%"),
+            SchedulerLock.expires_at < now - timedelta(seconds=self.lease_ttl),
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        self.members = tuple(self.live_members(db, now))
+        target = self.target_shards(self.members)
+        owned = set()
+        for k in range(self.num_shards):
+            name = self.shard_name(k)
+            if k in target:
+                if _take(db, name, self.instance_id, expires, now):
+                    owned.add(k)
+            elif k in self.owned:
+                self._release(db, name, now)  # rebalanceo: ahora es de otro miembro
+
+        owned = frozenset(owned)
+        if owned != self.owned:
+            print(f"🧩 Shards {sorted(owned)}/{self.num_shards} "
+                  f"({len(self.members)} instancias)")
+        self.owned = owned
+        return owned
+
+    def filter(self, personas: List[dict]) -> List[dict]:
+        return [p for p in personas if shard_of(p["id"], self.ring) in self.owned]
+
+    def release_all(self, db: Session) -> None:
+        now = self.clock()
+        for k in self.owned:
+            self._release(db, self.shard_name(k), now)
+        self._release(db, f"{MEMBER_PREFIX}{self.instance_id}", now)
+        self.owned = frozenset()
+
+    def _release(self, db: Session, name: str, now: datetime) -> None:
+        (
+            db.query(SchedulerLock)
+            .filter(SchedulerLock.lock_name == name, SchedulerLock.owner_id == self.instance_id)
+            .update({"expires_at": now - timedelta(seconds=1)}, synchronize_session=False)
+        )
+        db.commit()
+
+
+class SharedState:
+    """
+    Claves con TTL compartidas entre instancias (filas `scheduler_state:<key>`).
+    El valor va en owner_id y la caducidad en expires_at.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 clock: Callable[[], datetime] = datetime.utcnow):
+        self.session_factory = session_factory
+        self.clock = clock
+
+    def claim(self, key: str, ttl_seconds: int, value: str = "1") -> bool:
+        """True solo para la primera instancia que la reclama dentro del TTL."""
+        now = self.clock()
+        expires = now + timedelta(seconds=ttl_seconds)
+        name = f"{STATE_PREFIX}{key}"
+        db = self.session_factory()
+        try:
+            updated = (
+                db.query(SchedulerLock)
+                .filter(SchedulerLock.lock_name == name, SchedulerLock.expires_at < now)
+                .update({"owner_id": value, "expires_at": expires}, synchronize_session=False)
+            )
+            db.commit()
+            return updated > 0 or _insert(db, name, value, expires)
+        finally:
+            db.close()
+
+    def hold(self, key: str, value: str, ttl_seconds: int) -> bool:
+        """
+        Como claim, pero si la clave ya tiene `value` también es True y se
+        renueva el TTL; con otro valor vigente, False. Un UPDATE condicional
+        (caducada o mismo valor): dos instancias con valores distintos nunca
+        ganan las dos.
+        """
+        now = self.clock()
+        expires = now + timedelta(seconds=ttl_seconds)
+        name = f"{STATE_PREFIX}{key}"
+        db = self.session_factory()
+        try:
+            def _update() -> bool:
+                updated = (
+                    db.query(SchedulerLock)
+                    .filter(
+                        SchedulerLock.lock_name == name,
+                        (SchedulerLock.owner_id == value) | (SchedulerLock.expires_at < now),
+                    )
+                    .update({"owner_id": value, "expires_at": expires}, synchronize_session=False)
+                )
+                db.commit()
+                return updated > 0
+
+            # Si otra instancia inserta a la vez, reintenta: gana si insertó el mismo valor
+            return _update() or _insert(db, name, value, expires) or _update()
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = (
+                db.query(SchedulerLock.owner_id)
+                .filter(SchedulerLock.lock_name == f"{STATE_PREFIX}{key}",
+                        SchedulerLock.expires_at >= self.clock())
+                .first()
+            )
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    def put(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = self.clock()
+        expires = now + timedelta(seconds=ttl_seconds)
+        name = f"{STATE_PREFIX}{key}"
+        db = self.session_factory()
+        try:
+            updated = (
+                db.query(SchedulerLock)
+                .filter(SchedulerLock.lock_name == name)
+                .update({"owner_id": value, "expires_at": expires}, synchronize_session=False)
+            )
+            db.commit()
+            if not updated and not _insert(db, name, value, expires):
+                # Otra instancia la insertó a la vez: gana la última escritura
+                db.query(SchedulerLock).filter(SchedulerLock.lock_name == name).update(
+                    {"owner_id": value, "expires_at": expires}, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    def purge(self) -> int:
+        """Borra las claves caducadas (las filas de estado no se reutilizan solas)."""
+        db = self.session_factory()
+        try:
+            deleted = (
+                db.query(SchedulerLock)
+                .filter(SchedulerLock.lock_name.like(f"{STATE_PREFIX}%"),
+                        SchedulerLock.expires_at < self.clock())
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return deleted
+        finally:
+            db.close()
@@ -0,0 +1,330 @@
+# backend/core/signal_archive.py
+"""
+Hot/Cold Signal Storage.
+
+La tabla `signals` (hot) solo debe contener lo que la app lee a diario.
+Las señales frías (no guardadas por el usuario, ya evaluadas y más antiguas
+que N días) se mueven a ficheros Parquet comprimidos particionados por día:
+
+    <ARCHIVE_DIR>/date=YYYY-MM-DD/part-<uuid>.parquet
+
+Cada fila archivada incluye la señal y su evaluación. Las lecturas
+históricas (`load_signal_history`, y `load_recent_archived` para los
+endpoints de historial de persona y logs por token) combinan DB + archivo
+de forma transparente. Los agregados diarios (core/rollups.py) no se tocan
+al archivar, así que las gráficas siguen siendo completas. Al borrar una
+persona, `purge_archived_source` elimina también sus filas archivadas.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models_db import Signal, SignalEvaluation
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = Path(
+    os.getenv("SIGNAL_ARCHIVE_DIR", str(BACKEND_DIR / "data" / "archive" / "signals"))
+)
+
+# Días que una señal transitoria evaluada permanece en la tabla hot
+DEFAULT_RETENTION_DAYS = 7
+PARQUET_COMPRESSION = "zstd"
+
+ARCHIVE_COLUMNS = [
+    "id",
+    "timestamp",
+    "token",
+    "timeframe",
+    "direction",
+    "entry",
+    "tp",
+    "sl",
+    "confidence",
+    "rationale",
+    "source",
+    "mode",
+    "strategy_id",
+    "user_id",
+    "is_hidden",
+    "is_saved",
+    "extra",
+    "idempotency_key",
+    "result",
+    "pnl_r",
+    "exit_price",
+    "evaluated_at",
+]
+
+
+def _row_from_signal(sig: Signal, ev: Optional[SignalEvaluation]) -> dict:
+    return {
+        "id": sig.id,
+        "timestamp": sig.timestamp,
+        "token": sig.token,
+        "timeframe": sig.timeframe,
+        "direction": sig.direction,
+        "entry": sig.entry,
+        "tp": sig.tp,
+        "sl": sig.sl,
+        "confidence": sig.confidence,
+        "rationale": sig.rationale,
+        "source": sig.source,
+        "mode": sig.mode,
+        "strategy_id": sig.strategy_id,
+        "user_id": sig.user_id,
+        "is_hidden": sig.is_hidden,
+        "is_saved": sig.is_saved,
+        "extra": sig.extra,
+        "idempotency_key": sig.idempotency_key,
+        "result": ev.result if ev else None,
+        "pnl_r": ev.pnl_r if ev else None,
+        "exit_price": ev.exit_price if ev else None,
+        "evaluated_at": ev.evaluated_at if ev else None,
+    }
+
+
+def _cold_signals_query(db: Session, cutoff: datetime):
+    return (
+        db.query(Signal, SignalEvaluation)
+        .join(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+        .filter(
+            Signal.timestamp < cutoff,
+            or_(Signal.is_saved == 0, Signal.is_saved.is_(None)),
+        )
+        .order_by(Signal.id)
+    )
+
+
+def _write_partitions(df: pd.DataFrame, archive_dir: Path) -> List[Path]:
+    written = []
+    days = df["timestamp"].dt.strftime("%Y-%m-%d")
+    for day, part in df.groupby(days):
+        part_dir = archive_dir / f"date={day}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        path = part_dir / f"part-{uuid.uuid4().hex}.parquet"
+        part.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+        written.append(path)
+    return written
+
+
+def archive_cold_signals(
+    db: Session,
+    retention_days: int = DEFAULT_RETENTION_DAYS,
+    batch_size: int = 5000,
+    archive_dir: Optional[Path] = None,
+    dry_run: bool = False,
+) -> int:
+    """
+    Mueve a Parquet las señales frías (is_saved=0, evaluadas, > retention_days)
+    y las borra de la tabla hot. Trabaja por lotes: cada lote se escribe a
+    disco antes de borrarse, de modo que un fallo a mitad nunca pierde filas
+    (como mucho deja duplicados, que la lectura elimina por id).
+
+    Devuelve el número de señales archivadas.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    if dry_run:
+        return _cold_signals_query(db, cutoff).count()
+
+    archived = 0
+    while True:
+        batch = _cold_signals_query(db, cutoff).limit(batch_size).all()
+        if not batch:
+            break
+
+        df = pd.DataFrame(
+            [_row_from_signal(sig, ev) for sig, ev in batch], columns=ARCHIVE_COLUMNS
+        )
+        # Una señal con varias evaluaciones se archiva una sola vez
+        df = df.drop_duplicates(subset="id", keep="first")
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        _write_partitions(df, archive_dir)
+
+        ids = [int(i) for i in df["id"]]
+        try:
+            db.query(SignalEvaluation).filter(
+                SignalEvaluation.signal_id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.query(Signal).filter(Signal.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        archived += len(ids)
+        if len(batch) < batch_size:
+            break
+
+    return archived
+
+
+def load_archived_signals(
+    start: datetime,
+    end: Optional[datetime] = None,
+    token: Optional[str] = None,
+    source: Optional[str] = None,
+    archive_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Lee del archivo solo las particiones del rango [start, end].
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    end = end or datetime.utcnow()
+    if not archive_dir.exists():
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+
+    start_day = start.strftime("%Y-%m-%d")
+    end_day = end.strftime("%Y-%m-%d")
+
+    frames = []
+    for part_dir in sorted(archive_dir.glob("date=*")):
+        day = part_dir.name.split("=", 1)[1]
+        if day < start_day or day > end_day:
+            continue
+        for path in sorted(part_dir.glob("*.parquet")):
+            frames.append(pd.read_parquet(path))
+
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df[(df["timestamp"] >= start) & (df["timestamp"] <= end)]
+    if token:
+        df = df[df["token"] == token.upper()]
+    if source:
+        df = df[df["source"] == source]
+    return df.drop_duplicates(subset="id", keep="first").reset_index(drop=True)
+
+
+def load_signal_history(
+    db: Session,
+    start: datetime,
+    end: Optional[datetime] = None,
+    token: Optional[str] = None,
+    source: Optional[str] = None,
+    archive_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Historial de señales (con su evaluación) combinando tabla hot y archivo.
+    Pensado para consultas históricas y backtests sobre señales reales.
+    Ordenado por timestamp; señales abiertas tienen result = None.
+    """
+    end = end or datetime.utcnow()
+
+    q = (
+        db.query(Signal, SignalEvaluation)
+        .outerjoin(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+        .filter(Signal.timestamp >= start, Signal.timestamp <= end)
+    )
+    if token:
+        q = q.filter(Signal.token == token.upper())
+    if source:
+        q = q.filter(Signal.source == source)
+
+    hot = pd.DataFrame(
+        [_row_from_signal(sig, ev) for sig, ev in q.all()], columns=ARCHIVE_COLUMNS
+    )
+
+    cold = load_archived_signals(start, end, token=token, source=source, archive_dir=archive_dir)
+
+    frames = [f for f in (hot, cold) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.drop_duplicates(subset="id", keep="first")
+    return df.sort_values("timestamp").reset_index(drop=True)
+
+
+def archived_records(df: pd.DataFrame) -> List[dict]:
+    """Filas del archivo como dicts (NaN -> None, Timestamp -> datetime)."""
+    records = []
+    for rec in df.astype(object).where(df.notna(), None).to_dict("records"):
+        for col in ("timestamp", "evaluated_at"):
+            if hasattr(rec.get(col), "to_pydatetime"):
+                rec[col] = rec[col].to_pydatetime()
+        records.append(rec)
+    return records
+
+
+def load_recent_archived(
+    limit: int,
+    token: Optional[str] = None,
+    source: Optional[str] = None,
+    mode: Optional[str] = None,
+    include_user_id: Optional[int] = None,
+    archive_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Las `limit` señales archivadas más recientes (timestamp desc).
+    Recorre las particiones de la más nueva a la más vieja y para en cuanto
+    tiene `limit` filas: un día más viejo ya no puede desplazarlas.
+    Con `include_user_id` solo devuelve señales de sistema o de ese usuario.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    if limit <= 0 or not archive_dir.exists():
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+
+    frames, found = [], 0
+    for part_dir in sorted(archive_dir.glob("date=*"), reverse=True):
+        for path in sorted(part_dir.glob("*.parquet")):
+            df = pd.read_parquet(path)
+            if token:
+                df = df[df["token"] == token.upper()]
+            if source:
+                df = df[df["source"] == source]
+            if mode:
+                df = df[df["mode"] == mode]
+            if include_user_id is not None:
+                df = df[df["user_id"].isna() | (df["user_id"] == include_user_id)]
+            if not df.empty:
+                frames.append(df)
+                found += len(df)
+        if found >= limit:
+            break
+
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(subset="id", keep="first")
+    return df.sort_values("timestamp", ascending=False).head(limit).reset_index(drop=True)
+
+
+def purge_archived_source(source: str, archive_dir: Optional[Path] = None) -> int:
+    """
+    Borra del archivo las señales de una persona (al eliminar la persona),
+    para que un backfill de rollups no las resucite. Reescribe cada fichero
+    afectado en uno temporal y lo sustituye (os.replace es atómico).
+    Devuelve el número de filas eliminadas.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    if not archive_dir.exists():
+        return 0
+
+    removed = 0
+    for path in sorted(archive_dir.glob("date=*/*.parquet")):
+        df = pd.read_parquet(path)
+        keep = df["source"] != source
+        if keep.all():
+            continue
+        removed += int((~keep).sum())
+        if not keep.any():
+            path.unlink()
+            continue
+        tmp = path.with_suffix(".tmp")
+        df[keep].to_parquet(tmp, index=False, compression=PARQUET_COMPRESSION)
+        os.replace(tmp, path)
+    return removed
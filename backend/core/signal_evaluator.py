@@ -7,6 +7,7 @@ from typing import List, Dict
 
 from models_db import Signal, SignalEvaluation, StrategyConfig
 from core.market_data_api import get_current_price
+from core.rollups import record_evaluation
 
 # Minimum age to evaluate (avoid instant evaluation on creation)
 MIN_SIGNAL_AGE_MINUTES = 5
@@ -118,6 +119,9 @@ def evaluate_pending_signals(db: Session) -> int:
                 )
 
                 db.add(eval_obj)
+                record_evaluation(
+                    db, sig, result, eval_obj.pnl_r, eval_obj.evaluated_at
+                )
                 new_evaluations_count += 1
 
                 # Update Strategy Stats
@@ -0,0 +1,123 @@
+# backend/core/ttl_cache.py
+"""
+Bounded TTL/LRU mapping for long-running in-memory state.
+
+El scheduler mantiene varios diccionarios de estado (dedupe, coherencia,
+última dirección...) que, como dict normales, crecen sin límite en un
+proceso que corre durante semanas. `TTLCache` es un reemplazo con la
+misma interfaz básica de dict que:
+
+- expira entradas más antiguas que `ttl_seconds`
+- desaloja las menos usadas (LRU) cuando supera `maxsize`
+
+Así el tamaño (y la RSS) queda acotado por `maxsize`, no por el tiempo
+de ejecución.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Mapping acotado por tamaño (LRU) y por antigüedad (TTL).
+    No es thread-safe: el scheduler solo lo modifica desde el hilo principal.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._timer = timer
+        # key -> (expires_at, value), ordenado de menos a más recientemente usado
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    # === Dict-like API ===
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expires_at, value = item
+        if expires_at <= self._timer():
+            del self._data[key]
+            self.expirations += 1
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        now = self._timer()
+        self._data[key] = (now + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        self._purge_expired(now)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __delitem__(self, key: Hashable) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data.keys()))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            return default
+        return item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    # === Maintenance & Metrics ===
+
+    def _purge_expired(self, now: Optional[float] = None) -> None:
+        """
+        Elimina entradas expiradas desde la más antigua. Como cada escritura
+        mueve su clave al final y el TTL es fijo, el orden por inserción es
+        casi siempre el de expiración; se detiene en la primera viva.
+        """
+        now = self._timer() if now is None else now
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+            self.expirations += 1
+
+    def purge_expired(self) -> None:
+        self._purge_expired()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,385 @@
+# backend/core/walk_forward.py
+"""
+Walk-forward optimization (out-of-sample) sobre BacktestEngine.
+
+El histórico se divide en ventanas rodantes train/test. Para cada ventana
+se optimizan los parámetros SOLO con el tramo de train (core.optimizer) y
+se evalúan con el tramo de test siguiente, que la optimización no ha
+visto. Los tramos de test se encadenan en una única curva de equity OOS.
+
+Las ventanas están alineadas a tiempo absoluto (múltiplos de
+`test_candles` desde epoch), no al inicio del histórico descargado. Así,
+al ampliar el histórico una ventana, las anteriores conservan sus límites
+y su resultado se lee de caché en vez de recalcularse. La clave de caché
+incluye una huella de las velas de la ventana, por lo que si los datos
+cambian la ventana se recalcula.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import CANDLES_PER_DAY, BacktestEngine, WARMUP_CANDLES
+from core.cache import cache
+from core.optimizer import DEFAULT_WORKERS, SweepError, build_combinations, run_sweep
+
+WINDOW_CACHE_TTL = int(os.getenv("WALK_FORWARD_CACHE_TTL", str(7 * 24 * 3600)))
+# Sin Redis la caché vive en el proceso y solo purga caducados: TTL corto
+WINDOW_MEMORY_CACHE_TTL = int(os.getenv("WALK_FORWARD_MEMORY_CACHE_TTL", "3600"))
+# Campos de cada punto de la curva OOS que usa el encadenado
+CURVE_FIELDS = ("time", "timestamp", "strategy_equity", "buy_hold_equity")
+MAX_WINDOWS = 50
+MIN_TEST_CANDLES = 10
+
+# Estado por worker: histórico completo (solo lectura)
+_SHARED: Dict[str, Any] = {}
+
+
+# === Windows ===
+
+
+def _interval_ms(df: pd.DataFrame) -> int:
+    return int(np.median(np.diff(df["timestamp"].to_numpy()[:200])))
+
+
+def build_windows(
+    df: pd.DataFrame, train_candles: int, test_candles: int
+) -> List[Dict[str, Any]]:
+    """
+    Devuelve las ventanas completas disponibles en `df` (índices posicionales).
+    Cada tramo de test cubre [k*T, (k+1)*T) en tiempo absoluto, con
+    T = test_candles * intervalo; el train son las `train_candles` velas
+    inmediatamente anteriores.
+    """
+    if test_candles < MIN_TEST_CANDLES:
+        raise SweepError(f"test_candles must be >= {MIN_TEST_CANDLES}")
+    if train_candles < WARMUP_CANDLES + MIN_TEST_CANDLES:
+        raise SweepError(
+            f"train_candles must be >= {WARMUP_CANDLES + MIN_TEST_CANDLES}"
+        )
+
+    ts = df["timestamp"].to_numpy().astype(np.int64)
+    span_ms = test_candles * _interval_ms(df)
+    buckets = ts // span_ms
+
+    windows = []
+    for k in np.unique(buckets):
+        idx = np.flatnonzero(buckets == k)
+        test_start, test_end = int(idx[0]), int(idx[-1]) + 1
+        # Solo ventanas completas y con suficiente train por detrás
+        if test_end - test_start != test_candles:
+            continue
+        if test_start < max(train_candles, WARMUP_CANDLES):
+            continue
+        windows.append(
+            {
+                "window": int(k),
+                "train_start": test_start - train_candles,
+                "test_start": test_start,
+                "test_end": test_end,
+            }
+        )
+    return windows
+
+
+def estimate_windows(days: int, timeframe: str, train_candles: int, test_candles: int) -> int:
+    """
+    Cota superior de las ventanas que dará un histórico de `days` días
+    (mismo nº de velas que BacktestEngine.fetch_history). Sirve para
+    limitar el coste antes de descargar nada.
+    """
+    candles = days * CANDLES_PER_DAY.get(timeframe, 24) + WARMUP_CANDLES
+    return max(0, min(MAX_WINDOWS, (candles - train_candles) // max(1, test_candles)))
+
+
+def _window_key(df: pd.DataFrame, win: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """Clave de caché: configuración de la optimización + huella de las velas."""
+    candles = df.iloc[win["train_start"] : win["test_end"]]
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(
+        np.ascontiguousarray(
+            candles[["timestamp", "open", "high", "low", "close"]].to_numpy(
+                dtype=np.float64
+            )
+        ).tobytes()
+    )
+    return f"wf:{digest.hexdigest()}"
+
+
+def _cache_ttl() -> int:
+    return WINDOW_CACHE_TTL if cache.redis_client else WINDOW_MEMORY_CACHE_TTL
+
+
+# === Workers ===
+
+
+def _init_worker(df: pd.DataFrame):
+    _SHARED["df"] = df
+
+
+def _run_window(win: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    df = _SHARED["df"]
+    train_df = df.iloc[win["train_start"] : win["test_start"]].reset_index(drop=True)
+    # El test arranca con su propio warmup (velas ya vistas, sin operar)
+    test_df = df.iloc[win["test_start"] - WARMUP_CANDLES : win["test_end"]].reset_index(
+        drop=True
+    )
+
+    sweep = run_sweep(
+        strategy_id=params["strategy_id"],
+        symbol=params["symbol"],
+        timeframe=params["timeframe"],
+        grid=params["grid"],
+        space=params["space"],
+        n_iter=params["n_iter"],
+        seed=params["seed"],
+        metric=params["metric"],
+        initial_capital=params["initial_capital"],
+        workers=1,
+        df=train_df,
+    )
+    best = sweep["results"][0]
+    if not best["metrics"]:
+        return {**win, "best_params": best["params"], "error": best["error"]}
+
+    engine = BacktestEngine(initial_capital=params["initial_capital"])
+    oos = engine.run_on_data(
+        params["strategy_id"],
+        params["symbol"],
+        params["timeframe"],
+        test_df,
+        config=best["params"] or None,
+    )
+    return {
+        **win,
+        "train_from": str(df.iloc[win["train_start"]]["time"]),
+        "test_from": str(df.iloc[win["test_start"]]["time"]),
+        "test_to": str(df.iloc[win["test_end"] - 1]["time"]),
+        "best_params": best["params"],
+        "in_sample": best["metrics"],
+        "out_of_sample": oos["metrics"],
+        # Solo lo que necesita el encadenado (la ventana se guarda en caché)
+        "curve": [{k: p[k] for k in CURVE_FIELDS} for p in oos["curve"]],
+        "error": None,
+    }
+
+
+# === Stitching ===
+
+
+def stitch_windows(
+    windows: List[Dict[str, Any]], initial_capital: float
+) -> Dict[str, Any]:
+    """
+    Encadena los tramos OOS: cada tramo empieza con el equity con el que
+    terminó el anterior (reescalando su curva, que parte de initial_capital).
+    Se encadena sobre el último punto de la curva, no sobre `final_capital`:
+    la curva incluye el PnL flotante de la posición abierta al cierre del
+    tramo y `final_capital` no, lo que dejaría un salto entre tramos.
+    """
+    capital = initial_capital
+    buy_hold = initial_capital
+    curve = []
+    trades = 0
+    wins = 0.0
+
+    for w in windows:
+        if w.get("error"):
+            continue
+        factor = capital / initial_capital
+        bh_factor = buy_hold / initial_capital
+        for p in w["curve"]:
+            curve.append(
+                {
+                    **p,
+                    "strategy_equity": round(p["strategy_equity"] * factor, 2),
+                    "buy_hold_equity": round(p["buy_hold_equity"] * bh_factor, 2),
+                }
+            )
+        m = w["out_of_sample"]
+        if w["curve"]:
+            capital = w["curve"][-1]["strategy_equity"] * factor
+            buy_hold = w["curve"][-1]["buy_hold_equity"] * bh_factor
+        else:
+            capital = m["final_capital"] * factor
+        trades += m["total_trades"]
+        wins += m["win_rate"] * m["total_trades"] / 100
+
+    peak = initial_capital
+    max_dd = 0.0
+    for p in curve:
+        peak = max(peak, p["strategy_equity"])
+        max_dd = min(max_dd, (p["strategy_equity"] - peak) / peak)
+
+    return {
+        "metrics": {
+            "initial_capital": round(initial_capital, 2),
+            "final_capital": round(capital, 2),
+            "total_pnl": round(capital - initial_capital, 2),
+            "roi_pct": round((capital - initial_capital) / initial_capital * 100, 2),
+            "buy_hold_pnl": round(buy_hold - initial_capital, 2),
+            "max_drawdown": round(max_dd * 100, 2),
+            "total_trades": int(trades),
+            "win_rate": round(wins / trades * 100, 1) if trades else 0,
+        },
+        "curve": curve,
+    }
+
+
+# === Public API ===
+
+
+def run_walk_forward(
+    strategy_id: str,
+    symbol: str,
+    timeframe: str = "1h",
+    days: int = 90,
+    train_candles: int = 500,
+    test_candles: int = 100,
+    grid: Optional[Dict[str, List[Any]]] = None,
+    space: Optional[Dict[str, Any]] = None,
+    n_iter: int = 20,
+    seed: Optional[int] = None,
+    metric: str = "roi_pct",
+    initial_capital: float = 1000.0,
+    workers: Optional[int] = None,
+    df: Optional[pd.DataFrame] = None,
+    max_runs: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Optimiza en cada train, evalúa en el test siguiente y devuelve la
+    curva OOS encadenada junto con el detalle por ventana.
+    `max_runs` limita ventanas × combinaciones (se conservan las ventanas
+    más recientes). `progress_callback(hechas, total, 0)` se llama tras
+    cada ventana calculada (las de caché no cuentan).
+    """
+    # Valida el espacio antes de descargar nada
+    combos = build_combinations(grid, space, n_iter, seed)
+    max_windows = MAX_WINDOWS
+    if max_runs is not None:
+        max_windows = min(MAX_WINDOWS, max_runs // len(combos))
+        if max_windows < 1:
+            raise SweepError(
+                f"{len(combos)} combinations exceed the limit of {max_runs} runs"
+            )
+
+    if df is None:
+        df = BacktestEngine(initial_capital).fetch_history(symbol, timeframe, days)
+
+    windows = build_windows(df, train_candles, test_candles)
+    if not windows:
+        raise SweepError(
+            "History too short for a single train/test window "
+            f"({len(df)} candles, need > {train_candles + test_candles})"
+        )
+    windows = windows[-max_windows:]
+
+    params = {
+        "strategy_id": strategy_id,
+        "symbol": symbol.lower(),
+        "timeframe": timeframe,
+        "grid": grid,
+        "space": space,
+        "n_iter": n_iter,
+        "seed": seed,
+        "metric": metric,
+        "initial_capital": initial_capital,
+        "train_candles": train_candles,
+        "test_candles": test_candles,
+    }
+
+    started = time.perf_counter()
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = []
+    for win in windows:
+        key = _window_key(df, win, params)
+        cached = cache.get(key)
+        if cached:
+            results[win["window"]] = cached
+        else:
+            pending.append((key, win))
+
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(pending) or 1))
+    print(
+        f"[WALK-FORWARD] {strategy_id} {symbol} {timeframe}: {len(windows)} windows "
+        f"({len(windows) - len(pending)} cached), {workers} workers"
+    )
+
+    def report(done: int) -> None:
+        if progress_callback:
+            progress_callback(done, len(pending), 0)
+
+    if pending:
+        if workers == 1:
+            _init_worker(df)
+            computed = []
+            for _, win in pending:
+                computed.append(_run_window(win, params))
+                report(len(computed))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(df,)
+            ) as pool:
+                futures = {
+                    pool.submit(_run_window, win, params): i
+                    for i, (_, win) in enumerate(pending)
+                }
+                computed = [None] * len(pending)
+                try:
+                    for done, f in enumerate(as_completed(futures), start=1):
+                        computed[futures[f]] = f.result()
+                        report(done)
+                except BaseException:
+                    # Cancelación (JobCancelled) o error: no arrancar lo pendiente
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        for (key, win), res in zip(pending, computed):
+            results[win["window"]] = res
+            if not res.get("error"):
+                cache.set(key, res, ttl=_cache_ttl())
+
+    ordered = [results[w["window"]] for w in windows]
+    stitched = stitch_windows(ordered, initial_capital)
+
+    ok = [w for w in ordered if not w.get("error")]
+    is_roi = [w["in_sample"]["roi_pct"] for w in ok]
+    oos_roi = [w["out_of_sample"]["roi_pct"] for w in ok]
+    # Eficiencia WF: rendimiento OOS por vela / rendimiento IS por vela
+    efficiency = None
+    if ok and np.mean(is_roi) > 0:
+        is_per_candle = np.mean(is_roi) / (train_candles - WARMUP_CANDLES)
+        oos_per_candle = np.mean(oos_roi) / test_candles
+        efficiency = round(float(oos_per_candle / is_per_candle), 2)
+
+    elapsed = time.perf_counter() - started
+    print(f"[WALK-FORWARD] Done in {elapsed:.1f}s")
+
+    return {
+        "strategy_id": strategy_id,
+        "token": symbol.upper(),
+        "timeframe": timeframe,
+        "train_candles": train_candles,
+        "test_candles": test_candles,
+        "metric": metric,
+        "cached_windows": len(windows) - len(pending),
+        "elapsed_seconds": round(elapsed, 2),
+        "metrics": stitched["metrics"],
+        "in_sample_roi_avg": round(float(np.mean(is_roi)), 2) if ok else 0,
+        "out_of_sample_roi_avg": round(float(np.mean(oos_roi)), 2) if ok else 0,
+        "efficiency": efficiency,
+        "windows": [
+            {k: v for k, v in w.items() if k != "curve"} for w in ordered
+        ],
+        "curve": stitched["curve"],
+    }
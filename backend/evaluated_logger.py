@@ -99,6 +99,7 @@ def _append_evaluations(token: str, rows: List[Dict[str, str]]) -> int:
             Signal,
             SignalEvaluation,
         )
+        from backend.core.rollups import record_evaluation
         from sqlalchemy import select
 
         db = SessionLocal()
@@ -146,6 +147,13 @@ def _append_evaluations(token: str, rows: List[Dict[str, str]]) -> int:
                         exit_price=float(row.get("price_at_eval", 0)),
                     )
                     db.add(eval_obj)
+                    record_evaluation(
+                        db,
+                        signal_obj,
+                        eval_obj.result,
+                        eval_obj.pnl_r,
+                        eval_obj.evaluated_at,
+                    )
 
                     # Mark strategy for stats update if present
                     if signal_obj.strategy_id:
@@ -3,6 +3,7 @@ import ta
 
 # Importar desde el módulo core
 from core.market_data_api import get_ohlcv_data
+from indicators.trend import trend_regime
 
 # Exchange ID for data source (used by evaluator)
 EXCHANGE_ID = "binance"
@@ -62,6 +63,13 @@ def get_market_data(symbol: str, timeframe: str = "1h", limit: int = 1000):
             df["high"], df["low"], df["close"], window=14
         )
 
+        # Régimen de tendencia (pendiente OLS de log(precio), ventanas 14/28)
+        regime = trend_regime(df["close"])
+        df[["SLOPE_14", "R2_14", "SLOPE_28", "R2_28"]] = regime[
+            ["slope_14", "r2_14", "slope_28", "r2_28"]
+        ].to_numpy()
+        df["TREND_REGIME"] = regime["trend_regime"].to_numpy()
+
         # Limpieza de NaNs generados por indicadores
         df.dropna(inplace=True)
 
@@ -83,6 +91,9 @@ def get_market_data(symbol: str, timeframe: str = "1h", limit: int = 1000):
             "atr": last["ATRr_14"],
             # "volume_change_pct": ... (opcional, simplificado para robustez)
             "trend": "BULLISH" if last["close"] > last["EMA_50"] else "BEARISH",
+            "trend_regime": last["TREND_REGIME"],
+            "trend_slope": round(last["SLOPE_28"], 6),
+            "trend_r2": round(last["R2_28"], 3),
             "source_exchange": source_id,
         }
 
@@ -0,0 +1,143 @@
+# backend/indicators/trend.py
+"""
+Pendiente OLS móvil (y R²) sobre log(precio), en forma cerrada.
+
+Para una ventana de `w` velas con x = 0..w-1:
+    Sxx = w(w²-1)/12   (constante)
+    Sxy = Σ k·y - x̄·Σ y          (k = índice absoluto, x̄ = centro de la ventana)
+    Syy = Σ y² - (Σ y)²/w
+    slope = Sxy / Sxx,   R² = Sxy² / (Sxx·Syy)
+
+Las sumas de cada ventana salen de sumas acumuladas (diferencia de dos
+cumsum), así que el coste es O(n) por ventana y las sumas se calculan una
+sola vez para todas las ventanas pedidas. Para limitar el error numérico en
+series largas se acumula por bloques y se resta la media de y en cada uno
+(la pendiente y el R² no cambian).
+
+Lo usan trading_lab/models/trend_slope.py y la capa de mercado
+(indicators/market.py) como feature de régimen de tendencia.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (14, 28)
+# Las sumas acumuladas se hacen por bloques (con el solape de la ventana más
+# larga) para que k·y no crezca con la longitud de la serie
+BLOCK_SIZE = 4096
+
+
+def _window_sum(cum: np.ndarray, w: int) -> np.ndarray:
+    """Suma de las últimas `w` posiciones (eje 0) a partir de un cumsum con 0 inicial."""
+    out = np.full((len(cum) - 1,) + cum.shape[1:], np.nan)
+    if w <= len(out):
+        out[w - 1:] = cum[w:] - cum[:-w]
+    return out
+
+
+def _ols_block(values: np.ndarray, windows: List[int]) -> Dict[str, np.ndarray]:
+    """Una serie (n,) o varias en columnas (n, S): el cálculo va siempre por el eje 0."""
+    n = len(values)
+    valid = np.isfinite(values)
+    counts = valid.sum(axis=0)
+    means = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    y = np.where(valid, values - means, 0.0)
+    k = np.arange(n, dtype=float).reshape((n,) + (1,) * (values.ndim - 1))
+
+    zero = np.zeros((1,) + values.shape[1:])
+    cum_y = np.concatenate([zero, np.cumsum(y, axis=0)])
+    cum_ky = np.concatenate([zero, np.cumsum(k * y, axis=0)])
+    cum_yy = np.concatenate([zero, np.cumsum(y * y, axis=0)])
+    cum_bad = np.concatenate([zero, np.cumsum(~valid, axis=0)])
+
+    out = {}
+    for w in windows:
+        sy = _window_sum(cum_y, w)
+        sky = _window_sum(cum_ky, w)
+        syy = _window_sum(cum_yy, w)
+        bad = _window_sum(cum_bad, w) > 0
+
+        center = k - (w - 1) / 2.0  # x̄ en índice absoluto
+        sxx = w * (w * w - 1) / 12.0
+        sxy = sky - center * sy
+        var_y = np.maximum(syy - sy * sy / w, 0.0)
+
+        slope = sxy / sxx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(var_y > 1e-18, (sxy * sxy) / (sxx * var_y), 0.0)
+        r2 = np.clip(r2, 0.0, 1.0)
+
+        slope[bad] = np.nan
+        r2[bad | np.isnan(sy)] = np.nan
+        out[f"slope_{w}"] = slope
+        out[f"r2_{w}"] = r2
+    return out
+
+
+def _rolling_ols_array(values: np.ndarray, windows: List[int], log: bool) -> Dict[str, np.ndarray]:
+    if any(w < 2 for w in windows):
+        raise ValueError(f"Las ventanas deben ser >= 2: {windows}")
+    values = np.asarray(values, dtype=float)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0, np.log(values), np.nan)
+
+    n = len(values)
+    overlap = max(windows, default=2) - 1
+    out = {f"{kind}_{w}": np.full(values.shape, np.nan)
+           for w in windows for kind in ("slope", "r2")}
+    for start in range(0, n, BLOCK_SIZE):
+        lo = max(0, start - overlap)
+        end = min(n, start + BLOCK_SIZE)
+        block = _ols_block(values[lo:end], windows)
+        for col, arr in block.items():
+            out[col][start:end] = arr[start - lo:]
+    return out
+
+
+def rolling_ols(series: pd.Series, windows: Iterable[int] = DEFAULT_WINDOWS,
+                log: bool = True) -> pd.DataFrame:
+    """
+    Pendiente y R² de la regresión lineal en ventana móvil, para varias ventanas.
+
+    Devuelve un DataFrame con columnas `slope_<w>` y `r2_<w>` alineado con
+    `series`. Las ventanas incompletas o con algún valor no válido (NaN, o
+    precio <= 0 con `log=True`) dan NaN, igual que el ajuste por ventana.
+    En una ventana plana (varianza cero) la pendiente es 0 y el R² 0.
+    """
+    windows = [int(w) for w in windows]
+    out = _rolling_ols_array(series.to_numpy(dtype=float), windows, log)
+    return pd.DataFrame(out, index=series.index)
+
+
+def rolling_ols_panel(frame: pd.DataFrame, windows: Iterable[int] = DEFAULT_WINDOWS,
+                      log: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    `rolling_ols` de muchas series a la vez (una por columna, p. ej. un
+    símbolo por columna). Devuelve {"slope_<w>": DataFrame, "r2_<w>": DataFrame}
+    con la misma forma que `frame`.
+    """
+    windows = [int(w) for w in windows]
+    out = _rolling_ols_array(frame.to_numpy(dtype=float), windows, log)
+    return {col: pd.DataFrame(arr, index=frame.index, columns=frame.columns)
+            for col, arr in out.items()}
+
+
+def classify_trend(slopes: pd.DataFrame) -> pd.Series:
+    """UP si todas las pendientes son > 0, DOWN si todas < 0, si no RANGE."""
+    up = (slopes > 0).all(axis=1)
+    dn = (slopes < 0).all(axis=1)
+    regime = pd.Series("RANGE", index=slopes.index, dtype=object)
+    regime[up] = "UP"
+    regime[dn] = "DOWN"
+    return regime
+
+
+def trend_regime(series: pd.Series, windows: Iterable[int] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    """Feature de régimen: `rolling_ols` + columna `trend_regime` (UP/DOWN/RANGE)."""
+    windows = [int(w) for w in windows]
+    feats = rolling_ols(series, windows)
+    feats["trend_regime"] = classify_trend(feats[[f"slope_{w}" for w in windows]])
+    return feats
@@ -135,6 +135,17 @@ async def shutdown_event():
     # Stop Telegram Bot
     await stop_telegram_bot()
 
+    # Cancel queued/running backtest jobs
+    from core.backtest_jobs import job_manager
+
+    job_manager.shutdown()
+
+    # Scheduler (daemon thread, no SIGTERM handler there): stop the loop and
+    # release its shard leases so other instances take them over right away
+    if scheduler_instance.running:
+        await asyncio.to_thread(scheduler_instance.stop, 10)
+        await asyncio.to_thread(scheduler_instance.release_leases)  # also if still mid-iteration
+
 
 from fastapi.middleware.trustedhost import TrustedHostMiddleware  # noqa: E402
 from fastapi.exceptions import RequestValidationError  # noqa: E402
@@ -355,6 +366,31 @@ async def startup():
     else:
          print("ℹ️ [STARTUP] Evaluator skipped (RUN_EVALUATOR not set).")
 
+    # Quota write-behind (Redis counters -> DailyUsage), only when Redis is active
+    from core.entitlements import get_quota_redis_client, flush_quota_counters
+
+    if get_quota_redis_client() is not None:
+
+        async def run_quota_flush_loop():
+            from fastapi.concurrency import run_in_threadpool
+            from database import SessionLocal
+
+            def _flush():
+                db = SessionLocal()
+                try:
+                    return flush_quota_counters(db)
+                finally:
+                    db.close()
+
+            while True:
+                try:
+                    await asyncio.sleep(60)
+                    await run_in_threadpool(_flush)
+                except Exception as e:
+                    print(f"[BACKGROUND] Quota flush error: {e}")
+
+        asyncio.create_task(run_quota_flush_loop())
+
 
 # ==== 12. Endpoint Notify (Telegram) ====
 
@@ -149,10 +149,20 @@ class StrategyConfig(Base):
     # Config JSON (parámetros específicos de la estrategia)
     config_json = Column(Text, nullable=True)  # JSON: {"rsi_period": 14, ...}
 
+    # Versión de configuración: se incrementa en cada cambio operativo
+    # (toggle, tokens, timeframes...). El scheduler solo recompila su tabla
+    # de personas cuando cambia. Las estadísticas NO la incrementan.
+    config_version = Column(Integer, default=1)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+def bump_config_version(strat: StrategyConfig):
+    """Signals the scheduler that this persona's runtime config changed."""
+    strat.config_version = (strat.config_version or 1) + 1
+
+
 class PushSubscription(Base):
     __tablename__ = "push_subscriptions"
     __table_args__ = {"extend_existing": True}
@@ -248,3 +258,34 @@ class CopilotProfile(Base):
 
     # Relación simple
     user = relationship("User")
+
+
+class SignalDailyRollup(Base):
+    """
+    Agregados diarios de evaluaciones (día x usuario x persona x token).
+    Mantenidos por el evaluador (core/rollups.py); las gráficas leen de aquí
+    en lugar de escanear signals/signal_evaluations.
+    """
+
+    __tablename__ = "signal_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "user_id", "source", "token", "is_saved", name="uq_rollup_bucket"
+        ),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    day = Column(String, index=True)  # YYYY-MM-DD (UTC, fecha de evaluación)
+    user_id = Column(Integer, default=0)  # 0 = System (sin FK para poder usar 0)
+    source = Column(String, default="")  # Persona: "Marketplace:<persona_id>", "audit_script", ...
+    token = Column(String, default="")
+    is_saved = Column(Integer, default=0)  # Mismo flag que Signal.is_saved
+
+    signals = Column(Integer, default=0)  # Señales evaluadas en el bucket
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    breakeven = Column(Integer, default=0)
+    pnl_r_sum = Column(Float, default=0.0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
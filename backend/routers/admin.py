@@ -94,6 +94,15 @@ async def get_admin_stats(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/performance")
+async def get_admin_performance(days: int = 30, db: Session = Depends(get_db)):
+    """Daily platform-wide results chart (reads daily rollups)."""
+    from core.rollups import daily_series
+
+    days = max(1, min(days, 365))
+    return {"days": days, "series": daily_series(db, days=days)}
+
+
 @router.get("/users")
 async def list_users(
     page: int = 1,
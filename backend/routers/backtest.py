@@ -1,9 +1,24 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from core.backtest_engine import BacktestEngine
+from core.backtest_cache import load_result, run_cached
+from core.backtest_jobs import DONE, TERMINAL, JobLimitExceeded, job_manager
+from core.downsample import DEFAULT_MAX_POINTS, apply_max_points
+from core.entitlements import OPTIMIZE_LIMITS, PORTFOLIO_LIMITS, WALK_FORWARD_LIMITS
+from core.optimizer import RANK_METRICS, SweepError, build_combinations
+from core.portfolio_backtest import MAX_DAYS, MAX_TOKENS
+from core.walk_forward import estimate_windows
+from models_db import User
+from routers.auth_new import get_current_user
 
 router = APIRouter(prefix="/backtest", tags=["backtest"])
 
+MAX_MONTE_CARLO_PATHS = 50000
+
 
 class BacktestRequest(BaseModel):
     strategy_id: str
@@ -11,12 +26,19 @@ class BacktestRequest(BaseModel):
     timeframe: str = "1h"
     days: int = 30
     initial_capital: float = 1000.0
+    monte_carlo_paths: int = 10000
+    # Inicio anclado (ms). Permite reutilizar runs previos cuando solo avanza el final
+    start_ts: Optional[int] = None
+    # Puntos máximos de la curva (LTTB). 0 = resolución completa
+    max_points: int = DEFAULT_MAX_POINTS
 
 
 @router.post("/run")
-def run_backtest(req: BacktestRequest):
+def run_backtest(req: BacktestRequest, response: Response):
     """
     Ejecuta una simulación histórica de una estrategia.
+    Los resultados se cachean por contenido; la cabecera `X-Backtest-Cache`
+    indica hit / partial / miss.
     """
     results = None
     try:
@@ -29,15 +51,19 @@ def run_backtest(req: BacktestRequest):
         # Intento de normalización básica
         strat_id = req.strategy_id.replace(".py", "")
 
-        results = engine.run(
+        results, cache_status = run_cached(
+            engine,
             strategy_id=strat_id,
             # Engine/API expects lowercase usually? Market API handles both
             symbol=req.token.lower(),
             timeframe=req.timeframe,
             days=req.days,
+            monte_carlo_paths=max(0, min(req.monte_carlo_paths, MAX_MONTE_CARLO_PATHS)),
+            start_ts=req.start_ts,
         )
+        response.headers["X-Backtest-Cache"] = cache_status
 
-        return results
+        return apply_max_points(results, req.max_points)
 
     except Exception as e:
         import traceback
@@ -57,6 +83,324 @@ def run_backtest(req: BacktestRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# === Full-Resolution Curves ===
+
+CURVE_PAGE_MAX = 10000
+CURVE_BINARY_COLUMNS = ("timestamp", "strategy_equity", "buy_hold_equity", "price")
+
+
+@router.get("/results/{result_id}/curve")
+def get_result_curve(
+    result_id: str, offset: int = 0, limit: int = 5000, format: str = "json"
+):
+    """
+    Curva completa (sin reducir) de un resultado de /backtest/run, paginada.
+    `format=f64` devuelve las columnas numéricas como float64 little-endian
+    contiguos (columna a columna), mucho más ligero que JSON.
+    """
+    result = load_result(result_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+
+    curve = result.get("curve") or []
+    offset = max(0, offset)
+    limit = max(1, min(limit, CURVE_PAGE_MAX))
+    page = curve[offset : offset + limit]
+    next_offset = offset + limit if offset + limit < len(curve) else None
+
+    if format == "f64":
+        import numpy as np
+
+        data = np.array(
+            [[p.get(c) or 0.0 for p in page] for c in CURVE_BINARY_COLUMNS],
+            dtype="<f8",
+        )
+        return Response(
+            content=data.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Curve-Columns": ",".join(CURVE_BINARY_COLUMNS),
+                "X-Curve-Rows": str(len(page)),
+                "X-Curve-Total": str(len(curve)),
+                "X-Curve-Next-Offset": "" if next_offset is None else str(next_offset),
+            },
+        )
+
+    return {
+        "result_id": result_id,
+        "total": len(curve),
+        "offset": offset,
+        "next_offset": next_offset,
+        "points": page,
+    }
+
+
+# === Async Jobs ===
+
+SSE_POLL_SECONDS = 0.5
+
+
+def _job_params(req: BacktestRequest) -> Dict[str, Any]:
+    params = req.model_dump()
+    params["strategy_id"] = req.strategy_id.replace(".py", "")
+    params["token"] = req.token.upper()
+    params["monte_carlo_paths"] = max(
+        0, min(req.monte_carlo_paths, MAX_MONTE_CARLO_PATHS)
+    )
+    return params
+
+
+def _get_job_or_404(job_id: str, user: User):
+    job = job_manager.get(job_id, user_id=user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _submit_job(user: User, params: Dict[str, Any]):
+    try:
+        job, created = job_manager.submit(user.id, user.plan, params)
+    except JobLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "code": "BACKTEST_JOB_LIMIT",
+                "message": str(e),
+                "limit": e.limit,
+                "scope": e.scope,
+            },
+        )
+    return {"job_id": job.id, "status": job.status, "deduplicated": not created}
+
+
+@router.post("/jobs", status_code=202)
+def submit_backtest_job(
+    req: BacktestRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Encola un backtest y devuelve su job_id sin esperar al resultado.
+    Un envío idéntico mientras el job existe devuelve el mismo job.
+    """
+    return _submit_job(current_user, _job_params(req))
+
+
+@router.get("/jobs/{job_id}")
+def get_backtest_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return _get_job_or_404(job_id, current_user).snapshot()
+
+
+@router.get("/jobs/{job_id}/result")
+def get_backtest_job_result(
+    job_id: str, current_user: User = Depends(get_current_user)
+):
+    job = _get_job_or_404(job_id, current_user)
+    if job.status != DONE:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": f"Job is {job.status}", "error": job.error},
+        )
+    return apply_max_points(job.result, job.params.get("max_points"))
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_backtest_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = job_manager.cancel(job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_backtest_job(
+    job_id: str, request: Request, current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events con el progreso del job (`progress`) y un evento
+    final (`end`) cuando termina, falla o se cancela.
+    """
+    job = _get_job_or_404(job_id, current_user)
+
+    async def events():
+        last_version = -1
+        while True:
+            if await request.is_disconnected():
+                break
+            if job.version != last_version:
+                last_version = job.version
+                snap = job.snapshot()
+                event = "end" if job.status in TERMINAL else "progress"
+                yield f"event: {event}\ndata: {json.dumps(snap)}\n\n"
+                if event == "end":
+                    break
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class PortfolioBacktestRequest(BaseModel):
+    strategy_id: str
+    tokens: List[str] = ["BTC", "ETH", "SOL"]
+    timeframe: str = "1h"
+    days: int = 30
+    initial_capital: float = 1000.0
+    max_positions: int = 5
+    position_size_pct: float = 20.0
+    max_points: int = DEFAULT_MAX_POINTS
+
+
+@router.post("/portfolio", status_code=202)
+def run_portfolio_backtest(
+    req: PortfolioBacktestRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Backtest multi-token con capital compartido, límite de posiciones
+    simultáneas y tamaño por posición (% del equity). Se ejecuta como job
+    (ver /backtest/jobs/{job_id}); tokens × días se limitan por plan
+    (PORTFOLIO_LIMITS).
+    """
+    tokens = list(dict.fromkeys(t.upper() for t in req.tokens))
+    if not tokens or len(tokens) > MAX_TOKENS:
+        raise HTTPException(
+            status_code=400, detail=f"Provide between 1 and {MAX_TOKENS} tokens"
+        )
+    if not 1 <= req.days <= MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be in [1, {MAX_DAYS}]")
+    if req.max_positions < 1 or not 0 < req.position_size_pct <= 100:
+        raise HTTPException(
+            status_code=400,
+            detail="max_positions must be >= 1 and position_size_pct in (0, 100]",
+        )
+
+    plan = (current_user.plan or "FREE").upper()
+    limit = PORTFOLIO_LIMITS.get(plan, PORTFOLIO_LIMITS["FREE"])
+    if len(tokens) * req.days > limit:
+        raise _plan_limit_exceeded(
+            plan,
+            f"{len(tokens)} tokens x {req.days} days exceed your plan limit of {limit} "
+            "(fewer tokens or a shorter range)",
+            limit,
+        )
+
+    params = req.model_dump()
+    params.update(
+        kind="portfolio",
+        strategy_id=req.strategy_id.replace(".py", ""),
+        tokens=tokens,
+    )
+    return _submit_job(current_user, params)
+
+
+class SweepRequest(BaseModel):
+    strategy_id: str
+    token: str = "BTC"
+    timeframe: str = "1h"
+    days: int = 30
+    initial_capital: float = 1000.0
+    grid: Optional[Dict[str, List[Any]]] = None
+    space: Optional[Dict[str, Any]] = None
+    n_iter: int = 20
+    seed: Optional[int] = None
+    metric: str = "roi_pct"
+
+
+class OptimizeRequest(SweepRequest):
+    top: int = 20
+
+
+def _plan_limit_exceeded(plan: str, message: str, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=403,
+        detail={
+            "code": "PLAN_LIMIT",
+            "message": message,
+            "tier": plan,
+            "limit": limit,
+            "upgrade_required": plan != "OWNER",
+        },
+    )
+
+
+def _sweep_size(req: SweepRequest) -> int:
+    """Nº de combinaciones del barrido (valida el espacio antes de encolar)."""
+    if req.metric not in RANK_METRICS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown metric '{req.metric}'. Use one of {RANK_METRICS}"
+        )
+    try:
+        return len(build_combinations(req.grid, req.space, req.n_iter, req.seed))
+    except SweepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/optimize", status_code=202)
+def optimize_strategy(
+    req: OptimizeRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Barrido de parámetros (grid o random) sobre un mismo histórico.
+    Se ejecuta como job (ver /backtest/jobs/{job_id}); el resultado son las
+    `top` combinaciones ordenadas por `metric`. El nº de combinaciones se
+    limita por plan (OPTIMIZE_LIMITS).
+    """
+    plan = (current_user.plan or "FREE").upper()
+    limit = OPTIMIZE_LIMITS.get(plan, OPTIMIZE_LIMITS["FREE"])
+    combinations = _sweep_size(req)
+    if combinations > limit:
+        raise _plan_limit_exceeded(
+            plan, f"{combinations} combinations exceed your plan limit of {limit}", limit
+        )
+
+    params = req.model_dump()
+    params.update(
+        kind="optimize",
+        strategy_id=req.strategy_id.replace(".py", ""),
+        token=req.token.upper(),
+    )
+    return _submit_job(current_user, params)
+
+
+class WalkForwardRequest(SweepRequest):
+    days: int = 90
+    train_candles: int = 500
+    test_candles: int = 100
+    max_points: int = DEFAULT_MAX_POINTS
+
+
+@router.post("/walk-forward", status_code=202)
+def walk_forward(
+    req: WalkForwardRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Walk-forward: optimiza en cada ventana de train y encadena los tramos
+    de test (out-of-sample) en una sola curva de equity. Se ejecuta como
+    job; ventanas × combinaciones se limitan por plan (WALK_FORWARD_LIMITS).
+    """
+    plan = (current_user.plan or "FREE").upper()
+    limit = WALK_FORWARD_LIMITS.get(plan, WALK_FORWARD_LIMITS["FREE"])
+    combinations = _sweep_size(req)
+    windows = max(1, estimate_windows(req.days, req.timeframe, req.train_candles, req.test_candles))
+    if windows * combinations > limit:
+        raise _plan_limit_exceeded(
+            plan,
+            f"~{windows} windows x {combinations} combinations exceed your plan limit "
+            f"of {limit} runs (shorten 'days' or grow 'test_candles')",
+            limit,
+        )
+
+    params = req.model_dump()
+    params.update(
+        kind="walk_forward",
+        strategy_id=req.strategy_id.replace(".py", ""),
+        token=req.token.upper(),
+        max_runs=limit,
+    )
+    return _submit_job(current_user, params)
+
+
 @router.get("/strategies")
 def list_backtestable_strategies():
     """
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc
 from database import get_db
-from models_db import Signal, SignalEvaluation
+from models_db import Signal
 from pydantic import BaseModel
 from datetime import datetime
 from routers.auth_new import get_current_user
@@ -48,12 +48,16 @@ def get_recent_logs(
 ):
     """
     Obtiene las señales más recientes (Paginadas).
+    Solo lee la tabla hot: con SIGNAL_RETENTION_DAYS las señales transitorias
+    archivadas dejan de aparecer aquí (siguen en /logs/{mode}/{token} y en el
+    historial de la persona). Las guardadas (is_saved) nunca se archivan.
     """
     try:
         from sqlalchemy import or_
 
         # Initialize query FIRST
-        query = db.query(Signal)
+        # Evaluations are joined in the same SELECT (avoids one query per row)
+        query = db.query(Signal).options(joinedload(Signal.evaluation))
         # Import dependency if needed (it is already imported in header? No, need check)
         # Actually it is imported via router? No. We have to import it.
 
@@ -123,13 +127,8 @@ def get_recent_logs(
                 continue
             seen_keys.add(dedup_key)
 
-            # Buscar vacantes (evaluación)
-            # OPTIMIZATION: Could be eager loaded, but for now loop is fine for small limits
-            eval_entry = (
-                db.query(SignalEvaluation)
-                .filter(SignalEvaluation.signal_id == sig.id)
-                .first()
-            )
+            # Evaluación (ya cargada vía joinedload)
+            eval_entry = sig.evaluation
 
             status = "OPEN"
             pnl = None
@@ -185,9 +184,13 @@ def get_logs_by_token(
     try:
         from sqlalchemy import or_
 
-        query = db.query(Signal).filter(
-            Signal.mode == mode.upper(),
-            or_(Signal.user_id == current_user.id, Signal.user_id.is_(None)),
+        query = (
+            db.query(Signal)
+            .options(joinedload(Signal.evaluation))
+            .filter(
+                Signal.mode == mode.upper(),
+                or_(Signal.user_id == current_user.id, Signal.user_id.is_(None)),
+            )
         )
 
         if token.lower() != "all":
@@ -198,11 +201,7 @@ def get_logs_by_token(
         # Mapear a formato simple
         results = []
         for s in signals:
-            eval_entry = (
-                db.query(SignalEvaluation)
-                .filter(SignalEvaluation.signal_id == s.id)
-                .first()
-            )
+            eval_entry = s.evaluation
             results.append(
                 {
                     "timestamp": s.timestamp.isoformat() if s.timestamp else None,
@@ -222,6 +221,40 @@ def get_logs_by_token(
                     "exit_price": eval_entry.exit_price if eval_entry else None,
                 }
             )
+
+        # Completar con señales archivadas (SIGNAL_RETENTION_DAYS)
+        if len(results) < limit:
+            from core.signal_archive import archived_records, load_recent_archived
+
+            hot_ids = {s.id for s in signals}
+            archived = load_recent_archived(
+                limit,
+                token=None if token.lower() == "all" else token,
+                mode=mode.upper(),
+                include_user_id=current_user.id,
+            )
+            for rec in archived_records(archived):
+                if rec["id"] in hot_ids:
+                    continue
+                results.append(
+                    {
+                        "timestamp": rec["timestamp"].isoformat() if rec["timestamp"] else None,
+                        "token": rec["token"],
+                        "timeframe": rec["timeframe"],
+                        "direction": rec["direction"],
+                        "entry": rec["entry"],
+                        "tp": rec["tp"],
+                        "sl": rec["sl"],
+                        "confidence": rec["confidence"],
+                        "source": rec["source"],
+                        "closed_at": (
+                            rec["evaluated_at"].isoformat() if rec["evaluated_at"] else None
+                        ),
+                        "exit_price": rec["exit_price"],
+                    }
+                )
+            results.sort(key=lambda r: r["timestamp"] or "", reverse=True)
+            results = results[:limit]
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
@@ -317,6 +350,16 @@ def toggle_save_signal(
         if sig.user_id == current_user.id:
             # Toggle
             new_state = 1 if (sig.is_saved == 0 or sig.is_saved is None) else 0
+
+            # Move an already-evaluated signal to the matching rollup bucket
+            if sig.evaluation:
+                from core.rollups import record_evaluation
+
+                ev = sig.evaluation
+                record_evaluation(db, sig, ev.result, ev.pnl_r, ev.evaluated_at, sign=-1)
+                sig.is_saved = new_state
+                record_evaluation(db, sig, ev.result, ev.pnl_r, ev.evaluated_at)
+
             sig.is_saved = new_state
             db.commit()
             return {
@@ -5,13 +5,20 @@ from datetime import datetime, timedelta
 from database import get_db
 from routers.auth_new import get_current_user
 from models_db import User, Signal, SignalEvaluation
+from core.rollups import daily_series
+
+# Sources used by audit/verification scripts (excluded from user stats)
+TEST_SOURCES = ["audit_script", "verification"]
+MAX_CHART_DAYS = 365
 
 router = APIRouter(tags=["Stats"], dependencies=[Depends(get_current_user)])
 
 
 @router.get("/dashboard")
 def get_dashboard_stats(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    days: int = 7,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Returns aggregated stats and chart data for the dashboard.
@@ -21,8 +28,8 @@ def get_dashboard_stats(
         # 1. Calculate Summary Stats (Win Rate, Open Signals, PnL)
         summary = compute_stats_summary(db, current_user)
 
-        # 2. Calculate Chart Data (7 Days Performance)
-        chart_data = get_performance_chart(db, current_user)
+        # 2. Calculate Chart Data (Daily Performance, 7 days by default)
+        chart_data = get_performance_chart(db, current_user, days=days)
 
         return {"summary": summary, "chart": chart_data}
     except Exception as e:
@@ -43,7 +50,7 @@ def get_dashboard_stats(
 def compute_stats_summary(db: Session, user: User):
     day_ago = datetime.utcnow() - timedelta(hours=24)
     week_ago = datetime.utcnow() - timedelta(days=7)
-    test_sources = ["audit_script", "verification"]
+    test_sources = TEST_SOURCES
 
     # Base Query Helper
     def get_base_signal_query():
@@ -132,67 +139,32 @@ def compute_stats_summary(db: Session, user: User):
     }
 
 
-def get_performance_chart(db: Session, user: User):
+def get_performance_chart(db: Session, user: User, days: int = 7):
     """
-    Returns daily Win/Loss counts for the last 7 days.
+    Returns daily Win/Loss counts for the last `days` days.
+    Reads the daily rollups (core/rollups.py), so the cost depends on the
+    number of days, not on the number of evaluated signals.
     """
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    test_sources = ["audit_script", "verification"]
-
-    # Query: Date, Result, Count
-    # SQLite uses strftime, Postgres uses to_char. Assuming SQLite for now
-    # based on context,
-    # but let's try to be generic by grouping in Python or using a simple date
-    # truncation if possible.
-    # For safety/compatibility, we fetch relevant evaluations and process in Python.
-    # It's less efficient but safe across DB types for this scale.
-
-    active_evals = (
-        db.query(SignalEvaluation.evaluated_at, SignalEvaluation.result)
-        .join(Signal)
-        .filter(
-            SignalEvaluation.evaluated_at >= week_ago,
-            Signal.source.notin_(test_sources),
-            Signal.user_id == user.id,
-            Signal.is_saved == 1,
-        )
-        .all()
+    days = max(1, min(days, MAX_CHART_DAYS))
+
+    series = daily_series(
+        db,
+        days=days,
+        user_id=user.id,
+        saved_only=True,
+        exclude_sources=TEST_SOURCES,
     )
 
-    # Process in Python
-    from collections import defaultdict
-
-    daily_stats = defaultdict(lambda: {"wins": 0, "losses": 0, "date": ""})
-
-    # Pre-fill last 7 days to ensure no gaps
-    for i in range(7):
-        d = (datetime.utcnow() - timedelta(days=6 - i)).strftime("%a")  # Mon, Tue...
-        daily_stats[d]["date"] = d  # Ensure key exists
-
-    for ev in active_evals:
-        if not ev.evaluated_at:
-            continue
-        day_str = ev.evaluated_at.strftime("%a")  # Mon, Tue...
-        res = str(ev.result).upper()
-
-        if "WIN" in res or "TP" in res:
-            daily_stats[day_str]["wins"] += 1
-        elif "LOSS" in res or "SL" in res:
-            daily_stats[day_str]["losses"] += 1
-
-    # Convert to list sorted by date (trickier with just "Mon", but we filled in order)
-    # Actually, let's just return the list in limits of 7 days sliding window
-    # Re-generating keys based on current date to ensure order
-
+    # Weekday labels for the classic 7-day chart, ISO dates for longer windows
     final_chart = []
-    for i in range(7):
-        d_obj = datetime.utcnow() - timedelta(days=6 - i)
-        day_label = d_obj.strftime("%a")
+    for point in series:
+        d_obj = datetime.strptime(point["day"], "%Y-%m-%d")
+        day_label = d_obj.strftime("%a") if days <= 7 else point["day"]
         final_chart.append(
             {
                 "date": day_label,
-                "wins": daily_stats[day_label]["wins"],
-                "losses": daily_stats[day_label]["losses"],
+                "wins": point["wins"],
+                "losses": point["losses"],
             }
         )
 
@@ -5,17 +5,18 @@ Single Source of Truth: 'strategy_configs' table.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Dict, Any
 import json as json_lib
 import re
 
 
 from database import get_db
-from models_db import StrategyConfig, User, Signal, SignalEvaluation
+from models_db import StrategyConfig, User, Signal, SignalEvaluation, bump_config_version
 from pydantic import BaseModel
 from routers.auth_new import get_current_user
 from dependencies import require_plan
+from core.rollups import daily_series, delete_source_rollups, totals_by_source
 
 
 # === Dependency ===
@@ -90,6 +91,11 @@ async def get_marketplace(
         # Re-fetch after seeding
         configs = db.query(StrategyConfig).filter(StrategyConfig.user_id == current_user.id).all()
 
+    # Realized stats for all personas in one rollup query (no per-persona scans)
+    rollup_totals = totals_by_source(
+        db, [f"Marketplace:{c.persona_id}" for c in configs]
+    )
+
     personas = []
     for c in configs:
         # Determine strict "is_custom" bool based on user_id presence
@@ -110,34 +116,13 @@ async def get_marketplace(
         # Fix: Calculate Win Rate dynamically to ensure accuracy
         target_source = f"Marketplace:{c.persona_id}"
         real_wr = 0.0
-        try:
-            # Count evaluated wins
-            wins = (
-                db.query(SignalEvaluation)
-                .join(Signal)
-                .filter(
-                    Signal.source == target_source, SignalEvaluation.result == "WIN"
-                )
-                .count()
-            )
-
-            # Count total evaluations
-            total_evals = (
-                db.query(SignalEvaluation)
-                .join(Signal)
-                .filter(Signal.source == target_source)
-                .count()
-            )
-
-            if total_evals > 0:
-                real_wr = (wins / total_evals) * 100
+        totals = rollup_totals.get(target_source)
+        if totals and totals["signals"] > 0:
+            real_wr = (totals["wins"] / totals["signals"]) * 100
 
             # Valid commit happens outside loop if we want, or transient update
             c.win_rate = real_wr
-            c.total_signals = total_evals
-        except Exception as e:
-            print(f"[STATS] Error calculating stats for {c.persona_id}: {e}")
-            real_wr = c.win_rate or 0.0
+            c.total_signals = totals["signals"]
 
         # Frequency (Static if in config, else inferred)
         freq_label = "Medium"
@@ -247,6 +232,7 @@ async def toggle_strategy(
 
     # Toggle (0 -> 1, 1 -> 0)
     strat.enabled = 0 if strat.enabled == 1 else 1
+    bump_config_version(strat)
     db.commit()
 
     return {"status": "ok", "enabled": strat.enabled == 1}
@@ -304,6 +290,15 @@ async def delete_persona(
     # IF this is a custom strategy and we want to be aggressive about cleanup.
     # However, 'target_source' is the strict link for persona execution.
 
+    delete_source_rollups(db, target_source)
+
+    # Señales ya archivadas en Parquet (si no, un backfill de rollups las resucita)
+    from core.signal_archive import purge_archived_source
+
+    purged = purge_archived_source(target_source)
+    if purged:
+        print(f"🗄️ Purged {purged} archived signals of {target_source}")
+
     print(
         f"🗑️ Deleting Persona {persona_id}: Metadata + "
         f"{deleted_signals} Signals + {deleted_evals} Evaluations."
@@ -331,6 +326,7 @@ async def get_persona_history(persona_id: str, db: Session = Depends(get_db)):
 
     signals = (
         db.query(Signal)
+        .options(joinedload(Signal.evaluation))
         .filter(Signal.source == target_source)
         .order_by(Signal.timestamp.desc())
         .limit(100)
@@ -364,9 +360,50 @@ async def get_persona_history(persona_id: str, db: Session = Depends(get_db)):
             }
         )
 
+    # Con SIGNAL_RETENTION_DAYS las señales antiguas viven en el archivo Parquet
+    if len(history) < 100:
+        from core.signal_archive import archived_records, load_recent_archived
+
+        hot_ids = {h["id"] for h in history}
+        archived = load_recent_archived(100, source=target_source)
+        for rec in archived_records(archived):
+            if rec["id"] in hot_ids:
+                continue
+            history.append(
+                {
+                    "id": rec["id"],
+                    "timestamp": rec["timestamp"],
+                    "token": rec["token"],
+                    "direction": rec["direction"],
+                    "entry": rec["entry"],
+                    "tp": rec["tp"],
+                    "sl": rec["sl"],
+                    "mode": rec["mode"],
+                    "confidence": rec["confidence"],
+                    "rationale": rec["rationale"],
+                    "result": {
+                        "result": rec["result"],
+                        "pnl_r": rec["pnl_r"],
+                        "exit_price": rec["exit_price"],
+                        "closed_at": rec["evaluated_at"],
+                    },
+                }
+            )
+        history.sort(key=lambda h: h["timestamp"], reverse=True)
+        history = history[:100]
+
     return history
 
 
+@router.get("/marketplace/{persona_id}/performance")
+async def get_persona_performance(
+    persona_id: str, days: int = 30, db: Session = Depends(get_db)
+):
+    """Serie diaria de resultados para una Persona (desde rollups)."""
+    days = max(1, min(days, 365))
+    return daily_series(db, days=days, source=f"Marketplace:{persona_id}")
+
+
 # === Registry & Metadata (Legacy/Internal) ===
 
 
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 import os
+import sys
 
 router = APIRouter()
 
@@ -38,3 +39,19 @@ def get_system_config():
             print(f"Error loading theme_config: {e}")
 
     return defaults
+
+
+@router.get("/scheduler/metrics")
+def get_scheduler_metrics():
+    """
+    Sizes of the scheduler's bounded in-memory state (TTL/LRU caches).
+    Only meaningful when the scheduler runs inside this process (RUN_SCHEDULER):
+    otherwise 404. The module is looked up, never imported, so this endpoint
+    does not build a StrategyScheduler in the API process.
+    """
+    module = sys.modules.get("scheduler")
+    instance = getattr(module, "scheduler_instance", None)
+    if instance is None or not getattr(instance, "running", False):
+        raise HTTPException(status_code=404, detail="Scheduler not running in this process")
+
+    return {"state": instance.state_metrics()}
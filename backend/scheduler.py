@@ -7,13 +7,17 @@ NO requiere Docker ni cron, solo:
     python scheduler.py
 """
 
+import os
 import sys
 import time
+import signal
+import threading
 import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 import uuid
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 
@@ -25,9 +29,14 @@ from database import SessionLocal  # noqa: E402
 from strategies.registry import get_registry  # noqa: E402
 from core.signal_evaluator import evaluate_pending_signals  # noqa: E402
 from core.signal_logger import log_signal  # noqa: E402
+from core.signal_archive import archive_cold_signals  # noqa: E402
+from core.ttl_cache import TTLCache  # noqa: E402
 from models_db import StrategyConfig, User  # noqa: E402
 from notify import send_telegram  # noqa: E402
 from data.supported_tokens import VALID_TOKENS_FULL  # noqa: E402
+from core.entitlements import TokenCatalog  # noqa: E402
+from core.prescreen import build_panel  # noqa: E402
+from core.sharding import SharedState, ShardLeaseManager  # noqa: E402
 
 # Configuración de Logging
 logging.basicConfig(
@@ -37,12 +46,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Memory budget for in-memory scheduler state (entries per structure).
+# Each structure is a TTL/LRU cache, so RSS stays flat on week-long runs.
+STATE_MAX_ENTRIES = int(os.getenv("SCHEDULER_STATE_MAX_ENTRIES", "50000"))
 
-def get_active_strategies_from_db():
+# Pre-screen vectorizado de personas scanner (core/prescreen.py)
+PRESCREEN_ENABLED = os.getenv("SCHEDULER_PRESCREEN", "1") == "1"
+
+# Horizontal scaling (core/sharding.py): with N > 1 shards each instance runs
+# only the personas of the shards it holds a lease for. 1 = single global lock.
+SCHEDULER_SHARDS = int(os.getenv("SCHEDULER_SHARDS", "1"))
+
+COHERENCE_WINDOW = timedelta(minutes=30)
+NOTIFY_DEDUPE_WINDOW = timedelta(minutes=45)
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _parse_json_list(raw):
+    try:
+        value = json.loads(raw) if raw else []
+    except Exception:
+        return []
+    return value if isinstance(value, list) else []
+
+
+def _compile_persona(c, chat_id, token_pool):
+    """
+    Convierte una fila StrategyConfig en el dict que consume el scheduler.
+    Los tokens se normalizan (trim/upper/alias), se deduplican y se
+    internan en `token_pool`, de modo que personas con la misma lista
+    (p.ej. todos los Scanners) comparten una única tupla.
+    """
+    tokens_list = _parse_json_list(c.tokens)
+    tf_list = _parse_json_list(c.timeframes)
+
+    # --- TOKEN LIST LOGIC ---
+    # If the strategy is configured with "ALL" or "SCANNER" as the symbol,
+    # or if the tokens list is empty, we treat it as a SCANNER strategy
+    # that runs on the full list.
+
+    primary_symbol = str(tokens_list[0]).strip().upper() if tokens_list else "BTC"
+
+    # Special 'Marker' logic for System Scanners
+    is_scanner = primary_symbol in ["ALL", "SCANNER", "*"]
+    if is_scanner:
+        logger.info(
+            f"  ✨ Detected Scanner Strategy: {c.name} -> Expanding to {len(VALID_TOKENS_FULL)} tokens"
+        )
+        raw_tokens = VALID_TOKENS_FULL
+    else:
+        raw_tokens = tokens_list if tokens_list else ["BTC"]
+
+    normalized = []
+    for t in raw_tokens:
+        token = TokenCatalog.normalize(str(t))
+        if token and token not in normalized:
+            normalized.append(token)
+    target_tokens = token_pool.setdefault(tuple(normalized), tuple(normalized))
+
+    target_tf = tf_list[0] if tf_list else "1h"
+
+    return {
+        "id": c.persona_id,  # "trend_king_sol"
+        "strategy_id": c.strategy_id,  # "donchian_v2"
+        "tokens": target_tokens,  # Shared, read-only tuple of tokens
+        "timeframe": target_tf,
+        "name": c.name,
+        "telegram_chat_id": chat_id,
+        "user_id": c.user_id, # [FIX] Isolation: Pass owner ID
+        "scanner": is_scanner,  # Universo completo: pasa por el pre-screen
+    }
+
+
+def get_active_strategies_from_db(token_pool=None):
     """
     Recupera las estrategias activas directamente de PostgreSQL (StrategyConfig).
     Retorna una lista de diccionarios compatibles con el formato esperado por el scheduler.
     """
+    token_pool = {} if token_pool is None else token_pool
     db = SessionLocal()
     try:
         # Join with User to get Telegram preferences
@@ -53,53 +137,7 @@ def get_active_strategies_from_db():
             .all()
         )
 
-        strategies = []
-        for c, chat_id in results:
-            # Parse JSON fields safely
-            try:
-                tokens_list = json.loads(c.tokens) if c.tokens else []
-            except Exception:
-                tokens_list = []
-
-            try:
-                tf_list = json.loads(c.timeframes) if c.timeframes else []
-            except Exception:
-                tf_list = []
-
-            # --- TOKEN LIST LOGIC ---
-            # If the strategy is configured with "ALL" or "SCANNER" as the symbol,
-            # or if the tokens list is empty, we treat it as a SCANNER strategy
-            # that runs on the full list.
-
-            primary_symbol = tokens_list[0] if tokens_list else "BTC"
-
-            # Special 'Marker' logic for System Scanners
-            if primary_symbol in ["ALL", "SCANNER", "*"]:
-                logger.info(
-                    f"  ✨ Detected Scanner Strategy: {c.name} -> Expanding to {len(VALID_TOKENS_FULL)} tokens"
-                )
-                target_tokens = VALID_TOKENS_FULL
-            else:
-                # Default: Use the specific tokens configured (or just the first one for now)
-                # Ideally, we should iterate all tokens in tokens_list
-                # For now, let's just make target_tokens a list
-                target_tokens = tokens_list if tokens_list else ["BTC"]
-
-            target_tf = tf_list[0] if tf_list else "1h"
-
-            strategies.append(
-                {
-                    "id": c.persona_id,  # "trend_king_sol"
-                    "strategy_id": c.strategy_id,  # "donchian_v2"
-                    "tokens": target_tokens,  # Pass LIST of tokens
-                    "timeframe": target_tf,
-                    "name": c.name,
-                    "telegram_chat_id": chat_id,
-                    "user_id": c.user_id, # [FIX] Isolation: Pass owner ID
-                }
-            )
-
-        return strategies
+        return [_compile_persona(c, chat_id, token_pool) for c, chat_id in results]
     except Exception as e:
         logger.error(f"Error fetching strategies from DB: {e}")
         return []
@@ -107,6 +145,62 @@ def get_active_strategies_from_db():
         db.close()
 
 
+def get_persona_config_version(db: Session):
+    """
+    Versión barata de la configuración de personas: (nº filas, suma de
+    config_version, nº activas). Altas/bajas cambian el conteo y cada cambio
+    operativo incrementa config_version (routers/strategies.py). Las
+    actualizaciones de estadísticas (win_rate...) no la alteran.
+    """
+    row = db.query(
+        func.count(StrategyConfig.id),
+        func.sum(StrategyConfig.config_version),
+        func.sum(StrategyConfig.enabled),
+    ).one()
+    return tuple(row)
+
+
+class PersonaTable:
+    """
+    Tabla compilada de personas activas, en memoria.
+
+    Cada ciclo solo ejecuta la sonda de versión; la consulta completa y el
+    parseo de JSON se repiten únicamente si la versión cambia, o cada
+    `max_age_seconds` como red de seguridad (p.ej. cambios de
+    telegram_chat_id en users, que no tocan strategy_configs).
+    """
+
+    def __init__(self, max_age_seconds: int = 600, timer=time.monotonic):
+        self.max_age_seconds = max_age_seconds
+        self._timer = timer
+        self.version = None
+        self.loaded_at = None
+        self.personas = []
+        self.universe = ()  # Unión deduplicada de tokens de todas las personas
+        self.reloads = 0
+
+    def get(self):
+        now = self._timer()
+        db = SessionLocal()
+        try:
+            version = get_persona_config_version(db)
+        except Exception as e:
+            logger.error(f"Error probing persona config version: {e}")
+            return self.personas
+        finally:
+            db.close()
+
+        stale = self.loaded_at is None or now - self.loaded_at >= self.max_age_seconds
+        if version != self.version or stale:
+            token_pool = {}
+            self.personas = get_active_strategies_from_db(token_pool)
+            self.universe = tuple(sorted({t for tokens in token_pool for t in tokens}))
+            self.version = version
+            self.loaded_at = now
+            self.reloads += 1
+        return self.personas
+
+
 class StrategyScheduler:
     """
     Scheduler de Estrategias (Modo Marketplace - Parallelized).
@@ -115,7 +209,8 @@ class StrategyScheduler:
     para evitar bloqueos cuando hay muchos tokens.
     """
 
-    def __init__(self, loop_interval: int = 60):
+    def __init__(self, loop_interval: int = 60, timer=time.monotonic, panel_builder=build_panel,
+                 num_shards: int = SCHEDULER_SHARDS):
         self.loop_interval = loop_interval
         self.registry = get_registry()
 
@@ -142,29 +237,58 @@ class StrategyScheduler:
         self.registry.register(DonchianBreakoutV2)
         print(" [INFO] Strategies registered")
 
-        # State tracking for intervals
-        self.last_run = {}  # {persona_id: timestamp}
-        self.processed_signals = {}  # {signal_key: timestamp}
-        self.last_signal_direction = {}  # {persona_id_token: direction} (For alternation enforcement)
+        # State tracking for intervals (bounded TTL/LRU, see core/ttl_cache.py)
+        self.last_run = TTLCache(STATE_MAX_ENTRIES, ttl_seconds=24 * 3600, timer=timer)  # {persona_id: timestamp}
+        self.processed_signals = TTLCache(
+            STATE_MAX_ENTRIES, ttl_seconds=24 * 3600, timer=timer
+        )  # {signal_key: timestamp}
+        self.last_signal_direction = TTLCache(
+            STATE_MAX_ENTRIES, ttl_seconds=24 * 3600, timer=timer
+        )  # {persona_id_token: direction} (For alternation enforcement)
+
+        # Compiled persona table (refreshed only when the config version changes)
+        self.persona_table = PersonaTable()
 
         # Lock Config
         self.lock_id = str(uuid.uuid4())
         self.lock_ttl = 300  # 5 mins (Safe buffer > loop_interval)
         self.lock_name = "global_scheduler_lock"
 
-        # Deduplication Cache for Notifications
-        self.dedupe_cache = {}
+        # Sharding: leases per shard + dedupe state shared through the DB
+        self.shards = None
+        self.shared_state = None
+        if num_shards > 1:
+            self.shards = ShardLeaseManager(self.lock_id, num_shards, lease_ttl=self.lock_ttl)
+            self.shared_state = SharedState(lambda: SessionLocal())
+        # Deduplication Cache for Notifications (45 min window)
+        self.dedupe_cache = TTLCache(STATE_MAX_ENTRIES, ttl_seconds=3600, timer=timer)
 
         # Coherence Guard (Global Trend State)
         # Key: "Token" -> Value: { 'direction': 'long', 'ts': datetime, 'conf': 0.8 }
 
         # Used to reject conflicting signals (Long -> Short) if they happen too fast (Chop protection)
-        self.token_coherence = {}
+        self.token_coherence = TTLCache(STATE_MAX_ENTRIES, ttl_seconds=3600, timer=timer)
         
         # [NEW] Executor for Parallel Execution
         # We limit to 5 workers to prevent DB connection exhaustion if pooling set to 20
         self.max_workers = 5
 
+        # Pre-screen of scanner personas (one candle panel per timeframe and cycle)
+        self.prescreen_enabled = PRESCREEN_ENABLED
+        self.panel_builder = panel_builder
+        self.prescreen_stats = {}  # {persona_id: (survivors, universe)}
+
+        # Cold signal retention (hot table -> Parquet). Disabled unless configured.
+        retention = os.getenv("SIGNAL_RETENTION_DAYS")
+        self.retention_days = int(retention) if retention else None
+        self.last_archive_run = None
+
+        # True while run() is looping (see /system/scheduler/metrics)
+        self.running = False
+        # stop() (app shutdown) ends the loop; sleeps wait on it instead of time.sleep
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+
     def acquire_lock(self, db: Session) -> bool:
         """Intenta adquirir o renovar el lock de base de datos."""
         from models_db import SchedulerLock
@@ -201,7 +325,72 @@ class StrategyScheduler:
 
         print(f"🔒 Lock held by other instance ({lock.owner_id}). Retrying...")
         return False
+
+    def acquire_work(self, db: Session) -> bool:
+        """
+        Lock global (una instancia) o, con sharding, latido + leases de los
+        shards que tocan a esta instancia. True si hay trabajo que hacer.
+        """
+        if self.shards is None:
+            return self.acquire_lock(db)
+        return bool(self.shards.sync(db))
+
+    def owns_global_tasks(self) -> bool:
+        """Evaluador, retención y purga: solo el dueño del shard 0 con sharding."""
+        return self.shards is None or 0 in self.shards.owned
         
+    def prescreen_personas(self, personas):
+        """
+        Reduce los tokens de las personas scanner a los que pasan el
+        pre-screen de su estrategia. Un panel por timeframe (unión de tokens,
+        lookback máximo) sirve a todas las personas de ese timeframe.
+        Personas sin pre-screen o no scanner pasan intactas; las que se
+        quedan sin tokens no se ejecutan. Si falla el panel, no se filtra.
+        """
+        if not self.prescreen_enabled:
+            return personas
+
+        screens = {}
+        for p in personas:
+            if not p.get("scanner"):
+                continue
+            strategy = self.registry.get(p["strategy_id"])
+            screen = strategy.prescreen() if strategy else None
+            if screen is not None:
+                screens[p["id"]] = screen
+        if not screens:
+            return personas
+
+        panels = {}
+        for tf in {p["timeframe"] for p in personas if p["id"] in screens}:
+            group = [p for p in personas if p["id"] in screens and p["timeframe"] == tf]
+            tokens = list(dict.fromkeys(t for p in group for t in p["tokens"]))
+            # Las velas que pedirá la estrategia: los supervivientes las reciben ya descargadas
+            lookback = max(screens[p["id"]].panel_rows for p in group)
+            try:
+                panels[tf] = self.panel_builder(tokens, tf, lookback)
+            except Exception as e:
+                print(f"  ⚠️ Pre-screen panel {tf} failed, running full scan: {e}")
+
+        runnable = []
+        for p in personas:
+            screen, panel = screens.get(p["id"]), panels.get(p["timeframe"])
+            if screen is None or panel is None:
+                runnable.append(p)
+                continue
+            try:
+                survivors = tuple(screen.survivors(panel, p["tokens"]))
+            except Exception as e:
+                print(f"  ⚠️ Pre-screen {p['name']} failed, running full scan: {e}")
+                runnable.append(p)
+                continue
+            self.prescreen_stats[p["id"]] = (len(survivors), len(p["tokens"]))
+            print(f"  🔎 Pre-screen {p['name']}: {len(survivors)}/{len(p['tokens'])} tokens")
+            if survivors:
+                data = {t: panel.frames[t] for t in survivors if t in panel.frames}
+                runnable.append({**p, "tokens": survivors, "data": data})
+        return runnable
+
     def _execute_strategy_task(self, persona):
         """
         Worker function to execute a single strategy instance.
@@ -218,8 +407,10 @@ class StrategyScheduler:
         try:
             # print(f"   [Worker] Running {persona['name']}...")
             # Each strategy instance inside generate_signals acts locally
+            # Personas pre-screened: velas del panel (sin segunda descarga)
+            context = {"data": persona["data"]} if persona.get("data") else None
             signals = strategy.generate_signals(
-                tokens=persona["tokens"], timeframe=persona["timeframe"]
+                tokens=persona["tokens"], timeframe=persona["timeframe"], context=context
             )
             return signals
         except Exception as e:
@@ -231,18 +422,25 @@ class StrategyScheduler:
         import concurrent.futures
         
         iteration = 0
+        self.running = True
+        self._finished.clear()
+        # SIGTERM (docker stop, systemd, k8s) takes the same exit path as Ctrl+C,
+        # so shard leases are released instead of waiting for their TTL
+        prev_sigterm = None
+        if threading.current_thread() is threading.main_thread():
+            prev_sigterm = signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
         try:
-            while True:
+            while not self._stop.is_set():
                 # 0. Gestion de Lock
                 db = SessionLocal()
                 try:
-                    if not self.acquire_lock(db):
+                    if not self.acquire_work(db):
                         print("⏳ Waiting for lock...")
-                        time.sleep(10)
+                        self._stop.wait(10)
                         continue
                 except Exception as e:
                     print(f"⚠️ Lock Error: {e}")
-                    time.sleep(5)
+                    self._stop.wait(5)
                     continue
                 finally:
                     db.close()
@@ -253,8 +451,14 @@ class StrategyScheduler:
                 print(f"\n[{ba_time.strftime('%H:%M:%S')}] Iteration #{iteration}")
 
                 # 1. Obtener Personas Activas (DB)
-                personas = get_active_strategies_from_db()
+                personas = self.persona_table.get()
+                if self.shards is not None:
+                    personas = self.shards.filter(personas)
+                    print(f"  🧩 Shards {sorted(self.shards.owned)}/{self.shards.num_shards}")
                 print(f"  ℹ️  Active Personas: {len(personas)}")
+
+                # 1b. Pre-screen: scanners only run the full strategy on candidates
+                runnable = self.prescreen_personas(personas)
                 
                 # 2. Parallel Execution
                 all_signals_map = {} # {persona_id: [signals]}
@@ -263,7 +467,7 @@ class StrategyScheduler:
                     # Submit all tasks
                     future_to_persona = {
                         executor.submit(self._execute_strategy_task, p): p 
-                        for p in personas
+                        for p in runnable
                     }
                     
                     for future in concurrent.futures.as_completed(future_to_persona):
@@ -288,58 +492,169 @@ class StrategyScheduler:
                         continue
                         
                     for sig in signals:
-                        # 1. Deduplication (Optimized)
-                        # REMOVED: Inefficient DB query per signal.
-                        # We rely on 'log_signal' triggering IntegrityError via UniqueConstraint/IdempotencyKey.
-                        # This avoids opening N connections per cycle.
-
-                        # 2. In-Memory Deduplication
-                        ts_key = f"{p_id}_{sig.token}_{sig.direction}_{sig.timestamp}"
-                        last_ts = self.processed_signals.get(ts_key)
-                        if last_ts and sig.timestamp <= last_ts:
-                            continue
-
-                        # 3. Same-Side Spam check
-                        direction_key = f"{p_id}_{sig.token}"
-                        last_dir = self.last_signal_direction.get(direction_key)
-                        if last_dir == sig.direction:
-                            if last_ts and (sig.timestamp - last_ts).total_seconds() < 60:
-                                continue
-
-                        # 4. Global Coherence
-                        coherence_key = sig.token
-                        last_state = self.token_coherence.get(coherence_key)
-                        now_utc = datetime.utcnow()
-
-                        if last_state:
-                            last_global_dir = last_state["direction"]
-                            last_global_ts = last_state["ts"]
-                            if last_global_dir != sig.direction:
-                                if (now_utc - last_global_ts) < timedelta(minutes=30):
-                                    continue
-
-                        # Updates Shared State
-                        self.token_coherence[coherence_key] = {"direction": sig.direction, "ts": now_utc}
-                        # Process Signal
-                        self.process_single_signal(sig, p)
-
-                # 4. Evaluador PnL
-                try:
-                    eval_db = SessionLocal()
-                    try:
-                        new_evals = evaluate_pending_signals(eval_db)
-                        if new_evals > 0:
-                            print(f"  ✅ Evaluated {new_evals} signals")
-                    finally:
-                        eval_db.close()
-                except Exception as e:
-                    print(f"  ❌ Eval Error: {e}")
+                        if self.admit_signal(p_id, sig, datetime.utcnow()):
+                            # Process Signal
+                            self.process_single_signal(sig, p)
+
+                metrics = self.state_metrics()
+                print(
+                    "  📦 State sizes: "
+                    + ", ".join(f"{k}={v['size']}" for k, v in metrics.items())
+                )
+
+                # 4-5. Evaluador PnL y retención (una sola instancia)
+                if self.owns_global_tasks():
+                    self.run_global_tasks()
 
                 print(f"  😴 Sleeping {self.loop_interval}s...")
-                time.sleep(self.loop_interval)
+                self._stop.wait(self.loop_interval)
 
+            print("🛑 Scheduler stopped.")
+            self.release_leases()
         except KeyboardInterrupt:
             print("\n🛑 Stopped.")
+            self.release_leases()
+        finally:
+            self.running = False
+            self._finished.set()
+            if prev_sigterm is not None:
+                signal.signal(signal.SIGTERM, prev_sigterm)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Ends the loop (app shutdown: the scheduler runs in a daemon thread, so
+        no signal reaches it). Waits up to `timeout` for the current iteration.
+        """
+        self._stop.set()
+        if self.running:
+            self._finished.wait(timeout)
+
+    def release_leases(self):
+        """Frees this instance's shard leases / global lock so others take over without waiting for the TTL."""
+        db = SessionLocal()
+        try:
+            if self.shards is not None:
+                self.shards.release_all(db)
+            else:
+                from models_db import SchedulerLock
+
+                db.query(SchedulerLock).filter(
+                    SchedulerLock.lock_name == self.lock_name,
+                    SchedulerLock.owner_id == self.lock_id,
+                ).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)},
+                         synchronize_session=False)
+                db.commit()
+        except Exception as e:
+            print(f"⚠️ Lease release failed: {e}")
+        finally:
+            db.close()
+
+    def admit_signal(self, p_id, sig, now_utc) -> bool:
+        """
+        Filters applied before logging a signal (main thread only). In-memory,
+        or shared via SharedState when the scheduler is sharded.
+        Returns True if the signal should be processed.
+        """
+        # 1. Deduplication (Optimized)
+        # REMOVED: Inefficient DB query per signal.
+        # We rely on 'log_signal' triggering IntegrityError via UniqueConstraint/IdempotencyKey.
+        # This avoids opening N connections per cycle.
+
+        # 2. In-Memory Deduplication
+        ts_key = f"{p_id}_{sig.token}_{sig.direction}_{sig.timestamp}"
+        last_ts = self.processed_signals.get(ts_key)
+        if last_ts and sig.timestamp <= last_ts:
+            return False
+
+        # 3. Same-Side Spam check
+        direction_key = f"{p_id}_{sig.token}"
+        last_dir = self.last_signal_direction.get(direction_key)
+        if last_dir == sig.direction:
+            if last_ts and (sig.timestamp - last_ts).total_seconds() < 60:
+                return False
+
+        # 4. Global Coherence (shared across instances when sharded)
+        coherence_key = sig.token
+        if self.shared_state is not None:
+            # Check + write in one conditional UPDATE: two instances can't both
+            # admit opposite directions for the same token
+            try:
+                if not self.shared_state.hold(f"coherence:{coherence_key}", sig.direction,
+                                              int(COHERENCE_WINDOW.total_seconds())):
+                    return False
+            except Exception as e:
+                print(f"  ⚠️ Shared coherence claim failed: {e}")
+        else:
+            last_state = self.token_coherence.get(coherence_key)
+
+            if last_state:
+                last_global_dir = last_state["direction"]
+                last_global_ts = last_state["ts"]
+                if last_global_dir != sig.direction:
+                    if (now_utc - last_global_ts) < COHERENCE_WINDOW:
+                        return False
+
+            self.token_coherence[coherence_key] = {"direction": sig.direction, "ts": now_utc}
+        self.processed_signals[ts_key] = sig.timestamp
+        self.last_signal_direction[direction_key] = sig.direction
+        return True
+
+    def state_metrics(self):
+        """Sizes of the bounded in-memory state (for logs / monitoring)."""
+        structures = {
+            "last_run": self.last_run,
+            "processed_signals": self.processed_signals,
+            "last_signal_direction": self.last_signal_direction,
+            "dedupe_cache": self.dedupe_cache,
+            "token_coherence": self.token_coherence,
+        }
+        metrics = {}
+        for name, cache in structures.items():
+            if isinstance(cache, TTLCache):
+                metrics[name] = cache.stats()
+            else:
+                metrics[name] = {"size": len(cache)}
+        return metrics
+
+    def run_global_tasks(self):
+        """Tareas que no dependen de personas: evaluador PnL, retención y purga."""
+        try:
+            eval_db = SessionLocal()
+            try:
+                new_evals = evaluate_pending_signals(eval_db)
+                if new_evals > 0:
+                    print(f"  ✅ Evaluated {new_evals} signals")
+            finally:
+                eval_db.close()
+        except Exception as e:
+            print(f"  ❌ Eval Error: {e}")
+
+        # Retención (una vez al día)
+        self.run_retention()
+        if self.shared_state is not None:
+            try:
+                self.shared_state.purge()
+            except Exception as e:
+                print(f"  ❌ Shared state purge Error: {e}")
+
+    def run_retention(self):
+        """Archiva señales frías como máximo una vez cada 24h."""
+        if not self.retention_days:
+            return
+        now = datetime.utcnow()
+        if self.last_archive_run and now - self.last_archive_run < timedelta(hours=24):
+            return
+        self.last_archive_run = now
+
+        db = SessionLocal()
+        try:
+            archived = archive_cold_signals(db, retention_days=self.retention_days)
+            if archived > 0:
+                print(f"  🗄️ Archived {archived} cold signals")
+        except Exception as e:
+            print(f"  ❌ Archive Error: {e}")
+        finally:
+            db.close()
 
     def process_single_signal(self, sig, p):
         """
@@ -368,11 +683,21 @@ class StrategyScheduler:
 
         # Notification (Only if inserted)
         dedupe_key = f"{p['id']}_{sig.token}_{sig.direction}"
-        last_notif = self.dedupe_cache.get(dedupe_key)
-        if last_notif and (now - last_notif < timedelta(minutes=45)):
-            return
-
-        self.dedupe_cache[dedupe_key] = now
+        if self.shared_state is not None:
+            # Atomic claim: only one instance notifies within the window.
+            # If the DB is unavailable we still notify (the signal was inserted once).
+            try:
+                if not self.shared_state.claim(f"notify:{dedupe_key}",
+                                               int(NOTIFY_DEDUPE_WINDOW.total_seconds())):
+                    return
+            except Exception as e:
+                print(f"    ⚠️ Shared notify dedupe failed: {e}")
+        else:
+            last_notif = self.dedupe_cache.get(dedupe_key)
+            if last_notif and (now - last_notif < NOTIFY_DEDUPE_WINDOW):
+                return
+
+            self.dedupe_cache[dedupe_key] = now
 
         try:
             icon = "🟢" if sig.direction == "long" else "🔴"
@@ -9,7 +9,7 @@ sys.path.append(str(current_dir))
 
 from database import engine, SessionLocal  # noqa: E402
 from marketplace_config import SYSTEM_PERSONAS  # noqa: E402
-from models_db import StrategyConfig  # noqa: E402
+from models_db import StrategyConfig, bump_config_version  # noqa: E402
 
 def apply_db_patches():
     print("🔧 [DB PATCH] Starting Manual DB Patching & Seeding...")
@@ -35,17 +35,23 @@ def apply_db_patches():
         except Exception:
             pass
             
-        # 4. Drop Bad Constraint
+        # 4. Add config_version (scheduler persona cache)
+        try:
+            conn.execute(text("ALTER TABLE strategy_configs ADD COLUMN config_version INTEGER DEFAULT 1;"))
+        except Exception:
+            pass
+
+        # 5. Drop Bad Constraint
         # (This logic was complex in main.py, simplified here)
         # We assume users run this offline.
         
     db = SessionLocal()
     try:
-        # 5. Fix Schema Constraints (Logic from main.py)
+        # 6. Fix Schema Constraints (Logic from main.py)
         # Simplified: We trust Alembic or this script.
         pass 
         
-        # 6. Seed System Personas
+        # 7. Seed System Personas
         print("🌱 [SEED] Verify System Personas...")
         for sp in SYSTEM_PERSONAS:
             db_p = db.query(StrategyConfig).filter(StrategyConfig.persona_id == sp["id"]).first()
@@ -72,6 +78,7 @@ def apply_db_patches():
                 db_p.description = sp["description"]
                 db_p.is_public = 1
                 db_p.user_id = None
+                bump_config_version(db_p)
         db.commit()
         print("✅ [SEED] System Personas Synced.")
     except Exception as e:
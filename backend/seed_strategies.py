@@ -1,5 +1,5 @@
 from database import SessionLocal
-from models_db import StrategyConfig
+from models_db import StrategyConfig, bump_config_version
 from strategies.registry import get_registry
 from strategies.ma_cross import MACrossStrategy
 from strategies.DonchianBreakoutV2 import DonchianBreakoutV2 as DonchianStrategy
@@ -26,9 +26,9 @@ def seed_strategies():
     try:
         # 1. Deshabilitar TODAS las estrategias primero
         print("  - Disabling all strategies...")
-        db.query(StrategyConfig).update(
-            {StrategyConfig.enabled: 0}
-        )  # Use 0 instead of False
+        for strat in db.query(StrategyConfig).filter(StrategyConfig.enabled == 1):
+            strat.enabled = 0  # Use 0 instead of False
+            bump_config_version(strat)
         db.commit()
 
         # 2. Configurar las ganadoras
@@ -57,6 +57,7 @@ def seed_strategies():
                 existing.timeframes = json.dumps(timeframes)
                 existing.enabled = 1  # Use 1 instead of True
                 existing.interval_seconds = 60
+                bump_config_version(existing)  # Scheduler recompiles its persona table
                 db.add(existing)  # Explicit add to session
             else:
                 print(f"  - Creating {meta.name} ({meta.id})")
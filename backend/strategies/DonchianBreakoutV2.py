@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from datetime import datetime
@@ -5,6 +6,7 @@ from typing import List, Dict, Any, Optional
 from .base import Strategy, StrategyMetadata
 from core.schemas import Signal
 from indicators.market import get_market_data
+from core.prescreen import PreScreen, atr_expanding, near_donchian
 
 
 class DonchianBreakoutV2(Strategy):
@@ -19,6 +21,8 @@ class DonchianBreakoutV2(Strategy):
     - Trailing Stop at Donchian Middle Band
     """
 
+    emits_history = True  # analyze() devuelve las señales de todo el histórico
+
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
 
@@ -48,6 +52,15 @@ class DonchianBreakoutV2(Strategy):
             },
         )
 
+    def prescreen(self) -> PreScreen:
+        # Setup: cierre fuera de la banda con ATR > su media. Holgura: basta
+        # con estar a 0.25 ATR de la banda y con ATR > 0.9·media (el ATR del
+        # panel usa menos histórico que el de la estrategia)
+        return PreScreen((
+            near_donchian(self.period, atr_mult=0.25, atr_period=self.atr_period),
+            atr_expanding(self.atr_period, self.atr_ma_period, slack=0.9),
+        ), fetch_limit=self.ema_trend_period + 50)  # las mismas velas que pide generate_signals
+
     def generate_signals(
         self,
         tokens: List[str],
@@ -59,10 +72,15 @@ class DonchianBreakoutV2(Strategy):
         for token in tokens:
             try:
                 # 1. Get Data (need enough for EMA200 + buffer)
-                required_candles = self.ema_trend_period + 50
-                df, market = get_market_data(
-                    token.lower(), timeframe, limit=required_candles
-                )
+                # Datos inyectados (backtests) o descarga en vivo
+                if context and "data" in context and token in context["data"]:
+                    raw = context["data"][token]
+                    df = pd.DataFrame(raw) if isinstance(raw, list) else raw.copy()
+                else:
+                    required_candles = self.ema_trend_period + 50
+                    df, market = get_market_data(
+                        token.lower(), timeframe, limit=required_candles
+                    )
 
                 # [FIX] Ensure Timestamp Index
                 if df is not None and not df.empty and "timestamp" in df.columns:
@@ -79,102 +97,11 @@ class DonchianBreakoutV2(Strategy):
                     )
                     continue
 
-                # 2. Calculate Indicators
-                high = df["high"]
-                low = df["low"]
-                close = df["close"]
-
-                # Donchian Channels (manual calculation for clarity)
-                dc_upper = high.rolling(window=self.period).max().shift(1)
-                dc_lower = low.rolling(window=self.period).min().shift(1)
-                dc_mid = (dc_upper + dc_lower) / 2
-
-                # ATR & ATR MA
-                atr_series = ta.atr(high, low, close, length=self.atr_period)
-                atr_ma = atr_series.rolling(window=self.atr_ma_period).mean()
-
-                # EMA 200 Trend Filter
-                ema_trend = ta.ema(close, length=self.ema_trend_period)
-
-                # 3. Logic (on the last COMPLETED candle to avoid repainting)
-                curr_idx = -2
-                curr_close = close.iloc[curr_idx]
-                # curr_high = high.iloc[curr_idx]
-                # curr_low = low.iloc[curr_idx]
-                curr_dc_upper = dc_upper.iloc[curr_idx]
-                curr_dc_lower = dc_lower.iloc[curr_idx]
-                curr_dc_mid = dc_mid.iloc[curr_idx]
-                curr_atr = atr_series.iloc[curr_idx]
-                curr_atr_ma = atr_ma.iloc[curr_idx]
-                curr_ema = ema_trend.iloc[curr_idx]
-
-                # Skip if NaN
-                if pd.isna(curr_dc_upper) or pd.isna(curr_atr) or pd.isna(curr_ema):
-                    continue
-
-                # Volatility Filter
-                vol_ok = curr_atr > curr_atr_ma
-
-                # Trend Filter
-                trend_up = curr_close > curr_ema
-                trend_dn = curr_close < curr_ema
-
-                signal_dir = None
-                rationale = []
-                stop_loss = None
-                take_profit = None
-
-                # LONG
-                if curr_close > curr_dc_upper and vol_ok and trend_up:
-                    signal_dir = "long"
-                    rationale.append(f"Breakout Upper Donchian ({curr_dc_upper:.2f})")
-                    rationale.append("High Volatility (ATR > Avg)")
-                    rationale.append(
-                        f"Bullish Trend (Price {curr_close:.2f} > EMA200 {curr_ema:.2f})"
-                    )
-
-                    stop_loss = curr_dc_mid
-                    risk = curr_close - stop_loss
-                    take_profit = curr_close + (risk * 2.0)
-
-                # SHORT
-                elif curr_close < curr_dc_lower and vol_ok and trend_dn:
-                    signal_dir = "short"
-                    rationale.append(f"Breakout Lower Donchian ({curr_dc_lower:.2f})")
-                    rationale.append("High Volatility (ATR > Avg)")
-                    rationale.append(
-                        f"Bearish Trend (Price {curr_close:.2f} < EMA200 {curr_ema:.2f})"
-                    )
-
-                    stop_loss = curr_dc_mid
-                    risk = stop_loss - curr_close
-                    take_profit = curr_close - (risk * 2.0)
-
-                # [FIX] Use candle timestamp for stability (prevents dupes)
-                ts_candle = df.index[curr_idx]
-                if isinstance(ts_candle, (int, float)):
-                    ts_candle = datetime.utcfromtimestamp(ts_candle / 1000.0)
-                elif not isinstance(ts_candle, datetime):
-                    ts_candle = datetime.utcnow()
-
-                if signal_dir:
-                    sig = Signal(
-                        timestamp=ts_candle,
-                        strategy_id=self.metadata().id,
-                        mode="PRO",
-                        token=token.upper(),
-                        timeframe=timeframe,
-                        direction=signal_dir,
-                        entry=float(curr_close),
-                        tp=float(take_profit),
-                        sl=float(stop_loss),
-                        confidence=0.85,
-                        rationale=" | ".join(rationale),
-                        source="donchian_v2",
-                    )
+                # 2. Logic (on the last COMPLETED candle to avoid repainting)
+                for sig in self._signals(df, token, timeframe, last_only=True):
                     signals.append(sig)
                     print(
-                        f"[DonchianV2] ✅ Signal generated: {token} {signal_dir.upper()} @ {curr_close:.2f}"
+                        f"[DonchianV2] ✅ Signal generated: {token} {sig.direction.upper()} @ {sig.entry:.2f}"
                     )
 
             except Exception as e:
@@ -185,3 +112,103 @@ class DonchianBreakoutV2(Strategy):
                 continue
 
         return signals
+
+    def analyze(self, df: pd.DataFrame, token: str, timeframe: str) -> List[Signal]:
+        """
+        Señales de todo el histórico en una pasada vectorizada. Canales, ATR
+        y EMA son causales: la señal de cada vela es la que daría
+        generate_signals cuando esa vela es la última cerrada.
+        """
+        if df is None or len(df) < self.ema_trend_period:
+            return []
+        return self._signals(df, token, timeframe)
+
+    def _signals(
+        self, df: pd.DataFrame, token: str, timeframe: str, last_only: bool = False
+    ) -> List[Signal]:
+        high = df["high"]
+        low = df["low"]
+        close = df["close"]
+
+        # Donchian Channels (manual calculation for clarity)
+        dc_upper = high.rolling(window=self.period).max().shift(1)
+        dc_lower = low.rolling(window=self.period).min().shift(1)
+        dc_mid = (dc_upper + dc_lower) / 2
+
+        # ATR & ATR MA
+        atr_series = ta.atr(high, low, close, length=self.atr_period)
+        atr_ma = atr_series.rolling(window=self.atr_ma_period).mean()
+
+        # EMA 200 Trend Filter
+        ema_trend = ta.ema(close, length=self.ema_trend_period)
+        if ema_trend is None:
+            return []
+
+        px = close.to_numpy(dtype=float)
+        upper, lower, mid = dc_upper.to_numpy(), dc_lower.to_numpy(), dc_mid.to_numpy()
+        atr, atr_avg, ema = atr_series.to_numpy(), atr_ma.to_numpy(), ema_trend.to_numpy()
+
+        # La última vela puede estar formándose: se decide sobre la anterior.
+        # Con una ventana creciente la primera decisión llega con
+        # `ema_trend_period` velas, sobre la penúltima.
+        ready = ~np.isnan(upper) & ~np.isnan(atr) & ~np.isnan(ema)
+        ready[: self.ema_trend_period - 2] = False
+        ready[-1] = False
+        if last_only:
+            ready[:-2] = False
+
+        with np.errstate(invalid="ignore"):
+            # Volatility Filter
+            vol_ok = atr > atr_avg
+            is_long = ready & (px > upper) & vol_ok & (px > ema)
+            is_short = ready & ~is_long & (px < lower) & vol_ok & (px < ema)
+
+        signals = []
+        for i in np.flatnonzero(is_long | is_short):
+            curr_close, curr_ema = float(px[i]), float(ema[i])
+            stop_loss = float(mid[i])
+
+            if is_long[i]:
+                signal_dir = "long"
+                rationale = [
+                    f"Breakout Upper Donchian ({upper[i]:.2f})",
+                    "High Volatility (ATR > Avg)",
+                    f"Bullish Trend (Price {curr_close:.2f} > EMA200 {curr_ema:.2f})",
+                ]
+                risk = curr_close - stop_loss
+                take_profit = curr_close + (risk * 2.0)
+            else:
+                signal_dir = "short"
+                rationale = [
+                    f"Breakout Lower Donchian ({lower[i]:.2f})",
+                    "High Volatility (ATR > Avg)",
+                    f"Bearish Trend (Price {curr_close:.2f} < EMA200 {curr_ema:.2f})",
+                ]
+                risk = stop_loss - curr_close
+                take_profit = curr_close - (risk * 2.0)
+
+            # [FIX] Use candle timestamp for stability (prevents dupes)
+            ts_candle = df.index[i]
+            if isinstance(ts_candle, (int, float, np.integer, np.floating)):
+                ts_candle = datetime.utcfromtimestamp(ts_candle / 1000.0)
+            elif not isinstance(ts_candle, datetime):
+                ts_candle = datetime.utcnow()
+
+            signals.append(
+                Signal(
+                    timestamp=ts_candle,
+                    strategy_id=self.metadata().id,
+                    mode="PRO",
+                    token=token.upper(),
+                    timeframe=timeframe,
+                    direction=signal_dir,
+                    entry=curr_close,
+                    tp=float(take_profit),
+                    sl=stop_loss,
+                    confidence=0.85,
+                    rationale=" | ".join(rationale),
+                    source="donchian_v2",
+                )
+            )
+
+        return signals
@@ -20,7 +20,7 @@ Flujo de integración:
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Literal
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 # Import del schema unificado
@@ -31,6 +31,9 @@ backend_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(backend_dir))
 from core.schemas import Signal  # noqa: E402
 
+if TYPE_CHECKING:
+    from core.prescreen import PreScreen
+
 
 class StrategyMetadata(BaseModel):
     """
@@ -164,6 +167,13 @@ class Strategy(ABC):
         ```
     """
 
+    # True si la estrategia implementa analyze(df, token, timeframe), que
+    # devuelve en una sola llamada (vectorizada y causal) las señales de TODO
+    # el histórico de `df`, indexado por fecha (p. ej. MA Cross recorre todos
+    # los cruces). False (por defecto): solo decide sobre la última vela, así
+    # que los backtests la evalúan vela a vela con ventanas crecientes.
+    emits_history: bool = False
+
     @abstractmethod
     def metadata(self) -> StrategyMetadata:
         """
@@ -206,6 +216,17 @@ class Strategy(ABC):
             "generate_signals() must be implemented by strategy class"
         )
 
+    def prescreen(self) -> Optional["PreScreen"]:
+        """
+        Pre-screen barato opcional (core/prescreen.py) para personas scanner:
+        el scheduler lo evalúa sobre todo el universo en una pasada
+        vectorizada y solo llama a generate_signals con los tokens que pasan.
+
+        Debe ser un superconjunto del setup real (umbrales con holgura).
+        None = sin pre-screen, se analizan todos los tokens.
+        """
+        return None
+
     # === Helper methods opcionales para estrategias ===
 
     def validate_tokens(self, tokens: List[str]) -> List[str]:
@@ -1,7 +1,9 @@
 from .base import Strategy, StrategyMetadata
+from core.prescreen import PreScreen, rsi_outside
 from core.schemas import Signal
 from datetime import datetime
 from typing import List, Optional, Dict, Any
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -13,6 +15,8 @@ class BBMeanReversionStrategy(Strategy):
     Filtra con RSI para evitar operar contra tendencias muy fuertes sin agotamiento.
     """
 
+    emits_history = True  # analyze() devuelve las señales de todo el histórico
+
     def metadata(self) -> StrategyMetadata:
         return StrategyMetadata(
             id="bb_mean_reversion",
@@ -27,6 +31,11 @@ class BBMeanReversionStrategy(Strategy):
             default_timeframe="1h",
         )
 
+    def prescreen(self) -> PreScreen:
+        # Setup: RSI < 35 o > 65 (con 5 puntos de holgura). generate_signals
+        # no descarga nada: usa las velas del panel (>= 50) vía context["data"]
+        return PreScreen((rsi_outside(40, 60, period=14),), fetch_limit=100)
+
     def generate_signals(
         self,
         tokens: List[str],
@@ -48,122 +57,112 @@ class BBMeanReversionStrategy(Strategy):
             if df is None or df.empty:
                 continue
 
-            # Necesitamos al menos ~30 velas para BB y RSI
-            if len(df) < 50:
-                continue
+            # --- Lógica de Señal (NO REPAINTING) ---
+            # Usamos la ÚLTIMA VELA CERRADA.
+            # En backtest, el engine nos pasa datos hasta 'i', siendo iloc[-1] la vela "actual" o recién cerrada.
+            signals.extend(self._signals(df, token, timeframe, last_only=True))
 
-            # Copia defensiva
-            d = df.copy()
+        return signals
 
-            # --- Indicadores Técnicos ---
-            # Bollinger Bands (20, 2.0)
-            bb = ta.bbands(d["close"], length=20, std=2.0)
-            if bb is None:
-                continue
+    def analyze(self, df: pd.DataFrame, token: str, timeframe: str) -> List[Signal]:
+        """
+        Señales de todo el histórico en una pasada vectorizada. BB y RSI son
+        causales: la señal de cada vela es la que daría generate_signals con
+        las velas hasta ella.
+        """
+        return self._signals(df, token, timeframe)
 
-            # RSI (14)
-            rsi = ta.rsi(d["close"], length=14)
-            if rsi is None:
-                continue
+    def _signals(
+        self, df: pd.DataFrame, token: str, timeframe: str, last_only: bool = False
+    ) -> List[Signal]:
+        # Necesitamos al menos ~30 velas para BB y RSI
+        if df is None or len(df) < 50:
+            return []
 
-            # Unir al DF
-            # Nombres por defecto pandas_ta: BBL_20_2.0, BBM_20_2.0, BBU_20_2.0, RSI_14
-            d = pd.concat([d, bb, rsi], axis=1)
+        close = df["close"]
 
-            # --- Lógica de Señal (NO REPAINTING) ---
-            # Usamos la ÚLTIMA VELA CERRADA.
-            # En backtest, el engine nos pasa datos hasta 'i', siendo iloc[-1] la vela "actual" o recién cerrada.
-            # Asumiremos que iloc[-1] es la vela sobre la que tomamos decisión (Close price defined).
+        # --- Indicadores Técnicos ---
+        # Bollinger Bands (20, 2.0) y RSI (14)
+        # Nombres por defecto pandas_ta: BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
+        bb = ta.bbands(close, length=20, std=2.0)
+        rsi = ta.rsi(close, length=14)
+        if bb is None or rsi is None:
+            return []
 
-            row = d.iloc[-1]
+        lower = bb["BBL_20_2.0"].to_numpy()
+        mid = bb["BBM_20_2.0"].to_numpy()  # Media Simple 20
+        upper = bb["BBU_20_2.0"].to_numpy()
+        rsi = rsi.to_numpy()
+        px = close.to_numpy(dtype=float)
 
-            close = row["close"]
-            lower = row["BBL_20_2.0"]
-            upper = row["BBU_20_2.0"]
-            mid = row["BBM_20_2.0"]  # Media Simple 20
-            rsi_val = row["RSI_14"]
+        ready = ~np.isnan(lower) & ~np.isnan(rsi)
+        ready[:49] = False  # mismas 50 velas mínimas que con una ventana creciente
+        if last_only:
+            ready[:-1] = False
 
-            if pd.isna(lower) or pd.isna(rsi_val):
-                continue
+        # Setup LONG: Precio < Banda Inferior & RSI < 35 (Sobrevendido)
+        # Setup SHORT: Precio > Banda Superior & RSI > 65 (Sobrecomprado)
+        with np.errstate(invalid="ignore"):
+            is_long = ready & (px < lower) & (rsi < 35)
+            is_short = ready & ~is_long & (px > upper) & (rsi > 65)
 
-            # Determinar Timestamp correcto
-            # Si 'timestamp_dt' existe (backend legacy), usarlo, sino convertir
-            ts_val = datetime.utcnow()
-            if "timestamp" in d.columns:
-                try:
-                    # El timestamp de la vela suele ser el Open Time.
-                    # La señal se emite al cierre, así que es válida AHORA.
-                    ts_raw = (
-                        d.index[-1]
-                        if isinstance(d.index[-1], pd.Timestamp)
-                        else pd.to_datetime(d["timestamp"].iloc[-1], unit="ms")
-                    )
-                    ts_val = ts_raw
-                except Exception:
-                    pass
-
-            signal = None
-
-            # --- Setup LONG ---
-            # --- Setup LONG ---
-            # Precio < Banda Inferior & RSI < 35 (Sobrevendido)
-            if close < lower and rsi_val < 35:
-                dist = mid - close
+        times = _candle_times(df)
+        signals = []
+        for i in np.flatnonzero(is_long | is_short):
+            # El timestamp de la vela suele ser el Open Time.
+            # La señal se emite al cierre, así que es válida AHORA.
+            ts_val = times[i] if times is not None else datetime.utcnow()
+            close_i, rsi_i = float(px[i]), float(rsi[i])
+            lower_i, upper_i = float(lower[i]), float(upper[i])
+
+            if is_long[i]:
+                dist = mid[i] - close_i
                 # Conservative TP: 80% of distance to mean (accounts for MA moving down)
-                tp = close + (dist * 0.8)
-                sl = close - (dist * 0.6)  # Stop un poco por debajo
-
-                signal = Signal(
-                    timestamp=ts_val,
-                    token=token,
-                    timeframe=timeframe,
-                    direction="long",
-                    entry=round(close, 2),
-                    tp=round(tp, 2),
-                    sl=round(sl, 2),
-                    confidence=0.85,
-                    rationale=f"Reversion Long: Price < LowerBB ({lower:.2f}) & RSI {rsi_val:.1f} < 35",
-                    source="bb_mean_reversion",
-                    strategy_id=self.metadata().id,
-                    mode="CUSTOM",
-                    category="REVERSION",
-                    extra={
-                        "rsi": round(rsi_val, 1),
-                        "bb_lower": round(lower, 2),
-                        "bb_upper": round(upper, 2),
-                    },
-                )
-
-            # --- Setup SHORT ---
-            # Precio > Banda Superior & RSI > 65 (Sobrecomprado)
-            elif close > upper and rsi_val > 65:
-                dist = close - mid
+                tp = close_i + (dist * 0.8)
+                sl = close_i - (dist * 0.6)  # Stop un poco por debajo
+                direction = "long"
+                rationale = f"Reversion Long: Price < LowerBB ({lower_i:.2f}) & RSI {rsi_i:.1f} < 35"
+            else:
+                dist = close_i - mid[i]
                 # Conservative TP: 80% of distance to mean
-                tp = close - (dist * 0.8)
-                sl = close + (dist * 0.6)
+                tp = close_i - (dist * 0.8)
+                sl = close_i + (dist * 0.6)
+                direction = "short"
+                rationale = f"Reversion Short: Price > UpperBB ({upper_i:.2f}) & RSI {rsi_i:.1f} > 65"
 
-                signal = Signal(
+            signals.append(
+                Signal(
                     timestamp=ts_val,
                     token=token,
                     timeframe=timeframe,
-                    direction="short",
-                    entry=round(close, 2),
+                    direction=direction,
+                    entry=round(close_i, 2),
                     tp=round(tp, 2),
                     sl=round(sl, 2),
                     confidence=0.85,
-                    rationale=f"Reversion Short: Price > UpperBB ({upper:.2f}) & RSI {rsi_val:.1f} > 65",
+                    rationale=rationale,
                     source="bb_mean_reversion",
                     strategy_id=self.metadata().id,
                     mode="CUSTOM",
                     category="REVERSION",
                     extra={
-                        "rsi": round(rsi_val, 1),
-                        "bb_lower": round(lower, 2),
-                        "bb_upper": round(upper, 2),
+                        "rsi": round(rsi_i, 1),
+                        "bb_lower": round(lower_i, 2),
+                        "bb_upper": round(upper_i, 2),
                     },
                 )
-
-            if signal:
-                signals.append(signal)
+            )
 
         return signals
+
+
+def _candle_times(df: pd.DataFrame) -> Optional[pd.DatetimeIndex]:
+    """Timestamp de cada vela: el índice si es de fechas, si no la columna `timestamp` (ms)."""
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index
+    if "timestamp" in df.columns:
+        ts = df["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            return pd.DatetimeIndex(ts)
+        return pd.DatetimeIndex(pd.to_datetime(ts, unit="ms"))
+    return None
@@ -18,6 +18,8 @@ class MACrossStrategy(Strategy):
     - Death Cross (Rápida cruza hacia abajo Lenta) -> SHORT
     """
 
+    emits_history = True  # analyze() devuelve todos los cruces del histórico
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
         self.fast_period = self.config.get("fast_period", 10)
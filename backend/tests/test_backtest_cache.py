@@ -0,0 +1,87 @@
+import sys
+import os
+import random
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.backtest_engine import BacktestEngine
+from core.backtest_cache import HIT, MISS, PARTIAL, BacktestResultStore, run_cached
+from core.market_data_api import generate_mock_ohlcv
+from strategies.registry import get_registry, load_default_strategies
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="module")
+def history():
+    random.seed(11)
+    df = pd.DataFrame(generate_mock_ohlcv("ETH", limit=500))
+    df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
+    if "ma_cross" not in get_registry()._strategies:
+        with patch("builtins.print"):
+            load_default_strategies()
+    return df
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = BacktestResultStore(directory=tmp_path)
+    s.redis = None
+    return s
+
+
+def _run(df, store, **kwargs):
+    with patch("builtins.print"):
+        return run_cached(BacktestEngine(), "ma_cross", "eth", "1h", df=df,
+                          store=store, config={"fast_period": 5, "slow_period": 20},
+                          **kwargs)
+
+
+# === TESTS ===
+
+def test_identical_request_is_a_hit(history, store):
+    first, status = _run(history, store)
+    assert status == MISS
+    again, status = _run(history, store)
+    assert status == HIT
+    assert again["metrics"] == first["metrics"]
+
+    # Different parameters -> different content key
+    _, status = _run(history, store, monte_carlo_paths=100)
+    assert status != HIT
+
+
+def test_extended_range_resumes_from_checkpoint(history, store):
+    shorter = history.iloc[:400].reset_index(drop=True)
+    _run(shorter, store)
+
+    resumed, status = _run(history, store)
+    assert status == PARTIAL
+
+    with patch("builtins.print"):
+        full = BacktestEngine().run_on_data("ma_cross", "eth", "1h", history,
+                                            config={"fast_period": 5, "slow_period": 20})
+    assert resumed["metrics"] == full["metrics"]
+    assert resumed["curve"] == full["curve"]
+    assert resumed["trades"] == full["trades"]
+
+    # Last (forming) candle changed -> prefix still matches, resume at last candle
+    tweaked = history.copy()
+    tweaked.loc[len(tweaked) - 1, "close"] *= 1.001
+    _, status = _run(tweaked, store)
+    assert status == PARTIAL
+
+
+def test_disk_store_is_size_bounded(tmp_path):
+    store = BacktestResultStore(directory=tmp_path, max_bytes=4000)
+    store.redis = None
+    for i in range(20):
+        store.set(f"k{i}", {"blob": os.urandom(600).hex()})
+    total = sum(p.stat().st_size for p in tmp_path.glob("*.json.gz"))
+    assert total <= 4000
+    assert store.get("k19") is not None
+    assert store.get("k0") is None
@@ -0,0 +1,235 @@
+import sys
+import os
+import time
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models_db import User
+from core.backtest_jobs import (
+    CANCELLED,
+    DONE,
+    BacktestJobManager,
+    JobLimitExceeded,
+)
+
+
+def slow_runner(gate):
+    """Fake backtest: reports progress over 100 'candles' and waits on `gate`."""
+
+    def run(params, progress):
+        for i in range(0, 101, 10):
+            progress(i, 100, i // 10)
+            gate.wait(timeout=5)
+        return {"metrics": {"strategy_id": params["strategy_id"]}}
+
+    return run
+
+
+def _wait(job, status, timeout=5):
+    deadline = time.time() + timeout
+    while job.status != status and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == status
+
+
+# === TESTS ===
+
+def test_dedupe_and_plan_cap():
+    gate = threading.Event()
+    manager = BacktestJobManager(max_workers=2, runner=slow_runner(gate))
+    params = {"strategy_id": "ma_cross", "token": "BTC"}
+
+    job, created = manager.submit(1, "FREE", params)
+    again, created_again = manager.submit(1, "FREE", dict(params))
+    assert created and not created_again and again is job
+
+    # FREE allows a single active job; another user is independent
+    with pytest.raises(JobLimitExceeded):
+        manager.submit(1, "FREE", {**params, "token": "ETH"})
+    manager.submit(2, "PRO", {**params, "token": "ETH"})
+
+    gate.set()
+    _wait(job, DONE)
+    assert job.result["metrics"]["strategy_id"] == "ma_cross"
+    assert job.snapshot()["progress"]["pct"] == 100.0
+
+    # A finished job still dedupes (result reuse) and frees the slot
+    assert manager.submit(1, "FREE", params)[0] is job
+    assert manager.submit(1, "FREE", {**params, "token": "SOL"})[1]
+    manager.shutdown()
+
+
+def test_cancel_running_and_queued_jobs():
+    gate = threading.Event()
+    manager = BacktestJobManager(max_workers=1, runner=slow_runner(gate))
+    running, _ = manager.submit(1, "PRO", {"strategy_id": "a", "token": "BTC"})
+    queued, _ = manager.submit(1, "PRO", {"strategy_id": "b", "token": "BTC"})
+    _wait(running, "running")
+
+    manager.cancel(queued.id)
+    assert queued.status == CANCELLED
+
+    manager.cancel(running.id)
+    gate.set()
+    _wait(running, CANCELLED)
+    assert running.result is None
+    # Other users cannot see or cancel the job
+    assert manager.cancel(running.id, user_id=99) is None
+    manager.shutdown()
+
+
+def test_sse_stream_reports_progress_until_end(monkeypatch):
+    import routers.backtest as backtest_router
+    from routers.auth_new import get_current_user
+
+    gate = threading.Event()
+    gate.set()
+    manager = BacktestJobManager(max_workers=1, runner=slow_runner(gate))
+    monkeypatch.setattr(backtest_router, "job_manager", manager)
+    monkeypatch.setattr(backtest_router, "SSE_POLL_SECONDS", 0.01)
+
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    app.dependency_overrides[get_current_user] = lambda: User(id=5, plan="TRADER")
+    client = TestClient(app)
+
+    res = client.post("/backtest/jobs", json={"strategy_id": "ma_cross", "token": "btc"})
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+
+    with client.stream("GET", f"/backtest/jobs/{job_id}/events") as stream:
+        body = "".join(stream.iter_text())
+    assert "event: end" in body
+    assert '"status": "done"' in body
+
+    result = client.get(f"/backtest/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert client.get("/backtest/jobs/unknown").status_code == 404
+    manager.shutdown()
+
+
+def test_optimize_is_an_authenticated_capped_job(monkeypatch):
+    import core.optimizer
+    import routers.backtest as backtest_router
+    from routers.auth_new import get_current_user
+
+    calls = []
+
+    def fake_sweep(**kwargs):
+        calls.append(kwargs)
+        kwargs["progress_callback"](4, 4, 0)
+        return {"combinations": 4, "results": [{"rank": i} for i in range(1, 5)]}
+
+    monkeypatch.setattr(core.optimizer, "run_sweep", fake_sweep)
+    manager = BacktestJobManager(max_workers=1)
+    monkeypatch.setattr(backtest_router, "job_manager", manager)
+
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+    body = {"strategy_id": "ma_cross", "grid": {"fast_period": [5, 10], "slow_period": [30, 50]},
+            "top": 2}
+
+    # No user -> no sweep
+    assert client.post("/backtest/optimize", json=body).status_code == 401
+
+    user = User(id=6, plan="FREE")
+    app.dependency_overrides[get_current_user] = lambda: user
+    big = {**body, "grid": {"fast_period": list(range(5, 20)), "slow_period": [30, 50]}}
+    res = client.post("/backtest/optimize", json=big)
+    assert res.status_code == 403 and res.json()["detail"]["code"] == "PLAN_LIMIT"
+    assert client.post("/backtest/optimize", json={**body, "metric": "nope"}).status_code == 400
+
+    res = client.post("/backtest/optimize", json=body)
+    assert res.status_code == 202
+    job = manager.get(res.json()["job_id"])
+    _wait(job, DONE)
+    assert calls[0]["symbol"] == "btc"
+    assert job.snapshot()["progress"]["pct"] == 100.0
+    result = client.get(f"/backtest/jobs/{job.id}/result").json()
+    assert [r["rank"] for r in result["results"]] == [1, 2]
+    manager.shutdown()
+
+
+def test_walk_forward_is_a_job_capped_by_windows_times_combinations(monkeypatch):
+    import core.walk_forward
+    import routers.backtest as backtest_router
+    from routers.auth_new import get_current_user
+
+    calls = []
+
+    def fake_walk_forward(**kwargs):
+        calls.append(kwargs)
+        return {"metrics": {}, "windows": [], "curve": []}
+
+    monkeypatch.setattr(core.walk_forward, "run_walk_forward", fake_walk_forward)
+    manager = BacktestJobManager(max_workers=1)
+    monkeypatch.setattr(backtest_router, "job_manager", manager)
+
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+    body = {"strategy_id": "ma_cross", "grid": {"fast_period": [5, 10]}, "days": 30,
+            "train_candles": 200, "test_candles": 100}
+    assert client.post("/backtest/walk-forward", json=body).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=7, plan="FREE")
+    # 90 days of 1h -> ~19 windows x 4 combinations > 50 (FREE)
+    big = {**body, "days": 90, "grid": {"fast_period": [5, 10, 15, 20]}}
+    res = client.post("/backtest/walk-forward", json=big)
+    assert res.status_code == 403 and res.json()["detail"]["code"] == "PLAN_LIMIT"
+
+    res = client.post("/backtest/walk-forward", json=body)
+    assert res.status_code == 202
+    job = manager.get(res.json()["job_id"])
+    _wait(job, DONE)
+    assert calls[0]["max_runs"] == 50 and calls[0]["train_candles"] == 200
+    assert "top" not in job.params
+    manager.shutdown()
+
+
+def test_portfolio_backtest_is_a_job_capped_by_tokens_times_days(monkeypatch):
+    import core.portfolio_backtest
+    import routers.backtest as backtest_router
+    from routers.auth_new import get_current_user
+
+    calls = []
+
+    def fake_run(self, **kwargs):
+        calls.append((self, kwargs))
+        kwargs["progress_callback"](2, 2, 0)
+        return {"metrics": {}, "tokens": {}, "trades": [], "curve": []}
+
+    monkeypatch.setattr(core.portfolio_backtest.PortfolioBacktestEngine, "run", fake_run)
+    manager = BacktestJobManager(max_workers=1)
+    monkeypatch.setattr(backtest_router, "job_manager", manager)
+
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+    body = {"strategy_id": "bb_mean_reversion", "tokens": ["btc", "ETH", "BTC"], "days": 30,
+            "max_positions": 2}
+    assert client.post("/backtest/portfolio", json=body).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=8, plan="FREE")
+    assert client.post("/backtest/portfolio", json={**body, "days": 5000}).status_code == 400
+    # 6 tokens x 30 days > 150 (FREE)
+    big = {**body, "tokens": ["BTC", "ETH", "SOL", "AVAX", "BNB", "XRP"]}
+    res = client.post("/backtest/portfolio", json=big)
+    assert res.status_code == 403 and res.json()["detail"]["code"] == "PLAN_LIMIT"
+
+    res = client.post("/backtest/portfolio", json=body)
+    assert res.status_code == 202
+    job = manager.get(res.json()["job_id"])
+    _wait(job, DONE)
+    engine, kwargs = calls[0]
+    assert kwargs["tokens"] == ["BTC", "ETH"] and kwargs["days"] == 30
+    assert engine.max_positions == 2
+    assert job.snapshot()["progress"]["pct"] == 100.0
+    assert client.get(f"/backtest/jobs/{job.id}/result").status_code == 200
+    manager.shutdown()
@@ -0,0 +1,114 @@
+import sys
+import os
+import json
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# tools/benchmark_suite.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tools")))
+
+from core.market_data_api import generate_mock_ohlcv
+import benchmark_suite as bench
+
+END = 1_704_067_200_000
+
+
+# === FIXTURES ===
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"fixtures_dir": tmp_path / "fixtures", "manifest_path": tmp_path / "fixtures.json"}
+
+
+def _report(cases):
+    return {"meta": {"fixtures": {}}, "results": [
+        {"group": "engine", "name": name, "size": 100, "median_s": t, "output": out}
+        for name, t, out in cases]}
+
+
+# === TESTS ===
+
+def test_mock_ohlcv_seeded_is_deterministic():
+    a = generate_mock_ohlcv("ETH", limit=300, seed=5, regime="mixed", end_ts=END)
+    b = generate_mock_ohlcv("ETH", limit=300, seed=5, regime="mixed", end_ts=END)
+    assert a == b
+    assert a != generate_mock_ohlcv("ETH", limit=300, seed=6, regime="mixed", end_ts=END)
+    assert a[-1]["timestamp"] == END - 3_600_000
+    assert all(r["low"] <= min(r["open"], r["close"]) and r["high"] >= max(r["open"], r["close"])
+               for r in a)
+
+
+def test_mock_ohlcv_regimes_shape_the_series():
+    def closes(regime, **kw):
+        rows = generate_mock_ohlcv("ETH", limit=2000, seed=1, regime=regime, end_ts=END, **kw)
+        return np.array([r["close"] for r in rows])
+
+    assert closes("trend_up")[-1] > 3000 * 1.5
+    assert closes("trend_down")[-1] < 3000 / 1.5
+    rng = closes("range")
+    assert abs(np.log(rng[-1] / 3000)) < 0.3
+
+    def vol(c):
+        return np.std(np.diff(np.log(c)))
+
+    assert vol(closes("volatile")) > 2 * vol(rng)
+    assert vol(closes("range", volatility=0.04)) > 1.5 * vol(rng)
+    with pytest.raises(ValueError):
+        generate_mock_ohlcv("ETH", limit=10, regime="nope")
+
+
+def test_committed_manifest_matches_generator():
+    manifest = bench.load_manifest()
+    entry = manifest["fixtures"][bench.fixture_name("ETH", 1000)]
+    data = bench._to_csv_bytes(bench.build_fixture("ETH", 1000))
+    assert bench._sha256(data) == entry["sha256"]
+
+
+def test_fixture_drift_is_rejected(paths):
+    bench.load_fixtures([200], symbols=["SOL"], **paths)
+    path = paths["fixtures_dir"] / "SOL_1h_200.csv"
+    path.write_text(path.read_text().replace("150.0", "151.0", 1))
+
+    with pytest.raises(RuntimeError):
+        bench.load_fixtures([200], symbols=["SOL"], **paths)
+    frames = bench.load_fixtures([200], symbols=["SOL"], freeze=True, **paths)
+    assert len(frames[("SOL", 200)]) == 200
+
+
+def test_suite_runs_offline_and_is_reproducible(paths, monkeypatch):
+    def _no_network(*a, **k):
+        raise AssertionError("network access")
+    monkeypatch.setattr(bench.market_data_api.ccxt, "binance", _no_network)
+
+    kw = dict(sizes=[300], repeats=1, groups=("strategy", "indicator", "engine"), **paths)
+    first = bench.run_suite(**kw)
+    rows = {r["name"]: r for r in first["results"]}
+
+    assert not [r for r in first["results"] if "error" in r]
+    assert rows["ma_cross.analyze"]["output"]["signals"] > 0
+    assert rows["backtest_engine.run_on_data"]["output"]["trades"] > 0
+    assert rows["portfolio_backtest.run_on_data"]["output"]["trades"] > 0
+    assert all(r["deterministic"] for r in first["results"])
+
+    second = bench.run_suite(**{**kw, "groups": ("indicator", "engine")})
+    cmp = bench.compare_results(first, second, tolerance=100.0)
+    assert cmp["output_changes"] == [] and cmp["fixtures_changed"] == []
+    assert cmp["missing"] and all(k.startswith("strategy:") for k in cmp["missing"])
+
+    out = bench.save_results(second, paths["fixtures_dir"].parent / "r.json")
+    assert json.loads(out.read_text())["meta"]["fixtures"].keys() == {
+        "ETH_1h_300", "BTC_1h_300", "SOL_1h_300", "AVAX_1h_300"}
+
+
+def test_compare_flags_regressions_and_output_changes():
+    base = _report([("a", 0.100, {"trades": 3}), ("b", 0.100, {"trades": 3}),
+                    ("c", 0.0010, {"trades": 3})])
+    cur = _report([("a", 0.200, {"trades": 3}), ("b", 0.050, {"trades": 4}),
+                   ("c", 0.0025, {"trades": 3})])
+    cmp = bench.compare_results(base, cur, tolerance=0.25)
+
+    assert [e["case"] for e in cmp["regressions"]] == ["engine:a:100"]
+    assert [e["case"] for e in cmp["improvements"]] == ["engine:b:100"]
+    # c es 2.5x más lento pero por debajo del suelo de ruido
+    assert [e["case"] for e in cmp["output_changes"]] == ["engine:b:100"]
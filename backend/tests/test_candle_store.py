@@ -0,0 +1,218 @@
+import sys
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+ccxt = pytest.importorskip("ccxt")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# trading_lab (download_data / dataset_store)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab")))
+
+from core.candle_store import CandleStore, missing_ranges  # noqa: E402
+import core.market_data_api as market_data_api  # noqa: E402
+import download_data  # noqa: E402
+import dataset_store  # noqa: E402
+
+HOUR = 3_600_000
+T0 = 1_700_002_800_000  # alineado a la hora
+
+
+# === FIXTURES ===
+
+class FakeExchange:
+    """Exchange local: velas 1h desde T0 hasta `now_ms` (exclusivo), con fallos opcionales."""
+
+    def __init__(self, now_ms, missing=(), fail_on=None, fail_exc=RuntimeError):
+        self.now_ms = now_ms
+        self.missing = set(missing)
+        self.fail_on = set(fail_on or ())
+        self.fail_exc = fail_exc
+        self.calls = []
+
+    def _candle(self, ts):
+        p = 100.0 + (ts - T0) / HOUR
+        return [ts, p, p + 1, p - 1, p + 0.5, 10.0]
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls.append((symbol, since, limit))
+        if len(self.calls) in self.fail_on:
+            raise self.fail_exc("boom")
+        if since is None:
+            since = self.now_ms - limit * HOUR
+        ts = max(T0, -(-since // HOUR) * HOUR)
+        out = []
+        while ts < self.now_ms and len(out) < limit:
+            if ts not in self.missing:
+                out.append(self._candle(ts))
+            ts += HOUR
+        return out
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(tmp_path / "candles")
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(download_data.time, "sleep", lambda s: None)
+
+
+def _download(store, ex, end_ms, **kw):
+    return download_data.download_all(
+        lambda: ex, store, ["ETH/USDT", "SOL/USDT"], ["1h"], T0,
+        workers=2, rps=0, end_ms=end_ms, page_limit=100, **kw
+    )
+
+
+# === TESTS ===
+
+def test_missing_ranges_head_tail_and_gaps():
+    ts = np.array([T0 + 5 * HOUR, T0 + 6 * HOUR, T0 + 9 * HOUR], dtype=np.int64)
+    assert missing_ranges(ts, T0, T0 + 12 * HOUR, HOUR) == [
+        (T0, T0 + 4 * HOUR), (T0 + 10 * HOUR, T0 + 12 * HOUR)]
+    assert (T0 + 7 * HOUR, T0 + 8 * HOUR) in missing_ranges(
+        ts, T0, T0 + 12 * HOUR, HOUR, include_gaps=True)
+    assert missing_ranges(np.empty(0, dtype=np.int64), T0 + 1, T0 + 3 * HOUR, HOUR) == [
+        (T0 + HOUR, T0 + 3 * HOUR)]
+
+
+def test_download_from_scratch_stores_closed_candles(store):
+    end = T0 + 350 * HOUR + 123  # la vela 350 sigue abierta
+    ex = FakeExchange(now_ms=end)
+    reports = _download(store, ex, end)
+
+    for r in reports:
+        assert "error" not in r
+        v = r["validation"]
+        assert v["rows"] == 350
+        assert v["gaps"] == v["duplicates"] == v["misaligned"] == v["bad_ohlc"] == 0
+        assert v["last_ts"] == T0 + 349 * HOUR
+    assert len(ex.calls) == 2 * 4  # 4 páginas de 100 por serie
+
+
+def test_incremental_run_fetches_only_tail(store):
+    _download(store, FakeExchange(now_ms=T0 + 200 * HOUR), T0 + 200 * HOUR)
+
+    ex = FakeExchange(now_ms=T0 + 230 * HOUR)
+    reports = _download(store, ex, T0 + 230 * HOUR)
+
+    assert all(since >= T0 + 199 * HOUR for _, since, _ in ex.calls)
+    assert [r["fetched"] for r in reports] == [30, 30]
+    assert store.validate("ETHUSDT", "1h")["rows"] == 230
+
+
+def test_crash_resumes_from_page_checkpoint(store):
+    end = T0 + 500 * HOUR
+    ex = FakeExchange(now_ms=end, fail_on={3})
+    report = download_data.download_all(
+        lambda: ex, store, ["ETH/USDT"], ["1h"], T0, workers=1, rps=0,
+        end_ms=end, page_limit=100)[0]
+    assert "error" in report
+    # Las dos páginas previas al fallo quedaron como checkpoint
+    assert len(store.timestamps("ETHUSDT", "1h")) == 200
+
+    ex2 = FakeExchange(now_ms=end)
+    report = download_data.download_all(
+        lambda: ex2, store, ["ETH/USDT"], ["1h"], T0, workers=1, rps=0,
+        end_ms=end, page_limit=100)[0]
+    assert report["resumed_pages"] == 2
+    assert ex2.calls[0][1] == T0 + 200 * HOUR
+    assert report["validation"]["rows"] == 500
+
+
+def test_network_errors_are_retried(store):
+    end = T0 + 150 * HOUR
+    ex = FakeExchange(now_ms=end, fail_on={1}, fail_exc=ccxt.NetworkError)
+    report = download_data.download_all(
+        lambda: ex, store, ["ETH/USDT"], ["1h"], T0, workers=1, rps=0,
+        end_ms=end, page_limit=100)[0]
+    assert "error" not in report
+    assert report["validation"]["rows"] == 150
+
+
+def test_exchange_gaps_are_reported_and_repaired(store):
+    end = T0 + 120 * HOUR
+    holes = [T0 + 40 * HOUR, T0 + 41 * HOUR]
+    r = _download(store, FakeExchange(now_ms=end, missing=holes), end)[0]
+    assert r["validation"]["gaps"] == 1
+    assert r["validation"]["missing_candles"] == 2
+
+    ex = FakeExchange(now_ms=end)
+    r = _download(store, ex, end, repair=True)[0]
+    assert r["validation"]["gaps"] == 0
+    assert ex.calls[0][1] == T0 + 40 * HOUR
+
+
+def test_market_data_api_reads_store_and_fetches_tail(store, monkeypatch):
+    now = int(time.time() * 1000)
+    base = (now // HOUR) * HOUR
+    rows = [[base - i * HOUR, 1.0, 2.0, 0.5, 1.5, 3.0] for i in range(300, 2, -1)]
+    store.append("LABTESTUSDT", "1h", rows)
+
+    ex = FakeExchange(now_ms=base + HOUR)
+    monkeypatch.setattr(market_data_api, "candle_store", store)
+    monkeypatch.setattr(market_data_api.ccxt, "binance", lambda cfg: ex)
+    for name in ("kraken", "kucoin", "gateio", "bybit"):
+        monkeypatch.setattr(market_data_api.ccxt, name, None, raising=False)
+
+    merged_in = []
+    real_merge = store._merge
+    monkeypatch.setattr(store, "_merge", lambda *a: merged_in.append(threading.current_thread().name)
+                        or real_merge(*a))
+
+    data = market_data_api.get_ohlcv_data("LABTEST", "1h", limit=200)
+    market_data_api.flush_store_writes(timeout=10)
+
+    assert ex.calls[0][2] < 10  # solo la cola desde la última vela guardada
+    assert len(data) == 200
+    ts = [c["timestamp"] for c in data]
+    assert ts == sorted(set(ts)) and ts[-1] == base
+    assert np.all(np.diff(ts) == HOUR)
+    # Las velas cerradas nuevas vuelven al store, consolidadas fuera del hilo de la petición
+    assert merged_in and all(name.startswith("candle-store") for name in merged_in)
+    assert store.read("LABTEST", "1h", limit=1).index[-1] == pd.Timestamp(base - HOUR, unit="ms", tz="UTC")
+
+
+def test_concurrent_appends_and_merges_keep_series_intact(store):
+    # Hilos del scheduler escribiendo la misma serie a la vez (append directo y páginas en staging)
+    errors = []
+
+    def writer(k):
+        try:
+            for j in range(5):
+                rows = [[T0 + (k * 10 + j * 2 + d) * HOUR, 1.0, 2.0, 0.5, 1.5, 3.0] for d in range(2)]
+                if k % 2:
+                    store.append("RACE", "1h", rows)
+                else:
+                    store.stage_page("RACE", "1h", rows)
+                    store.merge_staged("RACE", "1h")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    store.merge_staged("RACE", "1h")
+    report = store.validate("RACE", "1h")
+    assert report["rows"] == 80 and report["gaps"] == 0
+    assert not list(store.directory.glob("*.tmp"))
+
+
+def test_lab_datasets_fall_back_to_candle_store(store, tmp_path):
+    end = T0 + 100 * HOUR
+    _download(store, FakeExchange(now_ms=end), end)
+
+    df = dataset_store.load_dataset("ETHUSDT", "1h", datasets_dir=str(tmp_path / "none"),
+                                    tail=10, candle_store_dir=str(store.directory))
+    assert len(df) == 10
+    assert df.index[-1] == pd.Timestamp(T0 + 99 * HOUR, unit="ms", tz="UTC")
@@ -0,0 +1,78 @@
+import sys
+import os
+import json
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.backtest_cache import BacktestResultStore
+from core.downsample import apply_max_points, downsample_curve, lttb_indices
+
+
+def _curve(n, seed=0):
+    rng = np.random.default_rng(seed)
+    equity = 1000 * np.cumprod(1 + rng.normal(0, 0.002, n))
+    return [
+        {"time": str(i), "timestamp": float(i * 300_000), "strategy_equity": round(e, 2),
+         "buy_hold_equity": 1000.0, "price": 100.0}
+        for i, e in enumerate(equity)
+    ]
+
+
+# === TESTS ===
+
+def test_lttb_keeps_extremes_and_endpoints():
+    curve = _curve(52_000)
+    small = downsample_curve(curve, 2000)
+    assert len(small) == 2000
+    assert small[0] is curve[0] and small[-1] is curve[-1]
+
+    full = np.array([p["strategy_equity"] for p in curve])
+    kept = np.array([p["strategy_equity"] for p in small])
+    # Peaks/troughs survive: extremes within 0.5% of the full range
+    tolerance = 0.005 * np.ptp(full)
+    assert full.max() - kept.max() < tolerance
+    assert kept.min() - full.min() < tolerance
+
+    idx = lttb_indices(full, 500)
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_payload_shrinks_by_orders_of_magnitude():
+    result = {"metrics": {}, "curve": _curve(52_000)}
+    reduced = apply_max_points(result, 500)
+    assert reduced["curve_points_total"] == 52_000 and reduced["curve_downsampled"]
+    assert len(json.dumps(result)) / len(json.dumps(reduced)) > 50
+    # max_points=0 keeps full resolution
+    assert apply_max_points(result, 0) is result
+
+
+def test_full_resolution_curve_endpoint(tmp_path, monkeypatch):
+    import core.backtest_cache as backtest_cache
+    import routers.backtest as backtest_router
+
+    store = BacktestResultStore(directory=tmp_path)
+    store.redis = None
+    monkeypatch.setattr(backtest_cache, "_default_store", store)
+    result_id = "result-" + "a" * 64
+    store.set(result_id, {"curve": _curve(250)})
+
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+
+    page = client.get(f"/backtest/results/{result_id}/curve?offset=200&limit=100").json()
+    assert page["total"] == 250 and len(page["points"]) == 50
+    assert page["next_offset"] is None
+
+    res = client.get(f"/backtest/results/{result_id}/curve?limit=100&format=f64")
+    cols = res.headers["X-Curve-Columns"].split(",")
+    data = np.frombuffer(res.content, dtype="<f8").reshape(len(cols), -1)
+    assert data.shape == (4, 100) and res.headers["X-Curve-Next-Offset"] == "100"
+    assert data[cols.index("timestamp"), 1] == 300_000
+
+    assert client.get("/backtest/results/../etc/curve").status_code == 404
+    assert client.get("/backtest/results/result-zzz/curve").status_code == 404
@@ -0,0 +1,92 @@
+import sys
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("statsmodels")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# trading_lab/models/arima_model.py por ruta: backend/models.py tapa el paquete `models` del lab
+_LAB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab", "models", "arima_model.py")
+_spec = importlib.util.spec_from_file_location("lab_arima_model", _LAB_PATH)
+arima_model = importlib.util.module_from_spec(_spec)
+sys.modules["lab_arima_model"] = arima_model  # el pool de procesos lo busca por nombre
+_spec.loader.exec_module(arima_model)
+
+from statsmodels.tsa.arima.model import ARIMA  # noqa: E402
+
+
+# === FIXTURES ===
+
+def _close(seed, n=140):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01", periods=n, freq="1h")
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=idx, name="close")
+
+
+def _full_refit(close, order=(2, 1, 0), start=50):
+    """Implementación original: ajuste completo sobre close[:i] en cada vela."""
+    out = pd.Series(np.nan, index=close.index)
+    for i in range(start, len(close)):
+        out.iloc[i] = ARIMA(close.iloc[:i].to_numpy(), order=order).fit().forecast(steps=1)[0]
+    return out
+
+
+# === TESTS ===
+
+def test_refit_every_bar_matches_full_refit():
+    close = _close(1, n=70)
+    got = arima_model.arima_predictions(close, order=(2, 1, 0), refit_every=1, warm_start=False)
+    ref = _full_refit(close)
+    assert got.iloc[:50].isna().all()
+    np.testing.assert_allclose(got.iloc[50:], ref.iloc[50:], rtol=1e-8)
+
+
+def test_incremental_refits_every_k_and_tracks_full_refit():
+    close = _close(2)
+    f = arima_model.ArimaForecaster(order=(2, 1, 0), refit_every=10).fit(close.iloc[:50])
+    preds = []
+    for x in close.iloc[50:]:
+        preds.append(f.forecast())
+        f.update(x)
+    assert f.refits == 1 + len(close.iloc[50:]) // 10
+
+    ref = _full_refit(close).iloc[50:].to_numpy()
+    # Entre reajustes los parámetros apenas cambian: la predicción casi no se aleja
+    err = np.abs(np.array(preds) / ref - 1)
+    assert err.max() < 5e-3 and err.mean() < 1e-3
+
+
+def test_extend_between_refits_equals_filtering_with_fixed_params():
+    close = _close(3, n=90).to_numpy()
+    f = arima_model.ArimaForecaster(order=(2, 1, 0), refit_every=1000).fit(close[:60])
+    params = f.results.params
+    f.update(close[60:75])
+    fixed = ARIMA(close[:75], order=(2, 1, 0)).filter(params).forecast(steps=1)[0]
+    assert f.forecast() == pytest.approx(fixed, rel=1e-10)
+    assert f.refits == 1
+
+
+def test_add_arima_predictions_has_no_lookahead():
+    df = _close(4, n=100).to_frame()
+    out = arima_model.add_arima_predictions(df, order=(2, 1, 0), refit_every=20)
+    # Cambiar el futuro no altera las predicciones pasadas
+    df2 = df.copy()
+    df2.iloc[80:, 0] *= 1.5
+    out2 = arima_model.add_arima_predictions(df2, order=(2, 1, 0), refit_every=20)
+    pd.testing.assert_series_equal(out["arima_pred"].iloc[:81], out2["arima_pred"].iloc[:81])
+    with pytest.raises(ValueError):
+        arima_model.add_arima_predictions(df.iloc[:10])
+
+
+def test_predict_many_parallel_matches_inline():
+    closes = {"AAA": _close(5, n=90), "BBB": _close(6, n=80)}
+    kw = dict(order=(2, 1, 0), refit_every=15)
+    inline = arima_model.predict_many(closes, workers=1, **kw)
+    parallel = arima_model.predict_many(closes, workers=2, **kw)
+    for sym in closes:
+        pd.testing.assert_series_equal(inline[sym], parallel[sym])
+        assert inline[sym].index.equals(closes[sym].index)
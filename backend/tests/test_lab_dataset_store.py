@@ -0,0 +1,91 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+# Ensure trading_lab modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab")))
+
+import dataset_store
+from dataset_store import convert_csv, load_csv, load_dataset, parquet_path
+
+
+# === FIXTURES ===
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    # Row groups pequeños para que tail/rango tengan que elegir
+    monkeypatch.setattr(dataset_store, "ROW_GROUP_SIZE", 100)
+    n = 1000
+    ts = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, n))
+    df = pd.DataFrame({
+        "\ufeffTimestamp ": ts, "Open": close, "High": close + 1,
+        "Low": close - 1, "Close": close, "Volume": 10.0,
+    })
+    # Desordenado y con una vela duplicada (gana la última)
+    dup = df.iloc[[500]].copy()
+    dup["Close"] = -1.0
+    df = pd.concat([df.iloc[::-1], dup])
+    path = tmp_path / "ETHUSDT_1h.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+# === TESTS ===
+
+def test_load_normalizes_csv(csv_path):
+    df = load_csv(csv_path)
+
+    assert len(df) == 1000
+    assert df.index.name == "timestamp"
+    assert str(df.index.tz) == "UTC"
+    assert df.index.is_monotonic_increasing and df.index.is_unique
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert df.index[0] == pd.Timestamp(1_700_000_000_000, unit="ms", tz="UTC")
+    assert df["close"].iloc[500] == -1.0
+
+
+def test_converts_once_then_reads_parquet(csv_path, monkeypatch):
+    convert_csv(csv_path)
+    assert os.path.exists(parquet_path(csv_path))
+
+    def _no_csv(*a, **k):
+        raise AssertionError("CSV re-parsed")
+
+    monkeypatch.setattr(dataset_store.pd, "read_csv", _no_csv)
+    df = load_dataset("ETHUSDT", "1h", datasets_dir=os.path.dirname(csv_path), tail=10)
+    assert len(df) == 10
+
+
+def test_tail_matches_full_tail(csv_path):
+    full = load_csv(csv_path)
+    for n in (1, 99, 150, 5000):
+        pd.testing.assert_frame_equal(load_csv(csv_path, tail=n), full.tail(n))
+
+
+def test_range_filter(csv_path):
+    full = load_csv(csv_path)
+    start, end = full.index[120], full.index[480]
+    part = load_csv(csv_path, start=start, end=end)
+    pd.testing.assert_frame_equal(part, full.loc[start:end])
+
+    # Epoch en segundos y tail combinados
+    part = load_csv(csv_path, start=int(start.timestamp()), tail=5)
+    pd.testing.assert_frame_equal(part, full.tail(5))
+
+
+def test_rebuilds_when_csv_changes(csv_path):
+    assert len(load_csv(csv_path)) == 1000
+
+    df = pd.read_csv(csv_path).iloc[:300]
+    df.to_csv(csv_path, index=False)
+    assert len(load_csv(csv_path)) == 300
+
+
+def test_missing_dataset_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_dataset("BTCUSDT", "1h", datasets_dir=str(tmp_path))
@@ -0,0 +1,158 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab")))
+
+import features  # noqa: E402
+
+
+# === FIXTURES ===
+
+def _frame(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    idx = pd.date_range("2024-01-01", periods=n, freq="1h", name="timestamp", tz="UTC")
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread, "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=idx)
+
+
+def _reference(df):
+    """add_features tal como estaba antes del store."""
+    df = df.copy()
+    df["ema20"] = features._ema(df["close"], 20)
+    df["ema50"] = features._ema(df["close"], 50)
+    df["ema200"] = features._ema(df["close"], 200)
+    df["rsi"] = features._rsi(df["close"], 14)
+    df["macd"], df["macd_signal"], df["macd_hist"] = features._macd(df["close"])
+    mid = df["close"].rolling(20).mean()
+    std = df["close"].rolling(20).std(ddof=0)
+    df["bb_percent"] = ((df["close"] - (mid - 2 * std)) / (4 * std)).clip(0, 1)
+    df["atr"] = features._atr(df, 14)
+    df["atr_pct"] = (df["atr"] / df["close"]) * 100.0
+    df["volume_ma20"] = df["volume"].rolling(20).mean()
+    df["trend_regime"] = 0
+    df.loc[df["ema50"] > df["ema200"], "trend_regime"] = 1
+    df.loc[df["ema50"] < df["ema200"], "trend_regime"] = -1
+    return df.dropna().copy()
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / ".parquet" / "TEST_60.features.parquet")
+
+
+# === TESTS ===
+
+def test_add_features_without_cache_matches_reference():
+    df = _frame()
+    pd.testing.assert_frame_equal(features.add_features(df), _reference(df))
+
+
+def test_cached_run_reuses_every_group(store_path):
+    df = _frame()
+    first = features.add_features(df, cache_path=store_path)
+    assert os.path.exists(features.FeatureStore(store_path).range_path(df.index[0]))
+
+    store = features.FeatureStore(store_path)
+    again = store.compute(df)
+    assert store.last_run["reused"] == [d.name for d in features.FEATURES]
+    assert not store.last_run["appended"] and not store.last_run["recomputed"]
+    pd.testing.assert_frame_equal(features.add_features(df, cache_path=store_path), first)
+    assert list(again.columns) == features.feature_columns()
+
+
+def test_growing_dataset_only_appends_tail(store_path):
+    full = _frame(n=6000)
+    features.FeatureStore(store_path).compute(full.iloc[:5000])
+
+    store = features.FeatureStore(store_path)
+    got = store.compute(full)
+    assert store.last_run["new_rows"] == 1000
+    assert sorted(store.last_run["appended"]) == sorted(d.name for d in features.FEATURES)
+
+    expected = _reference(full)
+    cached = features.add_features(full, cache_path=store_path)
+    pd.testing.assert_frame_equal(cached, expected, rtol=1e-9, atol=1e-9)
+    assert len(got) == len(full)
+
+
+def _ema_group_v2(df, span):
+    return {f"ema{span}": df["close"].ewm(span=span, adjust=True).mean()}
+
+
+def test_definition_change_invalidates_only_affected_groups(store_path):
+    df = _frame()
+    features.FeatureStore(store_path).compute(df)
+
+    # ema50 con otra definición: cambia el hash de ema50 y el de trend (depende de él)
+    patched = [features.FeatureDef(d.name, _ema_group_v2, d.columns, d.params, d.lookback)
+               if d.name == "ema50" else d for d in features.FEATURES]
+    store = features.FeatureStore(store_path, defs=patched)
+    got = store.compute(df)
+    assert store.last_run["recomputed"] == ["ema50", "trend"]
+    assert "ema20" in store.last_run["reused"] and "rsi" in store.last_run["reused"]
+    expected = df["close"].ewm(span=50, adjust=True).mean()
+    np.testing.assert_allclose(got["ema50"].to_numpy(), expected.to_numpy())
+
+
+def test_rewritten_history_recomputes_everything(store_path):
+    df = _frame()
+    features.FeatureStore(store_path).compute(df)
+
+    edited = df.copy()
+    edited.iloc[10, edited.columns.get_loc("close")] *= 1.01
+    store = features.FeatureStore(store_path)
+    got = store.compute(edited)
+    assert store.last_run["recomputed"] == [d.name for d in features.FEATURES]
+    ref = _reference(edited)
+    pd.testing.assert_frame_equal(got.loc[ref.index], ref[features.feature_columns()])
+
+
+def test_tail_window_is_served_from_full_history_store(store_path):
+    full = _frame(n=6000)
+    store = features.FeatureStore(store_path)
+    store.compute(full)
+    full_store = store.range_path(full.index[0])
+
+    # tail(N) (FAST_MODE del verifier): se lee del store completo y no lo pisa
+    tail = full.tail(5000)
+    store = features.FeatureStore(store_path)
+    got = store.compute(tail)
+    assert store.last_run["source"] == full_store and not store.last_run["recomputed"]
+    assert os.listdir(os.path.dirname(store_path)) == [os.path.basename(full_store)]
+    # Mismo resultado que calcular el tail por separado
+    expected = _reference(tail)
+    pd.testing.assert_frame_equal(got.loc[expected.index], expected[features.feature_columns()],
+                                  rtol=1e-9, atol=1e-9)
+    pd.testing.assert_frame_equal(features.add_features(tail, cache_path=store_path), expected,
+                                  rtol=1e-9, atol=1e-9)
+
+
+def test_tail_and_full_runs_keep_separate_stores(store_path):
+    full = _frame(n=6000)
+    tail = full.tail(5000)
+    features.FeatureStore(store_path).compute(tail)
+
+    store = features.FeatureStore(store_path)
+    store.compute(full)
+    assert store.last_run["recomputed"] == [d.name for d in features.FEATURES]
+    # El store del tail queda contenido en el completo y se borra
+    assert os.listdir(os.path.dirname(store_path)) == [os.path.basename(store.range_path(full.index[0]))]
+
+    store = features.FeatureStore(store_path)
+    store.compute(full)
+    assert store.last_run["reused"] == [d.name for d in features.FEATURES]
+
+
+def test_feature_cache_path_sits_next_to_dataset_parquet():
+    path = features.feature_cache_path(os.path.join("data", "ETHUSDT_60.csv"))
+    assert path == os.path.join("data", ".parquet", "ETHUSDT_60.features.parquet")
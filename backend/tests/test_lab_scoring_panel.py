@@ -0,0 +1,160 @@
+import sys
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# trading_lab/models/scoring.py por ruta: backend/models.py tapa el paquete `models` del lab
+_LAB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab", "models", "scoring.py")
+_spec = importlib.util.spec_from_file_location("lab_scoring", _LAB_PATH)
+scoring = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(scoring)
+
+
+# === FIXTURES ===
+
+def _frame(seed, n=600, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.002, n))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    idx = pd.date_range(start, periods=n, freq="1h", name="timestamp")
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread, "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=idx)
+
+
+@pytest.fixture
+def frames():
+    # CCC empieza más tarde y termina antes: índices desalineados
+    return {"AAA": _frame(1), "BBB": _frame(2), "CCC": _frame(3, n=400, start="2024-01-03")}
+
+
+def _reference_scores(df, cfg, t):
+    """Lectura escalar de las reglas de scoring_config2 para la vela `t`."""
+    d = scoring.ensure_core_indicators(df.copy())
+    c, o, h, lo, v = (d[k] for k in ("close", "open", "high", "low", "volume"))
+    slopes = [scoring.rolling_ols_panel(c.to_frame(), [w])[f"slope_{w}"].iloc[:, 0] for w in (14, 28)]
+    s1, s2 = slopes[0].iloc[t], slopes[1].iloc[t]
+    regime = "UP" if s1 > 0 and s2 > 0 else "DOWN" if s1 < 0 and s2 < 0 else "RANGE"
+
+    mid, sd = c.rolling(20).mean().iloc[t], c.rolling(20).std(ddof=0).iloc[t]
+    pb = (c.iloc[t] - (mid - 2 * sd)) / (4 * sd)
+    bb = float(np.clip(2 * pb - 1, -1, 1))
+    atr_pct = d["ATR"].iloc[t] / c.iloc[t] * 100
+    rsi = d["RSI"].iloc[t]
+
+    body = abs(c.iloc[t] - o.iloc[t])
+    up_w, lo_w = h.iloc[t] - max(o.iloc[t], c.iloc[t]), min(o.iloc[t], c.iloc[t]) - lo.iloc[t]
+    o1, c1 = o.iloc[t - 1], c.iloc[t - 1]
+    bull = (c1 < o1 and c.iloc[t] > o.iloc[t] and o.iloc[t] <= c1 and c.iloc[t] >= o1) or \
+        (body > 0 and lo_w >= 2 * body and up_w <= body)
+    bear = (c1 > o1 and c.iloc[t] < o.iloc[t] and o.iloc[t] >= c1 and c.iloc[t] <= o1) or \
+        (body > 0 and up_w >= 2 * body and lo_w <= body)
+
+    sig = {
+        "rsi_bias": 1 if rsi > 55 else -1 if rsi < 45 else 0,
+        "macd_cross": np.sign(d["MACD_HIST"].iloc[t]),
+        "ema_trend": (np.sign(c.iloc[t] - d["EMA50"].iloc[t]) + np.sign(c.iloc[t] - d["EMA200"].iloc[t])) / 2,
+        "bb_percent": -bb if regime == "RANGE" else bb,
+        "atr_pct": 1 if 0.2 <= atr_pct <= 2.5 else -1 if atr_pct > 5.0 else 0,
+        "volume_anomaly": np.sign(c.iloc[t] - o.iloc[t]) if v.iloc[t] > v.rolling(20).mean().iloc[t] else 0,
+        "candle_signal": 1 if bull else -1 if bear else 0,
+        "trend_slope": 1 if regime == "UP" else -1 if regime == "DOWN" else 0,
+    }
+    w = cfg["weights"][regime]
+    long_pts = sum(w[f] * (s if f == "atr_pct" else max(s, 0)) for f, s in sig.items())
+    short_pts = sum(w[f] * (s if f == "atr_pct" else max(-s, 0)) for f, s in sig.items())
+    total = sum(abs(w[f]) for f in sig)  # arima_bias no cuenta sin columna arima_pred
+    return regime, np.clip(100 * long_pts / total, 0, 100), np.clip(100 * short_pts / total, 0, 100)
+
+
+# === TESTS ===
+
+def test_panel_matches_scalar_rules(frames):
+    cfg = scoring.load_config2()
+    scored = scoring.score_panel(frames)
+    for sym in ("AAA", "CCC"):
+        df = frames[sym]
+        for t in (250, 301, len(df) - 1):
+            regime, sl, ss = _reference_scores(df, cfg, t)
+            ts = df.index[t]
+            assert scored["trend_regime"].at[ts, sym] == regime
+            assert scored["score_long"].at[ts, sym] == pytest.approx(sl, abs=1e-9)
+            assert scored["score_short"].at[ts, sym] == pytest.approx(ss, abs=1e-9)
+
+
+def test_symbols_are_scored_independently(frames):
+    together = scoring.score_panel(frames)
+    for sym, df in frames.items():
+        alone = scoring.score_panel({sym: df})
+        for col in ("confidence", "tp_price", "sl_price", "atr_abs"):
+            pd.testing.assert_series_equal(together[col][sym].reindex(df.index), alone[col][sym],
+                                           check_names=False)
+        assert (together["signal_side"][sym].reindex(df.index) == alone["signal_side"][sym]).all()
+
+
+def test_yaml_weights_are_broadcast_by_regime(frames):
+    only_slope = {r: {f: 0 for f in scoring.FEATURES} for r in scoring.REGIMES}
+    only_slope["UP"]["trend_slope"] = 1
+    only_slope["DOWN"]["trend_slope"] = 1
+    scored = scoring.score_panel(frames, {"weights": only_slope, "thresholds": {"LONG": 50, "SHORT": 50}})
+
+    regime = scored["trend_regime"]
+    assert (scored["score_long"][regime == "UP"].stack() == 100).all()
+    assert (scored["score_short"][regime == "DOWN"].stack() == 100).all()
+    assert (scored["signal_side"][regime == "UP"].stack() == "LONG").all()
+    # En RANGE todos los pesos son 0: 0/0 -> sin señal
+    assert (scored["signal_side"][regime == "RANGE"].stack() == "NO_TRADE").all()
+
+
+def test_score_universe_latest_bar_per_symbol(frames):
+    uni = scoring.score_universe(frames)
+    assert list(uni.index) == sorted(uni.index, key=lambda s: -uni.at[s, "confidence"])
+    assert uni.at["CCC", "timestamp"] == frames["CCC"].index[-1]
+    assert uni.at["AAA", "close"] == frames["AAA"]["close"].iloc[-1]
+    for sym, row in uni.iterrows():
+        sign = -1 if row["signal_side"] == "SHORT" or row["score_short"] > row["score_long"] else 1
+        assert sign * (row["tp_price"] - row["close"]) > 0
+        assert sign * (row["close"] - row["sl_price"]) > 0
+
+
+def test_scorer_single_symbol_columns(frames):
+    out = scoring.Scorer().score(frames["AAA"])
+    for col in ("score_long", "score_short", "confidence", "signal_side", "atr_abs",
+                "bb_percent", "atr_pct", "trend_regime"):
+        assert col in out.columns
+    assert len(out) == len(frames["AAA"])
+    assert set(out["signal_side"]) <= {"LONG", "SHORT", "NO_TRADE"}
+
+
+def test_arima_pred_feeds_scoring_when_present(frames):
+    only_arima = {r: {f: 0 for f in scoring.FEATURES} for r in scoring.REGIMES}
+    for r in scoring.REGIMES:
+        only_arima[r]["arima_bias"] = 1
+    cfg = {"weights": only_arima, "thresholds": {"LONG": 50, "SHORT": 50}}
+
+    df = frames["AAA"].copy()
+    # Predicción alternando por encima / por debajo del cierre
+    df["arima_pred"] = df["close"] * np.where(np.arange(len(df)) % 2 == 0, 1.01, 0.99)
+    df.iloc[:50, df.columns.get_loc("arima_pred")] = np.nan  # warm-up del ARIMA
+    scored = scoring.score_panel({"AAA": df, "BBB": frames["BBB"]}, cfg)
+
+    side = scored["signal_side"]["AAA"].reindex(df.index)
+    assert (side.iloc[50::2] == "LONG").all()
+    assert (side.iloc[51::2] == "SHORT").all()
+    assert (side.iloc[:50] == "NO_TRADE").all()
+    # Sin columna arima_pred el símbolo no recibe la feature
+    assert (scored["signal_side"]["BBB"].dropna() == "NO_TRADE").all()
+
+    # Y sin ARIMA en ningún frame el score no cambia respecto a no tener la feature
+    base = scoring.score_panel(frames)
+    no_arima = scoring.load_config2()
+    for r in scoring.REGIMES:
+        no_arima["weights"][r]["arima_bias"] = 0
+    pd.testing.assert_frame_equal(base["confidence"], scoring.score_panel(frames, no_arima)["confidence"])
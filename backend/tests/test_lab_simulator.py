@@ -0,0 +1,116 @@
+import sys
+import os
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure trading_lab modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab")))
+
+from simulator import simulate_signals
+
+
+def _reference_simulate(df, signals, timeout_bars, commission, slippage, adverse_first):
+    """Original bar-by-bar loop from engine.simulate_signals (kept as oracle)."""
+    rows = []
+    signals = sorted(signals, key=lambda s: s.timestamp)
+    ts_to_idx = {ts: i for i, ts in enumerate(df.index)}
+    last_exit_idx = -1
+    N = len(df)
+
+    def cost_exit(raw, side):
+        return raw * (1 - slippage) * (1 - commission) if side == "LONG" \
+            else raw * (1 + slippage) * (1 + commission)
+
+    for sig in signals:
+        if sig.timestamp not in ts_to_idx:
+            continue
+        i = ts_to_idx[sig.timestamp]
+        if i <= last_exit_idx:
+            continue
+        entry_idx = i + 1
+        if entry_idx >= N:
+            break
+        raw_entry = float(df["open"].iloc[entry_idx])
+        side = sig.direction.upper()
+        entry = raw_entry * (1 + slippage) * (1 + commission) if side == "LONG" \
+            else raw_entry * (1 - slippage) * (1 - commission)
+        tp, sl = sig.tp, sig.sl
+        if not tp or not sl:
+            continue
+        exit_price = result = None
+        for fwd in range(1, timeout_bars + 1):
+            j = entry_idx + fwd
+            if j >= N:
+                break
+            h, lo = float(df["high"].iloc[j]), float(df["low"].iloc[j])
+            hit_tp = (h >= tp) if side == "LONG" else (lo <= tp)
+            hit_sl = (lo <= sl) if side == "LONG" else (h >= sl)
+            first, second = ((hit_sl, sl, "loss"), (hit_tp, tp, "win")) if adverse_first \
+                else ((hit_tp, tp, "win"), (hit_sl, sl, "loss"))
+            if first[0]:
+                exit_price, result = cost_exit(first[1], side), first[2]
+                break
+            if second[0]:
+                exit_price, result = cost_exit(second[1], side), second[2]
+                break
+        if exit_price is None:
+            j = min(entry_idx + timeout_bars, N - 1)
+            exit_price = cost_exit(float(df["close"].iloc[j]), side)
+            pnl = (exit_price - entry) if side == "LONG" else (entry - exit_price)
+            result = "win" if pnl > 0 else ("loss" if pnl < 0 else "breakeven")
+        gross = ((exit_price - entry) / entry) * (1 if side == "LONG" else -1) * 100.0
+        rows.append((df.index[entry_idx], df.index[j], side, entry, exit_price, gross,
+                     result, j - entry_idx))
+        last_exit_idx = j
+    return rows
+
+
+def _market(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    index = pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close}, index=index)
+
+
+def _signals(df, count=400, seed=1):
+    rng = np.random.default_rng(seed)
+    out = []
+    for i in rng.integers(0, len(df), size=count):
+        px = float(df["close"].iloc[i])
+        side = rng.choice(["long", "short", "neutral"], p=[0.45, 0.45, 0.1])
+        sign = 1 if side == "long" else -1
+        width = rng.uniform(0.002, 0.03)
+        tp = px * (1 + sign * width * rng.uniform(1, 3))
+        sl = px * (1 - sign * width)
+        if rng.random() < 0.05:
+            tp = None
+        out.append(SimpleNamespace(timestamp=df.index[i], direction=side, tp=tp, sl=sl,
+                                   confidence=0.7))
+    # Unknown timestamp and last-candle signal
+    out.append(SimpleNamespace(timestamp=pd.Timestamp("1999-01-01", tz="UTC"),
+                               direction="long", tp=1.0, sl=1.0, confidence=0.5))
+    out.append(SimpleNamespace(timestamp=df.index[-1], direction="long", tp=1.0, sl=1.0,
+                               confidence=0.5))
+    return out
+
+
+# === TESTS ===
+
+@pytest.mark.parametrize("adverse_first", [True, False])
+@pytest.mark.parametrize("timeout_bars", [0, 1, 48])
+def test_vectorized_exits_match_bar_by_bar(adverse_first, timeout_bars):
+    df = _market()
+    signals = _signals(df)
+    expected = _reference_simulate(df, signals, timeout_bars, 0.0004, 0.0002, adverse_first)
+    trades = simulate_signals(df, list(signals), timeout_bars=timeout_bars,
+                              adverse_first=adverse_first)
+
+    got = [(t.entry_time, t.exit_time, t.side, t.entry_price, t.exit_price,
+            t.return_pct_gross, t.result, t.bars_held) for t in trades]
+    assert len(got) > 10
+    assert got == expected
@@ -0,0 +1,137 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Ensure trading_lab modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab")))
+
+import backtest_tournament as tournament
+
+
+# === FIXTURES ===
+
+def _frame(seed, n=1500):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.004, n)) * close
+    idx = pd.date_range("2024-01-01", periods=n, freq="1h", tz="UTC", name="timestamp")
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread, "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=idx)
+
+
+@pytest.fixture
+def frames():
+    return {"AAAUSDT_1h": _frame(1), "BBBUSDT_1h": _frame(2)}
+
+
+GRID = {"ma_cross": {"fast_period": [5, 10], "slow_period": [30, 60]}}
+
+
+def _run(frames, path, workers):
+    return tournament.run_tournament(
+        GRID, ["AAAUSDT", "BBBUSDT"], ["1h"], results_path=str(path),
+        workers=workers, frames=frames, min_trades=0,
+    )
+
+
+# === TESTS ===
+
+def test_parallel_matches_inline(frames, tmp_path):
+    serial = _run(frames, tmp_path / "serial" / "results.jsonl", workers=1)
+    parallel = _run(frames, tmp_path / "parallel" / "results.jsonl", workers=2)
+
+    assert len(serial) == len(parallel) == 8
+    cols = ["strategy_id", "symbol", "timeframe", "params", "trades", "profit_factor",
+            "total_return_pct", "max_drawdown_pct"]
+    key = ["symbol", "params"]
+    pd.testing.assert_frame_equal(
+        serial[cols].sort_values(key).reset_index(drop=True),
+        parallel[cols].sort_values(key).reset_index(drop=True),
+    )
+    assert (serial["trades"] > 0).all()
+    assert serial["profit_factor"].is_monotonic_decreasing
+    assert (tmp_path / "parallel" / "leaderboard.csv").exists()
+
+
+def test_resume_skips_finished_jobs(frames, tmp_path, monkeypatch):
+    path = tmp_path / "results.jsonl"
+    _run(frames, path, workers=1)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 8
+
+    # Simula una caída: se pierden 3 resultados y la última línea queda truncada
+    path.write_text("\n".join(lines[:5]) + "\n" + lines[5][:20])
+
+    calls = []
+    real = tournament._run_job
+    monkeypatch.setattr(tournament, "_run_job", lambda job, mc: calls.append(job) or real(job, mc))
+    board = _run(frames, path, workers=1)
+
+    assert len(calls) == 3
+    assert len(board) == 8
+    keys = [json.loads(line)["key"] for line in path.read_text().splitlines() if line.endswith("}")]
+    assert len(set(keys)) == 8
+
+
+def test_changed_data_invalidates_results(frames, tmp_path, monkeypatch):
+    path = tmp_path / "results.jsonl"
+    _run(frames, path, workers=1)
+
+    frames["AAAUSDT_1h"] = _frame(3)
+    calls = []
+    real = tournament._run_job
+    monkeypatch.setattr(tournament, "_run_job", lambda job, mc: calls.append(job) or real(job, mc))
+    _run(frames, path, workers=1)
+
+    assert len(calls) == 4
+    assert {j["symbol"] for j in calls} == {"AAAUSDT"}
+
+
+def test_unknown_strategy_is_reported_not_fatal(frames, tmp_path):
+    board = tournament.run_tournament(
+        {"nope": {}, **GRID}, ["AAAUSDT"], ["1h"], results_path=str(tmp_path / "r.jsonl"),
+        workers=1, frames=frames, min_trades=0,
+    )
+    assert len(board) == 4
+    rows = [json.loads(line) for line in (tmp_path / "r.jsonl").read_text().splitlines()]
+    assert any("error" in r and r["strategy_id"] == "nope" for r in rows)
+
+
+def test_last_bar_strategies_are_rejected(frames, tmp_path):
+    # rsi_divergence solo mira la última vela: sobre todo el histórico daría
+    # 0 trades y nunca llegaría al leaderboard, así que el job falla explícito
+    board = tournament.run_tournament(
+        {"rsi_divergence": {}, **GRID}, ["AAAUSDT"], ["1h"], results_path=str(tmp_path / "r.jsonl"),
+        workers=1, frames=frames, min_trades=0,
+    )
+    assert len(board) == 4
+    assert set(board["strategy_id"]) == {"ma_cross"}
+    rows = [json.loads(line) for line in (tmp_path / "r.jsonl").read_text().splitlines()]
+    err = [r for r in rows if r["strategy_id"] == "rsi_divergence"]
+    assert len(err) == 1 and "emits_history" in err[0]["error"]
+
+
+def test_donchian_and_bb_enter_the_leaderboard(frames, tmp_path):
+    grid = {"donchian_v2": {"period": [20], "ema_trend_period": [100]}, "bb_mean_reversion": {}}
+    board = tournament.run_tournament(
+        grid, ["AAAUSDT", "BBBUSDT"], ["1h"], results_path=str(tmp_path / "r.jsonl"),
+        workers=1, frames=frames, min_trades=0,
+    )
+    rows = [json.loads(line) for line in (tmp_path / "r.jsonl").read_text().splitlines()]
+    assert not [r for r in rows if "error" in r]
+    assert set(board["strategy_id"]) == {"donchian_v2", "bb_mean_reversion"}
+    assert (board["trades"] > 0).all()
+
+
+def test_default_grid_only_has_history_strategies():
+    tournament.load_default_strategies()
+    for strategy_id in tournament.DEFAULT_GRID:
+        assert tournament.get_registry().get(strategy_id).emits_history
@@ -0,0 +1,46 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.monte_carlo import monte_carlo_summary, simulate_equity_paths
+
+
+# === TESTS ===
+
+def test_shuffle_keeps_final_return_and_varies_drawdown():
+    returns = [2.0, -1.0, 3.0, -2.5, 1.5, -1.0, 2.0, -0.5]
+    equity = simulate_equity_paths(returns, n_paths=500, method="shuffle", seed=1)
+
+    expected_final = np.prod(1 + np.array(returns) / 100)
+    assert equity.shape == (500, len(returns))
+    assert np.allclose(equity[:, -1], expected_final)
+
+    summary = monte_carlo_summary(returns, n_paths=500, method="shuffle", seed=1)
+    dd = summary["max_drawdown_pct"]
+    assert dd["p5"] < dd["p95"] <= 0
+    assert summary["final_return_pct"]["p5"] == summary["final_return_pct"]["p95"]
+
+
+def test_risk_of_ruin_and_degenerate_inputs():
+    losing = monte_carlo_summary([-10.0, -8.0, 1.0] * 10, n_paths=2000, ruin_pct=50, seed=3)
+    assert losing["risk_of_ruin_pct"] > 90
+    assert losing["prob_loss_pct"] > 90
+
+    assert monte_carlo_summary([], n_paths=100)["paths"] == 0
+    assert monte_carlo_summary([1.0], n_paths=100)["risk_of_ruin_pct"] is None
+
+
+def test_vectorized_speed_budget():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.2, 2.0, size=500)
+
+    started = time.perf_counter()
+    summary = monte_carlo_summary(returns, n_paths=10_000, seed=0)
+    elapsed = time.perf_counter() - started
+
+    assert summary["paths"] == 10_000 and summary["trades"] == 500
+    assert elapsed < 1.0
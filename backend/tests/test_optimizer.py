@@ -0,0 +1,157 @@
+import sys
+import os
+import random
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.backtest_engine import BacktestEngine
+from core.market_data_api import generate_mock_ohlcv
+from core.optimizer import SweepError, build_combinations, run_sweep, sample_space
+from strategies.registry import get_registry, load_default_strategies
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="module")
+def history():
+    random.seed(7)
+    df = pd.DataFrame(generate_mock_ohlcv("BTC", limit=400))
+    df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
+    if "ma_cross" not in get_registry()._strategies:
+        with patch("builtins.print"):
+            load_default_strategies()
+    return df
+
+
+# === TESTS ===
+
+def test_search_spaces():
+    grid = build_combinations(grid={"fast_period": [5, 10], "slow_period": [30, 50, 80]})
+    assert len(grid) == 6
+    assert {"fast_period": 10, "slow_period": 80} in grid
+
+    space = {"fast_period": {"min": 5, "max": 30}, "tp_atr_mult": {"min": 1.0, "max": 3.0}}
+    a = sample_space(space, n_iter=8, seed=1)
+    assert a == sample_space(space, n_iter=8, seed=1)
+    assert all(isinstance(c["fast_period"], int) and 5 <= c["fast_period"] <= 30 for c in a)
+
+    with pytest.raises(SweepError):
+        build_combinations(grid={"x": list(range(1000))})
+
+
+def test_sweep_matches_single_runs_and_is_ranked(history):
+    grid = {"fast_period": [5, 10], "slow_period": [30, 60]}
+    with patch("builtins.print"):
+        sweep = run_sweep("ma_cross", "btc", "1h", grid=grid, df=history, workers=2)
+
+        # Data is never downloaded; each row matches a direct engine run
+        best = sweep["results"][0]
+        direct = BacktestEngine().run_on_data(
+            "ma_cross", "btc", "1h", history, config=best["params"]
+        )
+
+    assert sweep["combinations"] == 4
+    assert [r["rank"] for r in sweep["results"]] == [1, 2, 3, 4]
+    rois = [r["metrics"]["roi_pct"] for r in sweep["results"]]
+    assert rois == sorted(rois, reverse=True)
+    assert best["metrics"] == direct["metrics"]
+
+
+def test_walk_forward_reuses_cached_windows(history):
+    from core.walk_forward import build_windows, run_walk_forward
+
+    grid = {"fast_period": [5, 10], "slow_period": [30]}
+    shorter = history.iloc[:-60].reset_index(drop=True)
+
+    with patch("builtins.print"):
+        first = run_walk_forward("ma_cross", "btc", "1h", train_candles=150,
+                                 test_candles=50, grid=grid, df=shorter, workers=2)
+        extended = run_walk_forward("ma_cross", "btc", "1h", train_candles=150,
+                                    test_candles=50, grid=grid, df=history, workers=2)
+
+    n_first = len(build_windows(shorter, 150, 50))
+    assert len(first["windows"]) == n_first and first["cached_windows"] == 0
+    # Extending history only computes the new window(s)
+    assert extended["cached_windows"] == n_first
+    assert len(extended["windows"]) > n_first
+    assert extended["windows"][:n_first] == first["windows"]
+
+    # OOS curve is the concatenation of complete test segments
+    assert len(extended["curve"]) == 50 * len(extended["windows"])
+    assert extended["curve"][0]["timestamp"] == history.iloc[
+        extended["windows"][0]["test_start"]]["timestamp"]
+
+
+def test_sweep_reports_progress_and_aborts(history):
+    grid = {"fast_period": [5, 10, 15], "slow_period": [30]}
+    seen = []
+    with patch("builtins.print"):
+        run_sweep("ma_cross", "btc", "1h", grid=grid, df=history, workers=1,
+                  progress_callback=lambda done, total, _: seen.append((done, total)))
+    assert seen == [(1, 3), (2, 3), (3, 3)]
+
+    class Stop(BaseException):
+        pass
+
+    def stop(done, total, _):
+        raise Stop()
+
+    with patch("builtins.print"), pytest.raises(Stop):
+        run_sweep("ma_cross", "btc", "1h", grid=grid, df=history, workers=2,
+                  progress_callback=stop)
+
+
+def test_walk_forward_max_runs_keeps_latest_windows(history):
+    from core.walk_forward import build_windows, run_walk_forward
+
+    grid = {"fast_period": [5, 10], "slow_period": [30]}
+    all_windows = build_windows(history, 150, 50)
+
+    seen = []
+    with patch("builtins.print"):
+        result = run_walk_forward("ma_cross", "btc", "1h", train_candles=150, test_candles=50,
+                                  grid=grid, df=history, workers=1, max_runs=2, seed=3,
+                                  progress_callback=lambda d, t, _: seen.append((d, t)))
+        with pytest.raises(SweepError):
+            run_walk_forward("ma_cross", "btc", "1h", train_candles=150, test_candles=50,
+                             grid=grid, df=history, workers=1, max_runs=1)
+
+    assert [w["window"] for w in result["windows"]] == [all_windows[-1]["window"]]
+    assert seen == [(1, 1)]
+
+
+def test_stitch_chains_on_last_curve_point_with_open_position():
+    from core.walk_forward import stitch_windows
+
+    def window(equities, final_capital):
+        curve = [{"time": str(i), "timestamp": i, "strategy_equity": e, "buy_hold_equity": 1000.0}
+                 for i, e in enumerate(equities)]
+        return {"curve": curve, "error": None,
+                "out_of_sample": {"final_capital": final_capital, "total_trades": 1, "win_rate": 100.0}}
+
+    # Primer tramo acaba con una posición abierta (+10% flotante, 0 realizado)
+    stitched = stitch_windows([window([1000.0, 1100.0], 1000.0), window([1000.0, 1050.0], 1050.0)], 1000.0)
+
+    equity = [p["strategy_equity"] for p in stitched["curve"]]
+    assert equity == [1000.0, 1100.0, 1100.0, 1155.0]  # sin salto entre tramos
+    assert stitched["metrics"]["final_capital"] == 1155.0
+
+
+def test_walk_forward_caches_slim_windows_with_short_ttl_in_memory(history):
+    from core import walk_forward
+    from core.walk_forward import CURVE_FIELDS, run_walk_forward
+
+    grid = {"fast_period": [7], "slow_period": [30]}
+    with patch("builtins.print"), patch.object(walk_forward.cache, "redis_client", None), \
+            patch.object(walk_forward.cache, "set") as cache_set:
+        result = run_walk_forward("ma_cross", "btc", "1h", train_candles=150, test_candles=50,
+                                  grid=grid, df=history, workers=1)
+
+    assert cache_set.call_count == len(result["windows"])
+    for (_, entry), kwargs in cache_set.call_args_list:
+        assert kwargs["ttl"] == walk_forward.WINDOW_MEMORY_CACHE_TTL
+        assert all(set(p) == set(CURVE_FIELDS) for p in entry["curve"])
@@ -0,0 +1,127 @@
+import sys
+import os
+import json
+import importlib.util
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import Base
+from models_db import StrategyConfig, bump_config_version
+from data.supported_tokens import VALID_TOKENS_FULL
+from scheduler import PersonaTable
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="function")
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    db.add_all([
+        StrategyConfig(persona_id="scan_a", strategy_id="s1", name="Scan A",
+                       tokens=json.dumps(["ALL"]), timeframes=json.dumps(["1h"]), enabled=1),
+        StrategyConfig(persona_id="scan_b", strategy_id="s2", name="Scan B",
+                       tokens=json.dumps(["scanner"]), timeframes=json.dumps(["4h"]), enabled=1),
+        StrategyConfig(persona_id="custom", strategy_id="s3", name="Custom",
+                       tokens=json.dumps(["eth", " matic", "ETH", "POL"]), timeframes=None, enabled=1),
+    ])
+    db.commit()
+    db.close()
+
+    with patch("scheduler.SessionLocal", side_effect=lambda: factory()):
+        yield factory
+    engine.dispose()
+
+
+# === TESTS ===
+
+def test_persona_table_compiles_and_shares_tokens(session_factory):
+    table = PersonaTable()
+    personas = {p["id"]: p for p in table.get()}
+
+    # Scanner markers are case-insensitive and share a single token tuple
+    assert personas["scan_a"]["tokens"] is personas["scan_b"]["tokens"]
+    assert len(personas["scan_a"]["tokens"]) == len(set(VALID_TOKENS_FULL))
+
+    # Normalized (trim/upper/alias) and deduplicated, order preserved
+    assert personas["custom"]["tokens"] == ("ETH", "POL")
+    assert personas["custom"]["timeframe"] == "1h"
+    assert set(table.universe) >= {"ETH", "POL"}
+
+
+def test_persona_table_reloads_only_on_version_change(session_factory):
+    table = PersonaTable()
+    table.get()
+    table.get()
+    assert table.reloads == 1
+
+    # Stats updates (evaluator) do not invalidate the table
+    db = session_factory()
+    strat = db.query(StrategyConfig).filter(StrategyConfig.persona_id == "custom").one()
+    strat.win_rate = 55.0
+    strat.total_signals = 10
+    db.commit()
+    table.get()
+    assert table.reloads == 1
+
+    # A config change (toggle bumps config_version) does
+    strat.enabled = 0
+    bump_config_version(strat)
+    db.commit()
+    db.close()
+    personas = table.get()
+    assert table.reloads == 2
+    assert "custom" not in {p["id"] for p in personas}
+
+
+def test_persona_table_max_age_refresh(session_factory):
+    now = [0.0]
+    table = PersonaTable(max_age_seconds=600, timer=lambda: now[0])
+    table.get()
+    now[0] = 599
+    table.get()
+    assert table.reloads == 1
+    now[0] = 600
+    table.get()
+    assert table.reloads == 2
+
+
+def test_seed_script_invalidates_persona_table(session_factory):
+    path = os.path.join(os.path.dirname(__file__), "..", "tools", "seed_quant_strategies.py")
+    spec = importlib.util.spec_from_file_location("seed_quant_strategies", path)
+    seed = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(seed)
+
+    db = session_factory()
+    # Both rows exist already: row count and enabled count don't change
+    db.add_all([
+        StrategyConfig(persona_id="ma", strategy_id="ma_cross_v1", name="MA",
+                       tokens=json.dumps(["DOGE"]), timeframes=json.dumps(["1h"]), enabled=1),
+        StrategyConfig(persona_id="bb", strategy_id="bb_mean_reversion_v1", name="BB",
+                       tokens=json.dumps(["BTC"]), timeframes=json.dumps(["1h"]), enabled=1),
+    ])
+    db.commit()
+    db.close()
+
+    table = PersonaTable()
+    table.get()
+    with patch.object(seed, "SessionLocal", side_effect=lambda: session_factory()), \
+            patch("builtins.print"):
+        seed.seed_quant_configs()  # DOGE -> BTC/ETH/SOL
+
+    personas = {p["id"]: p for p in table.get()}
+    assert table.reloads == 2
+    assert personas["ma"]["tokens"] == ("BTC", "ETH", "SOL")
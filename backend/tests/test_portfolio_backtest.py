@@ -0,0 +1,159 @@
+import sys
+import os
+import time
+import random
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.market_data_api import generate_mock_ohlcv
+from core.portfolio_backtest import PortfolioBacktestEngine, simulate_portfolio
+
+
+def _random_market(T, N, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=(T, N)), axis=0)
+    high = close * 1.005
+    low = close * 0.995
+    direction = rng.choice([0, 1, -1], size=(T, N), p=[0.98, 0.01, 0.01]).astype(np.int8)
+    entry = close.copy()
+    side = np.where(direction >= 0, 1, -1)
+    signals = {
+        "direction": direction,
+        "entry": entry,
+        "tp": entry * (1 + 0.02 * side),
+        "sl": entry * (1 - 0.01 * side),
+        "confidence": rng.random((T, N)),
+    }
+    return high, low, close, signals
+
+
+# === TESTS ===
+
+def test_shared_capital_and_position_cap():
+    high, low, close, signals = _random_market(2000, 20)
+    sim = simulate_portfolio(high, low, close, signals, initial_capital=1000,
+                             max_positions=3, position_size_pct=30)
+
+    assert sim["open_positions"].max() <= 3
+    assert sim["skipped_signals"] > 0
+    assert sim["final_cash"] >= 0
+    # With everything closed, equity equals initial capital + realized PnL
+    if sim["still_open"] == 0:
+        realized = sum(t["pnl"] for t in sim["trades"])
+        assert np.isclose(sim["equity"][-1], 1000 + realized)
+
+
+def test_50_tokens_10k_candles_in_seconds():
+    high, low, close, signals = _random_market(10_000, 50, seed=1)
+    started = time.perf_counter()
+    sim = simulate_portfolio(high, low, close, signals, max_positions=10)
+    assert time.perf_counter() - started < 5
+    assert len(sim["trades"]) > 100
+
+
+def test_engine_runs_strategy_across_tokens():
+    from strategies.registry import get_registry, load_default_strategies
+
+    with patch("builtins.print"):
+        if "ma_cross" not in get_registry()._strategies:
+            load_default_strategies()
+        random.seed(3)
+        base = generate_mock_ohlcv("BTC", limit=600)
+        data = {}
+        for tok in ("BTC", "ETH", "SOL", "AVAX"):
+            rows = generate_mock_ohlcv(tok, limit=600)
+            for r, b in zip(rows, base):
+                r["timestamp"], r["time"] = b["timestamp"], b["time"]
+            data[tok] = pd.DataFrame(rows)
+
+        engine = PortfolioBacktestEngine(initial_capital=1000, max_positions=2,
+                                         position_size_pct=50)
+        res = engine.run_on_data("ma_cross", data, "1h", config={"fast_period": 5,
+                                                                  "slow_period": 20})
+
+    assert res["metrics"]["total_trades"] > 0
+    assert set(res["tokens"]) <= set(data)
+    assert max(p["open_positions"] for p in res["curve"]) <= 2
+    assert len(res["curve"]) == 600 - 50
+
+
+def _strategy(strategy_id):
+    from strategies.registry import get_registry, load_default_strategies
+
+    if strategy_id not in get_registry()._strategies:
+        load_default_strategies()
+    return get_registry().get(strategy_id)
+
+
+def _series(tok, limit, seed=3):
+    random.seed(seed)
+    df = pd.DataFrame(generate_mock_ohlcv(tok, limit=limit))
+    df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def test_history_path_matches_per_candle_signals():
+    """analyze() vectorizado == una llamada a generate_signals por vela."""
+    from core.portfolio_backtest import token_signals
+
+    with patch("builtins.print"):
+        for strategy_id in ("bb_mean_reversion", "donchian_v2"):
+            strategy = _strategy(strategy_id)
+            assert strategy.emits_history
+            df = _series("BTC", 600)
+
+            history = token_signals(strategy, "BTC", df, "1h")
+            strategy.emits_history = False  # fuerza la vía vela a vela en esta instancia
+            per_candle = token_signals(strategy, "BTC", df, "1h", warmup=0)
+
+            def key(s):
+                return (pd.Timestamp(s.timestamp), s.direction, s.entry, s.tp, s.sl)
+
+            assert len(per_candle) > 0, strategy_id
+            assert [key(s) for s in history] == [key(s) for s in per_candle]
+
+
+def test_history_strategy_matches_single_asset_engine():
+    """Un token, una posición al 100%: mismas decisiones que el motor single-asset (vela a vela)."""
+    from core.backtest_engine import BacktestEngine
+
+    with patch("builtins.print"):
+        _strategy("bb_mean_reversion")
+        df = _series("BTC", 400)
+
+        single = BacktestEngine(initial_capital=1000).run_on_data(
+            "bb_mean_reversion", "btc", "1h", df)
+        engine = PortfolioBacktestEngine(initial_capital=1000, max_positions=1,
+                                         position_size_pct=100)
+        res = engine.run_on_data("bb_mean_reversion", {"BTC": df}, "1h")
+
+    assert single["metrics"]["total_trades"] > 0
+    assert res["metrics"]["total_trades"] == single["metrics"]["total_trades"]
+    assert [t["exit_time"] for t in res["trades"]] == [
+        t["exit_time"][:16] for t in single["trades"]]
+
+
+def test_run_on_data_50_tokens_2k_candles_in_seconds():
+    """End to end (señales + simulación) con estrategias de la vía vectorizada."""
+    with patch("builtins.print"):
+        base = _series("BTC", 2000, seed=11)
+        data = {}
+        for n in range(50):
+            df = _series(f"T{n}", 2000, seed=100 + n)
+            df["timestamp"], df["time"] = base["timestamp"], base["time"]
+            data[f"T{n}"] = df
+
+        for strategy_id in ("bb_mean_reversion", "donchian_v2"):
+            _strategy(strategy_id)
+            engine = PortfolioBacktestEngine(initial_capital=1000, max_positions=10)
+            started = time.perf_counter()
+            res = engine.run_on_data(strategy_id, data, "1h")
+            elapsed = time.perf_counter() - started
+
+            # Vela a vela serían ~100k llamadas a generate_signals (minutos)
+            assert elapsed < 10, (strategy_id, elapsed)
+            assert res["metrics"]["total_trades"] > 0
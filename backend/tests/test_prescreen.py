@@ -0,0 +1,179 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("pandas_ta")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas_ta as ta
+from core import prescreen
+from core.market_data_api import generate_mock_ohlcv
+from strategies.DonchianBreakoutV2 import DonchianBreakoutV2
+
+
+# === FIXTURES ===
+
+def _universe(n=150, bars=300):
+    regimes = ["random", "trend_up", "trend_down", "range", "volatile", "mixed"]
+    frames = {}
+    for i in range(n):
+        rows = generate_mock_ohlcv(f"TK{i}", limit=bars, seed=i, regime=regimes[i % len(regimes)])
+        frames[f"TK{i}"] = pd.DataFrame(rows)
+    return frames
+
+
+def _donchian_setup(df, strat):
+    """Condición de entrada de DonchianBreakoutV2 (vela -2, histórico completo)."""
+    high, low, close = df["high"], df["low"], df["close"]
+    upper = high.rolling(strat.period).max().shift(1)
+    lower = low.rolling(strat.period).min().shift(1)
+    atr = ta.atr(high, low, close, length=strat.atr_period)
+    vol_ok = atr > atr.rolling(strat.atr_ma_period).mean()
+    return bool(((close > upper) | (close < lower)).iloc[-2] and vol_ok.iloc[-2])
+
+
+class FakeRegistry:
+    def __init__(self, strategies):
+        self.strategies = strategies
+
+    def get(self, strategy_id):
+        return self.strategies.get(strategy_id)
+
+
+# === TESTS ===
+
+def test_panel_aligns_tokens_by_latest_candle():
+    frames = {
+        "A": pd.DataFrame({f: np.arange(10.0) for f in prescreen.PANEL_FIELDS}),
+        "B": pd.DataFrame({f: np.arange(3.0) for f in prescreen.PANEL_FIELDS}),
+        "C": None,
+    }
+    panel = prescreen.panel_from_frames(frames, lookback=5)
+    assert panel.close.shape == (5, 3)
+    assert list(panel.close["A"]) == [5, 6, 7, 8, 9]
+    assert panel.close["B"].iloc[-1] == 2 and panel.close["B"].isna().sum() == 2
+    assert list(panel.bars()) == [5, 3, 0]
+
+
+def test_rules_match_per_token_indicators():
+    frames = _universe(n=12)
+    panel = prescreen.panel_from_frames(frames, lookback=300)
+    rsi = prescreen.panel_rsi(panel.close, 14)
+    atr = prescreen.panel_atr(panel, 14)
+    for token, df in frames.items():
+        np.testing.assert_allclose(rsi[token].iloc[-50:], ta.rsi(df["close"], length=14).iloc[-50:],
+                                   rtol=1e-6)
+        np.testing.assert_allclose(atr[token].iloc[-50:],
+                                   ta.atr(df["high"], df["low"], df["close"], length=14).iloc[-50:],
+                                   rtol=1e-6)
+
+    screen = prescreen.PreScreen((prescreen.rsi_below(35),), rows=1)
+    expected = [t for t, df in frames.items() if ta.rsi(df["close"], length=14).iloc[-1] < 35]
+    assert screen.survivors(panel) == expected
+
+
+def test_donchian_prescreen_keeps_every_setup_and_prunes_universe():
+    strat = DonchianBreakoutV2()
+    screen = strat.prescreen()
+    frames = _universe()
+    panel = prescreen.panel_from_frames(frames, lookback=screen.lookback)
+
+    survivors = set(screen.survivors(panel))
+    setups = {t for t, df in frames.items() if _donchian_setup(df, strat)}
+    assert setups, "el universo de prueba debe tener algún setup"
+    assert setups <= survivors
+    assert len(survivors) < 0.6 * len(frames)
+
+
+def test_tokens_without_history_pass():
+    screen = prescreen.PreScreen((prescreen.rsi_below(1),))
+    frames = _universe(n=3)
+    frames["NEW"] = frames["TK0"].iloc[-10:]
+    panel = prescreen.panel_from_frames(frames, lookback=screen.lookback)
+    assert screen.survivors(panel, ["TK0", "NEW", "MISSING"]) == ["NEW", "MISSING"]
+
+
+def test_scheduler_prescreens_only_scanner_personas():
+    from scheduler import StrategyScheduler
+
+    frames = _universe(n=40)
+    built = []
+
+    def builder(tokens, timeframe, lookback):
+        built.append((tuple(tokens), timeframe, lookback))
+        return prescreen.panel_from_frames({t: frames[t] for t in tokens}, lookback)
+
+    with patch("builtins.print"):
+        sched = StrategyScheduler(loop_interval=60, panel_builder=builder)
+    sched.registry = FakeRegistry({"donchian_v2": DonchianBreakoutV2()})
+
+    universe = tuple(frames)
+    personas = [
+        {"id": "scan", "name": "Scan", "strategy_id": "donchian_v2", "tokens": universe,
+         "timeframe": "1h", "scanner": True},
+        {"id": "scan4h", "name": "Scan 4h", "strategy_id": "donchian_v2", "tokens": universe,
+         "timeframe": "4h", "scanner": True},
+        {"id": "custom", "name": "Custom", "strategy_id": "donchian_v2", "tokens": ("TK1",),
+         "timeframe": "1h", "scanner": False},
+        {"id": "other", "name": "Other", "strategy_id": "unknown", "tokens": universe,
+         "timeframe": "1h", "scanner": True},
+    ]
+    with patch("builtins.print"):
+        runnable = {p["id"]: p for p in sched.prescreen_personas(personas)}
+
+    assert len(built) == 2  # un panel por timeframe
+    expected = tuple(DonchianBreakoutV2().prescreen().survivors(
+        prescreen.panel_from_frames(frames, built[0][2]), universe))
+    assert runnable["scan"]["tokens"] == expected
+    assert 0 < len(expected) < len(universe)
+    assert runnable["custom"]["tokens"] == ("TK1",)
+    assert runnable["other"]["tokens"] == universe
+    assert sched.prescreen_stats["scan"] == (len(expected), len(universe))
+
+
+def test_scheduler_prescreen_fails_open():
+    from scheduler import StrategyScheduler
+
+    def broken(tokens, timeframe, lookback):
+        raise RuntimeError("exchange down")
+
+    with patch("builtins.print"):
+        sched = StrategyScheduler(loop_interval=60, panel_builder=broken)
+        sched.registry = FakeRegistry({"donchian_v2": DonchianBreakoutV2()})
+        personas = [{"id": "scan", "name": "Scan", "strategy_id": "donchian_v2",
+                     "tokens": ("TK0", "TK1"), "timeframe": "1h", "scanner": True}]
+        assert sched.prescreen_personas(personas) == personas
+
+
+def test_survivors_reuse_panel_candles_without_refetch():
+    from scheduler import StrategyScheduler
+
+    strat = DonchianBreakoutV2()
+    rows = {f"TK{i}": generate_mock_ohlcv(f"TK{i}", limit=400, seed=i, regime="volatile") for i in range(30)}
+    fetches = []
+
+    def fetch(token, timeframe, limit):
+        fetches.append((token, limit))
+        return rows[token][-limit:]
+
+    def builder(tokens, timeframe, lookback):
+        return prescreen.build_panel(tokens, timeframe, lookback, fetch=fetch, workers=1)
+
+    with patch("builtins.print"):
+        sched = StrategyScheduler(loop_interval=60, panel_builder=builder)
+        sched.registry = FakeRegistry({"donchian_v2": strat})
+        persona = {"id": "scan", "name": "Scan", "strategy_id": "donchian_v2", "tokens": tuple(rows),
+                   "timeframe": "1h", "scanner": True}
+        (runnable,) = sched.prescreen_personas([persona])
+        # El panel pide lo mismo que generate_signals (misma clave de caché)
+        assert {limit for _, limit in fetches} == {strat.ema_trend_period + 50}
+        assert set(runnable["data"]) == set(runnable["tokens"])
+
+        with patch("strategies.DonchianBreakoutV2.get_market_data", return_value=(None, None)) as refetch:
+            sched._execute_strategy_task(runnable)
+    refetch.assert_not_called()
+    assert len(fetches) == len(rows)
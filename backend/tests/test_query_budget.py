@@ -0,0 +1,122 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import app
+from database import Base, get_db
+from models_db import User, Signal, SignalEvaluation
+from routers.auth_new import get_current_user
+
+# Setup In-Memory DB for testing
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+N_SIGNALS = 60
+PERSONA_ID = "budget_persona"
+
+
+class StatementCounter:
+    """Counts SQL statements executed against the test engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+def override_get_current_user():
+    return User(id=1, email="budget@example.com", plan="PRO", created_at=None)
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    base_ts = datetime(2025, 1, 1, 0, 0, 0)
+    for i in range(N_SIGNALS):
+        sig = Signal(
+            timestamp=base_ts + timedelta(hours=i), token="BTC", timeframe="1h",
+            direction="long", entry=100.0, tp=110.0, sl=95.0, confidence=0.7,
+            source=f"Marketplace:{PERSONA_ID}", mode="LITE", strategy_id="s1", user_id=1,
+        )
+        db.add(sig)
+        db.flush()
+        # Half of the signals are already evaluated
+        if i % 2 == 0:
+            db.add(SignalEvaluation(signal_id=sig.id, result="WIN", pnl_r=2.0, exit_price=110.0))
+    db.commit()
+    db.close()
+
+    # Overrides are scoped to this module so other test modules keep their own
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def statements():
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter)
+
+
+# === TESTS ===
+
+def test_recent_logs_bounded_queries(client, statements):
+    """
+    /logs/recent must not issue one evaluation query per signal row.
+    """
+    response = client.get("/logs/recent", params={"limit": 50})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 50
+    assert sum(1 for row in data if row["status"] == "WIN") == 25
+    assert statements.count <= 2
+
+
+def test_logs_by_token_bounded_queries(client, statements):
+    response = client.get("/logs/LITE/BTC", params={"limit": 50})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 50
+    assert sum(1 for row in data if row["exit_price"] is not None) == 25
+    assert statements.count <= 2
+
+
+def test_persona_history_bounded_queries(client, statements):
+    response = client.get(f"/strategies/marketplace/{PERSONA_ID}/history")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == N_SIGNALS
+    assert sum(1 for row in data if row["result"]) == N_SIGNALS // 2
+    assert statements.count <= 2
@@ -0,0 +1,204 @@
+import sys
+import os
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import Base
+from models_db import User, DailyUsage
+from core.entitlements import (
+    QUOTAS,
+    check_and_increment_quota,
+    flush_quota_counters,
+    get_user_entitlements,
+)
+
+
+class FakeRedis:
+    """Minimal in-process stand-in for the redis commands used by quotas."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.ttl = {}
+        self.ops = []
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def set(self, key, value, nx=False, ex=None):
+        self.ops.append(("set", key))
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        if ex:
+            self.ttl[key] = ex
+        return True
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def incrby(self, key, amount):
+        self.ops.append(("incrby", key))
+        self.data[key] = str(int(self.data.get(key, 0)) + amount)
+        return int(self.data[key])
+
+    def decr(self, key):
+        return self.incrby(key, -1)
+
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def sadd(self, name, *values):
+        self.sets.setdefault(name, set()).update(values)
+
+    def spop(self, name, count):
+        members = self.sets.get(name, set())
+        popped = [members.pop() for _ in range(min(count, len(members)))]
+        return popped
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.ops.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.ops]
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="function")
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with patch("core.entitlements.get_quota_redis_client", return_value=client):
+        yield client
+
+
+# === TESTS ===
+
+def test_redis_quota_enforced_without_db_writes(db, redis_client):
+    user = User(id=7, plan="TRADER")
+    limit = QUOTAS["TRADER"]["ai_analysis"]
+
+    for i in range(limit):
+        res = check_and_increment_quota(db, user, "ai_analysis")
+        assert res["used"] == i + 1
+
+    with pytest.raises(HTTPException) as exc:
+        check_and_increment_quota(db, user, "ai_analysis")
+    assert exc.value.status_code == 429
+    assert exc.value.detail["used"] == limit
+
+    # Hot path did not touch DailyUsage; counter has an expiry
+    assert db.query(DailyUsage).count() == 0
+    assert all(ttl > 0 for ttl in redis_client.ttl.values())
+    assert get_user_entitlements(db, user)["features"]["ai_analysis"]["used"] == limit
+
+
+def test_redis_counter_seeded_from_db(db, redis_client):
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    db.add(DailyUsage(user_id=8, feature="advisor_chat", date=today, count=5))
+    db.commit()
+
+    res = check_and_increment_quota(db, User(id=8, plan="TRADER"), "advisor_chat")
+    assert res["used"] == 6
+    # Seed is in place before the first INCR (no window without it)
+    assert [op for op, _ in redis_client.ops] == ["set", "incrby"]
+    assert redis_client.ttl
+
+
+def test_concurrent_first_hit_keeps_seed(db, redis_client):
+    """Otra petición siembra entre nuestro EXISTS y nuestro SET: SET NX no la pisa."""
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    db.add(DailyUsage(user_id=11, feature="advisor_chat", date=today, count=5))
+    db.commit()
+    key = f"quota:{today}:11:advisor_chat"
+
+    real_exists = redis_client.exists
+
+    def racing_exists(k):
+        found = real_exists(k)
+        if not found:
+            redis_client.data[k] = "6"  # seed 5 + INCR de la otra petición
+        return found
+
+    redis_client.exists = racing_exists
+    res = check_and_increment_quota(db, User(id=11, plan="TRADER"), "advisor_chat")
+    assert res["used"] == 7
+    assert redis_client.data[key] == "7"
+
+
+def test_no_db_fallback_after_redis_increment(db, redis_client):
+    user = User(id=12, plan="FREE")
+    limit = QUOTAS["FREE"]["ai_analysis"]
+    for _ in range(limit):
+        check_and_increment_quota(db, user, "ai_analysis")
+
+    def broken_decr(key):
+        raise ConnectionError("redis down")
+
+    redis_client.decr = broken_decr
+    with patch("core.entitlements._db_check_and_increment") as db_path, patch("builtins.print"):
+        with pytest.raises(HTTPException) as exc:
+            check_and_increment_quota(db, user, "ai_analysis")
+    assert exc.value.status_code == 429
+    db_path.assert_not_called()
+
+
+def test_write_behind_flush(db, redis_client):
+    user = User(id=9, plan="PRO")
+    for _ in range(3):
+        check_and_increment_quota(db, user, "advisor_chat")
+
+    assert flush_quota_counters(db) == 1
+    row = db.query(DailyUsage).filter(DailyUsage.user_id == 9).one()
+    assert (row.feature, row.count) == ("advisor_chat", 3)
+
+    # Nothing dirty -> no-op
+    assert flush_quota_counters(db) == 0
+
+
+def test_db_fallback_when_redis_unavailable(db):
+    user = User(id=10, plan="FREE")
+    with patch("core.entitlements.get_quota_redis_client", return_value=None):
+        for _ in range(QUOTAS["FREE"]["ai_analysis"]):
+            check_and_increment_quota(db, user, "ai_analysis")
+        with pytest.raises(HTTPException) as exc:
+            check_and_increment_quota(db, user, "ai_analysis")
+    assert exc.value.status_code == 429
+    assert db.query(DailyUsage).one().count == QUOTAS["FREE"]["ai_analysis"]
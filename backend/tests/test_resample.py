@@ -0,0 +1,244 @@
+import sys
+import os
+import time
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("ccxt")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.candle_store import CandleStore, rows_to_frame, timeframe_to_ms, to_ms
+from core import resample
+import core.market_data_api as market_data_api
+
+_TOOL_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "tools", "verify_resample.py")
+_spec = importlib.util.spec_from_file_location("verify_resample", _TOOL_PATH)
+verify_resample = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(verify_resample)
+
+MIN = 60_000
+DAY = 86_400_000
+T0 = 1_704_067_200_000  # 2024-01-01 00:00 UTC (lunes)
+
+
+# === FIXTURES ===
+
+def _minutes(n, start=T0, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    ts = start + np.arange(n, dtype=np.int64) * MIN
+    return rows_to_frame(np.column_stack([
+        ts, open_, np.maximum(open_, close) + spread, np.minimum(open_, close) - spread,
+        close, rng.uniform(1, 5, n),
+    ]))
+
+
+def _pandas_resample(df, timeframe):
+    """Referencia independiente: resample de pandas (velas vacías fuera)."""
+    rule = {"m": "min", "h": "h", "d": "D", "w": "W-MON"}[timeframe[-1]]
+    kw = {"label": "left", "closed": "left"} if timeframe.endswith("w") else {}
+    agg = df.resample(f"{timeframe[:-1]}{rule}", **kw).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    return agg.dropna()
+
+
+class FakeExchange:
+    """Sirve cualquier timeframe agregando una serie de 1m con pandas."""
+
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls.append((timeframe, since, limit))
+        df = self.minutes if timeframe == "1m" else _pandas_resample(self.minutes, timeframe)
+        ts = to_ms(df.index)
+        if since is None:
+            sel = slice(max(len(df) - limit, 0), len(df))
+        else:
+            first = int(np.searchsorted(ts, since))
+            sel = slice(first, first + limit)
+        return np.column_stack([ts[sel], df.to_numpy()[sel]]).tolist()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(tmp_path / "candles")
+
+
+def _patch_exchange(monkeypatch, store, ex):
+    monkeypatch.setattr(market_data_api, "candle_store", store)
+    monkeypatch.setattr(market_data_api.ccxt, "binance", lambda cfg: ex)
+    for name in ("kraken", "kucoin", "gateio", "bybit"):
+        monkeypatch.setattr(market_data_api.ccxt, name, None, raising=False)
+
+
+def _store_behind(store, symbol, minutes, timeframe, lag):
+    """Guarda `timeframe` agregado de `minutes` salvo las últimas `lag` velas."""
+    df = _pandas_resample(minutes, timeframe).iloc[:-lag]
+    store.append(symbol, timeframe, np.column_stack([to_ms(df.index), df.to_numpy()]).tolist())
+    return df
+
+
+# === TESTS ===
+
+@pytest.mark.parametrize("timeframe", ["5m", "15m", "1h", "4h"])
+def test_resample_matches_pandas_aggregation(timeframe):
+    df = _minutes(3 * 24 * 60 + 37)  # acaba con una vela incompleta
+    got = resample.resample_frame(df, "1m", timeframe)
+    ref = _pandas_resample(df, timeframe)
+    ratio = timeframe_to_ms(timeframe) // MIN
+    ref = ref[ref.index + pd.Timedelta(milliseconds=(ratio - 1) * MIN) <= df.index[-1]]
+    pd.testing.assert_frame_equal(got, ref, check_freq=False, check_dtype=False)
+
+
+def test_partial_candles_and_gaps():
+    df = _minutes(5 * 60, start=T0 + 20 * MIN)  # empieza a mitad de hora
+    out = resample.resample_frame(df, "1m", "1h")
+    assert out.index[0] == pd.Timestamp(T0 + 60 * MIN, unit="ms", tz="UTC")
+    assert out.index[-1] == pd.Timestamp(T0 + 4 * 60 * MIN, unit="ms", tz="UTC")
+
+    with_partial = resample.resample_frame(df, "1m", "1h", include_partial=True)
+    assert len(with_partial) == len(out) + 1
+    assert with_partial["close"].iloc[-1] == df["close"].iloc[-1]
+
+    holed = df.drop(df.index[100])  # hueco en la hora T0+2h
+    gapped = resample.resample_frame(holed, "1m", "1h")
+    assert pd.Timestamp(T0 + 120 * MIN, unit="ms", tz="UTC") not in gapped.index
+    assert len(gapped) == len(out) - 1
+
+
+def test_daily_and_weekly_alignment():
+    df = _minutes(16 * 24 * 60, start=T0 - 2 * DAY)  # sábado
+    hourly = resample.resample_frame(df, "1m", "1h")
+    daily = resample.resample_frame(hourly, "1h", "1d")
+    assert (to_ms(daily.index) % DAY == 0).all()
+
+    weekly = resample.resample_frame(daily, "1d", "1w")
+    assert list(weekly.index.dayofweek) == [0, 0]
+    pd.testing.assert_frame_equal(weekly, _pandas_resample(df, "1w").iloc[1:3],
+                                  check_freq=False, check_dtype=False)
+
+
+def test_base_timeframe_selection():
+    assert resample.base_timeframe_for("4h", ["1m", "5m", "1h", "1d"]) == "1h"
+    assert resample.base_timeframe_for("15m", ["1h", "4h"]) is None
+    assert resample.base_timeframe_for("1w", ["1d", "3d"]) == "1d"
+    assert not resample.can_derive("7m", "1h")
+    with pytest.raises(ValueError):
+        resample.resample_frame(_minutes(10), "1h", "15m")
+
+
+def test_derive_from_store_reads_only_needed_base(store):
+    df = _minutes(2 * 24 * 60)
+    ts = to_ms(df.index)
+    store.append("ETHUSDT", "5m", np.column_stack([ts, df.to_numpy()])[::5].tolist())
+    store.append("ETHUSDT", "1m", np.column_stack([ts, df.to_numpy()]).tolist())
+    assert store.timeframes("ETH") == ["1m", "5m"]
+
+    out, base = resample.derive_from_store(store, "ETH", "1h", limit=10, base_timeframe="1m")
+    assert base == "1m" and len(out) == 10
+    pd.testing.assert_frame_equal(out, _pandas_resample(df, "1h").iloc[-10:],
+                                  check_freq=False, check_dtype=False)
+    assert resample.derive_from_store(store, "ETH", "1h")[1] == "5m"
+
+
+def test_market_data_api_derives_from_base_series(store, monkeypatch):
+    now = int(time.time() * 1000)
+    start = (now // DAY) * DAY - 3 * DAY
+    minutes = _minutes((now - start) // MIN + 1, start=start)
+    ex = FakeExchange(minutes)
+
+    five = _pandas_resample(minutes, "5m")
+    closed = five.iloc[:-3]  # el store va unas velas por detrás
+    store.append("RSMPTEST", "5m",
+                 np.column_stack([to_ms(closed.index), closed.to_numpy()]).tolist())
+
+    _patch_exchange(monkeypatch, store, ex)
+
+    data, source = market_data_api.get_ohlcv_data("RSMPTEST", "1h", limit=40, return_source=True)
+
+    assert source.startswith("resampled:5m")
+    assert [c[0] for c in ex.calls] == ["5m"] and ex.calls[0][2] < 10
+    assert len(data) == 40
+    ref = _pandas_resample(minutes, "1h").iloc[-40:]
+    assert [c["timestamp"] for c in data] == list(to_ms(ref.index))
+    np.testing.assert_allclose([c["close"] for c in data[:-1]], ref["close"].iloc[:-1])
+    np.testing.assert_allclose([c["volume"] for c in data[:-1]], ref["volume"].iloc[:-1])
+
+
+def test_resampling_fetches_tail_and_stores_it_without_caching_base(store, monkeypatch):
+    now = int(time.time() * 1000)
+    start = (now // DAY) * DAY - 2 * DAY
+    minutes = _minutes((now - start) // MIN + 1, start=start)
+    ex = FakeExchange(minutes)
+    stored = _store_behind(store, "RSMPTAIL", minutes, "5m", 4)
+    _patch_exchange(monkeypatch, store, ex)
+    cached = []
+    real_set = market_data_api.cache.set
+    monkeypatch.setattr(market_data_api.cache, "set",
+                        lambda key, value, ttl=None: cached.append(key) or real_set(key, value, ttl=ttl))
+
+    data, source = market_data_api.get_ohlcv_data("RSMPTAIL", "1h", limit=20, return_source=True)
+    market_data_api.flush_store_writes(timeout=10)
+
+    assert source.startswith("resampled:5m") and len(data) == 20
+    assert ex.calls == [("5m", None, 5)]  # desde la última guardada, incluida
+    # Solo se cachea el resultado pedido, no la serie base intermedia
+    assert cached == ["ohlcv:RSMPTAIL:1h:20"]
+    # Las velas base cerradas de la cola vuelven al store
+    last = store.read("RSMPTAIL", "5m", limit=1).index[-1]
+    assert last == _pandas_resample(minutes, "5m").index[-2] and last > stored.index[-1]
+
+
+def test_same_timeframe_series_wins_over_resampling(store, monkeypatch):
+    now = int(time.time() * 1000)
+    start = (now // DAY) * DAY - 2 * DAY
+    minutes = _minutes((now - start) // MIN + 1, start=start)
+    ex = FakeExchange(minutes)
+    _store_behind(store, "RSMPSAME", minutes, "5m", 2)
+    _store_behind(store, "RSMPSAME", minutes, "1h", 1)
+    _patch_exchange(monkeypatch, store, ex)
+
+    data, source = market_data_api.get_ohlcv_data("RSMPSAME", "1h", limit=20, return_source=True)
+
+    assert source == "binance" and len(data) == 20
+    assert [c[0] for c in ex.calls] == ["1h"] and ex.calls[0][2] < 5
+
+
+def test_resampling_too_many_base_rows_fetches_directly(store, monkeypatch):
+    now = int(time.time() * 1000)
+    start = (now // DAY) * DAY - 2 * DAY
+    minutes = _minutes((now - start) // MIN + 1, start=start)
+    ex = FakeExchange(minutes)
+    _store_behind(store, "RSMPCAP", minutes, "5m", 2)
+    _patch_exchange(monkeypatch, store, ex)
+    # 1h x 20 desde 5m son 252 velas base
+    monkeypatch.setattr(market_data_api, "RESAMPLE_MAX_BASE_ROWS", 200)
+
+    data, source = market_data_api.get_ohlcv_data("RSMPCAP", "1h", limit=20, return_source=True)
+
+    assert source == "binance"
+    assert ex.calls == [("1h", None, 20)]
+
+
+def test_verify_against_exchange_candles():
+    minutes = _minutes(3 * 24 * 60)
+    now = T0 + 3 * DAY - 7 * MIN
+    reports = verify_resample.verify_symbol(FakeExchange(minutes), "ETH/USDT", "5m",
+                                            ["15m", "1h", "4h", "7m"], candles=12, now_ms=now)
+    assert [r["ok"] for r in reports[:3]] == [True, True, True]
+    assert all(r["compared"] == 12 for r in reports[:3])
+    assert "error" in reports[3]
+
+    ref = _pandas_resample(minutes, "1h")
+    bad = ref.copy()
+    bad.iloc[-5, bad.columns.get_loc("high")] *= 1.01
+    report = resample.compare_candles(bad, ref)
+    assert not report["ok"] and report["mismatched"]["high"] == 1
@@ -0,0 +1,124 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import Base
+from models_db import User, Signal, SignalEvaluation, SignalDailyRollup
+from core.rollups import backfill_rollups, daily_series, totals_by_source
+from core.signal_evaluator import evaluate_pending_signals
+from routers.stats import get_performance_chart
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="function")
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add_signal(db, token, direction, entry, tp, sl, hours_ago, user_id=1, source="Marketplace:p1"):
+    sig = Signal(
+        timestamp=datetime.utcnow() - timedelta(hours=hours_ago), token=token, timeframe="1h",
+        direction=direction, entry=entry, tp=tp, sl=sl, confidence=0.7, source=source,
+        mode="LITE", strategy_id="p1", user_id=user_id, is_saved=1,
+    )
+    db.add(sig)
+    db.commit()
+    return sig
+
+
+def _rollup_snapshot(db):
+    rows = db.query(SignalDailyRollup).all()
+    return sorted(
+        (r.day, r.user_id, r.source, r.token, r.is_saved, r.signals, r.wins, r.losses,
+         r.breakeven, round(r.pnl_r_sum, 4))
+        for r in rows
+    )
+
+
+# === TESTS ===
+
+def test_evaluator_maintains_rollups(db):
+    """
+    evaluate_pending_signals writes one rollup bucket per (day, user, persona, token).
+    """
+    _add_signal(db, "BTC", "long", 100.0, 110.0, 95.0, hours_ago=2)   # WIN (price 120)
+    _add_signal(db, "BTC", "short", 100.0, 90.0, 105.0, hours_ago=2)  # LOSS (price 120)
+    _add_signal(db, "BTC", "long", 100.0, 130.0, 95.0, hours_ago=2)   # Open
+    _add_signal(db, "ETH", "long", 10.0, 11.0, 9.0, hours_ago=2)      # WIN (price 12)
+
+    prices = {"BTC": 120.0, "ETH": 12.0}
+    with patch("core.signal_evaluator.get_current_price", side_effect=lambda t: prices[t]):
+        assert evaluate_pending_signals(db) == 3
+
+    totals = totals_by_source(db, ["Marketplace:p1"])
+    assert totals["Marketplace:p1"] == {"signals": 3, "wins": 2}
+
+    series = daily_series(db, days=7, user_id=1)
+    assert len(series) == 7
+    today = series[-1]
+    assert (today["signals"], today["wins"], today["losses"]) == (3, 2, 1)
+
+
+def test_backfill_matches_incremental(db):
+    _add_signal(db, "BTC", "long", 100.0, 110.0, 95.0, hours_ago=2)
+    _add_signal(db, "SOL", "long", 100.0, 110.0, 95.0, hours_ago=2, user_id=None, source="Marketplace:sys")
+    with patch("core.signal_evaluator.get_current_price", return_value=120.0):
+        evaluate_pending_signals(db)
+    incremental = _rollup_snapshot(db)
+
+    db.query(SignalDailyRollup).delete()
+    db.commit()
+    assert backfill_rollups(db) == 2
+    assert _rollup_snapshot(db) == incremental
+
+
+def test_performance_chart_reads_rollups(db):
+    """
+    The dashboard chart is served from rollups: constant query count, any range.
+    """
+    user = User(id=1, email="rollup@example.com", plan="PRO")
+    base = datetime.utcnow()
+    for d in range(120):
+        sig = _add_signal(db, "BTC", "long", 100.0, 110.0, 95.0, hours_ago=24 * d + 1)
+        db.add(SignalEvaluation(
+            signal_id=sig.id, evaluated_at=base - timedelta(days=d),
+            result="WIN" if d % 3 else "LOSS", pnl_r=1.0,
+        ))
+    db.commit()
+    backfill_rollups(db)
+
+    statements = []
+    engine = db.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        week = get_performance_chart(db, user, days=7)
+        n_week = len(statements)
+        year = get_performance_chart(db, user, days=365)
+        n_year = len(statements) - n_week
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(week) == 7
+    assert len(year) == 365
+    assert n_week == n_year == 1
+    assert sum(p["wins"] + p["losses"] for p in year) == 120
+    assert sum(p["losses"] for p in week) == 3  # days 0, 3, 6
@@ -0,0 +1,276 @@
+import sys
+import os
+import random
+import time
+import signal
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import Base
+import models_db  # noqa: F401  (registra SchedulerLock en Base)
+from core.sharding import HashRing, SharedState, ShardLeaseManager, shard_of, shard_ring
+
+PERSONAS = [{"id": f"persona_{i}", "name": f"P{i}"} for i in range(400)]
+
+
+# === FIXTURES ===
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2025, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _sync(factory, *managers):
+    for m in managers:
+        db = factory()
+        try:
+            m.sync(db)
+        finally:
+            db.close()
+
+
+def _assert_partition(managers, num_shards):
+    owned = [m.owned for m in managers]
+    for i in range(len(owned)):
+        for j in range(i + 1, len(owned)):
+            assert not owned[i] & owned[j], "un shard con dos dueños"
+    return set().union(*owned) == set(range(num_shards))
+
+
+# === TESTS ===
+
+def test_consistent_hash_moves_few_personas():
+    before = shard_ring(8)
+    after = shard_ring(9)
+    moved = sum(shard_of(p["id"], before) != shard_of(p["id"], after) for p in PERSONAS)
+    assert moved < 0.25 * len(PERSONAS)
+
+    counts = [0] * 8
+    for p in PERSONAS:
+        counts[shard_of(p["id"], before)] += 1
+    assert min(counts) > 0.4 * len(PERSONAS) / 8
+
+    # Independiente del orden de los nodos (todas las instancias calculan lo mismo)
+    assert HashRing(["a", "b", "c"]).node_for("x") == HashRing(["c", "a", "b"]).node_for("x")
+
+
+def test_instances_split_shards_and_rebalance_on_join(session_factory, clock):
+    a = ShardLeaseManager("inst-a", num_shards=8, lease_ttl=300, clock=clock)
+    _sync(session_factory, a)
+    assert a.owned == frozenset(range(8))
+
+    b = ShardLeaseManager("inst-b", num_shards=8, lease_ttl=300, clock=clock)
+    _sync(session_factory, b)  # A aún tiene los leases
+    assert _assert_partition([a, b], 8)
+
+    clock.advance(60)
+    _sync(session_factory, a, b)  # A suelta lo que ahora es de B, B lo toma
+    assert _assert_partition([a, b], 8)
+    assert a.owned and b.owned
+    assert a.owned == a.target_shards(["inst-a", "inst-b"])
+
+    # Cada persona la ejecuta exactamente una instancia
+    ids = [p["id"] for p in a.filter(PERSONAS)] + [p["id"] for p in b.filter(PERSONAS)]
+    assert sorted(ids) == sorted(p["id"] for p in PERSONAS)
+
+
+def test_dead_instance_shards_are_taken_over(session_factory, clock):
+    a = ShardLeaseManager("inst-a", num_shards=6, lease_ttl=300, clock=clock)
+    b = ShardLeaseManager("inst-b", num_shards=6, lease_ttl=300, clock=clock)
+    _sync(session_factory, a, b, a, b)
+    assert _assert_partition([a, b], 6)
+    b_shards = b.owned
+
+    # B deja de latir: antes del TTL sus shards siguen siendo suyos
+    clock.advance(200)
+    _sync(session_factory, a)
+    assert not a.owned & b_shards
+
+    clock.advance(150)
+    _sync(session_factory, a)
+    assert a.owned == frozenset(range(6))
+
+
+def test_graceful_release_hands_over_immediately(session_factory, clock):
+    a = ShardLeaseManager("inst-a", num_shards=4, clock=clock)
+    b = ShardLeaseManager("inst-b", num_shards=4, clock=clock)
+    _sync(session_factory, a, b, a, b)
+
+    db = session_factory()
+    b.release_all(db)
+    db.close()
+    _sync(session_factory, a)
+    assert a.owned == frozenset(range(4))
+
+
+def test_random_membership_never_double_assigns(session_factory, clock):
+    rng = random.Random(7)
+    managers = [ShardLeaseManager(f"inst-{i}", num_shards=12, lease_ttl=120, clock=clock)
+                for i in range(4)]
+    alive = set(range(4))
+    for _ in range(60):
+        clock.advance(rng.choice([5, 30, 60]))
+        if rng.random() < 0.1 and len(alive) > 1:
+            alive.discard(rng.choice(sorted(alive)))
+        elif rng.random() < 0.1:
+            alive.add(rng.randrange(4))
+        for i in sorted(alive):
+            _sync(session_factory, managers[i])
+            _assert_partition([managers[j] for j in alive], 12)
+
+    for _ in range(4):  # sin cambios de membresía se estabiliza en una partición completa
+        clock.advance(200)
+        _sync(session_factory, *[managers[i] for i in sorted(alive)])
+    assert _assert_partition([managers[i] for i in alive], 12)
+
+
+def test_shared_state_claim_is_exactly_once(session_factory, clock):
+    s1 = SharedState(session_factory, clock=clock)
+    s2 = SharedState(session_factory, clock=clock)
+    assert s1.claim("notify:x", 60)
+    assert not s2.claim("notify:x", 60)
+    assert not s1.claim("notify:x", 60)
+
+    s2.put("coherence:ETH", "long", 60)
+    assert s1.get("coherence:ETH") == "long"
+
+    clock.advance(61)
+    assert s1.get("coherence:ETH") is None
+    assert s2.claim("notify:x", 60)
+    assert s1.purge() == 1
+
+
+def test_shared_state_hold_admits_one_value(session_factory, clock):
+    s1 = SharedState(session_factory, clock=clock)
+    s2 = SharedState(session_factory, clock=clock)
+    assert s1.hold("coherence:ETH", "long", 60)
+    assert not s2.hold("coherence:ETH", "short", 60)
+    clock.advance(45)
+    assert s2.hold("coherence:ETH", "long", 60)  # mismo valor: pasa y renueva el TTL
+    clock.advance(45)
+    assert not s1.hold("coherence:ETH", "short", 60)
+    clock.advance(16)
+    assert s1.hold("coherence:ETH", "short", 60)
+    assert s2.get("coherence:ETH") == "short"
+
+
+def test_sharded_schedulers_share_dedupe(session_factory):
+    from scheduler import StrategyScheduler
+
+    with patch("scheduler.SessionLocal", side_effect=lambda: session_factory()), \
+            patch("builtins.print"):
+        a = StrategyScheduler(loop_interval=60, num_shards=4)
+        b = StrategyScheduler(loop_interval=60, num_shards=4)
+        # Ids fijos (por defecto son uuid4) para que el reparto sea determinista
+        a.shards = ShardLeaseManager("inst-a", num_shards=4)
+        b.shards = ShardLeaseManager("inst-b", num_shards=4)
+
+        now = datetime.utcnow()
+        long_sig = SimpleNamespace(token="ETH", direction="long", timestamp=now,
+                                   entry=1.0, tp=2.0, sl=0.5)
+        short_sig = SimpleNamespace(token="ETH", direction="short", timestamp=now,
+                                    entry=1.0, tp=0.5, sl=2.0)
+        assert a.admit_signal("p1", long_sig, now)
+        assert not b.admit_signal("p2", short_sig, now)  # coherencia compartida
+
+        persona = {"id": "p1", "name": "P1", "timeframe": "1h", "telegram_chat_id": "42"}
+        with patch("scheduler.log_signal", return_value=True), \
+                patch("scheduler.send_telegram") as send:
+            a.process_single_signal(SimpleNamespace(**vars(long_sig)), persona)
+            b.process_single_signal(SimpleNamespace(**vars(long_sig)), persona)
+        assert send.call_count == 1
+
+        db = session_factory()
+        assert a.acquire_work(db)
+        assert not b.acquire_work(db)  # A tiene todos los leases hasta su siguiente ciclo
+        a.acquire_work(db)
+        assert b.acquire_work(db)
+        db.close()
+        assert not a.shards.owned & b.shards.owned
+        assert a.owns_global_tasks() != b.owns_global_tasks()
+
+
+def test_sigterm_releases_leases(session_factory):
+    from scheduler import StrategyScheduler
+
+    with patch("scheduler.SessionLocal", side_effect=lambda: session_factory()), \
+            patch("builtins.print"):
+        a = StrategyScheduler(loop_interval=60, num_shards=4)
+        a.shards = ShardLeaseManager("inst-a", num_shards=4)
+        real_acquire = a.acquire_work
+
+        def acquire_then_sigterm(db):
+            assert real_acquire(db)
+            os.kill(os.getpid(), signal.SIGTERM)
+            return True
+
+        before = signal.getsignal(signal.SIGTERM)
+        with patch.object(a, "acquire_work", side_effect=acquire_then_sigterm):
+            a.run()  # vuelve en vez de morir: SIGTERM sale por el mismo camino que Ctrl+C
+
+        assert not a.running
+        assert signal.getsignal(signal.SIGTERM) is before
+        b = ShardLeaseManager("inst-b", num_shards=4)
+        _sync(session_factory, b)
+        assert b.owned == frozenset(range(4))  # sin esperar al TTL de los leases de A
+
+
+def test_stop_from_another_thread_releases_leases(session_factory):
+    # Despliegue: el scheduler corre en un hilo daemon y shutdown_event llama a stop()
+    import threading
+    from scheduler import StrategyScheduler
+
+    with patch("scheduler.SessionLocal", side_effect=lambda: session_factory()), \
+            patch("builtins.print"):
+        a = StrategyScheduler(loop_interval=3600, num_shards=4)
+        a.shards = ShardLeaseManager("inst-a", num_shards=4)
+        a.persona_table.get = lambda: []
+        a.owns_global_tasks = lambda: False
+
+        t = threading.Thread(target=a.run, daemon=True)
+        t.start()
+        for _ in range(200):
+            if a.shards.owned:
+                break
+            time.sleep(0.01)
+        assert a.shards.owned == frozenset(range(4))
+
+        a.stop(timeout=5)
+        t.join(timeout=5)
+        assert not t.is_alive() and not a.running
+
+        b = ShardLeaseManager("inst-b", num_shards=4)
+        _sync(session_factory, b)
+        assert b.owned == frozenset(range(4))
@@ -0,0 +1,159 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ensure backend modules are importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("pyarrow")
+
+from database import Base
+from models_db import Signal, SignalEvaluation, SignalDailyRollup
+from core.rollups import backfill_rollups
+from core.signal_archive import (
+    archive_cold_signals,
+    load_archived_signals,
+    load_recent_archived,
+    load_signal_history,
+    purge_archived_source,
+)
+
+
+# === FIXTURES ===
+
+@pytest.fixture(scope="function")
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add(db, days_ago, is_saved=0, evaluated=True, token="BTC"):
+    ts = datetime.utcnow() - timedelta(days=days_ago)
+    sig = Signal(
+        timestamp=ts, token=token, timeframe="1h", direction="long", entry=100.0,
+        tp=110.0, sl=95.0, confidence=0.6, source="Marketplace:scanner", mode="LITE",
+        strategy_id="scanner", user_id=None, is_saved=is_saved,
+    )
+    db.add(sig)
+    db.flush()
+    if evaluated:
+        db.add(SignalEvaluation(
+            signal_id=sig.id, evaluated_at=ts + timedelta(hours=2), result="WIN",
+            pnl_r=2.0, exit_price=110.0,
+        ))
+    db.commit()
+    return sig.id
+
+
+# === TESTS ===
+
+def test_archive_moves_only_cold_signals(db, tmp_path):
+    cold_ids = [_add(db, days_ago=d) for d in (10, 11, 12)]
+    saved_id = _add(db, days_ago=10, is_saved=1)        # Saved by user -> stays
+    open_id = _add(db, days_ago=10, evaluated=False)    # Not evaluated -> stays
+    recent_id = _add(db, days_ago=1)                    # Too recent -> stays
+
+    assert archive_cold_signals(db, retention_days=7, archive_dir=tmp_path, dry_run=True) == 3
+    assert archive_cold_signals(db, retention_days=7, archive_dir=tmp_path, batch_size=2) == 3
+
+    hot_ids = {s.id for s in db.query(Signal).all()}
+    assert hot_ids == {saved_id, open_id, recent_id}
+    assert db.query(SignalEvaluation).count() == 2
+
+    # Date-partitioned layout
+    assert len(list(tmp_path.glob("date=*"))) == 3
+
+    archived = load_archived_signals(datetime.utcnow() - timedelta(days=30), archive_dir=tmp_path)
+    assert sorted(archived["id"].tolist()) == sorted(cold_ids)
+    assert set(archived["result"]) == {"WIN"}
+
+
+def test_history_merges_hot_and_archive(db, tmp_path):
+    for d in (10, 11):
+        _add(db, days_ago=d)
+    _add(db, days_ago=1)
+    _add(db, days_ago=2, token="ETH")
+    archive_cold_signals(db, retention_days=7, archive_dir=tmp_path)
+
+    start = datetime.utcnow() - timedelta(days=30)
+    history = load_signal_history(db, start, archive_dir=tmp_path)
+    assert len(history) == 4
+    assert history["timestamp"].is_monotonic_increasing
+
+    btc = load_signal_history(db, start, token="BTC", archive_dir=tmp_path)
+    assert len(btc) == 3
+
+
+def test_backfill_includes_archived_evaluations(db, tmp_path, monkeypatch):
+    for d in (10, 11, 1):
+        _add(db, days_ago=d)
+    monkeypatch.setattr("core.signal_archive.ARCHIVE_DIR", tmp_path)
+    archive_cold_signals(db, retention_days=7)
+
+    assert backfill_rollups(db) == 3
+    total = sum(r.signals for r in db.query(SignalDailyRollup).all())
+    assert total == 3
+
+
+def test_backfill_counts_half_archived_batch_once(db, tmp_path, monkeypatch):
+    """Crash entre la escritura Parquet y el borrado en DB: la señal está en los dos sitios."""
+    for d in (10, 11):
+        _add(db, days_ago=d)
+    monkeypatch.setattr("core.signal_archive.ARCHIVE_DIR", tmp_path)
+    with patch.object(db, "commit", side_effect=RuntimeError("crash")):
+        with pytest.raises(RuntimeError):
+            archive_cold_signals(db, retention_days=7)
+    db.rollback()
+    assert db.query(Signal).count() == 2
+    assert len(load_archived_signals(datetime.utcnow() - timedelta(days=30))) == 2
+
+    assert backfill_rollups(db) == 2
+    assert sum(r.signals for r in db.query(SignalDailyRollup).all()) == 2
+
+
+def test_recent_archived_and_purge(db, tmp_path, monkeypatch):
+    for d in (10, 11, 12):
+        _add(db, days_ago=d)
+    _add(db, days_ago=13, token="ETH")
+    archive_cold_signals(db, retention_days=7, archive_dir=tmp_path)
+
+    recent = load_recent_archived(2, token="BTC", archive_dir=tmp_path)
+    assert len(recent) == 2
+    assert recent["timestamp"].is_monotonic_decreasing
+    assert len(load_recent_archived(10, mode="LITE", include_user_id=5, archive_dir=tmp_path)) == 4
+
+    assert purge_archived_source("Marketplace:other", archive_dir=tmp_path) == 0
+    assert purge_archived_source("Marketplace:scanner", archive_dir=tmp_path) == 4
+    assert list(tmp_path.glob("date=*/*.parquet")) == []
+
+    monkeypatch.setattr("core.signal_archive.ARCHIVE_DIR", tmp_path)
+    assert backfill_rollups(db) == 0
+
+
+def test_persona_history_reads_archive(db, tmp_path, monkeypatch):
+    import asyncio
+    from routers.strategies import get_persona_history
+
+    for d in (10, 11):
+        _add(db, days_ago=d)
+    recent_id = _add(db, days_ago=1)
+    monkeypatch.setattr("core.signal_archive.ARCHIVE_DIR", tmp_path)
+    archive_cold_signals(db, retention_days=7)
+
+    history = asyncio.run(get_persona_history("scanner", db=db))
+    assert len(history) == 3
+    assert history[0]["id"] == recent_id
+    assert history[-1]["result"]["result"] == "WIN"
@@ -0,0 +1,102 @@
+import sys
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from indicators.trend import rolling_ols, trend_regime
+
+# trading_lab/models/trend_slope.py por ruta: backend/models.py tapa el paquete `models` del lab
+_LAB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "trading_lab", "models", "trend_slope.py")
+_spec = importlib.util.spec_from_file_location("lab_trend_slope", _LAB_PATH)
+trend_slope = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(trend_slope)
+
+
+# === FIXTURES ===
+
+def _polyfit_slope(series, window):
+    """Implementación original (polyfit por ventana), como referencia."""
+    y = np.log(series.replace(0, np.nan))
+    x = np.arange(len(series), dtype=float)
+
+    def slope_fn(i):
+        j = i - window + 1
+        if j < 0:
+            return np.nan
+        yy = y.iloc[j:i + 1]
+        if yy.isna().any():
+            return np.nan
+        return np.polyfit(x[j:i + 1], yy, 1)[0]
+
+    return pd.Series([slope_fn(i) for i in range(len(series))], index=series.index)
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(3)
+    n = 1500
+    idx = pd.date_range("2024-01-01", periods=n, freq="1h", tz="UTC")
+    return pd.Series(3000 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n))), index=idx)
+
+
+# === TESTS ===
+
+@pytest.mark.parametrize("window", [2, 14, 28, 100])
+def test_slope_matches_polyfit(close, window):
+    got = rolling_ols(close, [window])[f"slope_{window}"]
+    ref = _polyfit_slope(close, window)
+    assert got.isna().equals(ref.isna())
+    np.testing.assert_allclose(got.dropna(), ref.dropna(), rtol=1e-7, atol=1e-10)
+
+
+def test_long_series_across_blocks():
+    rng = np.random.default_rng(9)
+    n = 3 * 4096 + 50
+    c = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    out = rolling_ols(c, [14, 200])
+    y = np.log(c.to_numpy())
+    for i in (4095, 4096, 4096 + 13, 8192 + 5, n - 1):
+        for w in (14, 200):
+            ref = np.polyfit(np.arange(w), y[i - w + 1:i + 1], 1)[0]
+            assert out[f"slope_{w}"].iloc[i] == pytest.approx(ref, rel=1e-9, abs=1e-14)
+
+
+def test_r2_matches_squared_correlation(close):
+    out = rolling_ols(close, [20])
+    for i in (19, 500, 1499):
+        y = np.log(close.iloc[i - 19:i + 1].to_numpy())
+        r = np.corrcoef(np.arange(20), y)[0, 1]
+        assert out["r2_20"].iloc[i] == pytest.approx(r * r, rel=1e-7)
+    assert out["r2_20"].dropna().between(0, 1).all()
+
+
+def test_invalid_prices_and_flat_windows(close):
+    c = close.copy()
+    c.iloc[100] = 0.0
+    c.iloc[200] = np.nan
+    out = rolling_ols(c, [10])
+    ref = _polyfit_slope(c, 10)
+    assert out["slope_10"].isna().equals(ref.isna())
+    assert out["slope_10"].iloc[100:110].isna().all() and not np.isnan(out["slope_10"].iloc[110])
+
+    flat = rolling_ols(pd.Series([5.0] * 30), [10]).iloc[-1]
+    assert flat["slope_10"] == pytest.approx(0.0, abs=1e-12) and flat["r2_10"] == 0.0
+    assert rolling_ols(pd.Series([1.0, 2.0]), [5])["slope_5"].isna().all()
+
+
+def test_lab_trend_regime_matches_original(close):
+    windows = (14, 28)
+    out = trend_slope.add_trend_regime(close.to_frame("close"), windows=windows)
+    s1, s2 = (_polyfit_slope(close, w) for w in windows)
+    expected = np.where((s1 > 0) & (s2 > 0), "UP", np.where((s1 < 0) & (s2 < 0), "DOWN", "RANGE"))
+
+    assert list(out.columns) == ["close", "slope_14", "slope_28", "trend_regime"]
+    assert (out["trend_regime"].to_numpy() == expected).all()
+    np.testing.assert_allclose(trend_slope._rolling_slope(close, 14).dropna(), s1.dropna(), rtol=1e-7)
+
+    feats = trend_regime(close, windows=(7, 14, 28))
+    assert {"slope_7", "r2_7", "slope_28", "r2_28", "trend_regime"} <= set(feats.columns)
@@ -0,0 +1,53 @@
+import sys
+import os
+import argparse
+
+# Ensure backend dir is in path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Load Env BEFORE imports
+from core.config import load_env_if_needed  # noqa: E402
+
+load_env_if_needed()
+
+from database import SessionLocal  # noqa: E402
+from core.signal_archive import (  # noqa: E402
+    ARCHIVE_DIR,
+    DEFAULT_RETENTION_DAYS,
+    archive_cold_signals,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move cold (unsaved, evaluated, old) signals to Parquet archive."
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=DEFAULT_RETENTION_DAYS,
+        help=f"Keep signals newer than N days in the hot table (default: {DEFAULT_RETENTION_DAYS})",
+    )
+    parser.add_argument(
+        "--execute",
+        action="store_true",
+        help="Actually archive (default is dry-run: only count)",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = archive_cold_signals(
+            db, retention_days=args.days, dry_run=not args.execute
+        )
+        if args.execute:
+            print(f"✅ Archived {count} cold signals to {ARCHIVE_DIR}")
+        else:
+            print(f"[DRY RUN] {count} cold signals would be archived. Use --execute.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
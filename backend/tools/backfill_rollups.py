@@ -0,0 +1,49 @@
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+
+# Ensure backend dir is in path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Load Env BEFORE imports
+from core.config import load_env_if_needed  # noqa: E402
+
+load_env_if_needed()
+
+from database import SessionLocal, engine  # noqa: E402
+from models_db import SignalDailyRollup  # noqa: E402
+from core.rollups import backfill_rollups  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild daily performance rollups from signals/evaluations."
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="Only rebuild the last N days (default: full history)",
+    )
+    args = parser.parse_args()
+
+    # Make sure the rollup table exists (no-op if already created)
+    SignalDailyRollup.__table__.create(bind=engine, checkfirst=True)
+
+    since = None
+    if args.days:
+        since = datetime.utcnow() - timedelta(days=args.days - 1)
+
+    db = SessionLocal()
+    try:
+        count = backfill_rollups(db, since=since)
+        scope = f"last {args.days} days" if args.days else "full history"
+        print(f"✅ Rollups rebuilt ({scope}): {count} evaluations aggregated.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import json
+import argparse
+
+# Ensure backend dir is in path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Load Env BEFORE imports
+from core.config import load_env_if_needed  # noqa: E402
+
+load_env_if_needed()
+
+from strategies.registry import load_default_strategies  # noqa: E402
+from core.optimizer import RANK_METRICS, run_sweep  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parameter sweep for a strategy over one shared history."
+    )
+    parser.add_argument("strategy_id", help="Registry ID or module name, e.g. ma_cross")
+    parser.add_argument("--token", default="BTC")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument(
+        "--grid",
+        help='JSON grid, e.g. \'{"fast_period": [5, 10], "slow_period": [50, 100]}\'',
+    )
+    parser.add_argument(
+        "--space",
+        help='JSON random space, e.g. \'{"fast_period": {"min": 5, "max": 30}}\'',
+    )
+    parser.add_argument("--n-iter", type=int, default=20, help="Samples for --space")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--metric", default="roi_pct", choices=RANK_METRICS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", dest="json_out", help="Write full results to file")
+    args = parser.parse_args()
+
+    load_default_strategies()
+
+    sweep = run_sweep(
+        strategy_id=args.strategy_id,
+        symbol=args.token,
+        timeframe=args.timeframe,
+        days=args.days,
+        grid=json.loads(args.grid) if args.grid else None,
+        space=json.loads(args.space) if args.space else None,
+        n_iter=args.n_iter,
+        seed=args.seed,
+        metric=args.metric,
+        workers=args.workers,
+    )
+
+    print(f"\n🏆 Top {args.top} by {args.metric}:")
+    print(f"{'#':>3}  {'ROI%':>8}  {'DD%':>7}  {'WR%':>6}  {'Trades':>6}  Params")
+    for r in sweep["results"][: args.top]:
+        m = r["metrics"]
+        if not m:
+            print(f"{r['rank']:>3}  ERROR: {r['error']}  {r['params']}")
+            continue
+        print(
+            f"{r['rank']:>3}  {m['roi_pct']:>8.2f}  {m['max_drawdown']:>7.2f}  "
+            f"{m['win_rate']:>6.1f}  {m['total_trades']:>6}  {r['params']}"
+        )
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(sweep, f, indent=2)
+        print(f"\n💾 Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ from datetime import datetime
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from database import SessionLocal
-from models_db import StrategyConfig
+from models_db import StrategyConfig, bump_config_version
 
 
 def seed_quant_configs():
@@ -62,6 +62,7 @@ def seed_quant_configs():
                 existing.tokens = cfg["tokens"]
                 existing.timeframes = cfg["timeframes"]
                 existing.updated_at = datetime.utcnow()
+                bump_config_version(existing)  # Scheduler recompiles its persona table
             else:
                 print(f"   Created {cfg['name']}...")
                 new_strat = StrategyConfig(**cfg)
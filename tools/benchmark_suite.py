@@ -0,0 +1,562 @@
+"""
+Offline Benchmark Suite - REPRODUCIBLE
+- Sin red: OHLCV sintético determinista (market_data_api.generate_mock_ohlcv
+  con seed/régimen) congelado en fixtures con checksum (tools/benchmarks/fixtures.json)
+- Cronometra analyze()/generate_signals() de cada estrategia, cada indicador
+  y cada motor de backtest a varios tamaños
+- Guarda los resultados en JSON y los compara con una ejecución anterior
+  (regresiones de tiempo y cambios de salida)
+
+Uso:
+  python tools/benchmark_suite.py
+  python tools/benchmark_suite.py --sizes 1000 5000 --groups strategy indicator
+  python tools/benchmark_suite.py --compare tools/benchmarks/results/baseline.json --fail-on-regression
+  python tools/benchmark_suite.py --freeze   # regenera fixtures y manifiesto (cambio intencionado)
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+LAB_DIR = ROOT_DIR / "trading_lab"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from core import market_data_api
+from core.market_data_api import generate_mock_ohlcv
+
+# ============= CONFIGURATION =============
+
+BENCH_DIR = ROOT_DIR / "tools" / "benchmarks"
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+MANIFEST_PATH = BENCH_DIR / "fixtures.json"
+RESULTS_DIR = BENCH_DIR / "results"
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+DEFAULT_REPEATS = 5
+GROUPS = ("strategy", "indicator", "engine")
+CASE_BUDGET_S = 10.0  # Deja de repetir un caso cuando acumula este tiempo
+# BacktestEngine re-ejecuta la estrategia sobre un slice creciente en cada vela
+# (coste cuadrático): por encima de este tamaño no se mide
+LOOP_ENGINE_MAX_SIZE = 2000
+
+# Regresión = más lento que baseline * (1 + tolerancia) y por más del suelo de ruido
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_S = 0.002
+
+TIMEFRAME = "1h"
+FIXTURE_END_TS = 1_704_067_200_000  # 2024-01-01 00:00 UTC
+FIXTURE_SPECS = {
+    "ETH": {"regime": "mixed", "seed": 1},
+    "BTC": {"regime": "mixed", "seed": 2},
+    "SOL": {"regime": "range", "seed": 3},
+    "AVAX": {"regime": "volatile", "seed": 4},
+}
+PRIMARY_SYMBOL = "ETH"  # Fixture de las estrategias e indicadores
+
+# id del benchmark -> (módulo, clase)
+STRATEGIES = {
+    "ma_cross": ("strategies.ma_cross", "MACrossStrategy"),
+    "rsi_divergence": ("strategies.rsi_divergence", "RSIDivergenceStrategy"),
+    "trend_following_native": ("strategies.TrendFollowingNative", "TrendFollowingNative"),
+    "supertrend_flow": ("strategies.supertrend_flow", "SuperTrendFlowStrategy"),
+    "vwap_intraday": ("strategies.vwap_intraday", "VWAPIntradayStrategy"),
+    "hyperscalp": ("strategies.HyperScalpStrategy", "HyperScalpStrategy"),
+    "donchian_v2": ("strategies.DonchianBreakoutV2", "DonchianBreakoutV2"),
+    "bb_mean_reversion": ("strategies.bb_mean_reversion", "BBMeanReversionStrategy"),
+    "rsi_macd": ("strategies.example_rsi_macd", "RSIMACDDivergenceStrategy"),
+}
+ENGINE_STRATEGY = "ma_cross"
+ENGINE_CONFIG = {"fast_period": 10, "slow_period": 30}
+
+# =========================================
+
+
+# ---------- Fixtures ----------
+
+def fixture_name(symbol: str, size: int) -> str:
+    return f"{symbol}_{TIMEFRAME}_{size}"
+
+
+def build_fixture(symbol: str, size: int) -> pd.DataFrame:
+    """Serie determinista (misma seed/régimen/fin -> mismas velas)."""
+    spec = FIXTURE_SPECS[symbol]
+    rows = generate_mock_ohlcv(symbol, limit=size, timeframe=TIMEFRAME, seed=spec["seed"],
+                               regime=spec["regime"], end_ts=FIXTURE_END_TS)
+    # "time" depende de la zona horaria local: se reconstruye en UTC al cargar
+    return pd.DataFrame(rows)[["timestamp", "open", "high", "low", "close", "volume"]]
+
+
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False, lineterminator="\n").encode("utf-8")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict[str, Any]:
+    if not Path(path).exists():
+        return {"timeframe": TIMEFRAME, "end_ts": FIXTURE_END_TS, "fixtures": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: Dict[str, Any], path: Path) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    manifest["fixtures"] = dict(sorted(manifest["fixtures"].items()))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+
+def load_fixtures(sizes: List[int], symbols: Optional[List[str]] = None,
+                  fixtures_dir: Path = FIXTURES_DIR, manifest_path: Path = MANIFEST_PATH,
+                  freeze: bool = False) -> Dict[Tuple[str, int], pd.DataFrame]:
+    """
+    Carga (o genera) los fixtures y los verifica contra el manifiesto.
+    Un fixture que no coincide con su checksum congelado aborta la ejecución:
+    los tiempos dejarían de ser comparables con los de ejecuciones anteriores.
+    Con `freeze=True` se regeneran y se reescribe el manifiesto.
+    """
+    fixtures_dir = Path(fixtures_dir)
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    frozen = manifest["fixtures"]
+    changed = False
+    out = {}
+
+    for symbol in symbols or list(FIXTURE_SPECS):
+        for size in sizes:
+            name = fixture_name(symbol, size)
+            path = fixtures_dir / f"{name}.csv"
+            if path.exists() and not freeze:
+                data = path.read_bytes()
+            else:
+                data = _to_csv_bytes(build_fixture(symbol, size))
+            digest = _sha256(data)
+
+            entry = frozen.get(name)
+            if entry is not None and entry["sha256"] != digest and not freeze:
+                raise RuntimeError(
+                    f"Fixture {name} no coincide con el manifiesto ({path}). "
+                    f"Bórralo para regenerarlo o usa --freeze si el cambio es intencionado."
+                )
+            if entry is None or entry["sha256"] != digest:
+                frozen[name] = {"symbol": symbol, "size": size, **FIXTURE_SPECS[symbol],
+                                "sha256": digest}
+                changed = True
+                print(f"[BENCH] Fixture congelado: {name}")
+            if not path.exists() or freeze:
+                path.write_bytes(data)
+
+            out[(symbol, size)] = pd.read_csv(io.BytesIO(data))
+
+    if changed:
+        _save_manifest(manifest, manifest_path)
+    return out
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Formato de get_ohlcv_data (lista de dicts con timestamp en ms)."""
+    out = df.copy()
+    out["time"] = pd.to_datetime(out["timestamp"], unit="ms").dt.strftime("%Y-%m-%d %H:%M")
+    return out.to_dict("records")
+
+
+def _indexed(df: pd.DataFrame) -> pd.DataFrame:
+    """Formato de analyze(): índice temporal, columnas OHLCV."""
+    out = df.set_index(pd.to_datetime(df["timestamp"], unit="ms"))
+    out.index.name = "timestamp"
+    return out.drop(columns=["timestamp"])
+
+
+def _engine_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Formato de BacktestEngine.run_on_data (igual que fetch_history)."""
+    out = df.copy()
+    out["timestamp_dt"] = pd.to_datetime(out["timestamp"], unit="ms")
+    out["time"] = out["timestamp_dt"].dt.strftime("%Y-%m-%d %H:%M")
+    return out
+
+
+@contextlib.contextmanager
+def offline_market_data(frames: Dict[str, pd.DataFrame]) -> Iterator[None]:
+    """
+    Sustituye get_ohlcv_data en todos los módulos que lo importaron por una
+    versión que sirve la cola de los fixtures: nada sale a la red.
+    """
+    real = market_data_api.get_ohlcv_data
+    records = {sym: _records(df) for sym, df in frames.items()}
+
+    def _fake(symbol: str, timeframe: str = "30m", limit: int = 100, return_source: bool = False):
+        key = symbol.upper().replace("/", "").replace("USDT", "")
+        rows = records.get(key, [])[-limit:]
+        return (rows, "fixture") if return_source else rows
+
+    with contextlib.ExitStack() as stack:
+        for mod in list(sys.modules.values()):
+            if getattr(mod, "get_ohlcv_data", None) is real:
+                stack.enter_context(mock.patch.object(mod, "get_ohlcv_data", _fake))
+        yield
+
+
+# ---------- Salidas (para detectar cambios de comportamiento) ----------
+
+def _signals_output(signals: list) -> Dict[str, Any]:
+    h = hashlib.sha256()
+    for s in signals:
+        h.update(f"{pd.Timestamp(s.timestamp).isoformat()}|{s.direction}|"
+                 f"{float(s.entry or 0):.6f}|{float(s.tp or 0):.6f}|{float(s.sl or 0):.6f}\n".encode())
+    return {"signals": len(signals), "digest": h.hexdigest()[:16]}
+
+
+def _series_output(*series: pd.Series) -> Dict[str, Any]:
+    out = {}
+    for k, s in enumerate(series):
+        arr = np.asarray(s, dtype=float)
+        valid = arr[~np.isnan(arr)]
+        out[f"s{k}"] = {"valid": int(valid.size),
+                        "last": round(float(valid[-1]), 6) if valid.size else None}
+    return out
+
+
+# ---------- Casos ----------
+
+def _lab_module(rel_path: str, name: str):
+    """Carga un módulo de trading_lab por ruta (backend/models.py taparía trading_lab/models)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, LAB_DIR / rel_path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def strategy_cases(fixtures: Dict[Tuple[str, int], pd.DataFrame], sizes: List[int]) -> List[Dict[str, Any]]:
+    cases = []
+    for sid, (module, cls_name) in STRATEGIES.items():
+        strategy_cls = getattr(importlib.import_module(module), cls_name)
+        for size in sizes:
+            raw = fixtures[(PRIMARY_SYMBOL, size)]
+            df = _indexed(raw)
+            if hasattr(strategy_cls, "analyze"):
+                cases.append({
+                    "group": "strategy", "name": f"{sid}.analyze", "size": size,
+                    "fn": lambda c=strategy_cls, d=df: _signals_output(
+                        c().analyze(d.copy(), PRIMARY_SYMBOL, TIMEFRAME)),
+                })
+            # Las que leen el context usan el fixture completo; las que piden datos,
+            # la cola que les sirve offline_market_data
+            cases.append({
+                "group": "strategy", "name": f"{sid}.generate_signals", "size": size,
+                "frames": {PRIMARY_SYMBOL: raw},
+                "fn": lambda c=strategy_cls, d=df: _signals_output(c().generate_signals(
+                    [PRIMARY_SYMBOL], TIMEFRAME, context={"data": {PRIMARY_SYMBOL: d.copy()}})),
+            })
+    return cases
+
+
+def indicator_cases(fixtures: Dict[Tuple[str, int], pd.DataFrame], sizes: List[int]) -> List[Dict[str, Any]]:
+    import ta
+    from indicators.market import get_market_data
+    from indicators.trend import rolling_ols
+
+    rules = _lab_module("trading_rules/indicators.py", "lab_trading_rules_indicators")
+    scoring = _lab_module("models/scoring.py", "lab_models_scoring")
+
+    indicators: Dict[str, Callable[[pd.DataFrame], Dict[str, Any]]] = {
+        # Capa quant del backend (indicators/market.py)
+        "ta.ema_21": lambda d: _series_output(ta.trend.ema_indicator(d["close"], window=21)),
+        "ta.rsi_14": lambda d: _series_output(ta.momentum.rsi(d["close"], window=14)),
+        "ta.macd": lambda d: _series_output(ta.trend.MACD(d["close"]).macd_diff()),
+        "ta.atr_14": lambda d: _series_output(ta.volatility.average_true_range(
+            d["high"], d["low"], d["close"], window=14)),
+        "trend.rolling_ols": lambda d: _series_output(
+            *rolling_ols(d["close"], (14, 28, 100)).T.values),
+        # trading_lab
+        "lab.ema_200": lambda d: _series_output(rules.ema(d["close"], 200)),
+        "lab.atr_14": lambda d: _series_output(rules.atr(d, 14)),
+        "lab.bollinger_20": lambda d: _series_output(*rules.bollinger(d["close"], 20)),
+        "lab.ensure_features": lambda d: _series_output(
+            *rules.ensure_features(d)[["ATR", "EMA50", "EMA200"]].T.values),
+        "scoring.rsi_14": lambda d: _series_output(scoring.rsi(d["close"], 14)),
+        "scoring.macd": lambda d: _series_output(*scoring.macd(d["close"])),
+        "scoring.ensure_core_indicators": lambda d: _series_output(
+            *scoring.ensure_core_indicators(d.copy())[["ATR", "RSI", "MACD_HIST"]].T.values),
+    }
+
+    cases = []
+    for size in sizes:
+        raw = fixtures[(PRIMARY_SYMBOL, size)]
+        df = _indexed(raw)
+        for name, fn in indicators.items():
+            cases.append({"group": "indicator", "name": name, "size": size,
+                          "fn": lambda f=fn, d=df: f(d)})
+        # Scoring por lotes de todos los fixtures (panel velas × símbolos)
+        universe = {sym: _indexed(fixtures[(sym, size)]) for sym in FIXTURE_SPECS
+                    if (sym, size) in fixtures}
+        cases.append({
+            "group": "indicator", "name": "scoring.score_panel", "size": size,
+            "fn": lambda u=universe: _series_output(
+                *scoring.score_panel(u)["confidence"].T.values),
+        })
+        # Ruta completa: descarga (offline) + todos los indicadores de market.py
+        cases.append({
+            "group": "indicator", "name": "market.get_market_data", "size": size,
+            "frames": {PRIMARY_SYMBOL: raw},
+            "fn": lambda n=size: _series_output(
+                get_market_data(PRIMARY_SYMBOL, TIMEFRAME, limit=n)[0]["RSI_14"]),
+        })
+    return cases
+
+
+def engine_cases(fixtures: Dict[Tuple[str, int], pd.DataFrame], sizes: List[int],
+                 loop_max_size: int = LOOP_ENGINE_MAX_SIZE) -> List[Dict[str, Any]]:
+    from core.backtest_engine import BacktestEngine
+    from core.portfolio_backtest import PortfolioBacktestEngine
+
+    sys.path.append(str(LAB_DIR))
+    from simulator import simulate_signals
+    strategy_cls = getattr(importlib.import_module(STRATEGIES[ENGINE_STRATEGY][0]),
+                           STRATEGIES[ENGINE_STRATEGY][1])
+
+    def _loop(df):
+        res = BacktestEngine().run_on_data(ENGINE_STRATEGY, PRIMARY_SYMBOL.lower(), TIMEFRAME,
+                                           df, config=ENGINE_CONFIG)
+        return {"trades": res["metrics"]["total_trades"], "roi_pct": res["metrics"]["roi_pct"]}
+
+    def _portfolio(data):
+        res = PortfolioBacktestEngine(initial_capital=1000, max_positions=2).run_on_data(
+            ENGINE_STRATEGY, {k: v.copy() for k, v in data.items()}, TIMEFRAME, config=ENGINE_CONFIG)
+        return {"trades": res["metrics"]["total_trades"], "roi_pct": res["metrics"]["roi_pct"]}
+
+    def _lab(df, signals):
+        trades = simulate_signals(df, list(signals))
+        return {"trades": len(trades),
+                "return_pct_net": round(float(sum(t.return_pct_net for t in trades)), 6)}
+
+    cases = []
+    for size in sizes:
+        raw = fixtures[(PRIMARY_SYMBOL, size)]
+        if size <= loop_max_size:
+            cases.append({"group": "engine", "name": "backtest_engine.run_on_data", "size": size,
+                          "fn": lambda d=_engine_frame(raw): _loop(d)})
+        else:
+            cases.append({"group": "engine", "name": "backtest_engine.run_on_data", "size": size,
+                          "skip": f"size > loop_max_size ({loop_max_size})"})
+
+        data = {sym: fixtures[(sym, size)] for sym in FIXTURE_SPECS if (sym, size) in fixtures}
+        cases.append({"group": "engine", "name": "portfolio_backtest.run_on_data", "size": size,
+                      "fn": lambda d=data: _portfolio(d)})
+
+        # Solo la simulación: las señales se calculan fuera del cronómetro
+        df = _indexed(raw)
+        with contextlib.redirect_stdout(io.StringIO()):
+            signals = strategy_cls(config=ENGINE_CONFIG).analyze(df, PRIMARY_SYMBOL, TIMEFRAME)
+        cases.append({"group": "engine", "name": "lab.simulate_signals", "size": size,
+                      "fn": lambda d=df, s=signals: _lab(d, s)})
+    return cases
+
+
+# ---------- Ejecución ----------
+
+def time_case(fn: Callable[[], Any], repeats: int, budget_s: float = CASE_BUDGET_S) -> Dict[str, Any]:
+    """
+    Una ejecución de calentamiento + `repeats` medidas (menos si el caso
+    supera `budget_s`). Si el calentamiento ya es lento cuenta como medida.
+    La salida debe ser idéntica en todas las repeticiones.
+    """
+    times: List[float] = []
+    first = None
+    deterministic = True
+    for k in range(repeats + 1):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            out = fn()
+        elapsed = time.perf_counter() - t0
+        if k == 0:
+            first = out
+            if elapsed >= budget_s / max(repeats, 1):
+                times.append(elapsed)
+        else:
+            times.append(elapsed)
+            deterministic &= out == first
+        if len(times) >= repeats or sum(times) >= budget_s:
+            break
+    return {
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "repeats": len(times),
+        "deterministic": deterministic,
+        "output": first,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_suite(sizes: List[int] = DEFAULT_SIZES, repeats: int = DEFAULT_REPEATS,
+              groups: Tuple[str, ...] = GROUPS, only: Optional[str] = None,
+              fixtures_dir: Path = FIXTURES_DIR, manifest_path: Path = MANIFEST_PATH,
+              loop_max_size: int = LOOP_ENGINE_MAX_SIZE, budget_s: float = CASE_BUDGET_S,
+              freeze: bool = False) -> Dict[str, Any]:
+    from strategies.registry import get_registry, load_default_strategies
+
+    fixtures = load_fixtures(sizes, fixtures_dir=fixtures_dir, manifest_path=manifest_path,
+                             freeze=freeze)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if ENGINE_STRATEGY not in get_registry()._strategies:
+            load_default_strategies()
+
+    builders = {
+        "strategy": lambda: strategy_cases(fixtures, sizes),
+        "indicator": lambda: indicator_cases(fixtures, sizes),
+        "engine": lambda: engine_cases(fixtures, sizes, loop_max_size),
+    }
+    cases = [c for g in groups for c in builders[g]()]
+    if only:
+        cases = [c for c in cases if only in c["name"]]
+
+    results = []
+    for n, case in enumerate(cases, start=1):
+        row = {"group": case["group"], "name": case["name"], "size": case["size"]}
+        if "skip" in case:
+            row["skipped"] = case["skip"]
+        else:
+            frames = case.get("frames", {PRIMARY_SYMBOL: fixtures[(PRIMARY_SYMBOL, case["size"])]})
+            try:
+                with offline_market_data(frames):
+                    row.update(time_case(case["fn"], repeats, budget_s))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+        status = row.get("error") or row.get("skipped") or f"{row['median_s'] * 1000:.1f} ms"
+        print(f"[BENCH] {n}/{len(cases)} {row['group']:<9} {row['name']:<40} {row['size']:>6}  {status}")
+        results.append(row)
+
+    manifest = load_manifest(manifest_path)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sizes": list(sizes),
+            "repeats": repeats,
+            "fixtures": {name: e["sha256"] for name, e in manifest["fixtures"].items()
+                         if e["size"] in sizes},
+        },
+        "results": results,
+    }
+
+
+def save_results(report: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    if path is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        path = RESULTS_DIR / f"bench_{stamp}_{report['meta']['git_commit'] or 'nogit'}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    noise_floor_s: float = NOISE_FLOOR_S) -> Dict[str, Any]:
+    """Compara medianas caso a caso (group:name:size) y las salidas de cada caso."""
+    def _index(report):
+        return {f"{r['group']}:{r['name']}:{r['size']}": r for r in report["results"]
+                if "median_s" in r}
+
+    base, cur = _index(baseline), _index(current)
+    out = {"regressions": [], "improvements": [], "output_changes": [],
+           "missing": sorted(set(base) - set(cur)), "new": sorted(set(cur) - set(base)),
+           "fixtures_changed": sorted(
+               k for k, v in current["meta"].get("fixtures", {}).items()
+               if baseline["meta"].get("fixtures", {}).get(k, v) != v)}
+
+    for key in sorted(set(base) & set(cur)):
+        b, c = base[key]["median_s"], cur[key]["median_s"]
+        ratio = c / b if b > 0 else float("inf")
+        entry = {"case": key, "baseline_s": b, "current_s": c, "ratio": round(ratio, 3)}
+        if c > b * (1 + tolerance) and c - b > noise_floor_s:
+            out["regressions"].append(entry)
+        elif b > c * (1 + tolerance) and b - c > noise_floor_s:
+            out["improvements"].append(entry)
+        if base[key].get("output") != cur[key].get("output"):
+            out["output_changes"].append({"case": key, "baseline": base[key].get("output"),
+                                          "current": cur[key].get("output")})
+    return out
+
+
+def _print_comparison(cmp: Dict[str, Any]) -> None:
+    print("\n📊 Comparación con baseline")
+    if cmp["fixtures_changed"]:
+        print(f"   ⚠️ Fixtures distintos: {', '.join(cmp['fixtures_changed'])}")
+    for e in cmp["regressions"]:
+        print(f"   🔴 {e['case']}: {e['baseline_s'] * 1000:.1f} -> {e['current_s'] * 1000:.1f} ms (x{e['ratio']})")
+    for e in cmp["improvements"]:
+        print(f"   🟢 {e['case']}: {e['baseline_s'] * 1000:.1f} -> {e['current_s'] * 1000:.1f} ms (x{e['ratio']})")
+    for e in cmp["output_changes"]:
+        print(f"   ⚠️ Salida distinta: {e['case']}")
+    print(f"   {len(cmp['regressions'])} regresiones, {len(cmp['improvements'])} mejoras, "
+          f"{len(cmp['output_changes'])} cambios de salida")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks offline y reproducibles")
+    ap.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    ap.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    ap.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    ap.add_argument("--only", default=None, help="Solo casos cuyo nombre contenga este texto")
+    ap.add_argument("--loop-max-size", type=int, default=LOOP_ENGINE_MAX_SIZE)
+    ap.add_argument("--out", default=None, help="Fichero JSON de resultados")
+    ap.add_argument("--compare", default=None, help="JSON de una ejecución anterior")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    ap.add_argument("--fail-on-regression", action="store_true")
+    ap.add_argument("--freeze", action="store_true", help="Regenera fixtures y manifiesto")
+    args = ap.parse_args()
+
+    report = run_suite(args.sizes, args.repeats, tuple(args.groups), args.only,
+                       loop_max_size=args.loop_max_size, freeze=args.freeze)
+    path = save_results(report, args.out)
+    print(f"\n💾 Resultados en {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        cmp = compare_results(baseline, report, tolerance=args.tolerance)
+        _print_comparison(cmp)
+        if args.fail_on_regression and cmp["regressions"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
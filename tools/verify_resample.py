@@ -0,0 +1,108 @@
+"""
+Verifica el resampleo local (backend/core/resample.py) contra el exchange.
+
+Para cada timeframe destino descarga las últimas N velas del exchange y las
+velas base que cubren el mismo rango, agrega la base localmente y compara
+OHLCV vela a vela (solo velas cerradas: la vela en curso cambia entre las
+dos descargas).
+
+Uso:
+  python tools/verify_resample.py --symbols ETH/USDT BTC/USDT --base 5m --timeframes 15m 1h 4h 1d
+  python tools/verify_resample.py --base 1m --timeframes 5m 15m --candles 100 --exchange bybit
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from core.candle_store import rows_to_frame, timeframe_to_ms
+from core.resample import bucket_start, can_derive, compare_candles, resample_frame
+
+DEFAULT_SYMBOLS = ["ETH/USDT", "BTC/USDT"]
+DEFAULT_BASE = "5m"
+DEFAULT_TIMEFRAMES = ["15m", "1h", "4h", "1d"]
+DEFAULT_CANDLES = 200
+PAGE_LIMIT = 1000
+RESULTS_PATH = ROOT_DIR / "tools" / "benchmarks" / "results" / "resample_verification.json"
+
+
+def fetch_range(exchange, symbol: str, timeframe: str, since: int, until: int,
+                page_limit: int = PAGE_LIMIT) -> List[List[float]]:
+    """Velas con apertura en [since, until), paginando por `since`."""
+    interval = timeframe_to_ms(timeframe)
+    out: List[List[float]] = []
+    cursor = since
+    while cursor < until:
+        page = exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+        page = [c for c in page if cursor <= c[0] < until]
+        if not page:
+            break
+        out.extend(page)
+        cursor = int(page[-1][0]) + interval
+    return out
+
+
+def verify_symbol(exchange, symbol: str, base: str, timeframes: List[str],
+                  candles: int = DEFAULT_CANDLES, rtol: float = 1e-6,
+                  now_ms: int = None) -> List[Dict[str, Any]]:
+    now_ms = now_ms or int(time.time() * 1000)
+    reports = []
+    for tf in timeframes:
+        if not can_derive(base, tf):
+            reports.append({"symbol": symbol, "timeframe": tf, "base": base,
+                            "error": f"{tf} no se deriva de {base}"})
+            continue
+        interval = timeframe_to_ms(tf)
+        until = int(bucket_start([now_ms], tf)[0])  # excluye la vela en curso
+        since = until - candles * interval
+
+        reference = rows_to_frame(fetch_range(exchange, symbol, tf, since, until))
+        base_rows = fetch_range(exchange, symbol, base, since, until)
+        derived = resample_frame(rows_to_frame(base_rows), base, tf)
+
+        report = compare_candles(derived, reference, rtol=rtol)
+        reports.append({"symbol": symbol, "timeframe": tf, "base": base,
+                        "base_candles": len(base_rows), **report})
+    return reports
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Resampleo local vs velas del exchange")
+    ap.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    ap.add_argument("--base", default=DEFAULT_BASE)
+    ap.add_argument("--timeframes", nargs="+", default=DEFAULT_TIMEFRAMES)
+    ap.add_argument("--candles", type=int, default=DEFAULT_CANDLES)
+    ap.add_argument("--exchange", default="binance")
+    ap.add_argument("--rtol", type=float, default=1e-6)
+    ap.add_argument("--out", default=str(RESULTS_PATH))
+    args = ap.parse_args()
+
+    import ccxt
+
+    exchange = getattr(ccxt, args.exchange)({"enableRateLimit": True})
+    reports = []
+    for symbol in args.symbols:
+        for r in verify_symbol(exchange, symbol, args.base, args.timeframes,
+                               args.candles, rtol=args.rtol):
+            status = "✅" if r.get("ok") else "❌"
+            detail = r.get("error") or (f"{r['compared']} velas, missing={r['missing']} "
+                                        f"extra={r['extra']} mismatched={r['mismatched']}")
+            print(f"{status} {symbol} {args.base}->{r['timeframe']}: {detail}")
+            reports.append(r)
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(reports, f, indent=2, default=str)
+    print(f"\n💾 Informe en {args.out}")
+    if not all(r.get("ok") for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
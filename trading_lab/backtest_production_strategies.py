@@ -13,98 +13,56 @@ from demo_execution.strategies.implementations.donchian_strategy import Donchian
 from trading_rules.indicators import ensure_features
 from trading_rules.side_generators import side_ma_cross, side_donchian
 from trading_rules.signal_builder import compute_entry_tp_sl
+from dataset_store import load_csv
+from simulator import EXIT_SL, EXIT_TP, resolve_first_touch
 
 # --- Backtest Engine Helpers ---
 
 def load_data(symbol: str, timeframe: str = "60") -> pd.DataFrame:
-    """Loads data from data/ directory."""
+    """Loads data from data/ directory (Parquet-cached, see dataset_store.py)."""
     path = f"data/{symbol}_{timeframe}.csv"
     if not os.path.exists(path):
         print(f"❌ Data not found: {path}")
         return pd.DataFrame()
-    
-    df = pd.read_csv(path)
-    
-    # Normalize columns
-    df.columns = [c.lower() for c in df.columns]
-    
-    # Parse timestamp
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-        df = df.sort_values("timestamp").set_index("timestamp")
-    
-    return df
+    return load_csv(path)
 
 def evaluate_signals_vectorized(df: pd.DataFrame, signals: pd.DataFrame, tp_atr: float, sl_atr: float) -> pd.DataFrame:
     """
-    Simple vectorized evaluation of signals.
-    Iterates through signals and checks future price action in df.
+    Vectorized evaluation of signals.
+    All signals are resolved at once with simulator.resolve_first_touch:
+    up to LIMIT_BARS candles after the signal, SL checked before TP.
     """
-    results = []
-    
-    # Pre-calculate high/low arrays for speed if needed, but simple loop is fine for <10k signals
-    # We need to find the signal time in df
-    
-    for idx, row in signals.iterrows():
-        sig_time = row["ts_signal"]
-        if sig_time not in df.index:
-            continue
-            
-        # Start checking from NEXT candle
-        start_pos = df.index.get_loc(sig_time) + 1
-        if start_pos >= len(df):
-            continue
-            
-        entry_price = row["entry_price"]
-        tp = row["tp_price"]
-        sl = row["sl_price"]
-        side = row["side"]
-        
-        outcome = "TIMEOUT"
-        exit_price = df.iloc[-1]["close"]
-        bars_held = 0
-        
-        # Look ahead up to 100 bars (or timeout)
-        LIMIT_BARS = 100
-        
-        future_df = df.iloc[start_pos : start_pos + LIMIT_BARS]
-        
-        for i, candle in enumerate(future_df.itertuples()):
-            bars_held = i + 1
-            if side == "LONG":
-                if candle.low <= sl:
-                    outcome = "LOSS"
-                    exit_price = sl
-                    break
-                if candle.high >= tp:
-                    outcome = "WIN"
-                    exit_price = tp
-                    break
-            else: # SHORT
-                if candle.high >= sl:
-                    outcome = "LOSS"
-                    exit_price = sl
-                    break
-                if candle.low <= tp:
-                    outcome = "WIN"
-                    exit_price = tp
-                    break
-        
-        pnl = 0.0
-        if side == "LONG":
-            pnl = (exit_price - entry_price) / entry_price
-        else:
-            pnl = (entry_price - exit_price) / entry_price
-            
-        results.append({
-            "signal_idx": idx,
-            "outcome": outcome,
-            "pnl": pnl,
-            "bars_held": bars_held,
-            "exit_price": exit_price
-        })
-        
-    return pd.DataFrame(results)
+    LIMIT_BARS = 100
+    N = len(df)
+
+    # Signal candle position (-1 if not in df); the last candle has no future
+    pos = df.index.get_indexer(signals["ts_signal"])
+    valid = (pos >= 0) & (pos + 1 < N)
+    sig = signals[valid]
+    pos = pos[valid].astype(np.int64)
+    if len(sig) == 0:
+        return pd.DataFrame(columns=["signal_idx", "outcome", "pnl", "bars_held", "exit_price"])
+
+    is_long = (sig["side"] == "LONG").to_numpy()
+    tp = sig["tp_price"].to_numpy(dtype=np.float64)
+    sl = sig["sl_price"].to_numpy(dtype=np.float64)
+    exit_idx, kind = resolve_first_touch(
+        df["high"].to_numpy(dtype=np.float64), df["low"].to_numpy(dtype=np.float64),
+        pos, is_long, tp, sl, LIMIT_BARS, adverse_first=True,
+    )
+
+    # Timeout: exit at the last close of the dataset (original behaviour)
+    exit_price = np.where(kind == EXIT_SL, sl, np.where(kind == EXIT_TP, tp, float(df["close"].iloc[-1])))
+    entry_price = sig["entry_price"].to_numpy(dtype=np.float64)
+    pnl = np.where(is_long, (exit_price - entry_price) / entry_price, (entry_price - exit_price) / entry_price)
+
+    return pd.DataFrame({
+        "signal_idx": sig.index,
+        "outcome": np.where(kind == EXIT_SL, "LOSS", np.where(kind == EXIT_TP, "WIN", "TIMEOUT")),
+        "pnl": pnl,
+        "bars_held": exit_idx - pos,
+        "exit_price": exit_price,
+    })
 
 def run_full_backtest(strategy_cls, symbol="ETHUSDT", timeframe="60"):
     print(f"\n🔬 Backtesting {strategy_cls.name} on {symbol} ({timeframe}m)...")
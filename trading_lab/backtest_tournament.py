@@ -1,161 +1,334 @@
-import ccxt
-import pandas as pd
-import pandas_ta as ta
+# backtest_tournament.py
+# Torneo de estrategias: reparte jobs (estrategia, símbolo, timeframe, params)
+# en un pool de procesos y genera un leaderboard.
+#
+# - Cada dataset se carga una sola vez (dataset_store) y se publica en
+#   memoria compartida; los workers lo leen sin copias ni pickling por job.
+# - Las señales salen de las estrategias del backend (Strategy.analyze) y se
+#   simulan con simulator.simulate_signals (salidas vectorizadas, mismos
+#   costes y no-overlap que engine.py).
+# - Solo entran estrategias con `emits_history` (analyze devuelve todas las
+#   señales del histórico en una pasada vectorizada: MA Cross, Bollinger
+#   Reversion, Donchian V2). Las que solo miran la última vela necesitarían
+#   una llamada por vela (~10 ms x 20k velas por job); esos jobs se rechazan
+#   con error en vez de puntuar 0 señales en silencio.
+# - Cada resultado se añade al momento a un .jsonl; si el proceso cae, al
+#   relanzar se saltan los jobs ya hechos (la clave incluye los datos).
+#
+# Uso:
+#   python backtest_tournament.py --symbols ETHUSDT SOLUSDT --timeframes 1h 4h
+#   python backtest_tournament.py --grid grid.json --workers 8 --metric sharpe_trades
+
+import os
+import sys
+import json
 import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path to import strategies
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from strategies.registry import get_registry, load_default_strategies
+from core.optimizer import expand_grid
+
+from dataset_store import load_dataset
+from simulator import simulate_signals
+from metrics import compute_metrics, empty_metrics
+
+# ==== CONFIG ====
+DATASETS_DIR = "datasets"
+RESULTS_DIR = os.path.join("results", "tournament")
+SYMBOLS = ["ETHUSDT", "SOLUSDT"]
+TIMEFRAMES = ["1h", "4h"]
+TAIL = 20_000  # Velas por dataset (None = histórico completo)
+
+COMMISSION_PCT_PER_SIDE = 0.04 / 100.0
+SLIPPAGE_PCT_PER_SIDE   = 0.02 / 100.0
+DEFAULT_TIMEOUT_BARS = 48
+MC_PATHS = 0  # Monte Carlo desactivado por defecto: el torneo prima la velocidad
+
+# {strategy_id: {param: [valores]}} — solo estrategias con emits_history
+DEFAULT_GRID = {
+    "ma_cross": {"fast_period": [10, 20], "slow_period": [50, 100, 200]},
+    "donchian_v2": {"period": [20, 55], "ema_trend_period": [100, 200]},
+    "bb_mean_reversion": {},
+}
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+
+# ---------- Datos compartidos ----------
+def share_frame(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """Copia timestamp(ms)+OHLCV a un bloque de memoria compartida."""
+    arr = np.empty((len(df), 6), dtype=np.float64)
+    arr[:, 0] = df.index.as_unit("ms").asi8
+    arr[:, 1:] = df[OHLCV].to_numpy(dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=np.float64, buffer=shm.buf)[:] = arr
+    return shm, {"shm": shm.name, "rows": len(df)}
+
+
+def frame_from_array(arr: np.ndarray) -> pd.DataFrame:
+    index = pd.DatetimeIndex(pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms", utc=True),
+                             name="timestamp")
+    return pd.DataFrame(arr[:, 1:], index=index, columns=OHLCV)
+
+
+# Estado por worker: bloques abiertos y DataFrames ya reconstruidos
+_SPECS: Dict[str, Dict[str, Any]] = {}
+_FRAMES: Dict[str, pd.DataFrame] = {}
+_HANDLES: List[shared_memory.SharedMemory] = []
+
+
+def _init_worker(specs: Dict[str, Dict[str, Any]]) -> None:
+    global _SPECS
+    _SPECS = specs
+    load_default_strategies()
+
+
+def _frame(dataset: str) -> pd.DataFrame:
+    if dataset not in _FRAMES:
+        spec = _SPECS[dataset]
+        shm = shared_memory.SharedMemory(name=spec["shm"])
+        _HANDLES.append(shm)
+        arr = np.ndarray((spec["rows"], 6), dtype=np.float64, buffer=shm.buf)
+        _FRAMES[dataset] = frame_from_array(arr)
+    return _FRAMES[dataset]
+
+
+# ---------- Jobs ----------
+def dataset_name(symbol: str, timeframe: str) -> str:
+    return f"{symbol}_{timeframe}"
+
+
+def job_key(job: Dict[str, Any], fingerprint: str) -> str:
+    payload = json.dumps({**job, "data": fingerprint}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
 
-# --- CONFIGURACIÓN ---
-TOKENS = ['BTC/USDT', 'ETH/USDT']
-TIMEFRAMES = ['1h', '4h']
-LIMIT = 1500 # Muestra representativa
+def build_jobs(grid: Dict[str, Dict[str, List[Any]]], symbols: List[str],
+               timeframes: List[str]) -> List[Dict[str, Any]]:
+    jobs = []
+    for strategy_id, space in grid.items():
+        for params in expand_grid(space):
+            for symbol in symbols:
+                for tf in timeframes:
+                    jobs.append({"strategy_id": strategy_id, "symbol": symbol,
+                                 "timeframe": tf, "params": params})
+    return jobs
 
-def fetch_data(symbol, timeframe):
+
+def evaluate(df: pd.DataFrame, job: Dict[str, Any], mc_paths: int = MC_PATHS) -> Dict[str, Any]:
+    """Señales + simulación + métricas de un job sobre `df`."""
+    strategy = get_registry().get(job["strategy_id"], config=job["params"] or None)
+    if strategy is None:
+        raise ValueError(f"Estrategia desconocida: {job['strategy_id']}")
+    if not getattr(strategy, "emits_history", False):
+        raise ValueError(
+            f"{job['strategy_id']} solo evalúa la última vela (emits_history=False); "
+            "usa el backtest por vela del backend"
+        )
+
+    signals = strategy.analyze(df, job["symbol"], job["timeframe"])
+    timeout = int(getattr(strategy, "config", {}).get("bars_timeout", DEFAULT_TIMEOUT_BARS))
+    trades = simulate_signals(df, signals, timeout_bars=timeout,
+                              commission=COMMISSION_PCT_PER_SIDE,
+                              slippage=SLIPPAGE_PCT_PER_SIDE, adverse_first=True)
+    if not trades:
+        return {**empty_metrics(), "signals": len(signals)}
+    log_df = pd.DataFrame({
+        "return_pct_net": [t.return_pct_net for t in trades],
+        "bars_held": [t.bars_held for t in trades],
+    })
+    return {**compute_metrics(log_df, df_len=len(df), mc_paths=mc_paths), "signals": len(signals)}
+
+
+def _run_job(job: Dict[str, Any], mc_paths: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
     try:
-        print(f"📥 Bajando {symbol} {timeframe}...")
-        exchange = ccxt.binance()
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=LIMIT)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+        metrics = evaluate(_frame(dataset_name(job["symbol"], job["timeframe"])), job, mc_paths)
+        out = {**job, **metrics}
     except Exception as e:
-        print(f"Error bajando {symbol}: {e}")
-        return pd.DataFrame()
-
-# --- ESTRATEGIA 1: DONCHIAN (TREND) ---
-def strat_donchian(df):
-    d = df.copy()
-    # Indicadores
-    donchian = ta.donchian(d['high'], d['low'], lower_length=20, upper_length=20)
-    # Shift para evitar repainting
-    upper = donchian['DCU_20_20'].shift(1)
-    lower = donchian['DCL_20_20'].shift(1)
-    mid   = donchian['DCM_20_20'].shift(1)
-    ema   = ta.ema(d['close'], length=200)
-    
-    trades = []
-    in_pos = False
-    pos = {}
-    
-    for i in range(200, len(d)):
-        row = d.iloc[i]
-        if pd.isna(upper.iloc[i]): continue
-        
-        # Salida
-        if in_pos:
-            pnl = 0
-            if pos['type'] == 'LONG':
-                if row['low'] <= pos['sl']: pnl = -1.0 # Loss
-                elif row['high'] >= pos['tp']: pnl = 2.0 # Win (2R)
-            elif pos['type'] == 'SHORT':
-                if row['high'] >= pos['sl']: pnl = -1.0
-                elif row['low'] <= pos['tp']: pnl = 2.0
-            
-            if pnl != 0:
-                trades.append(pnl)
-                in_pos = False
-            continue
-            
-        # Entrada Trend
-        # Long: Rompe arriba + Precio sobre EMA200
-        if row['close'] > upper.iloc[i] and row['close'] > ema.iloc[i]:
-            sl = mid.iloc[i]
-            risk = row['close'] - sl
-            if risk > 0:
-                in_pos = True
-                pos = {'type': 'LONG', 'sl': sl, 'tp': row['close'] + (risk * 2)}
-        
-        # Short: Rompe abajo + Precio bajo EMA200
-        elif row['close'] < lower.iloc[i] and row['close'] < ema.iloc[i]:
-            sl = mid.iloc[i]
-            risk = sl - row['close']
-            if risk > 0:
-                in_pos = True
-                pos = {'type': 'SHORT', 'sl': sl, 'tp': row['close'] - (risk * 2)}
-                
-    return trades
-
-# --- ESTRATEGIA 2: BOLLINGER (MEAN REVERSION) ---
-def strat_bollinger(df):
-    d = df.copy()
-    # Bollinger Bands (20, 2.0)
-    bb = ta.bbands(d['close'], length=20, std=2.0)
-    if bb is None: return []
-    
-    # Shift para seguridad
-    upper = bb['BBU_20_2.0'].shift(1)
-    lower = bb['BBL_20_2.0'].shift(1)
-    mid   = bb['BBM_20_2.0'].shift(1) # SMA 20
-    
-    trades = []
-    in_pos = False
-    pos = {}
-    
-    # RSI para filtro (comprar solo si sobrevendido)
-    rsi = ta.rsi(d['close'], length=14).shift(1)
-
-    for i in range(50, len(d)):
-        row = d.iloc[i]
-        if pd.isna(upper.iloc[i]): continue
-        
-        # Salida (Al tocar la media movil - Regresión a la media)
-        if in_pos:
-            pnl = 0
-            # Salimos al tocar la media (SMA20) o Stop Loss fijo
-            curr_mid = mid.iloc[i]
-            
-            if pos['type'] == 'LONG':
-                if row['low'] <= pos['sl']: pnl = -1.0
-                elif row['high'] >= curr_mid: pnl = 1.5 # Salida técnica estimada
-            elif pos['type'] == 'SHORT':
-                if row['high'] >= pos['sl']: pnl = -1.0
-                elif row['low'] <= curr_mid: pnl = 1.5
-
-            if pnl != 0:
-                trades.append(pnl)
-                in_pos = False
+        out = {**job, "error": f"{type(e).__name__}: {e}"}
+    out["elapsed_s"] = round(time.perf_counter() - t0, 4)
+    return out
+
+
+# ---------- Resultados incrementales ----------
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """Resultados ya escritos por clave. Ignora una última línea truncada."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[row["key"]] = row
+    return done
+
+
+def _drop_partial_line(path: str) -> None:
+    """Recorta una última línea a medio escribir (caída durante un write)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def build_leaderboard(rows: List[Dict[str, Any]], metric: str = "profit_factor",
+                      min_trades: int = 10) -> pd.DataFrame:
+    df = pd.DataFrame([r for r in rows if "error" not in r])
+    if df.empty:
+        return df
+    df = df[df["trades"] >= min_trades].copy()
+    df["params"] = df["params"].apply(lambda p: json.dumps(p, sort_keys=True))
+    df = df.sort_values(metric, ascending=False).reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df
+
+
+def run_tournament(grid: Optional[Dict[str, Dict[str, List[Any]]]] = None,
+                   symbols: Optional[List[str]] = None,
+                   timeframes: Optional[List[str]] = None,
+                   results_path: Optional[str] = None,
+                   workers: Optional[int] = None,
+                   datasets_dir: str = DATASETS_DIR,
+                   tail: Optional[int] = TAIL,
+                   metric: str = "profit_factor",
+                   min_trades: int = 10,
+                   mc_paths: int = MC_PATHS,
+                   frames: Optional[Dict[str, pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    Ejecuta (o reanuda) el torneo y devuelve el leaderboard. `frames`
+    permite pasar datasets ya cargados {"<SYMBOL>_<tf>": df}.
+    """
+    grid = DEFAULT_GRID if grid is None else grid
+    symbols = symbols or SYMBOLS
+    timeframes = timeframes or TIMEFRAMES
+    results_path = results_path or os.path.join(RESULTS_DIR, "results.jsonl")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+
+    # 1) Datasets: una carga por (símbolo, timeframe)
+    frames = dict(frames or {})
+    for symbol in symbols:
+        for tf in timeframes:
+            name = dataset_name(symbol, tf)
+            if name in frames:
+                continue
+            try:
+                frames[name] = load_dataset(symbol, tf, datasets_dir, tail=tail)
+            except FileNotFoundError:
+                print(f"[TOURNAMENT] ⚠️ Dataset no encontrado: {name}")
+    fingerprints = {
+        name: f"{len(df)}:{df.index[0].value}:{df.index[-1].value}:{float(df['close'].iloc[-1])}"
+        for name, df in frames.items() if len(df)
+    }
+
+    # 2) Jobs pendientes (los ya hechos se saltan)
+    _drop_partial_line(results_path)
+    done = load_results(results_path)
+    jobs, rows = [], []
+    for job in build_jobs(grid, symbols, timeframes):
+        name = dataset_name(job["symbol"], job["timeframe"])
+        if name not in fingerprints:
             continue
+        job["key"] = job_key(job, fingerprints[name])
+        prev = done.get(job["key"])
+        if prev is not None and "error" not in prev:  # los fallidos se reintentan
+            rows.append(prev)
+        else:
+            jobs.append(job)
+    print(f"[TOURNAMENT] {len(jobs)} jobs pendientes, {len(rows)} reanudados "
+          f"({len(frames)} datasets, {workers} workers)")
+
+    # 3) Ejecución; cada resultado se escribe en cuanto llega
+    t0 = time.perf_counter()
+    with open(results_path, "a", encoding="utf-8") as out:
+        def _record(row):
+            out.write(json.dumps(row, default=str) + "\n")
+            out.flush()
+            rows.append(row)
+            if "error" in row:
+                print(f"[TOURNAMENT] ❌ {row['strategy_id']} {row['symbol']} {row['timeframe']}: {row['error']}")
+
+        if workers <= 1 or len(jobs) <= 1:
+            _FRAMES.clear()
+            _FRAMES.update(frames)
+            load_default_strategies()
+            for job in jobs:
+                _record(_run_job(job, mc_paths))
+        else:
+            handles, specs = [], {}
+            try:
+                for name, df in frames.items():
+                    shm, specs[name] = share_frame(df)
+                    handles.append(shm)
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(specs,)) as pool:
+                    futures = [pool.submit(_run_job, job, mc_paths) for job in jobs]
+                    for fut in as_completed(futures):
+                        _record(fut.result())
+            finally:
+                for shm in handles:
+                    shm.close()
+                    shm.unlink()
+    print(f"[TOURNAMENT] {len(jobs)} jobs en {time.perf_counter() - t0:.1f}s")
+
+    board = build_leaderboard(rows, metric=metric, min_trades=min_trades)
+    board_path = os.path.join(os.path.dirname(results_path) or ".", "leaderboard.csv")
+    board.to_csv(board_path, index=False)
+    return board
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Torneo de estrategias en paralelo")
+    ap.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    ap.add_argument("--timeframes", nargs="+", default=TIMEFRAMES)
+    ap.add_argument("--grid", default=None, help="JSON {strategy_id: {param: [valores]}}")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--metric", default="profit_factor")
+    ap.add_argument("--min-trades", type=int, default=10)
+    ap.add_argument("--mc-paths", type=int, default=MC_PATHS)
+    ap.add_argument("--tail", type=int, default=TAIL, help="0 = histórico completo")
+    ap.add_argument("--results", default=os.path.join(RESULTS_DIR, "results.jsonl"))
+    args = ap.parse_args()
+
+    grid = None
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+
+    board = run_tournament(grid, args.symbols, args.timeframes, args.results,
+                           workers=args.workers, tail=args.tail or None,
+                           metric=args.metric, min_trades=args.min_trades,
+                           mc_paths=args.mc_paths)
+
+    print("\n🏆 LEADERBOARD")
+    print("=" * 92)
+    print(f"{'#':<3} | {'STRATEGY':<26} | {'ASSET':<9} | {'TF':<4} | {'TRADES':<6} | "
+          f"{'WIN%':<6} | {'PF':<5} | {'RET%':<7} | {'DD%':<6}")
+    print("-" * 92)
+    for _, r in board.head(20).iterrows():
+        print(f"{r['rank']:<3} | {r['strategy_id']:<26} | {r['symbol']:<9} | {r['timeframe']:<4} | "
+              f"{r['trades']:<6} | {r['winrate']:<5.1f}% | {r['profit_factor']:<5.2f} | "
+              f"{r['total_return_pct']:<7.1f} | {r['max_drawdown_pct']:<6.1f}")
+    print(f"\nLeaderboard: {os.path.join(os.path.dirname(args.results) or '.', 'leaderboard.csv')}")
 
-        # Entrada Reversión
-        # Long: Precio cae bajo banda inferior + RSI bajo (Rebote)
-        if row['close'] < lower.iloc[i] and rsi.iloc[i] < 35:
-            dist = mid.iloc[i] - row['close']
-            sl = row['close'] - (dist * 0.5) # SL debajo
-            in_pos = True
-            pos = {'type': 'LONG', 'sl': sl}
-
-        # Short: Precio sube sobre banda superior + RSI alto (Rechazo)
-        elif row['close'] > upper.iloc[i] and rsi.iloc[i] > 65:
-            dist = row['close'] - mid.iloc[i]
-            sl = row['close'] + (dist * 0.5)
-            in_pos = True
-            pos = {'type': 'SHORT', 'sl': sl}
-            
-    return trades
-
-def run_tournament():
-    print("\n🏆 INICIANDO TORNEO DE ESTRATEGIAS")
-    print("="*60)
-    print(f"{'ASSET':<10} | {'TF':<4} | {'STRATEGY':<15} | {'TRADES':<6} | {'WIN%':<6} | {'NET R':<6}")
-    print("-" * 60)
-    
-    for token in TOKENS:
-        for tf in TIMEFRAMES:
-            df = fetch_data(token, tf)
-            if df.empty: continue
-            
-            # Test Donchian
-            res_d = strat_donchian(df)
-            net_d = sum(res_d)
-            wr_d = (len([x for x in res_d if x > 0]) / len(res_d) * 100) if res_d else 0
-            
-            print(f"{token:<10} | {tf:<4} | {'Donchian (Trend)':<15} | {len(res_d):<6} | {wr_d:<5.1f}% | {net_d:<6.1f}")
-            
-            # Test Bollinger
-            res_b = strat_bollinger(df)
-            net_b = sum(res_b)
-            wr_b = (len([x for x in res_b if x > 0]) / len(res_b) * 100) if res_b else 0
-            
-            print(f"{token:<10} | {tf:<4} | {'Bollinger (Rev)':<15} | {len(res_b):<6} | {wr_b:<5.1f}% | {net_b:<6.1f}")
-            print("-" * 60)
 
 if __name__ == "__main__":
-    run_tournament()
+    main()
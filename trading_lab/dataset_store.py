@@ -0,0 +1,219 @@
+# dataset_store.py
+# Capa de datasets compartida por los scripts del lab.
+#
+# Antes cada script (engine, realtime, live_signals, score_backtester...)
+# volvía a parsear el CSV completo con pd.read_csv + inferencia de fechas en
+# cada ejecución, para luego quedarse con las últimas FAST_TAIL velas.
+#
+# Aquí cada CSV se convierte UNA vez a Parquet (columnas tipadas, ordenado por
+# timestamp UTC, sin duplicados) en <dir_csv>/.parquet/<nombre>.parquet. Las
+# lecturas posteriores solo tocan los row groups necesarios:
+#   - tail=N        -> últimos row groups hasta cubrir N filas
+#   - start / end   -> filtros sobre las estadísticas de cada row group
+# así el coste de arranque no depende de la longitud del histórico.
+#
+# El Parquet se regenera solo si el CSV cambia (mtime/tamaño guardados en
+# los metadatos del fichero).
+#
+# Si no hay CSV, load_dataset lee la serie del store de velas del backend
+# (backend/core/candle_store.py, lo llena download_data.py), que usa el
+# mismo esquema Parquet.
+#
+# Uso CLI (conversión previa de todo datasets/):
+#   python dataset_store.py --dir datasets
+
+import os
+import argparse
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATASETS_DIR = "datasets"
+CANDLE_STORE_DIR = os.getenv(
+    "CANDLE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend", "data", "candles"),
+)
+CACHE_SUBDIR = ".parquet"
+ROW_GROUP_SIZE = 20_000
+TIME_COL = "timestamp"
+
+# Cabeceras temporales reconocidas (orden de preferencia)
+TIME_CANDIDATES = ["timestamp", "time", "date", "datetime", "open_time",
+                   "open_time_ms", "close_time", "close_time_ms"]
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+_META_MTIME = b"source_mtime_ns"
+_META_SIZE = b"source_size"
+
+TimeLike = Union[str, int, float, pd.Timestamp, None]
+
+
+def dataset_path(symbol: str, timeframe: str, datasets_dir: str = DATASETS_DIR) -> str:
+    return os.path.join(datasets_dir, f"{symbol.upper().replace('/', '')}_{timeframe}.csv")
+
+
+def parquet_path(csv_path: str) -> str:
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path) or ".", CACHE_SUBDIR, f"{base}.parquet")
+
+
+# ---------- Conversión CSV -> Parquet ----------
+def _clean_headers(cols) -> List[str]:
+    # quita BOM, espacios y pasa a minúsculas
+    return [str(c).replace("\ufeff", "").strip().lower() for c in cols]
+
+
+def _parse_time(s: pd.Series) -> pd.Series:
+    """Epoch (s o ms, según magnitud) o texto -> datetime64 UTC."""
+    num = pd.to_numeric(s, errors="coerce")
+    if num.notna().all():
+        unit = "ms" if num.abs().max() > 1e11 else "s"
+        return pd.to_datetime(num, unit=unit, utc=True, errors="coerce")
+    return pd.to_datetime(s, utc=True, errors="coerce")
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza un OHLCV crudo: cabeceras, índice `timestamp` UTC ordenado y único."""
+    df = df.copy()
+    df.columns = _clean_headers(df.columns)
+    tcol = next((c for c in TIME_CANDIDATES if c in df.columns), None)
+    if tcol is None:
+        raise ValueError(f"No se encontró columna temporal. Cabeceras: {list(df.columns)}")
+
+    ts = _parse_time(df.pop(tcol))
+    df.index = pd.DatetimeIndex(ts, name=TIME_COL)
+    df = df[df.index.notna()]
+    for k in OHLCV:
+        if k in df.columns:
+            df[k] = pd.to_numeric(df[k], errors="coerce").astype(np.float64)
+
+    df = df.sort_index(kind="stable")
+    return df[~df.index.duplicated(keep="last")]
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {_META_MTIME: str(st.st_mtime_ns).encode(), _META_SIZE: str(st.st_size).encode()}
+
+
+def _is_fresh(csv_path: str, pq_path: str) -> bool:
+    if not os.path.exists(pq_path):
+        return False
+    try:
+        meta = pq.read_schema(pq_path).metadata or {}
+    except Exception:
+        return False
+    stamp = _source_stamp(csv_path)
+    return all(meta.get(k) == v for k, v in stamp.items())
+
+
+def convert_csv(csv_path: str, force: bool = False) -> str:
+    """Convierte (si hace falta) el CSV a Parquet y devuelve la ruta del Parquet."""
+    pq_path = parquet_path(csv_path)
+    if not force and _is_fresh(csv_path, pq_path):
+        return pq_path
+
+    stamp = _source_stamp(csv_path)
+    df = normalize_frame(pd.read_csv(csv_path, encoding="utf-8"))
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **stamp})
+
+    os.makedirs(os.path.dirname(pq_path), exist_ok=True)
+    tmp = f"{pq_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(tmp, pq_path)
+    print(f"[DATASET] {os.path.basename(csv_path)} -> {pq_path} ({len(df)} filas)")
+    return pq_path
+
+
+def convert_all(datasets_dir: str = DATASETS_DIR, force: bool = False) -> List[str]:
+    out = []
+    for name in sorted(os.listdir(datasets_dir)):
+        if name.lower().endswith(".csv"):
+            out.append(convert_csv(os.path.join(datasets_dir, name), force=force))
+    return out
+
+
+# ---------- Lectura ----------
+def _to_utc(t: TimeLike) -> Optional[pd.Timestamp]:
+    if t is None:
+        return None
+    ts = pd.Timestamp(t, unit="s") if isinstance(t, (int, float)) else pd.Timestamp(t)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _read_tail(pf: pq.ParquetFile, n: int) -> pa.Table:
+    """Lee solo los últimos row groups necesarios para cubrir `n` filas."""
+    groups, rows = [], 0
+    for i in range(pf.num_row_groups - 1, -1, -1):
+        groups.append(i)
+        rows += pf.metadata.row_group(i).num_rows
+        if rows >= n:
+            break
+    table = pf.read_row_groups(sorted(groups))
+    return table.slice(max(table.num_rows - n, 0))
+
+
+def read_parquet_range(pq_path: str,
+                       start: TimeLike = None,
+                       end: TimeLike = None,
+                       tail: Optional[int] = None) -> pd.DataFrame:
+    start, end = _to_utc(start), _to_utc(end)
+    if start is None and end is None:
+        pf = pq.ParquetFile(pq_path)
+        table = _read_tail(pf, tail) if tail else pf.read()
+    else:
+        filters = []
+        if start is not None:
+            filters.append((TIME_COL, ">=", start))
+        if end is not None:
+            filters.append((TIME_COL, "<=", end))
+        table = pq.read_table(pq_path, filters=filters)
+        if tail:
+            table = table.slice(max(table.num_rows - tail, 0))
+    return table.to_pandas()
+
+
+def load_csv(csv_path: str,
+             start: TimeLike = None,
+             end: TimeLike = None,
+             tail: Optional[int] = None) -> pd.DataFrame:
+    """
+    DataFrame con índice `timestamp` (UTC, ascendente) y columnas en
+    minúscula, limitado a [start, end] y/o a las últimas `tail` filas.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"No existe dataset: {csv_path}")
+    return read_parquet_range(convert_csv(csv_path), start=start, end=end, tail=tail)
+
+
+def load_dataset(symbol: str,
+                 timeframe: str,
+                 datasets_dir: str = DATASETS_DIR,
+                 start: TimeLike = None,
+                 end: TimeLike = None,
+                 tail: Optional[int] = None,
+                 candle_store_dir: Optional[str] = None) -> pd.DataFrame:
+    csv_path = dataset_path(symbol, timeframe, datasets_dir)
+    if not os.path.exists(csv_path):
+        stored = os.path.join(candle_store_dir or CANDLE_STORE_DIR,
+                              os.path.basename(csv_path)[:-len(".csv")] + ".parquet")
+        if os.path.exists(stored):
+            return read_parquet_range(stored, start=start, end=end, tail=tail)
+    return load_csv(csv_path, start=start, end=end, tail=tail)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convierte datasets/*.csv a Parquet")
+    ap.add_argument("--dir", default=DATASETS_DIR)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    paths = convert_all(args.dir, force=args.force)
+    print(f"[DATASET] {len(paths)} datasets listos en {os.path.join(args.dir, CACHE_SUBDIR)}")
+
+
+if __name__ == "__main__":
+    main()
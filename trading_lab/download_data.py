@@ -1,54 +1,194 @@
-import ccxt
-import pandas as pd
+# download_data.py
+# Descarga incremental de OHLCV al store de velas del backend
+# (backend/core/candle_store.py, el mismo que lee market_data_api).
+#
+# - Mira qué hay ya guardado y solo pide los rangos que faltan (cabeza/cola;
+#   con --repair también los huecos internos).
+# - Cada página descargada se guarda al momento como checkpoint (.staging):
+#   si el proceso cae, la siguiente ejecución continúa desde ahí.
+# - Las series (símbolo × timeframe) se descargan en paralelo, con un
+#   limitador de peticiones compartido para respetar el rate limit.
+# - Al terminar cada serie se consolida y se valida (huecos, duplicados,
+#   velas desalineadas, OHLC incoherente).
+# - Basta con descargar un timeframe base (p. ej. 5m): market_data_api deriva
+#   15m/1h/4h/1d agregándolo (backend/core/resample.py; se verifica contra
+#   el exchange con tools/verify_resample.py).
+#
+# Uso:
+#   python download_data.py --symbols ETH/USDT SOL/USDT --timeframes 1h 4h
+#   python download_data.py --repair --workers 4 --rps 8
+
 import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import ccxt
+
+# Add backend to path to import the candle store
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from core.candle_store import CandleStore, missing_ranges, timeframe_to_ms
 
 # =========================
 # Configuración
 # =========================
-symbols = ["ETH/USDT", "BTC/USDT", "SOL/USDT"]
-timeframes = ["15m", "1h", "4h", "1d"]
-limit = 1000  # Velas por petición (máx. Binance)
-start_date = '2018-01-01T00:00:00Z'  # Fecha inicial
-output_dir = os.path.join(os.path.dirname(__file__), "datasets")  # Carpeta datasets en raíz
+SYMBOLS = ["ETH/USDT", "BTC/USDT", "SOL/USDT"]
+TIMEFRAMES = ["15m", "1h", "4h", "1d"]
+PAGE_LIMIT = 1000  # Velas por petición (máx. Binance)
+START_DATE = "2018-01-01T00:00:00Z"
+DEFAULT_WORKERS = 4
+DEFAULT_RPS = 5.0  # Peticiones/segundo entre todos los hilos
+MAX_RETRIES = 5
+FLUSH_EVERY_PAGES = 50  # Consolida staging -> serie cada N páginas
 
-# Crear carpeta datasets si no existe
-os.makedirs(output_dir, exist_ok=True)
 
-# =========================
-# Conexión a Binance
-# =========================
-exchange = ccxt.binance()
-
-def fetch_ohlcv(symbol, timeframe):
-    """Descarga datos OHLCV completos desde la fecha de inicio."""
-    all_data = []
-    since = exchange.parse8601(start_date)
-
-    while True:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
-        if not ohlcv:
-            break
-        all_data.extend(ohlcv)
-        since = ohlcv[-1][0] + 1  # Avanza al siguiente lote
-        print(f"Descargadas {len(all_data)} velas para {symbol} {timeframe}...")
-        if len(ohlcv) < limit:
-            break
-
-    # Convertir a DataFrame
-    df = pd.DataFrame(all_data, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    return df
+class RateLimiter:
+    """Espaciado mínimo entre peticiones, compartido por todos los hilos."""
 
-# =========================
-# Descarga y guardado
-# =========================
-for symbol in symbols:
-    for tf in timeframes:
-        print(f"📥 Descargando {symbol} {tf} desde {start_date}...")
-        df = fetch_ohlcv(symbol, tf)
-        file_name = f"{symbol.replace('/', '')}_{tf}.csv"
-        path = os.path.join(output_dir, file_name)
-        df.to_csv(path, index=False)
-        print(f"✅ Guardado: {path}")
-
-print("\n🎯 Descarga completada. Archivos en carpeta 'datasets/'")
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _fetch_page(exchange, symbol: str, timeframe: str, since: int, limit: int,
+                limiter: RateLimiter) -> List[List[float]]:
+    backoff = 1.0
+    for attempt in range(MAX_RETRIES):
+        limiter.wait()
+        try:
+            return exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        except (ccxt.NetworkError, ccxt.RateLimitExceeded) as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"[DOWNLOAD] ⚠️ {symbol} {timeframe}: {e}. Reintento en {backoff:.0f}s")
+            time.sleep(backoff)
+            backoff *= 2
+    return []
+
+
+def download_series(exchange, store: CandleStore, symbol: str, timeframe: str,
+                    start_ms: int, limiter: RateLimiter, repair: bool = False,
+                    end_ms: Optional[int] = None, page_limit: int = PAGE_LIMIT) -> Dict[str, Any]:
+    """Descarga lo que falte de una serie y devuelve un informe con su validación."""
+    interval = timeframe_to_ms(timeframe)
+    now_ms = int(time.time() * 1000) if end_ms is None else end_ms
+    # Última vela CERRADA: la que está abierta no se guarda
+    last_closed = (now_ms // interval) * interval - interval
+
+    resumed = store.merge_staged(symbol, timeframe)  # páginas de una ejecución anterior
+    ranges = missing_ranges(store.timestamps(symbol, timeframe), start_ms, last_closed,
+                            interval, include_gaps=repair)
+
+    pages = fetched = 0
+    for lo, hi in ranges:
+        since = lo
+        while since <= hi:
+            page = _fetch_page(exchange, symbol, timeframe, since, page_limit, limiter)
+            rows = [r for r in (page or []) if lo <= r[0] <= hi]
+            if rows:
+                store.stage_page(symbol, timeframe, rows)  # checkpoint
+                pages += 1
+                fetched += len(rows)
+                if pages % FLUSH_EVERY_PAGES == 0:
+                    store.merge_staged(symbol, timeframe)
+            # Fin del rango: página vacía/corta, rango cubierto o ya no avanza
+            if not page or len(page) < page_limit or page[-1][0] >= hi or page[-1][0] < since:
+                break
+            since = int(page[-1][0]) + interval
+        print(f"[DOWNLOAD] {symbol} {timeframe}: rango {lo}..{hi} -> {fetched} velas")
+
+    merged = store.merge_staged(symbol, timeframe)
+    validation = store.validate(symbol, timeframe)
+    if validation["gaps"] or validation["duplicates"] or validation["bad_ohlc"]:
+        print(f"[DOWNLOAD] ⚠️ {symbol} {timeframe}: gaps={validation['gaps']} "
+              f"missing={validation['missing_candles']} dup={validation['duplicates']} "
+              f"bad_ohlc={validation['bad_ohlc']}")
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "ranges": ranges,
+        "pages": pages,
+        "fetched": fetched,
+        "resumed_pages": resumed["merged_pages"],
+        "duplicates_dropped": resumed["duplicates"] + merged["duplicates"],
+        "validation": validation,
+    }
+
+
+def download_all(exchange_factory: Callable[[], Any], store: CandleStore,
+                 symbols: List[str], timeframes: List[str], start_ms: int,
+                 workers: int = DEFAULT_WORKERS, rps: float = DEFAULT_RPS,
+                 repair: bool = False, end_ms: Optional[int] = None,
+                 page_limit: int = PAGE_LIMIT) -> List[Dict[str, Any]]:
+    """Una tarea por serie; cada hilo usa su propia instancia del exchange."""
+    limiter = RateLimiter(rps)
+    local = threading.local()
+
+    def _task(symbol: str, tf: str) -> Dict[str, Any]:
+        if not hasattr(local, "exchange"):
+            local.exchange = exchange_factory()
+        try:
+            return download_series(local.exchange, store, symbol, tf, start_ms, limiter,
+                                   repair=repair, end_ms=end_ms, page_limit=page_limit)
+        except Exception as e:
+            # Lo ya guardado en staging se retoma en la próxima ejecución
+            print(f"[DOWNLOAD] ❌ {symbol} {tf}: {e}")
+            return {"symbol": symbol, "timeframe": tf, "error": str(e)}
+
+    jobs = [(s, tf) for s in symbols for tf in timeframes]
+    reports = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_task, s, tf) for s, tf in jobs]
+        for fut in as_completed(futures):
+            reports.append(fut.result())
+    order = {job: i for i, job in enumerate(jobs)}
+    return sorted(reports, key=lambda r: order[(r["symbol"], r["timeframe"])])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Descarga incremental de OHLCV al candle store")
+    ap.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    ap.add_argument("--timeframes", nargs="+", default=TIMEFRAMES)
+    ap.add_argument("--start", default=START_DATE, help="Fecha inicial ISO8601")
+    ap.add_argument("--exchange", default="binance")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--rps", type=float, default=DEFAULT_RPS)
+    ap.add_argument("--repair", action="store_true", help="Reintenta también los huecos internos")
+    ap.add_argument("--store", default=None, help="Directorio del store (CANDLE_STORE_DIR)")
+    args = ap.parse_args()
+
+    exchange_cls = getattr(ccxt, args.exchange)
+    store = CandleStore(args.store)
+    start_ms = ccxt.Exchange.parse8601(args.start)
+
+    print(f"📥 {len(args.symbols)}×{len(args.timeframes)} series -> {store.directory}")
+    reports = download_all(lambda: exchange_cls({"enableRateLimit": False}), store,
+                           args.symbols, args.timeframes, start_ms,
+                           workers=args.workers, rps=args.rps, repair=args.repair)
+
+    os.makedirs("results", exist_ok=True)
+    with open(os.path.join("results", "download_report.json"), "w", encoding="utf-8") as f:
+        json.dump(reports, f, indent=2, default=str)
+    failed = [r for r in reports if "error" in r]
+    print(f"\n🎯 Descarga completada: {len(reports) - len(failed)} OK, {len(failed)} con error. "
+          f"Informe en results/download_report.json")
+
+
+if __name__ == "__main__":
+    main()
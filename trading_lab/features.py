@@ -1,6 +1,49 @@
 # features.py
-import pandas as pd
+#
+# Features técnicas del lab (EMAs, RSI, MACD, Bollinger, ATR, volumen, régimen).
+#
+# Cada grupo de columnas se declara como un FeatureDef; su hash (código de la
+# función + parámetros + helpers + hash de las dependencias) identifica la
+# definición. Con `cache_path`, add_features usa un FeatureStore: las columnas
+# calculadas se guardan en Parquet junto al dataset, un fichero por inicio de
+# rango (<dir>/.parquet/<nombre>.<primera vela>.features.parquet), y en la
+# siguiente ejecución:
+#   - mismas velas y mismas definiciones     -> se leen tal cual;
+#   - el dataset creció por el final         -> solo se calcula la cola nueva
+#     (con `lookback` velas previas de calentamiento por grupo);
+#   - cambió la definición de un grupo       -> se recalcula solo ese grupo
+#     (y los que dependen de él);
+#   - el rango es un tramo final de otro ya cacheado (tail(N) del mismo
+#     dataset)                              -> se lee de ese store; solo se
+#     calculan las `lookback` primeras velas de cada grupo;
+#   - cambió el histórico ya cacheado       -> se recalcula todo.
+# Sin `cache_path` el comportamiento es el de siempre.
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dataset_store import CACHE_SUBDIR
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+# Velas de calentamiento por unidad de `span` en las medias exponenciales:
+# el peso de lo anterior es (1-2/(span+1))^(20·span) ≈ e^-40, por debajo de
+# la precisión de float64
+EWM_WARMUP = 20
+
+_META_KEY = b"feature_store"
+_HASH_COL = "_ohlcv_hash"
+_SUFFIX = ".features.parquet"
+
 
 def _ema(series: pd.Series, span: int) -> pd.Series:
     return series.ewm(span=span, adjust=False).mean()
@@ -34,42 +77,281 @@ def _atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     atr = tr.ewm(span=period, adjust=False).mean()
     return atr
 
-def add_features(df: pd.DataFrame) -> pd.DataFrame:
+
+# ---------- Grupos de features ----------
+def _ema_group(df: pd.DataFrame, span: int) -> Dict[str, pd.Series]:
+    return {f"ema{span}": _ema(df["close"], span)}
+
+def _rsi_group(df: pd.DataFrame, period: int) -> Dict[str, pd.Series]:
+    return {"rsi": _rsi(df["close"], period)}
+
+def _macd_group(df: pd.DataFrame, fast: int, slow: int, signal: int) -> Dict[str, pd.Series]:
+    macd, macd_signal, macd_hist = _macd(df["close"], fast, slow, signal)
+    return {"macd": macd, "macd_signal": macd_signal, "macd_hist": macd_hist}
+
+def _bollinger_group(df: pd.DataFrame, period: int, stds: float) -> Dict[str, pd.Series]:
+    mid = df["close"].rolling(period).mean()
+    std = df["close"].rolling(period).std(ddof=0)
+    upper = mid + stds * std
+    lower = mid - stds * std
+    bb = (df["close"] - lower) / (upper - lower)  # 0..1 aprox
+    return {"bb_percent": bb.clip(0, 1)}
+
+def _atr_group(df: pd.DataFrame, period: int) -> Dict[str, pd.Series]:
+    atr = _atr(df, period)
+    return {"atr": atr, "atr_pct": (atr / df["close"]) * 100.0}
+
+def _volume_group(df: pd.DataFrame, period: int) -> Dict[str, pd.Series]:
+    return {f"volume_ma{period}": df["volume"].rolling(period).mean()}
+
+def _trend_group(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    regime = np.where(df["ema50"] > df["ema200"], 1,
+                      np.where(df["ema50"] < df["ema200"], -1, 0))
+    return {"trend_regime": pd.Series(regime, index=df.index, dtype=np.int64)}
+
+
+@dataclass
+class FeatureDef:
+    """
+    Un grupo de columnas que se calculan juntas.
+    `lookback`: velas previas necesarias para que el valor de una vela nueva
+    coincida con el del cálculo completo (0 = puntual).
+    """
+    name: str
+    fn: Callable[..., Dict[str, pd.Series]]
+    columns: Tuple[str, ...]
+    params: Dict = field(default_factory=dict)
+    lookback: int = 0
+    helpers: Tuple[Callable, ...] = ()
+    deps: Tuple[str, ...] = ()
+
+    def compute(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        return self.fn(df, **self.params)
+
+
+FEATURES: List[FeatureDef] = [
+    FeatureDef("ema20", _ema_group, ("ema20",), {"span": 20}, EWM_WARMUP * 20, (_ema,)),
+    FeatureDef("ema50", _ema_group, ("ema50",), {"span": 50}, EWM_WARMUP * 50, (_ema,)),
+    FeatureDef("ema200", _ema_group, ("ema200",), {"span": 200}, EWM_WARMUP * 200, (_ema,)),
+    FeatureDef("rsi", _rsi_group, ("rsi",), {"period": 14}, EWM_WARMUP * 14 + 1, (_rsi,)),
+    FeatureDef("macd", _macd_group, ("macd", "macd_signal", "macd_hist"),
+               {"fast": 12, "slow": 26, "signal": 9}, EWM_WARMUP * (26 + 9), (_macd, _ema)),
+    FeatureDef("bollinger", _bollinger_group, ("bb_percent",), {"period": 20, "stds": 2}, 20),
+    FeatureDef("atr", _atr_group, ("atr", "atr_pct"), {"period": 14}, EWM_WARMUP * 14 + 1, (_atr,)),
+    FeatureDef("volume", _volume_group, ("volume_ma20",), {"period": 20}, 20),
+    FeatureDef("trend", _trend_group, ("trend_regime",), deps=("ema50", "ema200")),
+]
+
+
+def _source(fn: Callable) -> str:
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return getattr(fn, "__qualname__", repr(fn))
+
+
+def definition_hashes(defs: Optional[List[FeatureDef]] = None) -> Dict[str, str]:
+    """Hash de cada grupo; incluye el de sus dependencias, así un cambio se propaga."""
+    out: Dict[str, str] = {}
+    for d in defs or FEATURES:
+        h = hashlib.sha1()
+        h.update(_source(d.fn).encode())
+        h.update(json.dumps(d.params, sort_keys=True, default=str).encode())
+        h.update(json.dumps(list(d.columns)).encode())
+        for helper in d.helpers:
+            h.update(_source(helper).encode())
+        for dep in d.deps:
+            h.update(out[dep].encode())
+        out[d.name] = h.hexdigest()[:16]
+    return out
+
+
+def feature_columns(defs: Optional[List[FeatureDef]] = None) -> List[str]:
+    return [c for d in (defs or FEATURES) for c in d.columns]
+
+
+def feature_cache_path(csv_path: str) -> str:
+    """Ruta del store de features de un dataset (junto a su Parquet)."""
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path) or ".", CACHE_SUBDIR, f"{base}{_SUFFIX}")
+
+
+# ---------- Store ----------
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Huella de cada vela (índice + OHLCV presentes): valida cualquier tramo del store."""
+    cols = [c for c in OHLCV if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols], index=True).to_numpy()
+
+
+class FeatureStore:
+    """
+    Columnas de features persistidas en Parquet, un fichero por inicio de rango
+    (<base>.<primera vela>.features.parquet), con la huella de cada vela en la
+    columna `_ohlcv_hash` y metadatos: rows, first_ts, last_ts, groups {nombre: hash}.
+    Así un tail(N) del dataset y el histórico completo no se pisan, y si no hay
+    store para el inicio de `df` se sirve el tramo desde uno que empiece antes.
+    `last_run` resume qué se hizo en la última llamada a compute().
+    """
+
+    def __init__(self, path: str, defs: Optional[List[FeatureDef]] = None):
+        self.path = path
+        self.defs = defs or FEATURES
+        self.last_run: Dict = {}
+
+    def _root(self) -> str:
+        return self.path[: -len(_SUFFIX)] if self.path.endswith(_SUFFIX) else self.path
+
+    def range_path(self, first_ts) -> str:
+        """Fichero del rango que empieza en `first_ts`."""
+        stamp = "".join(ch for ch in str(first_ts) if ch.isalnum())
+        return f"{self._root()}.{stamp}{_SUFFIX}"
+
+    def _siblings(self, own: str) -> List[str]:
+        """Stores de otros rangos del mismo dataset, del más largo al más corto."""
+        paths = [p for p in glob.glob(f"{glob.escape(self._root())}.*{_SUFFIX}") if p != own]
+        return sorted(paths, key=lambda p: -int(self._read_meta(p).get("rows", 0)))
+
+    def _read_meta(self, path: str) -> Dict:
+        try:
+            return json.loads((pq.read_schema(path).metadata or {}).get(_META_KEY, b"{}"))
+        except Exception:
+            return {}
+
+    def _read(self, path: str) -> Tuple[Optional[pd.DataFrame], Dict]:
+        if not os.path.exists(path):
+            return None, {}
+        try:
+            table = pq.read_table(path)
+            meta = json.loads((table.schema.metadata or {}).get(_META_KEY, b"{}"))
+            return table.to_pandas(), meta
+        except Exception as e:
+            print(f"[FEATURES] Store ilegible ({e}), se recalcula: {path}")
+            return None, {}
+
+    def _write(self, path: str, feats: pd.DataFrame, meta: Dict) -> None:
+        table = pa.Table.from_pandas(feats, preserve_index=True)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               _META_KEY: json.dumps(meta).encode()})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+
+    def _prune(self, own: str, index: pd.Index) -> None:
+        """Borra los stores de rangos contenidos en el recién escrito (p. ej. un tail anterior)."""
+        siblings = self._siblings(own)
+        if not siblings:
+            return
+        stamps = set(index.astype(str))
+        for path in siblings:
+            meta = self._read_meta(path)
+            if meta.get("first_ts") in stamps and meta.get("last_ts") in stamps:
+                os.remove(path)
+
+    @staticmethod
+    def _valid_rows(hashes: np.ndarray, cached: Optional[pd.DataFrame], offset: int) -> int:
+        """Velas de `df` (desde la primera) que coinciden con el store a partir de `offset`."""
+        if cached is None or _HASH_COL not in cached.columns:
+            return 0
+        rows = min(len(cached) - offset, len(hashes))
+        if rows <= 0 or not np.array_equal(cached[_HASH_COL].to_numpy()[offset:offset + rows],
+                                           hashes[:rows]):
+            return 0
+        return rows
+
+    def _match(self, df: pd.DataFrame,
+               hashes: np.ndarray) -> Tuple[Optional[pd.DataFrame], Dict, int, int, str]:
+        """
+        Store reutilizable para `df`: (features alineadas, meta, velas válidas, offset, ruta).
+        Primero el del mismo inicio; si no, uno que empiece antes y contenga
+        la primera vela de `df` (offset = posición de esa vela en el store).
+        """
+        own = self.range_path(df.index[0])
+        cached, meta = self._read(own)
+        valid = self._valid_rows(hashes, cached, 0)
+        if valid:
+            return cached.iloc[:valid], meta, valid, 0, own
+        if cached is not None:
+            print(f"[FEATURES] El histórico cambió, se recalcula todo: {own}")
+        for path in self._siblings(own):
+            cached, meta = self._read(path)
+            if cached is None:
+                continue
+            offset = int(cached.index.get_indexer([df.index[0]])[0])
+            valid = self._valid_rows(hashes, cached, offset) if offset > 0 else 0
+            if valid:
+                return cached.iloc[offset:offset + valid], meta, valid, offset, path
+        return None, {}, 0, 0, own
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Columnas de features (sin dropna) alineadas con `df`."""
+        hashes = definition_hashes(self.defs)
+        n = len(df)
+        rows = _row_hashes(df)
+        cached, meta, valid, offset, source = (self._match(df, rows) if n
+                                               else (None, {}, 0, 0, None))
+
+        work = df.copy()
+        reused, appended, recomputed = [], [], []
+        warmup: Dict[str, int] = {}
+        for d in self.defs:
+            # Calentamiento efectivo: el propio más el de sus dependencias
+            warmup[d.name] = d.lookback + max((warmup[dep] for dep in d.deps), default=0)
+            same = (valid and meta.get("groups", {}).get(d.name) == hashes[d.name]
+                    and all(c in cached.columns for c in d.columns))
+            if not same:
+                for c, s in d.compute(work).items():
+                    work[c] = s
+                recomputed.append(d.name)
+                continue
+
+            values = {c: cached[c].to_numpy() for c in d.columns}
+            head = min(warmup[d.name], valid) if offset else 0
+            if head:
+                # Tramo de un store más largo: las primeras velas no tienen en
+                # `df` el mismo calentamiento, se calculan sobre `df`
+                fresh = d.compute(work.iloc[:head])
+                for c in d.columns:
+                    values[c] = np.concatenate([fresh[c].to_numpy(), values[c][head:]])
+            if valid < n:
+                start = max(0, valid - d.lookback)
+                tail = d.compute(work.iloc[start:])
+                for c in d.columns:
+                    values[c] = np.concatenate([values[c], tail[c].to_numpy()[valid - start:]])
+                appended.append(d.name)
+            else:
+                reused.append(d.name)
+            for c in d.columns:
+                work[c] = values[c]
+
+        cols = feature_columns(self.defs)
+        feats = work[cols]
+        own = self.range_path(df.index[0]) if n else None
+        if n and (appended or recomputed):
+            self._write(own, feats.assign(**{_HASH_COL: rows}),
+                        {"rows": n, "first_ts": str(df.index[0]), "last_ts": str(df.index[-1]),
+                         "groups": hashes})
+            self._prune(own, df.index)
+        self.last_run = {"reused": reused, "appended": appended, "recomputed": recomputed,
+                         "new_rows": n - valid if valid else n,
+                         "source": source if valid else None}
+        if recomputed or appended:
+            print(f"[FEATURES] {os.path.basename(own)}: "
+                  f"recalculados={recomputed or '-'} cola={n - valid if appended else 0} filas")
+        return feats
+
+
+def add_features(df: pd.DataFrame, cache_path: Optional[str] = None) -> pd.DataFrame:
     df = df.copy()
 
-    # EMAs
-    df["ema20"] = _ema(df["close"], 20)
-    df["ema50"] = _ema(df["close"], 50)
-    df["ema200"] = _ema(df["close"], 200)
-
-    # RSI
-    df["rsi"] = _rsi(df["close"], 14)
-
-    # MACD
-    macd, macd_signal, macd_hist = _macd(df["close"])
-    df["macd"] = macd
-    df["macd_signal"] = macd_signal
-    df["macd_hist"] = macd_hist
-
-    # Bollinger Bands %
-    mid = df["close"].rolling(20).mean()
-    std = df["close"].rolling(20).std(ddof=0)
-    upper = mid + 2 * std
-    lower = mid - 2 * std
-    df["bb_percent"] = (df["close"] - lower) / (upper - lower)  # 0..1 aprox
-    df["bb_percent"] = df["bb_percent"].clip(0, 1)
-
-    # ATR y % de ATR sobre precio
-    df["atr"] = _atr(df, 14)
-    df["atr_pct"] = (df["atr"] / df["close"]) * 100.0
-
-    # Volumen
-    df["volume_ma20"] = df["volume"].rolling(20).mean()
-
-    # Régimen de tendencia
-    df["trend_regime"] = 0
-    df.loc[df["ema50"] > df["ema200"], "trend_regime"] = 1
-    df.loc[df["ema50"] < df["ema200"], "trend_regime"] = -1
+    if cache_path:
+        feats = FeatureStore(cache_path).compute(df)
+        for c in feats.columns:
+            df[c] = feats[c]
+    else:
+        for d in FEATURES:
+            for c, s in d.compute(df).items():
+                df[c] = s
 
     # Limpieza inicial
     df = df.dropna().copy()
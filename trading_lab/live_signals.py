@@ -10,6 +10,8 @@ import numpy as np
 import pandas as pd
 import yaml
 
+from dataset_store import load_dataset as store_load_dataset
+
 DATASETS_DIR = "datasets"
 RESULTS_DIR  = "results"
 
@@ -19,27 +21,9 @@ SLIPPAGE_PCT_PER_SIDE   = 0.02 / 100.0
 RUN_ID = datetime.now(timezone.utc).strftime("run_%Y%m%d_%H%M%S")
 
 # -------- utilidades comunes --------
-def _infer_time_col(df: pd.DataFrame) -> str:
-    for c in ["timestamp","time","date","datetime","open_time"]:
-        if c in df.columns: return c
-    return ""
-
 def load_dataset(symbol: str, timeframe: str, fast_tail: int = 5000) -> pd.DataFrame:
-    path = os.path.join(DATASETS_DIR, f"{symbol}_{timeframe}.csv")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No existe dataset: {path}")
-    df = pd.read_csv(path)
-    tcol = _infer_time_col(df)
-    if tcol:
-        df[tcol] = pd.to_datetime(df[tcol], utc=True, errors="coerce")
-        df = df.dropna(subset=[tcol]).sort_values(tcol).set_index(tcol)
-    cols_lower = [c.lower() for c in df.columns]
-    for k in ["open","high","low","close","volume"]:
-        if k in cols_lower:
-            df[k] = df[df.columns[cols_lower.index(k)]]
-    if len(df) > fast_tail:
-        df = df.tail(fast_tail)
-    return df
+    # Parquet cacheado: solo se leen las últimas `fast_tail` velas
+    return store_load_dataset(symbol, timeframe, DATASETS_DIR, tail=fast_tail)
 
 def ema(s: pd.Series, n: int) -> pd.Series:
     return s.ewm(span=n, adjust=False).mean()
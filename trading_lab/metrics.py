@@ -0,0 +1,91 @@
+# metrics.py
+# Métricas por combinación (estrategia × símbolo × timeframe) a partir del
+# log de trades. Compartidas por engine.py y backtest_tournament.py.
+
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path to import core.monte_carlo
+backend_dir = Path(__file__).parent.parent / "backend"
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from core.monte_carlo import monte_carlo_summary
+
+# Paths Monte Carlo por defecto (0 = desactivado)
+MC_PATHS = 10_000
+
+
+def _streaks(returns: pd.Series) -> Tuple[int,int]:
+    wins = (returns > 0).astype(int)
+    max_win = max_loss = curr = curr_sign = 0
+    for x in wins:
+        if x == curr_sign:
+            curr += 1
+        else:
+            max_win = max(max_win, curr) if curr_sign == 1 else max_win
+            max_loss = max(max_loss, curr) if curr_sign == 0 else max_loss
+            curr = 1; curr_sign = x
+    max_win = max(max_win, curr) if curr_sign == 1 else max_win
+    max_loss = max(max_loss, curr) if curr_sign == 0 else max_loss
+    return max_win, max_loss
+
+def empty_metrics() -> Dict[str, float]:
+    """Métricas de una combinación sin trades."""
+    return {
+        "trades": 0, "winrate": 0.0, "avg_return_pct_net": 0.0,
+        "profit_factor": 0.0, "expectancy_pct": 0.0,
+        "max_drawdown_pct": 0.0, "total_return_pct": 0.0,
+        "sharpe_trades": 0.0, "sortino_trades": 0.0, "exposure_pct": 0.0,
+        "max_win_streak": 0, "max_loss_streak": 0,
+        "mc_max_drawdown_p95_pct": 0.0, "mc_total_return_p5_pct": 0.0,
+        "mc_risk_of_ruin_pct": 0.0
+    }
+
+def compute_metrics(log_df: pd.DataFrame, df_len: int, mc_paths: int = MC_PATHS) -> Dict[str, float]:
+    rets = log_df["return_pct_net"].fillna(0.0)
+    n = len(rets)
+    wins = rets[rets > 0].sum()
+    losses = rets[rets < 0].sum()
+    profit_factor = (wins / abs(losses)) if losses < 0 else (np.inf if wins > 0 else 0.0)
+    expectancy = rets.mean()
+    # Equity (por trade)
+    eq = (1.0 + (rets / 100.0)).cumprod()
+    roll_max = eq.cummax()
+    dd = (eq/roll_max) - 1.0
+    max_dd_pct = dd.min() * 100.0
+    total_return_pct = (eq.iloc[-1] - 1.0) * 100.0 if n > 0 else 0.0
+    # Sharpe / Sortino por trade (simple)
+    r = rets / 100.0
+    sharpe = (r.mean() / (r.std(ddof=0) + 1e-9)) * np.sqrt(max(n,1))
+    downside = r[r < 0]
+    sortino = (r.mean() / (downside.std(ddof=0) + 1e-9)) * np.sqrt(max(n,1))
+    # Exposición (aprox): barras totales en mercado / barras totales del dataset
+    exposure = (log_df["bars_held"].sum() / max(df_len,1)) * 100.0
+    # Streaks
+    sw, sl = _streaks(rets)
+    # Monte Carlo (bootstrap de retornos por trade): DD/retorno pesimistas + ruina
+    mc = monte_carlo_summary(rets.to_numpy(), n_paths=mc_paths, seed=0)
+    mc_ok = mc["paths"] > 0
+    # El DD es negativo: su p5 es el drawdown del peor 5% de paths
+    return {
+        "trades": int(n),
+        "winrate": float((rets > 0).mean() * 100.0),
+        "avg_return_pct_net": float(expectancy),
+        "profit_factor": float(profit_factor if np.isfinite(profit_factor) else 0.0),
+        "expectancy_pct": float(expectancy),
+        "max_drawdown_pct": float(max_dd_pct),
+        "total_return_pct": float(total_return_pct),
+        "sharpe_trades": float(sharpe),
+        "sortino_trades": float(sortino),
+        "exposure_pct": float(exposure),
+        "max_win_streak": int(sw),
+        "max_loss_streak": int(sl),
+        "mc_max_drawdown_p95_pct": float(mc["max_drawdown_pct"]["p5"]) if mc_ok else 0.0,
+        "mc_total_return_p5_pct": float(mc["final_return_pct"]["p5"]) if mc_ok else 0.0,
+        "mc_risk_of_ruin_pct": float(mc["risk_of_ruin_pct"]) if mc_ok else 0.0,
+    }
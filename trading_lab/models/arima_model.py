@@ -1,28 +1,134 @@
 # models/arima_model.py
+#
+# Predicción ARIMA a 1 vela. Reajustar el modelo completo en cada vela es
+# demasiado lento para muchos símbolos o para el bucle en vivo, así que el
+# modo por defecto es incremental:
+#   - se reajusta solo cada `refit_every` velas, arrancando de los parámetros
+#     anteriores (warm start);
+#   - entre reajustes, las velas nuevas solo actualizan el estado del filtro
+#     de Kalman con los parámetros vigentes (results.extend), que es O(1) por vela;
+#   - predict_many reparte los símbolos en un pool de procesos.
+# Con refit_every=1 y warm_start=False se obtiene el comportamiento original
+# (ajuste completo en cada vela).
 
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 from statsmodels.tsa.arima.model import ARIMA
-import warnings
 
 warnings.filterwarnings("ignore")
 
-def add_arima_predictions(df: pd.DataFrame, order=(5, 1, 0)) -> pd.DataFrame:
-    df = df.copy()
+DEFAULT_ORDER = (5, 1, 0)
+DEFAULT_REFIT_EVERY = 24
+MIN_OBS = 50
 
-    if len(df) < 50:
-        raise ValueError("Dataframe muy pequeño para ARIMA")
 
-    df["arima_pred"] = None
+class ArimaForecaster:
+    """
+    Estado de un ARIMA para uso incremental (backtest o bucle en vivo):
+
+        f = ArimaForecaster(refit_every=24).fit(closes)
+        pred = f.forecast()          # siguiente vela
+        f.update(new_close)          # extend o reajuste cada K velas
+    """
+
+    def __init__(self, order: Tuple[int, int, int] = DEFAULT_ORDER,
+                 refit_every: int = DEFAULT_REFIT_EVERY, warm_start: bool = True,
+                 fit_window: Optional[int] = None):
+        if refit_every < 1:
+            raise ValueError("refit_every debe ser >= 1")
+        self.order = tuple(order)
+        self.refit_every = int(refit_every)
+        self.warm_start = warm_start
+        self.fit_window = fit_window  # None = todo el histórico en cada reajuste
+        self.results = None
+        self.history = np.empty(0)
+        self.since_refit = 0
+        self.refits = 0
+
+    def _fit(self) -> None:
+        y = self.history if self.fit_window is None else self.history[-self.fit_window:]
+        start = self.results.params if (self.warm_start and self.results is not None) else None
+        self.results = ARIMA(y, order=self.order).fit(start_params=start)
+        self.since_refit = 0
+        self.refits += 1
+
+    def fit(self, values) -> "ArimaForecaster":
+        self.history = np.asarray(values, dtype=float)
+        self.results = None
+        self._fit()
+        return self
+
+    def update(self, values) -> None:
+        """Añade observaciones nuevas (una o varias) y reajusta si toca."""
+        new = np.atleast_1d(np.asarray(values, dtype=float))
+        self.history = np.concatenate([self.history, new])
+        self.since_refit += len(new)
+        if self.results is None or self.since_refit >= self.refit_every:
+            try:
+                self._fit()
+                return
+            except Exception as e:
+                if self.results is None:
+                    raise
+                print(f"[ARIMA] Reajuste fallido, se mantienen los parámetros: {e}")
+        self.results = self.results.extend(new)
+
+    def forecast(self) -> float:
+        return float(self.results.forecast(steps=1)[0])
 
-    for i in range(50, len(df)):
+
+def arima_predictions(close: pd.Series, order: Tuple[int, int, int] = DEFAULT_ORDER,
+                      refit_every: int = DEFAULT_REFIT_EVERY, warm_start: bool = True,
+                      fit_window: Optional[int] = None, min_obs: int = MIN_OBS) -> pd.Series:
+    """
+    Predicción a 1 vela para cada vela i >= min_obs usando solo close[:i]
+    (sin look-ahead). Las primeras `min_obs` velas quedan en NaN.
+    """
+    y = close.to_numpy(dtype=float)
+    preds = np.full(len(y), np.nan)
+    if len(y) <= min_obs:
+        return pd.Series(preds, index=close.index, name="arima_pred")
+
+    f = ArimaForecaster(order, refit_every, warm_start, fit_window).fit(y[:min_obs])
+    for i in range(min_obs, len(y)):
         try:
-            series = df["close"].iloc[:i]
-            model = ARIMA(series, order=order)
-            model_fit = model.fit()
-            forecast = model_fit.forecast(steps=1)
-            df.at[df.index[i], "arima_pred"] = forecast.iloc[0]
+            preds[i] = f.forecast()
         except Exception as e:
             print(f"[ARIMA] Error en la iteración {i}: {e}")
-            continue
+        f.update(y[i])
+    return pd.Series(preds, index=close.index, name="arima_pred")
+
 
+def add_arima_predictions(df: pd.DataFrame, order=DEFAULT_ORDER,
+                          refit_every: int = DEFAULT_REFIT_EVERY, warm_start: bool = True,
+                          fit_window: Optional[int] = None) -> pd.DataFrame:
+    df = df.copy()
+
+    if len(df) < MIN_OBS:
+        raise ValueError("Dataframe muy pequeño para ARIMA")
+
+    df["arima_pred"] = arima_predictions(df["close"], order, refit_every, warm_start, fit_window)
     return df
+
+
+def _predict_job(args) -> Tuple[str, pd.Series]:
+    symbol, close, kwargs = args
+    warnings.filterwarnings("ignore")
+    return symbol, arima_predictions(close, **kwargs)
+
+
+def predict_many(closes: Dict[str, pd.Series], workers: Optional[int] = None,
+                 **kwargs) -> Dict[str, pd.Series]:
+    """
+    arima_predictions para muchos símbolos, un proceso por símbolo en paralelo
+    (workers<=1: en línea). Los kwargs se pasan a arima_predictions.
+    """
+    jobs = [(sym, s, kwargs) for sym, s in closes.items()]
+    if workers is not None and workers <= 1:
+        return dict(_predict_job(j) for j in jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_predict_job, jobs))
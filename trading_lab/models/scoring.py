@@ -1,12 +1,30 @@
 # models/scoring.py
 # Scoring robusto con fallback: combina YAML parcial con defaults para evitar KeyError.
+#
+# - score_signals: un símbolo, pesos planos (scoring_config.yaml).
+# - score_panel / score_universe / Scorer: scoring por lotes de muchos símbolos
+#   a la vez con pesos por régimen (scoring_config2.yaml). Los indicadores se
+#   calculan una sola vez como matrices (velas × símbolos) y los pesos del
+#   régimen de cada celda se aplican por broadcasting.
+# - Si los frames traen `arima_pred` (models/arima_model.add_arima_predictions)
+#   entra la feature opcional arima_bias; sin esa columna no cuenta ni en los
+#   puntos ni en el total, y el score es el mismo que antes.
 
 import os
-from typing import Dict, Any, Optional
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+# Backend al final del path (pendiente OLS compartida, indicators/trend.py)
+backend_dir = Path(__file__).resolve().parent.parent.parent / "backend"
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from indicators.trend import rolling_ols_panel  # noqa: E402
+
 try:
     import yaml  # opcional
 except Exception:
@@ -173,3 +191,271 @@ def score_signals(df: pd.DataFrame, symbol: str = "", timeframe: str = "") -> pd
     df["symbol"] = symbol
     df["timeframe"] = timeframe
     return df
+
+
+# =========================
+# Scoring por lotes (panel de símbolos) — scoring_config2.yaml
+# =========================
+CONFIG2_PATH = str(Path(__file__).resolve().parent.parent / "scoring_config2.yaml")
+
+REGIMES = ("UP", "DOWN", "RANGE")
+FEATURES = ("rsi_bias", "macd_cross", "ema_trend", "bb_percent",
+            "atr_pct", "volume_anomaly", "candle_signal", "trend_slope", "arima_bias")
+# Solo puntúan si el panel trae su columna de entrada
+OPTIONAL_FEATURES = {"arima_bias": "arima_pred"}
+# Sin dirección: suma (o resta) lo mismo a largos y cortos
+NEUTRAL_FEATURES = ("atr_pct",)
+
+DEFAULT_REGIME_WEIGHTS = {
+    "UP": {"rsi_bias": 6, "macd_cross": 12, "ema_trend": 10, "bb_percent": 4,
+           "atr_pct": 3, "volume_anomaly": 8, "candle_signal": 7, "trend_slope": 12,
+           "arima_bias": 6},
+    "DOWN": {"rsi_bias": 6, "macd_cross": 12, "ema_trend": 10, "bb_percent": 4,
+             "atr_pct": 3, "volume_anomaly": 8, "candle_signal": 7, "trend_slope": 12,
+             "arima_bias": 6},
+    "RANGE": {"rsi_bias": 5, "macd_cross": 8, "ema_trend": 4, "bb_percent": 8,
+              "atr_pct": 3, "volume_anomaly": 6, "candle_signal": 6, "trend_slope": 6,
+              "arima_bias": 4},
+}
+DEFAULT_REGIME_THRESHOLDS = {"LONG": 60, "SHORT": 60}
+DEFAULT_ATR_PCT_BAND = (0.2, 2.5)  # ATR% por vela "óptimo"
+DEFAULT_ATR_PCT_EXTREME = 5.0
+SLOPE_WINDOWS = (14, 28)
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+
+Panel = Dict[str, pd.DataFrame]
+
+
+def _merge_cfg2(cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    cfg = cfg or {}
+    user_w = cfg.get("weights", {}) or {}
+    weights = {r: {**DEFAULT_REGIME_WEIGHTS[r], **(user_w.get(r) or {})} for r in REGIMES}
+    thresholds = {**DEFAULT_REGIME_THRESHOLDS, **(cfg.get("thresholds", {}) or {})}
+    return {
+        "weights": weights,
+        "thresholds": thresholds,
+        "tp_atr_mult": cfg.get("tp_atr_mult", DEFAULT_TP_MULT),
+        "sl_atr_mult": cfg.get("sl_atr_mult", DEFAULT_SL_MULT),
+        "atr_pct_band": tuple(cfg.get("atr_pct_band", DEFAULT_ATR_PCT_BAND)),
+        "atr_pct_extreme": cfg.get("atr_pct_extreme", DEFAULT_ATR_PCT_EXTREME),
+    }
+
+
+def load_config2(path: str = CONFIG2_PATH) -> Dict[str, Any]:
+    return _merge_cfg2(_load_yaml(path))
+
+
+def build_panel(frames: Dict[str, pd.DataFrame]) -> Panel:
+    """
+    {símbolo: DataFrame OHLCV} -> {campo: DataFrame velas × símbolos}.
+    Los índices se alinean por unión: un símbolo sin vela en un instante
+    queda con NaN (y sin señal) en esa fila. Las columnas opcionales
+    (arima_pred) entran si algún símbolo las trae; al resto les queda NaN.
+    """
+    fields = PANEL_FIELDS + tuple(col for col in OPTIONAL_FEATURES.values()
+                                  if any(col in df for df in frames.values()))
+    return {f: pd.DataFrame({sym: df[f] if f in df else pd.Series(np.nan, index=df.index)
+                             for sym, df in frames.items()}).sort_index()
+            for f in fields}
+
+
+def _panel_rsi(close: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    """rsi() por columnas sin contar las filas previas a la primera vela de cada símbolo."""
+    delta = close.diff()
+    # Igual que rsi(): el primer delta de cada serie cuenta como 0
+    delta = delta.mask(close.notna() & close.shift(1).isna(), 0.0)
+    gain = delta.clip(lower=0).rolling(period).mean()
+    loss = (-delta).clip(lower=0).rolling(period).mean()
+    rs = gain / loss.replace(0, np.nan)
+    out = (100 - (100 / (1 + rs))).fillna(50)
+    return out.where(close.notna())
+
+
+def panel_indicators(panel: Panel) -> Panel:
+    """Indicadores de todo el universo en matrices (mismas fórmulas que ensure_core_indicators)."""
+    o, h, lo, c, v = (panel[f] for f in PANEL_FIELDS)
+    prev_c = c.shift(1)
+    tr = np.maximum.reduce([(h - lo).abs().to_numpy(), (h - prev_c).abs().to_numpy(),
+                            (lo - prev_c).abs().to_numpy()])
+    tr = pd.DataFrame(tr, index=c.index, columns=c.columns)
+
+    macd_line, signal_line, hist = macd(c)
+    mid = c.rolling(20).mean()
+    sd = c.rolling(20).std(ddof=0)
+    upper, lower = mid + 2 * sd, mid - 2 * sd
+    atr_abs = tr.ewm(alpha=1 / 14, adjust=False).mean()
+    slopes = rolling_ols_panel(c, SLOPE_WINDOWS)
+
+    return {
+        "EMA50": ema(c, 50),
+        "EMA200": ema(c, 200),
+        "RSI": _panel_rsi(c, 14),
+        "MACD": macd_line,
+        "MACD_SIGNAL": signal_line,
+        "MACD_HIST": hist,
+        "ATR": atr_abs,
+        "atr_pct": atr_abs / c * 100.0,
+        "bb_percent": (c - lower) / (upper - lower).replace(0, np.nan),
+        "volume_ma20": v.rolling(20).mean(),
+        **{f"slope_{w}": slopes[f"slope_{w}"] for w in SLOPE_WINDOWS},
+    }
+
+
+def _candle_signal(o: np.ndarray, h: np.ndarray, lo: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """+1 envolvente alcista / martillo, -1 envolvente bajista / estrella fugaz."""
+    o1 = np.vstack([np.full((1, o.shape[1]), np.nan), o[:-1]])
+    c1 = np.vstack([np.full((1, c.shape[1]), np.nan), c[:-1]])
+    body = np.abs(c - o)
+    upper_wick = h - np.maximum(o, c)
+    lower_wick = np.minimum(o, c) - lo
+    with np.errstate(invalid="ignore"):
+        bull_engulf = (c1 < o1) & (c > o) & (o <= c1) & (c >= o1)
+        bear_engulf = (c1 > o1) & (c < o) & (o >= c1) & (c <= o1)
+        hammer = (body > 0) & (lower_wick >= 2 * body) & (upper_wick <= body)
+        star = (body > 0) & (upper_wick >= 2 * body) & (lower_wick <= body)
+    return np.where(bull_engulf | hammer, 1.0, np.where(bear_engulf | star, -1.0, 0.0))
+
+
+def _regime_codes(ind: Panel) -> np.ndarray:
+    """0=UP, 1=DOWN, 2=RANGE (pendientes 14/28 del mismo signo -> tendencia)."""
+    s1, s2 = (ind[f"slope_{w}"].to_numpy() for w in SLOPE_WINDOWS)
+    with np.errstate(invalid="ignore"):
+        up = (s1 > 0) & (s2 > 0)
+        dn = (s1 < 0) & (s2 < 0)
+    return np.where(up, 0, np.where(dn, 1, 2))
+
+
+def _feature_signals(panel: Panel, ind: Panel, regime: np.ndarray,
+                     cfg: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Señal de cada feature en [-1, 1] (positivo = favorece largos)."""
+    o, h, lo, c, v = (panel[f].to_numpy(dtype=float) for f in PANEL_FIELDS)
+    r = ind["RSI"].to_numpy()
+    hist = ind["MACD_HIST"].to_numpy()
+    e50, e200 = ind["EMA50"].to_numpy(), ind["EMA200"].to_numpy()
+    pb = ind["bb_percent"].to_numpy()
+    atr_pct = ind["atr_pct"].to_numpy()
+    lo_band, hi_band = cfg["atr_pct_band"]
+
+    with np.errstate(invalid="ignore"):
+        bb = np.nan_to_num(np.clip(2 * pb - 1, -1, 1))
+        out = {
+            "rsi_bias": np.where(r > 55, 1.0, np.where(r < 45, -1.0, 0.0)),
+            "macd_cross": np.nan_to_num(np.sign(hist)),
+            "ema_trend": (np.nan_to_num(np.sign(c - e50)) + np.nan_to_num(np.sign(c - e200))) / 2,
+            # %B alto: ruptura en tendencia, reversión (a la baja) en rango
+            "bb_percent": np.where(regime == 2, -bb, bb),
+            "atr_pct": np.where((atr_pct >= lo_band) & (atr_pct <= hi_band), 1.0,
+                                np.where(atr_pct > cfg["atr_pct_extreme"], -1.0, 0.0)),
+            "volume_anomaly": np.where(v > ind["volume_ma20"].to_numpy(),
+                                       np.nan_to_num(np.sign(c - o)), 0.0),
+            "candle_signal": _candle_signal(o, h, lo, c),
+            "trend_slope": np.where(regime == 0, 1.0, np.where(regime == 1, -1.0, 0.0)),
+        }
+        if "arima_pred" in panel:
+            # Predicción a 1 vela por encima del cierre favorece largos
+            pred = panel["arima_pred"].to_numpy(dtype=float)
+            out["arima_bias"] = np.nan_to_num(np.sign(pred - c))
+    return out
+
+
+def score_panel(data: Union[Panel, Dict[str, pd.DataFrame]],
+                cfg: Optional[Dict[str, Any]] = None) -> Panel:
+    """
+    Scoring de todo un universo en una llamada.
+
+    `data` es un panel ({campo: velas × símbolos}, ver build_panel) o
+    directamente {símbolo: DataFrame OHLCV}. Devuelve matrices velas × símbolos:
+    score_long, score_short, confidence (0-100), signal_side, tp_price,
+    sl_price, atr_abs, trend_regime y las features intermedias.
+    """
+    panel = data if set(PANEL_FIELDS) <= set(data) else build_panel(data)
+    cfg = load_config2() if cfg is None else _merge_cfg2(cfg)
+    ind = panel_indicators(panel)
+    regime = _regime_codes(ind)
+    signals = _feature_signals(panel, ind, regime, cfg)
+
+    # Pesos (régimen × feature); W[regime] reparte a cada celda los de su régimen
+    features = [f for f in FEATURES if f in signals]
+    W = np.array([[float(cfg["weights"][r][f]) for f in features] for r in REGIMES])
+    total = np.abs(W).sum(axis=1)[regime]
+    long_pts = np.zeros(regime.shape)
+    short_pts = np.zeros(regime.shape)
+    for k, f in enumerate(features):
+        w = W[regime, k]
+        s = signals[f]
+        if f in NEUTRAL_FEATURES:
+            long_pts += w * s
+            short_pts += w * s
+        else:
+            long_pts += w * np.clip(s, 0, None)
+            short_pts += w * np.clip(-s, 0, None)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score_long = np.clip(100.0 * long_pts / total, 0, 100)
+        score_short = np.clip(100.0 * short_pts / total, 0, 100)
+
+    close = panel["close"].to_numpy(dtype=float)
+    atr = ind["ATR"].to_numpy()
+    atr = np.where(np.isfinite(atr) & (atr > 0), atr, 1e-9)
+    is_long = score_long >= score_short
+    confidence = np.where(is_long, score_long, score_short)
+    thr = cfg["thresholds"]
+    side = np.where(is_long & (confidence >= thr["LONG"]), "LONG",
+                    np.where(~is_long & (confidence >= thr["SHORT"]), "SHORT", "NO_TRADE"))
+    has_price = np.isfinite(close)
+    side = np.where(has_price, side, "NO_TRADE")
+    direction = np.where(is_long, 1.0, -1.0)
+
+    def frame(a):
+        return pd.DataFrame(a, index=panel["close"].index, columns=panel["close"].columns)
+
+    return {
+        "score_long": frame(score_long),
+        "score_short": frame(score_short),
+        "confidence": frame(confidence),
+        "signal_side": frame(side),
+        "tp_price": frame(close + direction * cfg["tp_atr_mult"] * atr),
+        "sl_price": frame(close - direction * cfg["sl_atr_mult"] * atr),
+        "atr_abs": ind["ATR"],
+        "trend_regime": frame(np.array(REGIMES, dtype=object)[regime]),
+        "bb_percent": ind["bb_percent"],
+        "atr_pct": ind["atr_pct"],
+        "rsi": ind["RSI"],
+        "macd_hist": ind["MACD_HIST"],
+        "ema50": ind["EMA50"],
+        "ema200": ind["EMA200"],
+    }
+
+
+def score_universe(frames: Dict[str, pd.DataFrame],
+                   cfg: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Última vela de cada símbolo: una fila por símbolo, ordenado por confianza."""
+    panel = frames if set(PANEL_FIELDS) <= set(frames) else build_panel(frames)
+    scored = score_panel(panel, cfg)
+    close = panel["close"]
+    # Última fila con precio de cada símbolo (los índices pueden no coincidir)
+    last_pos = close.notna().to_numpy()[::-1].argmax(axis=0)
+    rows = len(close) - 1 - last_pos
+    cols = np.arange(close.shape[1])
+    cols_out = ["score_long", "score_short", "confidence", "signal_side",
+                "tp_price", "sl_price", "atr_abs", "trend_regime"]
+    out = pd.DataFrame({c: scored[c].to_numpy()[rows, cols] for c in cols_out},
+                       index=pd.Index(close.columns, name="symbol"))
+    out.insert(0, "close", close.to_numpy()[rows, cols])
+    out.insert(0, "timestamp", close.index[rows])
+    return out.sort_values("confidence", ascending=False, kind="stable")
+
+
+class Scorer:
+    """Scoring de un símbolo con scoring_config2.yaml (panel de una columna)."""
+
+    def __init__(self, config_path: str = CONFIG2_PATH, cfg: Optional[Dict[str, Any]] = None):
+        self.cfg = cfg if cfg is not None else (_load_yaml(config_path) or {})
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        scored = score_panel({"_": df}, self.cfg)
+        out = df.copy()
+        for name, frame in scored.items():
+            out[name] = frame["_"].reindex(df.index).to_numpy()
+        return out
+
@@ -1,42 +1,36 @@
 # models/trend_slope.py
+# Régimen de tendencia por pendiente OLS de log(precio) en varias ventanas.
+# El cálculo (forma cerrada con sumas acumuladas, O(n)) vive en el backend
+# (indicators/trend.py) para que lab y backend compartan la misma feature.
+
+import sys
+from pathlib import Path
 
-import numpy as np
 import pandas as pd
 
+# Backend al final del path: aquí `models` debe seguir siendo el paquete del lab
+backend_dir = Path(__file__).resolve().parent.parent.parent / "backend"
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from indicators.trend import classify_trend, rolling_ols  # noqa: E402
+
+
 def _rolling_slope(series: pd.Series, window: int) -> pd.Series:
     """
     Pendiente de regresión lineal (OLS) sobre log(precio) en ventana fija.
-    Normalizada por la media del eje X para estabilidad.
     """
-    y = np.log(series.replace(0, np.nan))
-    x = np.arange(len(series), dtype=float)
-
-    # coeficiente 'slope' con polyfit en ventana móvil
-    def slope_fn(i):
-        j = i - window + 1
-        if j < 0:
-            return np.nan
-        yy = y.iloc[j:i+1]
-        xx = x[j:i+1]
-        if yy.isna().any():
-            return np.nan
-        # polinomio grado 1 (a*x + b): a = slope
-        a, b = np.polyfit(xx, yy, 1)
-        return a
-
-    return pd.Series([slope_fn(i) for i in range(len(series))], index=series.index)
-
-def add_trend_regime(df: pd.DataFrame, windows=(14, 28)) -> pd.DataFrame:
+    return rolling_ols(series, [window])[f"slope_{window}"]
+
+
+def add_trend_regime(df: pd.DataFrame, windows=(14, 28), with_r2: bool = False) -> pd.DataFrame:
     out = df.copy()
-    w1, w2 = windows
-    out[f"slope_{w1}"] = _rolling_slope(out["close"], w1)
-    out[f"slope_{w2}"] = _rolling_slope(out["close"], w2)
+    feats = rolling_ols(out["close"], windows)
+    slope_cols = [f"slope_{w}" for w in windows]
+    cols = slope_cols + ([f"r2_{w}" for w in windows] if with_r2 else [])
+    for c in cols:
+        out[c] = feats[c]
 
     # Clasificación de régimen
-    up = (out[f"slope_{w1}"] > 0) & (out[f"slope_{w2}"] > 0)
-    dn = (out[f"slope_{w1}"] < 0) & (out[f"slope_{w2}"] < 0)
-
-    out["trend_regime"] = "RANGE"
-    out.loc[up, "trend_regime"] = "UP"
-    out.loc[dn, "trend_regime"] = "DOWN"
+    out["trend_regime"] = classify_trend(feats[slope_cols])
     return out
@@ -1,28 +1,18 @@
 # realtime.py
 # Genera una señal puntual (última vela) con TP/SL y sizing por riesgo fijo.
 
-import os
 import json
 import argparse
 import pandas as pd
 import numpy as np
 
 from models.scoring import score_signals
+from dataset_store import load_dataset as store_load_dataset
 
 DATASETS_DIR = "datasets"
 
 def load_dataset(symbol: str, timeframe: str) -> pd.DataFrame:
-    path = os.path.join(DATASETS_DIR, f"{symbol}_{timeframe}.csv")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No existe dataset: {path}")
-    df = pd.read_csv(path)
-    time_col = None
-    for c in ["timestamp", "time", "date", "datetime", "open_time"]:
-        if c in df.columns: time_col = c; break
-    if time_col:
-        df[time_col] = pd.to_datetime(df[time_col], utc=True, errors="coerce")
-        df = df.dropna(subset=[time_col]).sort_values(time_col).set_index(time_col)
-    return df
+    return store_load_dataset(symbol, timeframe, DATASETS_DIR)
 
 def position_size(capital: float, risk_pct: float, entry: float, sl: float) -> float:
     """
@@ -17,65 +17,21 @@ def sl_mult_from_conf(conf: float) -> float:
 def tp_mult_from_conf(conf: float) -> float:
     return (conf / 100.0) * 3.0 + 1.5
 
-from features import add_features
+from features import add_features, feature_cache_path
 from models.scoring import Scorer
-
-def _clean_headers(cols) -> list[str]:
-    cleaned = []
-    for c in cols:
-        name = str(c)
-        # quita BOM, espacios, tabs y lower
-        name = name.replace("\ufeff", "").strip().lower()
-        cleaned.append(name)
-    return cleaned
-
-def _parse_date_col(df: pd.DataFrame) -> pd.DataFrame:
-    cols = list(df.columns)
-    # orden de preferencia
-    keys_main = ["timestamp", "date", "datetime", "time"]
-    keys_ms   = ["open_time", "open_time_ms", "close_time", "close_time_ms"]
-
-    for key in keys_main:
-        if key in cols:
-            s = pd.to_numeric(df[key], errors="coerce") if key == "timestamp" else df[key]
-            if key == "timestamp":
-                # epoch s vs ms
-                if pd.notna(s).any() and pd.Series(s).gt(1e12).any():
-                    df[key] = pd.to_datetime(s, unit="ms", errors="coerce")
-                else:
-                    df[key] = pd.to_datetime(s, unit="s", errors="coerce")
-            else:
-                df[key] = pd.to_datetime(df[key], errors="coerce")
-            df = df.set_index(key).sort_index()
-            return df
-
-    for key in keys_ms:
-        if key in cols:
-            s = pd.to_numeric(df[key], errors="coerce")
-            df[key] = pd.to_datetime(s, unit="ms", errors="coerce")
-            df = df.set_index(key).sort_index()
-            return df
-
-    raise ValueError(
-        f"No se encontró columna temporal reconocible. Cabeceras: {list(df.columns)}"
-    )
+from dataset_store import load_csv
 
 def load_price_csv(path: str) -> pd.DataFrame:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No existe el archivo: {path}")
-    # encoding='utf-8' suele respetar BOM; de todas formas limpiamos
-    df = pd.read_csv(path, encoding="utf-8")
-    df.columns = _clean_headers(df.columns)
-
-    # mapear fecha
-    df = _parse_date_col(df)
+    # Cabeceras (BOM/espacios) y fecha (epoch s/ms o texto) las normaliza la
+    # capa de datasets, que además cachea el CSV en Parquet
+    df = load_csv(path)
 
     # Validar OHLCV mínimas
     required = {"open", "high", "low", "close", "volume"}
     missing = [c for c in required if c not in df.columns]
     if missing:
         raise ValueError(f"Faltan columnas OHLCV: {missing}. Cabeceras: {list(df.columns)}")
-    return df.sort_index()
+    return df
 
 def guess_symbol_tf_from_filename(path: str) -> Tuple[str, str]:
     base = os.path.basename(path).replace(".csv", "")
@@ -172,7 +128,7 @@ def equity_metrics(returns_pct: np.ndarray) -> dict:
 def run_backtest(data_path: str, threshold: float, timeout_bars: int, commission_pct_per_side: float):
     os.makedirs("results", exist_ok=True)
     df = load_price_csv(data_path)
-    df = add_features(df)
+    df = add_features(df, cache_path=feature_cache_path(data_path))
 
     if "atr_pct" in df.columns:
         df["atr_abs"] = df["atr_pct"] * df["close"]
@@ -0,0 +1,190 @@
+# simulator.py
+# Simulador de trades (entrada next-bar-open, no-overlap, costes por lado).
+#
+# La resolución de salidas es vectorizada: para TODAS las señales a la vez se
+# construye la ventana de `timeout_bars` velas posteriores a la entrada
+# (sliding_window_view, sin copiar el histórico por señal) y se localiza el
+# primer toque de TP y de SL con argmax. Después, una pasada secuencial
+# barata aplica el no-overlap con los índices de salida ya calculados.
+# Semántica idéntica al bucle vela a vela original (adverse_first incluido).
+
+from datetime import timezone
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+EXIT_TIMEOUT, EXIT_TP, EXIT_SL = 0, 1, 2
+
+
+class Trade:
+    __slots__ = ("entry_time","exit_time","side","entry_price","exit_price",
+                 "return_pct_net","return_pct_gross","result","bars_held",
+                 "tp_level","sl_level","confidence","R",
+                 "commission_pct_per_side","slippage_pct_per_side")
+    def __init__(self, **k):
+        for a in self.__slots__:
+            setattr(self, a, k.get(a))
+
+
+def resolve_first_touch(high: np.ndarray,
+                        low: np.ndarray,
+                        entry_idx: np.ndarray,
+                        is_long: np.ndarray,
+                        tp: np.ndarray,
+                        sl: np.ndarray,
+                        timeout_bars: int,
+                        adverse_first: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Para cada señal (arrays de longitud K) devuelve (exit_idx, exit_kind).
+    Se revisan las velas entry_idx+1 .. entry_idx+timeout_bars; si SL y TP
+    se tocan en la misma vela gana SL con adverse_first (TP sin él). Sin
+    toque, la salida es por timeout en min(entry_idx+timeout_bars, N-1).
+    """
+    N = len(high)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    K = len(entry_idx)
+    timeout_idx = np.minimum(entry_idx + timeout_bars, N - 1)
+    if K == 0 or timeout_bars <= 0:
+        return timeout_idx, np.full(K, EXIT_TIMEOUT, dtype=np.int8)
+
+    # Relleno NaN al final: las ventanas que pasan de N no tocan nada
+    pad = np.full(timeout_bars, np.nan)
+    h_win = sliding_window_view(np.concatenate([high, pad]), timeout_bars)[entry_idx + 1]
+    l_win = sliding_window_view(np.concatenate([low, pad]), timeout_bars)[entry_idx + 1]
+
+    long_ = np.asarray(is_long, dtype=bool)[:, None]
+    tp_ = np.asarray(tp, dtype=np.float64)[:, None]
+    sl_ = np.asarray(sl, dtype=np.float64)[:, None]
+    with np.errstate(invalid="ignore"):
+        tp_hit = np.where(long_, h_win >= tp_, l_win <= tp_)
+        sl_hit = np.where(long_, l_win <= sl_, h_win >= sl_)
+
+    never = timeout_bars
+    first_tp = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), never)
+    first_sl = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), never)
+
+    if adverse_first:
+        sl_wins = (first_sl < never) & (first_sl <= first_tp)
+        tp_wins = (first_tp < never) & ~sl_wins
+    else:
+        tp_wins = (first_tp < never) & (first_tp <= first_sl)
+        sl_wins = (first_sl < never) & ~tp_wins
+
+    exit_idx = np.where(sl_wins, entry_idx + 1 + first_sl,
+                        np.where(tp_wins, entry_idx + 1 + first_tp, timeout_idx))
+    kind = np.where(sl_wins, EXIT_SL, np.where(tp_wins, EXIT_TP, EXIT_TIMEOUT)).astype(np.int8)
+    return exit_idx, kind
+
+
+def simulate_signals(df: pd.DataFrame,
+                     signals: list,
+                     timeout_bars: int = 48, # Default timeout if not in signal
+                     commission: float = 0.0004,
+                     slippage: float = 0.0002,
+                     adverse_first: bool = True) -> List[Trade]:
+    """
+    Simula trades a partir de una lista de objetos Signal.
+    """
+    trades: List[Trade] = []
+
+    # Asumimos que signals están ordenadas por timestamp.
+    signals.sort(key=lambda s: s.timestamp)
+
+    # Mapa de timestamp -> indice en df
+    ts_to_idx = {ts: i for i, ts in enumerate(df.index)}
+    N = len(df)
+    if N == 0 or not signals:
+        return trades
+
+    # 1) Índice de cada señal (-1 si su timestamp no está en el df)
+    # Si el df tiene índice timezone-aware, sig.timestamp también debe serlo.
+    aware = df.index.tz is not None
+    sig_idx = np.empty(len(signals), dtype=np.int64)
+    for k, sig in enumerate(signals):
+        sig_ts = sig.timestamp
+        if aware and sig_ts.tzinfo is None:
+            sig_ts = sig_ts.replace(tzinfo=timezone.utc)
+        sig_idx[k] = ts_to_idx.get(sig_ts, -1)
+
+    # 2) Salidas de todas las señales candidatas de una vez
+    cand = np.flatnonzero((sig_idx >= 0) & (sig_idx + 1 < N))
+    is_long = np.array([signals[k].direction.upper() == "LONG" for k in cand], dtype=bool)
+    tp = np.array([signals[k].tp or np.nan for k in cand], dtype=np.float64)
+    sl = np.array([signals[k].sl or np.nan for k in cand], dtype=np.float64)
+    exit_idx, exit_kind = resolve_first_touch(
+        df["high"].to_numpy(dtype=np.float64), df["low"].to_numpy(dtype=np.float64),
+        sig_idx[cand] + 1, is_long, tp, sl, timeout_bars, adverse_first,
+    )
+    resolved = {int(k): (int(j), int(kd)) for k, j, kd in zip(cand, exit_idx, exit_kind)}
+
+    opens = df["open"].to_numpy(dtype=np.float64)
+    closes = df["close"].to_numpy(dtype=np.float64)
+    index = df.index
+
+    # 3) Pasada secuencial: no-overlap + costes
+    last_exit_idx = -1
+    for k, sig in enumerate(signals):
+        i = int(sig_idx[k])
+        if i < 0:
+            continue
+
+        # No overlap logic
+        if i <= last_exit_idx:
+            continue
+
+        # Entrada en apertura de la próxima vela
+        entry_idx = i + 1
+        if entry_idx >= N:
+            break
+
+        entry_price_raw = float(opens[entry_idx])
+        side = sig.direction.upper()
+
+        # Aplicamos costes de ENTRADA
+        entry_price = entry_price_raw * (1 + slippage) * (1 + commission) if side == "LONG" \
+                      else entry_price_raw * (1 - slippage) * (1 - commission)
+
+        tp_level = sig.tp
+        sl_level = sig.sl
+
+        # Si la señal no trae TP/SL (raro en nuestras estrategias), fallback
+        if not tp_level or not sl_level:
+            continue # Skip signals without TP/SL for now
+
+        j, kind = resolved[k]
+        if kind == EXIT_SL:
+            raw = sl_level; result = "loss"
+        elif kind == EXIT_TP:
+            raw = tp_level; result = "win"
+        else:
+            raw = float(closes[j]); result = None
+        exit_price = raw * (1 - slippage) * (1 - commission) if side == "LONG" \
+                     else raw * (1 + slippage) * (1 + commission)
+        if result is None:
+            pnl = (exit_price - entry_price) if side == "LONG" else (entry_price - exit_price)
+            result = "win" if pnl > 0 else ("loss" if pnl < 0 else "breakeven")
+        exit_time = index[j]
+        bars_held = j - entry_idx
+
+        gross_ret = ((exit_price - entry_price) / entry_price) * (1 if side == "LONG" else -1) * 100.0
+        net_ret = gross_ret # Costes ya en precio
+
+        risk_per_unit = abs(entry_price - sl_level)
+        R = (abs(exit_price - entry_price) / risk_per_unit) if risk_per_unit > 0 else np.nan
+        if (side == "LONG" and exit_price < entry_price) or (side == "SHORT" and exit_price > entry_price):
+            R = -R
+
+        trades.append(Trade(
+            entry_time=index[entry_idx], exit_time=exit_time, side=side,
+            entry_price=entry_price, exit_price=exit_price,
+            return_pct_net=net_ret, return_pct_gross=gross_ret,
+            result=result, bars_held=bars_held,
+            tp_level=tp_level, sl_level=sl_level, confidence=sig.confidence or 100.0, R=R,
+            commission_pct_per_side=commission*100.0, slippage_pct_per_side=slippage*100.0
+        ))
+
+        last_exit_idx = j
+
+    return trades
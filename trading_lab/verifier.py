@@ -14,7 +14,8 @@ SCORED_SIGNALS_PATH = "results/scored_signals.csv"
 
 FAST_MODE = True
 FAST_TAIL_N = 5000
-USE_ARIMA = False
+USE_ARIMA = True  # modo incremental: ~20s sobre FAST_TAIL_N velas; alimenta arima_bias en el scoring
+ARIMA_FIT_WINDOW = 500  # velas por reajuste (None = todo el histórico)
 # ---------------------------------------------------------------------------
 
 from utils.signal_logger import save_signal
@@ -71,7 +72,7 @@ def try_add_arima(df: pd.DataFrame) -> pd.DataFrame:
 
     try:
         t0 = time.time()
-        df = add_arima_predictions(df)
+        df = add_arima_predictions(df, fit_window=ARIMA_FIT_WINDOW)
         log(f"[ARIMA] Predicciones añadidas en {time.time() - t0:.2f}s.")
         return df
     except Exception as e:
@@ -168,9 +169,9 @@ def main():
     log("Tail del dataset guardado en results/debug_loaded_tail.csv")
 
     # 2) Features
-    from features import add_features
+    from features import add_features, feature_cache_path
     log("Calculando features…")
-    df = add_features(df)
+    df = add_features(df, cache_path=feature_cache_path(DATA_PATH))
     log(f"Features calculados (cols={len(df.columns)})")
 
     df.tail(5).to_csv("results/debug_features_tail.csv")